@@ -0,0 +1,168 @@
+"""
+Memory and serialization benchmark: pydantic Clip models vs compact ClipRecord storage.
+
+Usage (from backend/):
+    python -m benchmarks.bench_records --clips 20000 --segments 4
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.clip import Clip, ClipSegment
+from services.records import ClipRecord, SegmentTable
+
+CAMERA_FILES = {f"C{i}": f"/tmp/sess_bench/C{i}.mp4" for i in range(1, 5)}
+
+
+def _segments(i: int, num_segments: int):
+    base = i * 30.0
+    return [
+        ClipSegment(camera_id=f"C{(i + j) % 4 + 1}", start_s=base + j * 5.0, end_s=base + j * 5.0 + 5.0)
+        for j in range(num_segments)
+    ]
+
+
+def build_models(num_clips: int, num_segments: int):
+    return {
+        f"clip_{i:012x}": Clip(
+            clip_id=f"clip_{i:012x}",
+            segments=_segments(i, num_segments),
+            output_path=f"/srv/output/clips/clip_{i:012x}.mp4",
+            filesize_bytes=50_000_000 + i,
+            duration_s=5.0 * num_segments,
+            camera_files=dict(CAMERA_FILES),
+            created_at=datetime.now()
+        )
+        for i in range(num_clips)
+    }
+
+
+def build_records(num_clips: int, num_segments: int):
+    return {
+        f"clip_{i:012x}": ClipRecord(
+            clip_id=f"clip_{i:012x}",
+            segments=SegmentTable.from_segments(_segments(i, num_segments)),
+            output_path=f"/srv/output/clips/clip_{i:012x}.mp4",
+            filesize_bytes=50_000_000 + i,
+            duration_s=5.0 * num_segments,
+            camera_files=CAMERA_FILES
+        )
+        for i in range(num_clips)
+    }
+
+
+def measure_memory(builder, num_clips: int, num_segments: int) -> int:
+    """Bytes retained by the storage dict (segment inputs are freed)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    db = builder(num_clips, num_segments)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del db
+    return after - before
+
+
+def list_payload(db):
+    """Same shape as GET /api/v2/clips"""
+    return {
+        "clips": [
+            {
+                "clip_id": clip.clip_id,
+                "duration_s": clip.duration_s,
+                "filesize_bytes": clip.filesize_bytes,
+                "num_segments": len(clip.segments),
+                "created_at": clip.created_at.isoformat()
+            }
+            for clip in db.values()
+        ]
+    }
+
+
+def serialize_models(db) -> str:
+    return json.dumps({clip_id: clip.model_dump(mode="json") for clip_id, clip in db.items()})
+
+
+def serialize_records(db) -> str:
+    return json.dumps({clip_id: clip.to_dict() for clip_id, clip in db.items()})
+
+
+def time_best(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def load_models(data):
+    return {clip_id: Clip(**clip_data) for clip_id, clip_data in data.items()}
+
+
+def load_records(data):
+    return {clip_id: ClipRecord.from_dict(clip_data) for clip_id, clip_data in data.items()}
+
+
+def run(num_clips: int, num_segments: int, repeats: int) -> dict:
+    models = build_models(num_clips, num_segments)
+    records = build_records(num_clips, num_segments)
+    metadata = json.loads(serialize_records(records))
+
+    results = {
+        "clips": num_clips,
+        "segments_per_clip": num_segments,
+        "memory_bytes": {
+            "pydantic": measure_memory(build_models, num_clips, num_segments),
+            "records": measure_memory(build_records, num_clips, num_segments),
+        },
+        "load_ms": {
+            "pydantic": time_best(lambda: load_models(metadata), repeats),
+            "records": time_best(lambda: load_records(metadata), repeats),
+        },
+        "list_ms": {
+            "pydantic": time_best(lambda: json.dumps(list_payload(models)), repeats),
+            "records": time_best(lambda: json.dumps(list_payload(records)), repeats),
+        },
+        "serialize_ms": {
+            "pydantic": time_best(lambda: serialize_models(models), repeats),
+            "records": time_best(lambda: serialize_records(records), repeats),
+        },
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clips", type=int, default=20000)
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.clips, args.segments, args.repeats)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{results['clips']:,} clips x {results['segments_per_clip']} segments")
+    for metric, unit in (("memory_bytes", "MB"), ("load_ms", "ms"), ("list_ms", "ms"), ("serialize_ms", "ms")):
+        pyd = results[metric]["pydantic"]
+        rec = results[metric]["records"]
+        scale = 1 / 1024 / 1024 if unit == "MB" else 1
+        print(f"  {metric:<14} pydantic={pyd * scale:9.1f}{unit}  "
+              f"records={rec * scale:9.1f}{unit}  ratio={pyd / max(rec, 1e-9):5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+HTTP load test for the v2 API, replaying the frontend flow from
+frontend/src/services/api.js with many concurrent virtual users:
+
+    uploadCameras -> createClip x N -> createReel -> download reel
+
+Usage (from backend/):
+    python -m benchmarks.loadtest                                  # in-process app, 1/4/16 users
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 -c 8 -c 32
+    python -m benchmarks.loadtest --clips-per-user 20 --upload-per-user --output load.json
+
+In-process mode drives main.app through httpx's ASGI transport (client and
+server share one event loop, so absolute numbers are pessimistic); --url
+drives a running uvicorn instance over the network.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("benchmarks.loadtest needs httpx: pip install httpx")
+
+from benchmarks.synthetic import SourceSpec, generate_cameras
+
+# Same mapping as api.js sourceToCamera
+SOURCE_TO_CAMERA = {"left": "C1", "left_zoom": "C2", "right": "C3", "right_zoom": "C4"}
+
+OPERATIONS = ["upload", "create_clip", "create_reel", "download_reel"]
+
+logger = logging.getLogger("benchmarks.loadtest")
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class LoadStats:
+    """Latencies and outcomes per operation for one concurrency level"""
+
+    def __init__(self):
+        self.latencies_ms: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.bytes_downloaded = 0
+
+    def record(self, operation: str, latency_ms: float, error: Optional[str] = None):
+        if error is None:
+            self.latencies_ms[operation].append(latency_ms)
+        else:
+            self.errors[operation][error] += 1
+
+    def summary(self, wall_s: float) -> Dict:
+        operations = {}
+        total_ok = total_err = 0
+        extra = sorted((set(self.latencies_ms) | set(self.errors)) - set(OPERATIONS))
+        for operation in OPERATIONS + extra:
+            ordered = sorted(self.latencies_ms.get(operation, []))
+            errors = dict(self.errors.get(operation, {}))
+            n_err = sum(errors.values())
+            if not ordered and not n_err:
+                continue
+            total_ok += len(ordered)
+            total_err += n_err
+            operations[operation] = {
+                "count": len(ordered) + n_err,
+                "errors": n_err,
+                "error_rate": round(n_err / (len(ordered) + n_err), 4),
+                "error_kinds": errors,
+                "p50_ms": round(percentile(ordered, 50), 1),
+                "p95_ms": round(percentile(ordered, 95), 1),
+                "p99_ms": round(percentile(ordered, 99), 1),
+                "max_ms": round(ordered[-1], 1) if ordered else 0.0,
+                "throughput_rps": round(len(ordered) / wall_s, 3) if wall_s > 0 else 0.0,
+            }
+        total = total_ok + total_err
+        return {
+            "wall_s": round(wall_s, 3),
+            "requests": total,
+            "throughput_rps": round(total_ok / wall_s, 3) if wall_s > 0 else 0.0,
+            "error_rate": round(total_err / total, 4) if total else 0.0,
+            "bytes_downloaded": self.bytes_downloaded,
+            "operations": operations,
+        }
+
+
+async def timed(stats: LoadStats, operation: str, request) -> Optional[httpx.Response]:
+    """Await a request, recording latency or the kind of failure; returns None on failure"""
+    start = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError as e:
+        stats.record(operation, 0.0, error=type(e).__name__)
+        return None
+    latency_ms = (time.perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        stats.record(operation, latency_ms, error=f"HTTP {response.status_code}")
+        logger.debug(f"{operation} failed: {response.status_code} {response.text[:200]}")
+        return None
+    stats.record(operation, latency_ms)
+    return response
+
+
+async def upload_cameras(client: httpx.AsyncClient, stats: LoadStats, camera_files: Dict[str, str]) -> Optional[str]:
+    """uploadCameras(): multipart POST of C1-C4, returns the session key"""
+    files = {}
+    for camera_id, path in camera_files.items():
+        with open(path, "rb") as f:
+            files[camera_id] = (os.path.basename(path), f.read(), "video/mp4")
+    response = await timed(stats, "upload", client.post("/api/v2/upload_cameras", files=files))
+    return response.json()["session_key"] if response is not None else None
+
+
+async def delete_session(client: httpx.AsyncClient, stats: LoadStats, session_key: str):
+    """Delete an uploaded session so its camera temp files do not pile up across runs"""
+    await timed(stats, "delete_session", client.delete(f"/api/v2/session/{session_key}"))
+
+
+async def virtual_user(client: httpx.AsyncClient, stats: LoadStats, session_key: Optional[str],
+                       camera_files: Dict[str, str], args, rng: random.Random):
+    """One editor: create clips on random sources, build a reel from them, download it"""
+    if session_key is not None:
+        await edit_session(client, stats, session_key, args, rng)
+        return
+
+    session_key = await upload_cameras(client, stats, camera_files)
+    if session_key is None:
+        return
+    try:
+        await edit_session(client, stats, session_key, args, rng)
+    finally:
+        await delete_session(client, stats, session_key)
+
+
+async def edit_session(client: httpx.AsyncClient, stats: LoadStats, session_key: str, args, rng: random.Random):
+    clip_ids = []
+    for _ in range(args.clips_per_user):
+        source = rng.choice(list(SOURCE_TO_CAMERA))
+        length = rng.uniform(args.min_clip_s, args.max_clip_s)
+        start = rng.uniform(0, max(args.duration - length - 1.0, 0.0))
+        # createClip(): api.js sends one segment per clip as form data
+        segments = [{"camera_id": SOURCE_TO_CAMERA[source], "start_s": round(start, 3),
+                     "end_s": round(start + length, 3)}]
+        response = await timed(stats, "create_clip", client.post(
+            "/api/v2/clip/create", data={"session_key": session_key, "segments": json.dumps(segments)}))
+        if response is not None:
+            clip_ids.append(response.json()["clip_id"])
+
+    if not clip_ids:
+        return
+    response = await timed(stats, "create_reel", client.post("/api/v2/reel/create", json={"clip_ids": clip_ids}))
+    if response is None:
+        return
+
+    reel_id = response.json()["reel_id"]
+    response = await timed(stats, "download_reel", client.get(f"/api/v2/reel/{reel_id}/download"))
+    if response is not None:
+        stats.bytes_downloaded += len(response.content)
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, camera_files: Dict[str, str], args) -> Dict:
+    """Run one concurrency level: `concurrency` virtual users at once"""
+    stats = LoadStats()
+    shared_session = None
+    if not args.upload_per_user:
+        shared_session = await upload_cameras(client, stats, camera_files)
+        if shared_session is None:
+            return stats.summary(0.0)
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*[
+            virtual_user(client, stats, shared_session, camera_files, args, random.Random(args.seed * 1000 + i))
+            for i in range(concurrency)
+        ])
+    finally:
+        if shared_session is not None:
+            await delete_session(client, stats, shared_session)
+    return stats.summary(time.perf_counter() - start)
+
+
+def make_client(url: Optional[str], timeout_s: float, max_connections: int = 100) -> httpx.AsyncClient:
+    """Client for a running server at url, or for main.app in-process when url is None"""
+    timeout = httpx.Timeout(timeout_s)
+    if url:
+        limits = httpx.Limits(max_connections=max_connections)
+        return httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+
+    # In-process (run inside scratch_dir()): outputs go there instead of backend/output
+    import main
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://loadtest",
+                             timeout=timeout)
+
+
+@contextmanager
+def scratch_dir(enabled: bool = True):
+    """Run in a fresh temporary working directory, removed afterwards (no-op when not enabled)"""
+    if not enabled:
+        yield None
+        return
+    previous = os.getcwd()
+    work_dir = tempfile.mkdtemp(prefix="highlight_load_")
+    os.chdir(work_dir)
+    try:
+        yield work_dir
+    finally:
+        os.chdir(previous)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def print_level(concurrency: int, summary: Dict):
+    print(f"\nconcurrency={concurrency}  wall={summary['wall_s']:.1f}s  "
+          f"throughput={summary['throughput_rps']:.2f} req/s  errors={summary['error_rate'] * 100:.1f}%")
+    print(f"  {'operation':<15}{'count':>7}{'err%':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'req/s':>9}")
+    for operation, op in summary["operations"].items():
+        print(f"  {operation:<15}{op['count']:>7}{op['error_rate'] * 100:>6.1f}%"
+              f"{op['p50_ms']:>8.0f}ms{op['p95_ms']:>8.0f}ms{op['p99_ms']:>8.0f}ms{op['throughput_rps']:>9.2f}")
+        if op["error_kinds"]:
+            print(f"  {'':<15}{op['error_kinds']}")
+
+
+async def run(args, camera_files: Dict[str, str]) -> Dict:
+    results = {
+        "created_at": datetime.now().isoformat(),
+        "target": args.url or "in-process",
+        "clips_per_user": args.clips_per_user,
+        "upload_per_user": args.upload_per_user,
+        "levels": {},
+    }
+    with scratch_dir(enabled=not args.url):
+        async with make_client(args.url, args.timeout, max(args.concurrency) * 2) as client:
+            for concurrency in args.concurrency:
+                print(f"Running {concurrency} concurrent users ...", file=sys.stderr)
+                summary = await run_level(client, concurrency, camera_files, args)
+                results["levels"][str(concurrency)] = summary
+                print_level(concurrency, summary)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Base URL of a running backend (default: drive main.app in-process)")
+    parser.add_argument("-c", "--concurrency", type=int, action="append",
+                        help="Concurrent virtual users (repeatable, default: 1, 4, 16)")
+    parser.add_argument("--clips-per-user", type=int, default=10)
+    parser.add_argument("--min-clip-s", type=float, default=5.0)
+    parser.add_argument("--max-clip-s", type=float, default=15.0)
+    parser.add_argument("--upload-per-user", action="store_true",
+                        help="Every user uploads its own cameras (default: one shared upload per level)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--gop", type=int, default=60)
+    parser.add_argument("--duration", type=float, default=120.0, help="Source duration in seconds")
+    parser.add_argument("--bitrate", default="4M")
+    parser.add_argument("--media-dir", default=os.path.join(tempfile.gettempdir(), "highlight_bench_media"),
+                        help="Cache directory for generated sources")
+    parser.add_argument("--ffmpeg", default="ffmpeg")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show service logs")
+    args = parser.parse_args()
+    args.concurrency = args.concurrency or [1, 4, 16]
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    width, height = (int(v) for v in args.resolution.lower().split("x"))
+    spec = SourceSpec(width=width, height=height, fps=args.fps, gop=args.gop,
+                      duration_s=args.duration, bitrate=args.bitrate)
+    print(f"Preparing synthetic sources {spec.key} ...", file=sys.stderr)
+    camera_files = generate_cameras(args.media_dir, spec, ffmpeg_bin=args.ffmpeg)
+
+    output = os.path.abspath(args.output) if args.output else None
+    results = asyncio.run(run(args, camera_files))
+    results["media"] = spec.to_dict()
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {output}", file=sys.stderr)
+
+    failed = any(level["error_rate"] > 0 for level in results["levels"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""
+Replay a captured API session (TRAFFIC_CAPTURE_FILE, see
+services/traffic_capture.py) against synthetic sources.
+
+Usage (from backend/):
+    python -m benchmarks.replay capture.jsonl                       # 10x speed, in-process app
+    python -m benchmarks.replay capture.jsonl --speed 1 --speed max
+    python -m benchmarks.replay capture.jsonl --url http://127.0.0.1:8000 --output replay.json
+
+Requests are issued at their captured offsets divided by the speed factor
+("max" issues everything as soon as its inputs exist). Captured session,
+clip and reel IDs are mapped to the IDs the replayed requests produce, so
+a reel waits for the clips it references. Requests that failed in the
+capture are skipped.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.loadtest import LoadStats, make_client, percentile, timed, upload_cameras
+from benchmarks.synthetic import SourceSpec, generate_cameras
+
+logger = logging.getLogger("benchmarks.replay")
+
+# How long a request waits for the replayed request that produces its inputs
+DEPENDENCY_TIMEOUT_S = 3600.0
+
+
+def load_capture(path: str) -> List[Dict]:
+    """Successful captured requests in time order"""
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("type") == "request" and event.get("status", 500) < 400:
+                events.append(event)
+    return sorted(events, key=lambda e: e["t"])
+
+
+def source_spec_for(events: List[Dict], args) -> SourceSpec:
+    """Synthetic sources long enough for every captured segment, at the captured resolution"""
+    width, height = (int(v) for v in args.resolution.lower().split("x"))
+    fps = args.fps
+    duration_s = 0.0
+    for event in events:
+        if event["kind"] == "upload":
+            if event.get("resolution"):
+                width, height = (int(v) for v in event["resolution"].split("x"))
+            if event.get("fps"):
+                num, _, den = str(event["fps"]).partition("/")
+                fps = round(float(num) / float(den or 1))
+            duration_s = max(duration_s, float(event.get("duration_s") or 0))
+        for _, _, end_s in event.get("segments", []):
+            duration_s = max(duration_s, end_s + 2.0)
+    return SourceSpec(width=width, height=height, fps=fps, gop=args.gop,
+                      duration_s=max(duration_s, 30.0), bitrate=args.bitrate)
+
+
+class IdMap:
+    """Captured IDs -> futures of the IDs produced during replay (None if that request failed)"""
+
+    def __init__(self):
+        self._futures: Dict[str, asyncio.Future] = {}
+
+    def _future(self, captured_id: str) -> asyncio.Future:
+        if captured_id not in self._futures:
+            self._futures[captured_id] = asyncio.get_running_loop().create_future()
+        return self._futures[captured_id]
+
+    def expect(self, captured_id: Optional[str]):
+        """Declare that a replayed request will produce captured_id"""
+        if captured_id:
+            self._future(captured_id)
+
+    def resolve(self, captured_id: Optional[str], new_id: Optional[str]):
+        if captured_id and not self._future(captured_id).done():
+            self._future(captured_id).set_result(new_id)
+
+    async def get(self, captured_id: str) -> Optional[str]:
+        """Replay ID, or None if the producing request failed or was never captured"""
+        if captured_id not in self._futures:
+            return None
+        return await asyncio.wait_for(asyncio.shield(self._futures[captured_id]), DEPENDENCY_TIMEOUT_S)
+
+
+class Replayer:
+    """Re-drives captured events against one client"""
+
+    def __init__(self, client: httpx.AsyncClient, camera_files: Dict[str, str], stats: LoadStats):
+        self.client = client
+        self.camera_files = camera_files
+        self.stats = stats
+        self.sessions = IdMap()
+        self.clips = IdMap()
+        self.reels = IdMap()
+        self._fallback_session: Optional[asyncio.Task] = None
+        self.lag_ms: List[float] = []
+
+    def prepare(self, events: List[Dict]):
+        for event in events:
+            if event["kind"] == "upload":
+                self.sessions.expect(event.get("session_key"))
+            elif event["kind"] == "create_clip":
+                self.clips.expect(event.get("clip_id"))
+            elif event["kind"] == "create_reel":
+                self.reels.expect(event.get("reel_id"))
+
+    async def _session(self, captured_key: Optional[str]) -> Optional[str]:
+        key = await self.sessions.get(captured_key) if captured_key else None
+        if key is None:
+            # Capture started mid-session: upload once and share it
+            if self._fallback_session is None:
+                self._fallback_session = asyncio.ensure_future(
+                    upload_cameras(self.client, self.stats, self.camera_files))
+            key = await self._fallback_session
+        return key
+
+    async def _clip_ids(self, captured_ids: List[str]) -> Optional[List[str]]:
+        ids = [await self.clips.get(clip_id) for clip_id in captured_ids]
+        return None if any(clip_id is None for clip_id in ids) else ids
+
+    def _dependency_failed(self, kind: str):
+        self.stats.record(kind, 0.0, error="dependency failed")
+
+    async def run_event(self, event: Dict, scheduled: float):
+        kind = event["kind"]
+        try:
+            await self._run_event(kind, event, scheduled)
+        except asyncio.TimeoutError:
+            self._dependency_failed(kind)
+        except Exception as e:
+            logger.warning(f"{kind} replay failed: {e}")
+            self.stats.record(kind, 0.0, error=type(e).__name__)
+        finally:
+            # Unblock anything waiting on an ID this event should have produced
+            self.sessions.resolve(event.get("session_key") if kind == "upload" else None, None)
+            self.clips.resolve(event.get("clip_id") if kind == "create_clip" else None, None)
+            self.reels.resolve(event.get("reel_id") if kind == "create_reel" else None, None)
+
+    async def _run_event(self, kind: str, event: Dict, scheduled: float):
+        client, stats = self.client, self.stats
+
+        if kind == "upload":
+            key = await upload_cameras(client, stats, self.camera_files)
+            self.sessions.resolve(event.get("session_key"), key)
+            return
+
+        if kind == "create_clip":
+            session_key = await self._session(event.get("session_key"))
+            if session_key is None:
+                return self._dependency_failed(kind)
+            segments = [{"camera_id": cam, "start_s": start_s, "end_s": end_s}
+                        for cam, start_s, end_s in event["segments"]]
+            self.lag_ms.append((time.perf_counter() - scheduled) * 1000)
+            response = await timed(stats, kind, client.post(
+                "/api/v2/clip/create", data={"session_key": session_key, "segments": json.dumps(segments)}))
+            self.clips.resolve(event.get("clip_id"), response.json()["clip_id"] if response else None)
+            return
+
+        if kind in ("create_reel", "insert_reel_clips"):
+            clip_ids = await self._clip_ids(event.get("clip_ids", []))
+            if clip_ids is None:
+                return self._dependency_failed(kind)
+            if kind == "create_reel":
+                self.lag_ms.append((time.perf_counter() - scheduled) * 1000)
+                response = await timed(stats, kind, client.post("/api/v2/reel/create", json={"clip_ids": clip_ids}))
+                self.reels.resolve(event.get("reel_id"), response.json()["reel_id"] if response else None)
+                return
+            reel_id = await self.reels.get(event["reel_id"])
+            if reel_id is None:
+                return self._dependency_failed(kind)
+            self.lag_ms.append((time.perf_counter() - scheduled) * 1000)
+            await timed(stats, kind, client.post(f"/api/v2/reel/{reel_id}/clips",
+                                                 json={"clip_ids": clip_ids, "index": event.get("index")}))
+            return
+
+        if kind in ("download_clip", "delete_clip"):
+            clip_id = await self.clips.get(event["clip_id"])
+            if clip_id is None:
+                return self._dependency_failed(kind)
+            self.lag_ms.append((time.perf_counter() - scheduled) * 1000)
+            if kind == "download_clip":
+                response = await timed(stats, kind, client.get(f"/api/v2/clip/{clip_id}/download"))
+                if response is not None:
+                    stats.bytes_downloaded += len(response.content)
+            else:
+                await timed(stats, kind, client.delete(f"/api/v2/clip/{clip_id}"))
+            return
+
+        if kind in ("download_reel", "delete_reel", "remove_reel_clip"):
+            reel_id = await self.reels.get(event["reel_id"])
+            if reel_id is None:
+                return self._dependency_failed(kind)
+            self.lag_ms.append((time.perf_counter() - scheduled) * 1000)
+            if kind == "download_reel":
+                response = await timed(stats, kind, client.get(f"/api/v2/reel/{reel_id}/download"))
+                if response is not None:
+                    stats.bytes_downloaded += len(response.content)
+            elif kind == "delete_reel":
+                await timed(stats, kind, client.delete(f"/api/v2/reel/{reel_id}"))
+            else:
+                await timed(stats, kind, client.delete(f"/api/v2/reel/{reel_id}/clips/{event['index']}"))
+            return
+
+        if kind == "delete_session":
+            session_key = await self.sessions.get(event["session_key"])
+            if session_key is None:
+                return self._dependency_failed(kind)
+            await timed(stats, kind, client.delete(f"/api/v2/session/{session_key}"))
+            return
+
+        logger.debug(f"Skipping unsupported event kind {kind}")
+
+
+async def replay(client: httpx.AsyncClient, events: List[Dict], speed: Optional[float],
+                 camera_files: Dict[str, str]) -> Dict:
+    """Replay all events once; speed None means as fast as dependencies allow"""
+    stats = LoadStats()
+    replayer = Replayer(client, camera_files, stats)
+    replayer.prepare(events)
+
+    start = time.perf_counter()
+    tasks = []
+    for event in events:
+        offset = event["t"] / speed if speed else 0.0
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(replayer.run_event(event, start + offset)))
+    await asyncio.gather(*tasks)
+    summary = stats.summary(time.perf_counter() - start)
+
+    lag = sorted(replayer.lag_ms)
+    summary["dispatch_lag_ms"] = {
+        "p50": round(percentile(lag, 50), 1),
+        "p95": round(percentile(lag, 95), 1),
+        "max": round(lag[-1], 1) if lag else 0.0,
+    }
+    return summary
+
+
+def captured_latencies(events: List[Dict]) -> Dict[str, Dict]:
+    """Latency distribution per kind as originally captured"""
+    by_kind = defaultdict(list)
+    for event in events:
+        by_kind[event["kind"]].append(event["latency_ms"])
+    return {
+        kind: {"count": len(values), "p50_ms": round(percentile(sorted(values), 50), 1),
+               "p95_ms": round(percentile(sorted(values), 95), 1), "p99_ms": round(percentile(sorted(values), 99), 1)}
+        for kind, values in by_kind.items()
+    }
+
+
+def print_replay(label: str, summary: Dict, captured: Dict[str, Dict]):
+    print(f"\nspeed={label}  wall={summary['wall_s']:.1f}s  requests={summary['requests']}  "
+          f"errors={summary['error_rate'] * 100:.1f}%  dispatch lag p95={summary['dispatch_lag_ms']['p95']:.0f}ms")
+    print(f"  {'operation':<18}{'count':>7}{'err%':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'captured p50':>14}")
+    for operation, op in summary["operations"].items():
+        base = captured.get(operation, {}).get("p50_ms")
+        base_s = f"{base:>12.0f}ms" if base is not None else f"{'-':>14}"
+        print(f"  {operation:<18}{op['count']:>7}{op['error_rate'] * 100:>6.1f}%"
+              f"{op['p50_ms']:>8.0f}ms{op['p95_ms']:>8.0f}ms{op['p99_ms']:>8.0f}ms{base_s}")
+        if op["error_kinds"]:
+            print(f"  {'':<18}{op['error_kinds']}")
+
+
+async def run(args, speeds: List[str], events: List[Dict], camera_files: Dict[str, str],
+              captured: Dict[str, Dict]) -> Dict:
+    """Replay once per speed, on one client (and one event loop for the in-process app)"""
+    runs = {}
+    async with make_client(args.url, args.timeout) as client:
+        for label in speeds:
+            speed = parse_speed(label)
+            print(f"Replaying at {label}{'x' if speed else ''} ...", file=sys.stderr)
+            runs[label] = await replay(client, events, speed, camera_files)
+            print_replay(label, runs[label], captured)
+    return runs
+
+
+def parse_speed(value: str) -> Optional[float]:
+    if value.lower() in ("max", "0"):
+        return None
+    speed = float(value.lower().rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="Capture file written with TRAFFIC_CAPTURE_FILE")
+    parser.add_argument("--speed", action="append",
+                        help="Replay speed factor, e.g. 1, 10 or max (repeatable, default: 10)")
+    parser.add_argument("--url", help="Base URL of a running backend (default: drive main.app in-process)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-request timeout in seconds")
+    parser.add_argument("--resolution", default="1280x720", help="Used when the capture has no upload")
+    parser.add_argument("--fps", type=int, default=30, help="Used when the capture has no upload")
+    parser.add_argument("--gop", type=int, default=60)
+    parser.add_argument("--bitrate", default="4M")
+    parser.add_argument("--media-dir", default=os.path.join(tempfile.gettempdir(), "highlight_bench_media"),
+                        help="Cache directory for generated sources")
+    parser.add_argument("--ffmpeg", default="ffmpeg")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show service logs")
+    args = parser.parse_args()
+    speeds = args.speed or ["10"]
+    for label in speeds:
+        try:
+            parse_speed(label)
+        except (ValueError, argparse.ArgumentTypeError):
+            parser.error(f"invalid --speed {label!r}: use a positive factor or 'max'")
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    events = load_capture(args.capture)
+    if not events:
+        print(f"No replayable requests in {args.capture}", file=sys.stderr)
+        return 1
+    captured = captured_latencies(events)
+
+    spec = source_spec_for(events, args)
+    print(f"{len(events)} requests over {events[-1]['t']:.0f}s; preparing synthetic sources {spec.key} ...",
+          file=sys.stderr)
+    camera_files = generate_cameras(args.media_dir, spec, ffmpeg_bin=args.ffmpeg)
+
+    output = os.path.abspath(args.output) if args.output else None
+
+    results = {
+        "created_at": datetime.now().isoformat(),
+        "capture": os.path.abspath(args.capture),
+        "target": args.url or "in-process",
+        "media": spec.to_dict(),
+        "captured": captured,
+    }
+    results["runs"] = asyncio.run(run(args, speeds, events, camera_files, captured))
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {output}", file=sys.stderr)
+
+    return 1 if any(run["error_rate"] > 0 for run in results["runs"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
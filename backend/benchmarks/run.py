@@ -0,0 +1,223 @@
+"""
+Benchmark runner for the rendering pipeline on synthetic 4-camera sources.
+
+Usage (from backend/):
+    python -m benchmarks.run                                  # all scenarios
+    python -m benchmarks.run -s extract -s large_reel --repeat 10
+    python -m benchmarks.run --output results.json --baseline baseline.json
+
+Exits with status 1 when any scenario's median regresses past its threshold
+relative to the baseline.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ffmpeg_service import FFmpegService
+from services.clip_service import ClipService
+from services.reel_service import ReelService
+from benchmarks.synthetic import SourceSpec, generate_cameras
+from benchmarks.scenarios import SCENARIOS, BenchContext, Scenario
+
+RESULTS_SCHEMA = 1
+
+logger = logging.getLogger("benchmarks")
+
+
+def summarize(samples_ms: List[float]) -> Dict:
+    """Repeat statistics for one scenario"""
+    ordered = sorted(samples_ms)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "samples_ms": [round(s, 3) for s in samples_ms],
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p95_ms": round(ordered[p95_index], 3),
+        "stdev_ms": round(statistics.stdev(ordered), 3) if len(ordered) > 1 else 0.0,
+    }
+
+
+def run_scenario(scenario: Scenario, ctx: BenchContext, warmup: int, repeat: int) -> Dict:
+    """Run setup, warm-up iterations and timed repeats of one scenario"""
+    if scenario.setup:
+        scenario.setup(ctx)
+
+    for _ in range(warmup):
+        if scenario.before_each:
+            scenario.before_each(ctx)
+        scenario.run(ctx)
+
+    samples = []
+    extra = {}
+    for _ in range(repeat):
+        if scenario.before_each:
+            scenario.before_each(ctx)
+        start = time.perf_counter()
+        extra = scenario.run(ctx) or {}
+        samples.append((time.perf_counter() - start) * 1000)
+
+    result = summarize(samples)
+    result["threshold"] = scenario.threshold
+    result["extra"] = extra
+    return result
+
+
+def environment_info(ffmpeg_bin: str) -> Dict:
+    try:
+        version = subprocess.run([ffmpeg_bin, "-version"], capture_output=True, text=True).stdout.splitlines()[0]
+    except (OSError, IndexError):
+        version = "unknown"
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "ffmpeg": version,
+    }
+
+
+def add_speedups(results: Dict):
+    """Median speedup of scenarios over their speedup_vs reference, when both ran"""
+    scenarios = results["scenarios"]
+    for name, stats in scenarios.items():
+        reference = SCENARIOS[name].speedup_vs
+        base = scenarios.get(reference) if reference else None
+        if not base or "median_ms" not in stats or "median_ms" not in base or stats["median_ms"] <= 0:
+            continue
+        stats["speedup"] = {"vs": reference, "ratio": round(base["median_ms"] / stats["median_ms"], 3)}
+
+
+def compare(results: Dict, baseline: Dict, threshold_override: Optional[float]) -> List[Dict]:
+    """Compare scenario medians with a baseline results file"""
+    rows = []
+    for name, current in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or "median_ms" not in current or "median_ms" not in base:
+            continue
+        threshold = threshold_override if threshold_override is not None else current["threshold"]
+        ratio = current["median_ms"] / base["median_ms"] if base["median_ms"] > 0 else 1.0
+        rows.append({
+            "scenario": name,
+            "baseline_median_ms": base["median_ms"],
+            "median_ms": current["median_ms"],
+            "ratio": round(ratio, 3),
+            "threshold": threshold,
+            "regression": ratio > 1.0 + threshold,
+        })
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--resolution", default="1280x720")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--gop", type=int, default=60)
+    parser.add_argument("--duration", type=float, default=360.0, help="Source duration in seconds")
+    parser.add_argument("--bitrate", default="4M")
+    parser.add_argument("--media-dir", default=os.path.join(tempfile.gettempdir(), "highlight_bench_media"),
+                        help="Cache directory for generated sources")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--baseline", help="Baseline JSON results to compare against")
+    parser.add_argument("--threshold", type=float, help="Override regression threshold for all scenarios")
+    parser.add_argument("--ffmpeg", default="ffmpeg")
+    parser.add_argument("--ffprobe", default="ffprobe")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show service logs")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    width, height = (int(v) for v in args.resolution.lower().split("x"))
+    spec = SourceSpec(width=width, height=height, fps=args.fps, gop=args.gop,
+                      duration_s=args.duration, bitrate=args.bitrate)
+
+    print(f"Preparing synthetic sources {spec.key} ...", file=sys.stderr)
+    start = time.perf_counter()
+    camera_files = generate_cameras(args.media_dir, spec, ffmpeg_bin=args.ffmpeg)
+    print(f"  ready in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    work_dir = tempfile.mkdtemp(prefix="highlight_bench_")
+    try:
+        ffmpeg = FFmpegService(ffmpeg_bin=args.ffmpeg, ffprobe_bin=args.ffprobe)
+        clip_service = ClipService(output_dir=os.path.join(work_dir, "clips"), ffmpeg_service=ffmpeg)
+        reel_service = ReelService(output_dir=os.path.join(work_dir, "reels"), ffmpeg_service=ffmpeg,
+                                   clip_service=clip_service)
+        ctx = BenchContext(ffmpeg=ffmpeg, clip_service=clip_service, reel_service=reel_service,
+                           camera_files=camera_files, source_duration_s=spec.duration_s, work_dir=work_dir)
+
+        results = {
+            "schema": RESULTS_SCHEMA,
+            "created_at": datetime.now().isoformat(),
+            "environment": environment_info(args.ffmpeg),
+            "media": spec.to_dict(),
+            "warmup": args.warmup,
+            "repeat": args.repeat,
+            "scenarios": {},
+        }
+
+        for name in args.scenario or list(SCENARIOS):
+            scenario = SCENARIOS[name]
+            print(f"Running {name}: {scenario.description}", file=sys.stderr)
+            try:
+                results["scenarios"][name] = run_scenario(scenario, ctx, args.warmup, args.repeat)
+            except Exception as e:
+                results["scenarios"][name] = {"error": str(e), "threshold": scenario.threshold}
+                print(f"  ERROR: {e}", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    add_speedups(results)
+
+    print(f"\n{'scenario':<20}{'median':>10}{'p95':>10}{'min':>10}{'stdev':>10}")
+    for name, stats in results["scenarios"].items():
+        if "error" in stats:
+            print(f"{name:<20}{'error':>10}")
+            continue
+        speedup = stats.get("speedup")
+        print(f"{name:<20}{stats['median_ms']:>8.1f}ms{stats['p95_ms']:>8.1f}ms"
+              f"{stats['min_ms']:>8.1f}ms{stats['stdev_ms']:>8.1f}ms"
+              + (f"  {speedup['ratio']:.2f}x vs {speedup['vs']}" if speedup else ""))
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        results["comparison"] = {"baseline": args.baseline, "scenarios": rows}
+
+        print(f"\n{'scenario':<20}{'baseline':>10}{'current':>10}{'ratio':>8}  status")
+        for row in rows:
+            status = "REGRESSION" if row["regression"] else "ok"
+            print(f"{row['scenario']:<20}{row['baseline_median_ms']:>8.1f}ms{row['median_ms']:>8.1f}ms"
+                  f"{row['ratio']:>7.2f}x  {status}")
+        if any(row["regression"] for row in rows):
+            exit_code = 1
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}", file=sys.stderr)
+
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
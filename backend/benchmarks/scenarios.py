@@ -0,0 +1,202 @@
+"""
+Benchmark scenarios. Each scenario times one call of `run`; `setup` runs once
+before warm-up and `before_each` runs untimed before every iteration.
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from models.clip import ClipSegment
+from services.ffmpeg_service import FFmpegService
+from services.clip_service import ClipService
+from services.reel_service import ReelService
+from services.reel_encoder import EncodeProfile
+
+
+@dataclass
+class BenchContext:
+    """Services and media shared by all scenarios in a run"""
+    ffmpeg: FFmpegService
+    clip_service: ClipService
+    reel_service: ReelService
+    camera_files: Dict[str, str]
+    source_duration_s: float
+    work_dir: str
+    state: Dict = field(default_factory=dict)  # Per-scenario scratch space
+
+    def tmp_path(self, name: str) -> str:
+        return os.path.join(self.work_dir, name)
+
+
+@dataclass
+class Scenario:
+    """A named, repeatable benchmark operation"""
+    name: str
+    description: str
+    run: Callable[[BenchContext], Optional[Dict]]
+    setup: Optional[Callable[[BenchContext], None]] = None
+    before_each: Optional[Callable[[BenchContext], None]] = None
+    threshold: float = 0.20  # Allowed median slowdown vs baseline before flagging a regression
+    speedup_vs: Optional[str] = None  # Report median speedup over this scenario when both ran
+
+
+def _check(result, what: str):
+    if not result.success:
+        raise RuntimeError(f"{what} failed: {result.stderr[-500:]}")
+
+
+def _make_clips(ctx: BenchContext, count: int, clip_s: float) -> List[str]:
+    """Create count single-camera clips spread over the source duration"""
+    span = max(ctx.source_duration_s - clip_s - 1.0, 1.0)
+    clip_ids = []
+    for i in range(count):
+        start_s = (i * span / max(count, 1)) % span
+        camera_id = f"C{(i % 4) + 1}"
+        clip = ctx.clip_service.create_clip(
+            segments=[ClipSegment(camera_id=camera_id, start_s=start_s, end_s=start_s + clip_s)],
+            camera_files=ctx.camera_files
+        )
+        clip_ids.append(clip.clip_id)
+    return clip_ids
+
+
+# --- probe -------------------------------------------------------------------
+
+def _probe(ctx: BenchContext):
+    ctx.ffmpeg.probe_video(ctx.camera_files["C1"])
+
+
+# --- extract -----------------------------------------------------------------
+
+def _extract(ctx: BenchContext):
+    result = ctx.ffmpeg.extract_segment(
+        ctx.camera_files["C1"], 10.0, 20.0, ctx.tmp_path("extract.mp4"), accurate_seek=False
+    )
+    _check(result, "extract")
+    return {"bytes": result.filesize_bytes}
+
+
+# --- concat ------------------------------------------------------------------
+
+def _concat_setup(ctx: BenchContext):
+    paths = []
+    for i in range(10):
+        path = ctx.tmp_path(f"concat_src_{i:02d}.mp4")
+        start_s = 5.0 + i * 5.0
+        camera_id = f"C{(i % 4) + 1}"
+        _check(ctx.ffmpeg.extract_segment(ctx.camera_files[camera_id], start_s, start_s + 5.0, path,
+                                          accurate_seek=False), "concat setup")
+        paths.append(path)
+    ctx.state["concat_paths"] = paths
+
+
+def _concat(ctx: BenchContext):
+    result = ctx.ffmpeg.concat_segments(ctx.state["concat_paths"], ctx.tmp_path("concat.mp4"))
+    _check(result, "concat")
+    return {"bytes": result.filesize_bytes}
+
+
+# --- multi-switch clip -------------------------------------------------------
+
+def _multi_switch_clip(ctx: BenchContext):
+    segments = [
+        ClipSegment(camera_id="C1", start_s=10.0, end_s=15.0),
+        ClipSegment(camera_id="C2", start_s=15.0, end_s=22.0),
+        ClipSegment(camera_id="C3", start_s=22.0, end_s=30.0),
+        ClipSegment(camera_id="C4", start_s=30.0, end_s=35.0),
+    ]
+    clip = ctx.clip_service.create_clip(segments=segments, camera_files=ctx.camera_files)
+    ctx.clip_service.delete_clip(clip.clip_id)
+    return {"bytes": clip.filesize_bytes}
+
+
+# --- large reel --------------------------------------------------------------
+
+def _large_reel_setup(ctx: BenchContext):
+    ctx.state["large_reel_clips"] = _make_clips(ctx, count=15, clip_s=20.0)
+
+
+def _large_reel_cold(ctx: BenchContext):
+    # Drop cached fragments so every clip is remuxed, like a first-time reel
+    for clip_id in ctx.state["large_reel_clips"]:
+        ctx.reel_service.discard_fragment(clip_id)
+
+
+def _large_reel(ctx: BenchContext):
+    reel = ctx.reel_service.create_reel(clip_ids=ctx.state["large_reel_clips"])
+    ctx.reel_service.delete_reel(reel.reel_id)
+    return {"bytes": reel.filesize_bytes, "clips": len(reel.clip_ids)}
+
+
+def _reel_rebuild(ctx: BenchContext):
+    # Same reel with fragments already cached - the steady state for repeated reels
+    return _large_reel(ctx)
+
+
+# --- reel append -------------------------------------------------------------
+
+def _reel_append_setup(ctx: BenchContext):
+    clip_ids = _make_clips(ctx, count=31, clip_s=5.0)
+    reel = ctx.reel_service.create_reel(clip_ids=clip_ids[:30])
+    ctx.state["append_reel"] = reel.reel_id
+    ctx.state["append_clip"] = clip_ids[30]
+
+
+def _reel_append_reset(ctx: BenchContext):
+    reel = ctx.reel_service.get_reel(ctx.state["append_reel"])
+    if len(reel.clip_ids) > 30:
+        ctx.reel_service.remove_clip(reel.reel_id, len(reel.clip_ids) - 1)
+    # A freshly created clip has no cached fragment yet
+    ctx.reel_service.discard_fragment(ctx.state["append_clip"])
+
+
+def _reel_append(ctx: BenchContext):
+    reel = ctx.reel_service.insert_clips(ctx.state["append_reel"], [ctx.state["append_clip"]])
+    return {"clips": len(reel.clip_ids)}
+
+
+# --- letterboxed (re-encoded) reel ------------------------------------------
+
+LETTERBOX_PROFILE = EncodeProfile(width=1280, height=720, fps=30)
+
+
+def _letterbox_setup(ctx: BenchContext):
+    clip_ids = _make_clips(ctx, count=3, clip_s=40.0)
+    ctx.state["letterbox_jobs"] = [
+        (ctx.clip_service.ensure_rendered(clip_id), ctx.tmp_path(f"letterbox_{i:02d}.mp4"))
+        for i, clip_id in enumerate(clip_ids)
+    ]
+
+
+def _letterbox(ctx: BenchContext, parallel: bool) -> Dict:
+    result = ctx.reel_service.encoder.encode_files(ctx.state["letterbox_jobs"], LETTERBOX_PROFILE, parallel=parallel)
+    return {"bytes": result.filesize_bytes, "cpu_s": round(result.resource_usage.cpu_s, 3)}
+
+
+def _letterbox_serial(ctx: BenchContext):
+    return _letterbox(ctx, parallel=False)
+
+
+def _letterbox_chunked(ctx: BenchContext):
+    return _letterbox(ctx, parallel=True)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    s.name: s for s in [
+        Scenario("probe", "ffprobe stream metadata of one camera", _probe, threshold=0.30),
+        Scenario("extract", "Stream-copy 10s segment from one camera", _extract),
+        Scenario("concat", "Concat-demux 10 x 5s segments", _concat, setup=_concat_setup),
+        Scenario("multi_switch_clip", "25s clip switching across C1-C4", _multi_switch_clip),
+        Scenario("large_reel", "5 min reel from 15 x 20s clips, cold fragment cache", _large_reel,
+                 setup=_large_reel_setup, before_each=_large_reel_cold),
+        Scenario("reel_rebuild", "5 min reel from 15 x 20s clips, warm fragment cache", _reel_rebuild,
+                 setup=_large_reel_setup),
+        Scenario("reel_append", "Append one 5s clip to a 30-clip reel", _reel_append,
+                 setup=_reel_append_setup, before_each=_reel_append_reset),
+        Scenario("letterbox_serial", "Re-encode 3 x 40s clips letterboxed to 720p, one ffmpeg per clip",
+                 _letterbox_serial, setup=_letterbox_setup),
+        Scenario("letterbox_chunked", "Same encode split into keyframe-aligned chunks across cores",
+                 _letterbox_chunked, setup=_letterbox_setup, speedup_vs="letterbox_serial"),
+    ]
+}
@@ -0,0 +1,97 @@
+"""
+Synthetic 4-camera source generator using ffmpeg lavfi.
+Sources are cached per spec so repeated benchmark runs reuse them.
+"""
+
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+CAMERA_IDS = ["C1", "C2", "C3", "C4"]
+
+
+@dataclass
+class SourceSpec:
+    """Parameters of the synthetic camera files"""
+    width: int = 1280
+    height: int = 720
+    fps: int = 30
+    gop: int = 60
+    duration_s: float = 120.0
+    bitrate: str = "4M"
+    audio: bool = True
+
+    @property
+    def key(self) -> str:
+        return (f"{self.width}x{self.height}_{self.fps}fps_g{self.gop}_"
+                f"{self.duration_s:g}s_{self.bitrate}{'_a' if self.audio else ''}")
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _camera_command(ffmpeg_bin: str, spec: SourceSpec, index: int, output_path: str) -> List[str]:
+    """
+    Build the ffmpeg command for one camera. Cameras share the same moving test
+    pattern with a different hue, so they look distinct but stay time-correlated
+    like real cameras filming the same match.
+    """
+    video = (f"testsrc2=size={spec.width}x{spec.height}:rate={spec.fps}:duration={spec.duration_s:g},"
+             f"hue=h={index * 90}")
+
+    cmd = [ffmpeg_bin, "-v", "error", "-f", "lavfi", "-i", video]
+    if spec.audio:
+        # Noise bed with periodic "whistle" bursts every 20s, shared timeline across cameras
+        audio = (f"anoisesrc=color=pink:amplitude=0.1:sample_rate=48000:duration={spec.duration_s:g},"
+                 f"volume='if(lt(mod(t,20),0.5),6,1)':eval=frame")
+        cmd += ["-f", "lavfi", "-i", audio]
+
+    cmd += [
+        "-c:v", "libx264",
+        "-preset", "veryfast",
+        "-b:v", spec.bitrate,
+        "-maxrate", spec.bitrate,
+        "-bufsize", spec.bitrate,
+        "-g", str(spec.gop),
+        "-keyint_min", str(spec.gop),
+        "-sc_threshold", "0",
+        "-pix_fmt", "yuv420p",
+    ]
+    if spec.audio:
+        cmd += ["-c:a", "aac", "-b:a", "96k", "-shortest"]
+    cmd += ["-movflags", "+faststart", "-y", output_path]
+    return cmd
+
+
+def generate_cameras(output_dir: str, spec: SourceSpec, ffmpeg_bin: str = "ffmpeg") -> Dict[str, str]:
+    """
+    Generate (or reuse) four synthetic camera files.
+
+    Returns:
+        Mapping of camera IDs to file paths
+    """
+    spec_dir = os.path.join(output_dir, spec.key)
+    os.makedirs(spec_dir, exist_ok=True)
+    camera_files = {camera_id: os.path.join(spec_dir, f"{camera_id}.mp4") for camera_id in CAMERA_IDS}
+
+    missing = [(i, camera_id) for i, camera_id in enumerate(CAMERA_IDS)
+               if not os.path.exists(camera_files[camera_id])]
+    if not missing:
+        return camera_files
+
+    def _generate(item):
+        index, camera_id = item
+        path = camera_files[camera_id]
+        tmp_path = path + ".part.mp4"
+        result = subprocess.run(_camera_command(ffmpeg_bin, spec, index, tmp_path),
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Failed to generate {camera_id}: {result.stderr}")
+        os.replace(tmp_path, path)
+
+    with ThreadPoolExecutor(max_workers=len(missing)) as pool:
+        list(pool.map(_generate, missing))
+
+    return camera_files
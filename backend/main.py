@@ -3,21 +3,58 @@ FastAPI application for multi-camera highlight generation.
 Stream-copy only, zero re-encoding, maximum performance.
 """
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Optional
+import asyncio
 import tempfile
 import os
+import uuid
 import json
 import logging
 import time
+import shutil
 
 from models.clip import ClipSegment, ClipResponse
-from models.reel import ReelCreate, ReelResponse
+from models.reel import ReelCreate, ReelClipsInsert, ReelResponse
+from models.profiling import ProfilingSettings
+from models.sync import CameraSync, SessionSync
+from models.switch_plan import SwitchPlanRequest, SwitchPlanResponse
+from models.highlights import HighlightScanRequest, HighlightCandidate, HighlightScanResponse
+from models.analysis import AnalysisRequest, CameraAnalysis, AnalysisResponse
+from models.activity import CameraActivity, SessionActivity
+from models.audio_events import AudioEventsRequest, AudioEvent, CameraAudioScan, AudioEventsResponse
+from models.export import AspectExportRequest, ExportOutput, AspectExportStatus
+from models.scorecard import ScorecardRequest, ScorecardResponse
+from models.layout import LayoutRequest, LayoutResponse
+from models.bumper import BumperResponse
 from services.ffmpeg_service import FFmpegService
 from services.clip_service import ClipService
 from services.reel_service import ReelService
+from services.reel_encoder import ChunkedEncoder, EncodeProfile, DEFAULT_CHUNK_S
+from services.transitions import Transition
+from services.output_store import OutputStore
+from services.render_queue import RenderQueue
+from services.job_progress import ProgressTracker
+from services import metrics
+from services import tracing
+from services.resource_usage import ResourceUsage, collect_usage
+from services.profiling import Profiler
+from services import profiling
+from services.traffic_capture import TrafficRecorder
+from services.sync_service import SyncService
+from services.switch_planner import SwitchPlanner
+from services.highlight_detector import HighlightDetector
+from services.analysis_engine import AnalysisEngine
+from services.packet_activity import PacketActivity
+from services.audio_events import AudioEventDetector
+from services.aspect_export import AspectExporter, AspectTarget
+from services.scorecard import ScorecardService, ScorecardState
+from services.layout_renderer import LayoutRenderer, LayoutSpec
+from services.bumpers import BumperLibrary
+from services import traffic_capture
 
 # Configure logging
 logging.basicConfig(
@@ -46,13 +83,196 @@ app.add_middleware(
 OUTPUT_DIR = os.path.join(os.getcwd(), "output")
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# Rendered outputs are evicted (least recently downloaded first) above this size
+# and transparently re-rendered on the next download
+OUTPUT_HIGH_WATERMARK_BYTES = int(os.environ.get("OUTPUT_HIGH_WATERMARK_BYTES", 20 * 1024**3))
+OUTPUT_LOW_WATERMARK_BYTES = int(os.environ.get("OUTPUT_LOW_WATERMARK_BYTES", 16 * 1024**3))
+OUTPUT_MIN_FREE_BYTES = int(os.environ.get("OUTPUT_MIN_FREE_BYTES", 2 * 1024**3))
+
+output_store = OutputStore(
+    root_dir=OUTPUT_DIR,
+    high_watermark_bytes=OUTPUT_HIGH_WATERMARK_BYTES,
+    low_watermark_bytes=OUTPUT_LOW_WATERMARK_BYTES,
+    min_free_bytes=OUTPUT_MIN_FREE_BYTES
+)
 ffmpeg_service = FFmpegService()
-clip_service = ClipService(output_dir=os.path.join(OUTPUT_DIR, "clips"), ffmpeg_service=ffmpeg_service)
-reel_service = ReelService(output_dir=os.path.join(OUTPUT_DIR, "reels"), ffmpeg_service=ffmpeg_service, clip_service=clip_service)
+
+# Camera sync: offsets are estimated at upload and applied to clip segment times
+# (AUTO_SYNC=0 treats all cameras as already sharing one timeline)
+AUTO_SYNC = os.environ.get("AUTO_SYNC", "1") != "0"
+SYNC_MAX_OFFSET_S = float(os.environ.get("SYNC_MAX_OFFSET_S", 15.0))
+SYNC_ANALYSIS_WINDOW_S = float(os.environ.get("SYNC_ANALYSIS_WINDOW_S", 900.0))
+sync_service = SyncService(
+    cache_dir=os.path.join(OUTPUT_DIR, "cache", "sync"),
+    ffmpeg_service=ffmpeg_service,
+    analysis_window_s=SYNC_ANALYSIS_WINDOW_S,
+    max_offset_s=SYNC_MAX_OFFSET_S
+)
+
+clip_service = ClipService(output_dir=os.path.join(OUTPUT_DIR, "clips"), ffmpeg_service=ffmpeg_service,
+                           output_store=output_store, sync_service=sync_service if AUTO_SYNC else None)
+packet_activity = PacketActivity(ffmpeg_service=ffmpeg_service)
+switch_planner = SwitchPlanner(ffmpeg_service=ffmpeg_service, sync_service=sync_service if AUTO_SYNC else None,
+                               packet_activity=packet_activity)
+highlight_detector = HighlightDetector(ffmpeg_service=ffmpeg_service)
+audio_event_detector = AudioEventDetector(ffmpeg_service=ffmpeg_service)
+
+# Shared-decode analysis: each camera is decoded once at this size/rate and fanned out to
+# analyzer worker processes; results are cached per file
+ANALYSIS_FRAME_SIZE = os.environ.get("ANALYSIS_FRAME_SIZE", "64x36")
+ANALYSIS_FPS = float(os.environ.get("ANALYSIS_FPS", 10.0))
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", 4))
+_analysis_width, _analysis_height = (int(v) for v in ANALYSIS_FRAME_SIZE.lower().split("x"))
+analysis_engine = AnalysisEngine(
+    cache_dir=os.path.join(OUTPUT_DIR, "cache", "analysis"),
+    ffmpeg_service=ffmpeg_service,
+    width=_analysis_width,
+    height=_analysis_height,
+    fps=ANALYSIS_FPS,
+    max_workers=ANALYSIS_WORKERS
+)
+
+# Re-encoded (letterboxed) reels: clips are split into keyframe-aligned chunks of about
+# ENCODE_CHUNK_S seconds, ENCODE_WORKERS of them encoded at a time (default: one per core)
+ENCODE_CHUNK_S = float(os.environ.get("ENCODE_CHUNK_S", DEFAULT_CHUNK_S))
+ENCODE_WORKERS = int(os.environ.get("ENCODE_WORKERS", 0)) or None
+reel_encoder = ChunkedEncoder(ffmpeg_service=ffmpeg_service, packet_activity=packet_activity,
+                              max_workers=ENCODE_WORKERS, chunk_s=ENCODE_CHUNK_S)
+# Intro/outro bumpers: conformed once per clip stream format, then stream-copied onto reels
+bumper_library = BumperLibrary(output_dir=os.path.join(OUTPUT_DIR, "bumpers"), ffmpeg_service=ffmpeg_service,
+                               output_store=output_store)
+reel_service = ReelService(output_dir=os.path.join(OUTPUT_DIR, "reels"), ffmpeg_service=ffmpeg_service,
+                           clip_service=clip_service, output_store=output_store, encoder=reel_encoder,
+                           bumpers=bumper_library)
+aspect_exporter = AspectExporter(output_dir=os.path.join(OUTPUT_DIR, "exports"), ffmpeg_service=ffmpeg_service,
+                                 clip_service=clip_service, reel_service=reel_service, output_store=output_store)
+export_jobs = {}  # export_id -> job_id
+export_tasks = set()  # Running background exports (kept referenced until done)
+
+# Scorecard overlays: one PNG per scoreboard state, only the window around it re-encoded
+SCORECARD_FONT = os.environ.get("SCORECARD_FONT", "DejaVu Sans")
+scorecard_service = ScorecardService(output_dir=os.path.join(OUTPUT_DIR, "scorecards"), ffmpeg_service=ffmpeg_service,
+                                     clip_service=clip_service, packet_activity=packet_activity,
+                                     output_store=output_store, font=SCORECARD_FONT)
+
+# Multi-angle layouts share the re-encode worker pool and chunk length (ENCODE_WORKERS, ENCODE_CHUNK_S)
+layout_renderer = LayoutRenderer(output_dir=os.path.join(OUTPUT_DIR, "layouts"), ffmpeg_service=ffmpeg_service,
+                                 encoder=reel_encoder, sync_service=sync_service if AUTO_SYNC else None,
+                                 output_store=output_store)
+
+# Renders run on worker threads, at most this many at a time; the rest queue up
+MAX_CONCURRENT_RENDERS = int(os.environ.get("MAX_CONCURRENT_RENDERS", os.cpu_count() or 4))
+progress_tracker = ProgressTracker()
+render_queue = RenderQueue(max_concurrent=MAX_CONCURRENT_RENDERS, progress=progress_tracker)
+
+# Request tracing: "console", "file" (JSON lines in TRACE_FILE) or "none"
+TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "none").lower()
+TRACE_FILE = os.environ.get("TRACE_FILE", os.path.join(OUTPUT_DIR, "traces.jsonl"))
+if TRACE_EXPORTER == "console":
+    tracing.configure(tracing.console_exporter())
+elif TRACE_EXPORTER == "file":
+    tracing.configure(tracing.file_exporter(TRACE_FILE))
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """One span per request; service and ffmpeg spans nest under it"""
+    if not tracing.TRACER.enabled:
+        return await call_next(request)
+
+    remote_parent = tracing.parse_traceparent(request.headers.get("traceparent"))
+    with tracing.TRACER.span(f"{request.method} {request.url.path}", remote_parent=remote_parent,
+                             **{"http.method": request.method, "http.target": request.url.path}) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            span.name = f"{request.method} {route.path}"
+            span.set_attribute("http.route", route.path)
+        span.set_attribute("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_status("ERROR", f"HTTP {response.status_code}")
+        return response
+
+
+# Opt-in request profiling: send "X-Profile: 1", or arm the admin toggle to profile
+# the next N requests. Admin endpoints require X-Admin-Token when ADMIN_TOKEN is set.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+profiler = Profiler(
+    root_dir=os.environ.get("PROFILE_DIR", os.path.join(OUTPUT_DIR, "profiles")),
+    interval_s=float(os.environ.get("PROFILE_INTERVAL_MS", 5)) / 1000,
+    max_profiles=int(os.environ.get("PROFILE_MAX_COUNT", 50)),
+    max_age_s=float(os.environ.get("PROFILE_MAX_AGE_S", 7 * 24 * 3600))
+)
+
+
+def _check_admin(request: Request):
+    if ADMIN_TOKEN and request.headers.get("x-admin-token") != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    """Capture a CPU/allocation profile of opted-in requests"""
+    requested = request.headers.get("x-profile", "").lower() in ("1", "true", "yes")
+    if requested and ADMIN_TOKEN and request.headers.get("x-admin-token") != ADMIN_TOKEN:
+        requested = False
+    if request.url.path.startswith("/api/v2/admin/") or not profiler.should_profile(requested):
+        return await call_next(request)
+
+    profile = profiler.start(request.method, request.url.path)
+    token = profiling.activate(profile)
+    status_code = None
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        profiling.deactivate(token)
+        await run_in_threadpool(profiler.finish, profile, status_code)
+    response.headers["X-Profile-Id"] = profile.profile_id
+    return response
+
+
+# Optional traffic capture for replay (benchmarks/replay.py): timings and payload shapes, no media
+TRAFFIC_CAPTURE_FILE = os.environ.get("TRAFFIC_CAPTURE_FILE")
+traffic_recorder = TrafficRecorder(TRAFFIC_CAPTURE_FILE) if TRAFFIC_CAPTURE_FILE else None
+
+
+@app.middleware("http")
+async def capture_traffic(request: Request, call_next):
+    """Record request timing and payload shape for later replay"""
+    if traffic_recorder is None:
+        return await call_next(request)
+
+    token = traffic_capture.bind()
+    started = time.time()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        shape = traffic_capture.unbind(token)
+        route = request.scope.get("route")
+        if route is not None:
+            traffic_recorder.record(request.method, route.path, dict(request.path_params), status_code,
+                                    started, (time.time() - started) * 1000, shape)
+
 
 # In-memory storage for uploaded camera files (session-like)
 # In production, use Redis or similar
 camera_uploads = {}  # {session_key: {C1: path, C2: path, C3: path, C4: path}}
+session_usage = {}  # {session_key: ResourceUsage} - ffmpeg/ffprobe children run for the session
+
+
+async def _rendered_path(job: str, cached_path, ensure_rendered, *args) -> str:
+    """
+    File of a rendered output for download. Files on disk are served directly;
+    only re-rendering an evicted one waits for (and takes) a render slot.
+    """
+    path = cached_path(*args)
+    if path is None:
+        path = await render_queue.run(job, ensure_rendered, *args)
+    return path
 
 
 @app.get("/")
@@ -77,6 +297,7 @@ async def upload_cameras(
     Returns a session key to use for clip creation.
     """
     logger.info("Uploading 4 camera files...")
+    upload_start = time.time()
 
     # Generate session key
     session_key = f"sess_{int(time.time())}_{os.urandom(4).hex()}"
@@ -95,6 +316,7 @@ async def upload_cameras(
             content = await upload_file.read()
             temp_file.write(content)
             temp_file.close()
+            metrics.UPLOAD_BYTES.inc(len(content))
 
             camera_files[camera_id] = temp_path
             temp_files.append(temp_path)
@@ -103,7 +325,8 @@ async def upload_cameras(
 
         # Validate compatibility
         paths = [camera_files["C1"], camera_files["C2"], camera_files["C3"], camera_files["C4"]]
-        compatible, error_msg = ffmpeg_service.validate_compatibility(paths)
+        with collect_usage() as usage:
+            compatible, error_msg = ffmpeg_service.validate_compatibility(paths)
 
         if not compatible:
             # Cleanup on validation failure
@@ -116,10 +339,22 @@ async def upload_cameras(
 
         # Store camera files in memory
         camera_uploads[session_key] = camera_files
+        if AUTO_SYNC:
+            sync_service.schedule(camera_files)
 
         # Get metadata for first camera
-        metadata = ffmpeg_service.probe_video(camera_files["C1"])
+        with collect_usage() as probe_usage:
+            metadata = ffmpeg_service.probe_video(camera_files["C1"])
+        session_usage[session_key] = usage.add(probe_usage)
+        traffic_capture.annotate(
+            session_key=session_key,
+            camera_bytes={camera_id: os.path.getsize(path) for camera_id, path in camera_files.items()},
+            resolution=f"{metadata.width}x{metadata.height}",
+            fps=metadata.r_frame_rate,
+            duration_s=metadata.duration
+        )
 
+        metrics.UPLOAD_DURATION.observe(time.time() - upload_start)
         logger.info(f"Session {session_key} created successfully")
 
         return JSONResponse({
@@ -148,7 +383,8 @@ async def upload_cameras(
 @app.post("/api/v2/clip/create", response_model=ClipResponse)
 async def create_clip(
     session_key: str = Form(...),
-    segments: str = Form(...)  # JSON string
+    segments: str = Form(...),  # JSON string
+    job_id: Optional[str] = Form(None)
 ):
     """
     Create a clip from camera segments.
@@ -158,13 +394,18 @@ async def create_clip(
         segments: JSON array of segments, e.g.:
             [
                 {"camera_id": "C1", "start_s": 10.5, "end_s": 15.2},
-                {"camera_id": "C2", "start_s": 15.2, "end_s": 20.0}
+                {"camera_id": "C2", "start_s": 15.2, "end_s": 20.0},
+                {"camera_id": "C2", "start_s": 17.0, "end_s": 19.0, "speed": 0.5}
             ]
+            A segment with a speed other than 1 (a slow-motion replay) is re-encoded
+            on its own; the rest of the clip is stream-copied
+        job_id: Optional client-chosen ID to follow progress at /api/v2/jobs/{job_id}/events
 
     Returns:
         ClipResponse with clip_id and download URL
     """
     logger.info(f"Creating clip for session {session_key}")
+    traffic_capture.annotate(session_key=session_key)
 
     # Validate session
     if session_key not in camera_uploads:
@@ -174,19 +415,26 @@ async def create_clip(
 
     # Parse segments
     try:
-        segments_data = json.loads(segments)
-        clip_segments = [ClipSegment(**seg) for seg in segments_data]
+        with tracing.span("clip.parse_segments"):
+            segments_data = json.loads(segments)
+            clip_segments = [ClipSegment(**seg) for seg in segments_data]
+        traffic_capture.annotate(segments=[[seg.camera_id, seg.start_s, seg.end_s] for seg in clip_segments])
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid segments JSON: {e}")
 
     # Create clip
     try:
         start_time = time.time()
-        clip = clip_service.create_clip(
+        clip = await render_queue.run(
+            "clip",
+            clip_service.create_clip,
             segments=clip_segments,
-            camera_files=camera_files
+            camera_files=camera_files,
+            job_id=job_id
         )
         processing_time_ms = (time.time() - start_time) * 1000
+        session_usage.setdefault(session_key, ResourceUsage()).add(clip.resource_usage)
+        traffic_capture.annotate(clip_id=clip.clip_id)
 
         return ClipResponse(
             clip_id=clip.clip_id,
@@ -196,6 +444,8 @@ async def create_clip(
             processing_time_ms=processing_time_ms
         )
 
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error creating clip: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -203,12 +453,10 @@ async def create_clip(
 
 @app.get("/api/v2/clip/{clip_id}/download")
 async def download_clip(clip_id: str):
-    """Download a clip file"""
+    """Download a clip file (re-rendered if it was evicted)"""
     try:
-        clip_path = clip_service.get_clip_path(clip_id)
-
-        if not os.path.exists(clip_path):
-            raise HTTPException(status_code=404, detail="Clip file not found")
+        clip_path = await _rendered_path("clip_download", clip_service.cached_path, clip_service.ensure_rendered,
+                                         clip_id)
 
         return FileResponse(
             clip_path,
@@ -218,28 +466,112 @@ async def download_clip(clip_id: str):
 
     except KeyError:
         raise HTTPException(status_code=404, detail=f"Clip {clip_id} not found")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error downloading clip: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/v2/clip/{clip_id}/scorecard", response_model=ScorecardResponse)
+async def create_scorecard(clip_id: str, request: ScorecardRequest):
+    """
+    Burn a scoreboard bar into a clip over start_s-end_s.
+
+    The bar for each distinct score/event/clock is rendered once to a PNG and
+    reused; only the keyframe-aligned stretch around the window is re-encoded,
+    the rest of the clip is stream-copied.
+    """
+    state = ScorecardState(
+        team_a_score=request.team_a_score,
+        team_b_score=request.team_b_score,
+        event_type=request.event_type,
+        clock=request.clock,
+        team_a=request.team_a,
+        team_b=request.team_b
+    )
+    try:
+        render = await render_queue.run(
+            "scorecard",
+            scorecard_service.create,
+            clip_id, state, request.start_s, request.end_s, request.position,
+            job_id=request.job_id
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Clip {clip_id} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating scorecard: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return ScorecardResponse(
+        overlay_id=render.overlay_id,
+        clip_id=render.clip_id,
+        start_s=render.start_s,
+        end_s=render.end_s,
+        duration_s=render.duration_s,
+        encoded_s=render.encoded_s,
+        copied_s=render.copied_s,
+        filesize_bytes=render.filesize_bytes,
+        download_url=f"/api/v2/scorecard/{render.overlay_id}/download",
+        processing_time_ms=render.processing_time_ms
+    )
+
+
+@app.get("/api/v2/scorecard/{overlay_id}/download")
+async def download_scorecard(overlay_id: str):
+    """Download a clip with its scoreboard (re-rendered if it was evicted)"""
+    try:
+        path = await _rendered_path(
+            "scorecard_download", scorecard_service.cached_path, scorecard_service.ensure_rendered, overlay_id
+        )
+        return FileResponse(path, media_type="video/mp4", filename=f"{overlay_id}.mp4")
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e).strip("'"))
+    except Exception as e:
+        logger.error(f"Error downloading scorecard: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/v2/scorecard/{overlay_id}")
+async def delete_scorecard(overlay_id: str):
+    """Delete a scoreboard render"""
+    try:
+        scorecard_service.delete_render(overlay_id)
+        return {"message": f"Scorecard {overlay_id} deleted successfully"}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Scorecard {overlay_id} not found")
+
+
 @app.post("/api/v2/reel/create", response_model=ReelResponse)
 async def create_reel(request: ReelCreate):
     """
     Create a highlight reel from existing clips.
+    Clips are stream-copied where they can be. Clips not in the reel's format (the
+    requested one, or the most common one among the clips) are re-encoded scaled and
+    letterboxed to it (chunk-parallel, cached per clip). With a transition, only a
+    window around each cut is re-encoded; the rest of every clip is still copied.
+    Intro/outro bumpers are conformed to the clips' format once and stream-copied.
 
     Args:
-        request: ReelCreate with list of clip_ids
+        request: ReelCreate with list of clip_ids and optional format, transition and bumpers
 
     Returns:
         ReelResponse with reel_id and download URL
     """
     logger.info(f"Creating reel from {len(request.clip_ids)} clips")
+    traffic_capture.annotate(clip_ids=request.clip_ids)
 
     try:
         start_time = time.time()
-        reel = reel_service.create_reel(clip_ids=request.clip_ids)
+        profile = EncodeProfile(**request.format.model_dump()) if request.format else None
+        transition = Transition(**request.transition.model_dump()) if request.transition else None
+        reel = await render_queue.run("reel", reel_service.create_reel, clip_ids=request.clip_ids,
+                                      profile=profile, transition=transition, intro_id=request.intro_id,
+                                      outro_id=request.outro_id, job_id=request.job_id)
         processing_time_ms = (time.time() - start_time) * 1000
+        traffic_capture.annotate(reel_id=reel.reel_id)
 
         return ReelResponse(
             reel_id=reel.reel_id,
@@ -257,14 +589,71 @@ async def create_reel(request: ReelCreate):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/v2/reel/{reel_id}/clips", response_model=ReelResponse)
+async def insert_reel_clips(reel_id: str, request: ReelClipsInsert):
+    """
+    Append or insert clips into an existing reel.
+    Only the new clips and the clips after the insertion point are rewritten.
+    """
+    logger.info(f"Inserting {len(request.clip_ids)} clips into reel {reel_id}")
+    traffic_capture.annotate(clip_ids=request.clip_ids, index=request.index)
+
+    try:
+        start_time = time.time()
+        reel = await render_queue.run("reel_insert", reel_service.insert_clips, reel_id,
+                                      clip_ids=request.clip_ids, index=request.index, job_id=request.job_id)
+        processing_time_ms = (time.time() - start_time) * 1000
+
+        return ReelResponse(
+            reel_id=reel.reel_id,
+            duration_s=reel.duration_s,
+            filesize_bytes=reel.filesize_bytes,
+            num_clips=len(reel.clip_ids),
+            download_url=f"/api/v2/reel/{reel.reel_id}/download",
+            processing_time_ms=processing_time_ms
+        )
+
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Reel {reel_id} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error inserting clips into reel: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/v2/reel/{reel_id}/clips/{index}", response_model=ReelResponse)
+async def remove_reel_clip(reel_id: str, index: int):
+    """Remove the clip at a position from a reel"""
+    try:
+        start_time = time.time()
+        reel = await render_queue.run("reel_remove", reel_service.remove_clip, reel_id, index=index)
+        processing_time_ms = (time.time() - start_time) * 1000
+
+        return ReelResponse(
+            reel_id=reel.reel_id,
+            duration_s=reel.duration_s,
+            filesize_bytes=reel.filesize_bytes,
+            num_clips=len(reel.clip_ids),
+            download_url=f"/api/v2/reel/{reel.reel_id}/download",
+            processing_time_ms=processing_time_ms
+        )
+
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Reel {reel_id} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error removing clip from reel: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/v2/reel/{reel_id}/download")
 async def download_reel(reel_id: str):
-    """Download a reel file"""
+    """Download a reel file (re-rendered if it was evicted)"""
     try:
-        reel_path = reel_service.get_reel_path(reel_id)
-
-        if not os.path.exists(reel_path):
-            raise HTTPException(status_code=404, detail="Reel file not found")
+        reel_path = await _rendered_path("reel_download", reel_service.cached_path, reel_service.ensure_rendered,
+                                         reel_id)
 
         return FileResponse(
             reel_path,
@@ -274,6 +663,8 @@ async def download_reel(reel_id: str):
 
     except KeyError:
         raise HTTPException(status_code=404, detail=f"Reel {reel_id} not found")
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error downloading reel: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -290,7 +681,9 @@ async def list_clips():
                 "duration_s": clip.duration_s,
                 "filesize_bytes": clip.filesize_bytes,
                 "num_segments": len(clip.segments),
-                "created_at": clip.created_at.isoformat()
+                "created_at": clip.created_at.isoformat(),
+                "resource_usage": clip.resource_usage.to_dict(),
+                "sync_offsets": clip.sync_offsets
             }
             for clip in clips
         ]
@@ -308,7 +701,9 @@ async def list_reels():
                 "duration_s": reel.duration_s,
                 "filesize_bytes": reel.filesize_bytes,
                 "num_clips": len(reel.clip_ids),
-                "created_at": reel.created_at.isoformat()
+                "created_at": reel.created_at.isoformat(),
+                "resource_usage": reel.resource_usage.to_dict(),
+                "format": reel.profile.to_dict() if reel.profile else None
             }
             for reel in reels
         ]
@@ -317,12 +712,15 @@ async def list_reels():
 
 @app.delete("/api/v2/clip/{clip_id}")
 async def delete_clip(clip_id: str):
-    """Delete a clip"""
+    """Delete a clip (refused while a reel uses it)"""
     try:
-        clip_service.delete_clip(clip_id)
+        reel_service.delete_clip(clip_id)
+        scorecard_service.discard_clip(clip_id)
         return {"message": f"Clip {clip_id} deleted successfully"}
     except KeyError:
         raise HTTPException(status_code=404, detail=f"Clip {clip_id} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Error deleting clip: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -341,6 +739,606 @@ async def delete_reel(reel_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _export_status(export) -> AspectExportStatus:
+    outputs = []
+    if export.status == "done":
+        for target in export.targets:
+            info = target.to_dict()
+            outputs.append(ExportOutput(
+                name=target.name,
+                aspect=target.aspect,
+                width=info["width"],
+                height=info["height"],
+                download_url=f"/api/v2/export/{export.export_id}/{target.name}/download"
+            ))
+    return AspectExportStatus(
+        export_id=export.export_id,
+        job_id=export_jobs.get(export.export_id),
+        status=export.status,
+        error=export.error,
+        source_kind=export.source_kind,
+        source_id=export.source_id,
+        outputs=outputs,
+        filesize_bytes=export.filesize_bytes,
+        processing_time_ms=export.processing_time_ms
+    )
+
+
+async def _run_export(export_id: str, job_id: str):
+    try:
+        await render_queue.run("aspect_export", aspect_exporter.run, export_id, job_id=job_id)
+    except Exception as e:
+        logger.error(f"Background export {export_id} failed: {e}")
+
+
+@app.post("/api/v2/export/aspect", response_model=AspectExportStatus, status_code=202)
+async def create_aspect_export(request: AspectExportRequest):
+    """
+    Export a clip or reel as 1:1, 9:16 and/or 16:9 versions.
+
+    All formats are cropped/scaled/padded in one ffmpeg filter graph from a single
+    decode. Returns immediately; follow the job at /api/v2/jobs/{job_id}/events and
+    fetch /api/v2/export/{export_id} for the download URLs once it is done.
+    """
+    if (request.clip_id is None) == (request.reel_id is None):
+        raise HTTPException(status_code=400, detail="Set exactly one of clip_id or reel_id")
+    source_kind, source_id = ("clip", request.clip_id) if request.clip_id else ("reel", request.reel_id)
+
+    try:
+        targets = [AspectTarget(**target.model_dump()) for target in request.targets]
+        export = aspect_exporter.submit(source_kind, source_id, targets)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"{source_kind.capitalize()} {source_id} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    job_id = request.job_id or f"job_{uuid.uuid4().hex[:12]}"
+    export_jobs[export.export_id] = job_id
+    progress_tracker.queued(job_id, "aspect_export")
+    task = asyncio.create_task(_run_export(export.export_id, job_id))
+    export_tasks.add(task)
+    task.add_done_callback(export_tasks.discard)
+    return _export_status(export)
+
+
+@app.get("/api/v2/export/{export_id}", response_model=AspectExportStatus)
+async def get_aspect_export(export_id: str):
+    """Status of an export, with download URLs once it is done"""
+    try:
+        return _export_status(aspect_exporter.get_export(export_id))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Export {export_id} not found")
+
+
+@app.get("/api/v2/export/{export_id}/{name}/download")
+async def download_aspect_export(export_id: str, name: str):
+    """Download one output of a finished export (e.g. name 9x16), re-rendered if it was evicted"""
+    try:
+        path = await _rendered_path(
+            "export_download", aspect_exporter.cached_path, aspect_exporter.ensure_rendered, export_id, name
+        )
+        return FileResponse(path, media_type="video/mp4", filename=f"{export_id}_{name}.mp4")
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e).strip("'"))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error downloading export: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/v2/export/{export_id}")
+async def delete_aspect_export(export_id: str):
+    """Delete an export and its files"""
+    try:
+        aspect_exporter.delete_export(export_id)
+        export_jobs.pop(export_id, None)
+        return {"message": f"Export {export_id} deleted successfully"}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Export {export_id} not found")
+
+
+@app.put("/api/v2/{kind}/{output_id}/pin")
+async def pin_output(kind: str, output_id: str):
+    """Pin a clip or reel so it is never evicted"""
+    return _set_pinned(kind, output_id, True)
+
+
+@app.delete("/api/v2/{kind}/{output_id}/pin")
+async def unpin_output(kind: str, output_id: str):
+    """Unpin a clip or reel so it can be evicted under disk pressure"""
+    return _set_pinned(kind, output_id, False)
+
+
+def _set_pinned(kind: str, output_id: str, pinned: bool):
+    if kind not in ("clip", "reel"):
+        raise HTTPException(status_code=404, detail=f"Unknown output kind: {kind}")
+    try:
+        output_store.set_pinned(kind, output_id, pinned)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"{kind.capitalize()} {output_id} not found")
+    return {"message": f"{kind.capitalize()} {output_id} {'pinned' if pinned else 'unpinned'}"}
+
+
+@app.get("/api/v2/storage")
+async def storage_stats():
+    """Output store usage, watermarks and per-output access/pin/eviction state"""
+    return output_store.stats()
+
+
+@app.get("/api/v2/jobs/{job_id}")
+async def get_job_progress(job_id: str):
+    """Latest progress snapshot of a render job"""
+    try:
+        return progress_tracker.get(job_id).to_dict()
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+
+@app.get("/api/v2/jobs/{job_id}/events")
+async def job_progress_events(job_id: str):
+    """
+    Server-Sent Events stream of render job progress.
+
+    Open it before submitting the job (with the same job_id) to catch every
+    update. Each event is a JSON snapshot with status, percent, out_time_s,
+    total_s, speed and bytes; the stream ends when the job is done or failed.
+    """
+    async def event_stream():
+        async for snapshot in progress_tracker.subscribe(job_id):
+            if snapshot is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: progress\ndata: {json.dumps(snapshot)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/v2/admin/profiling")
+async def get_profiling(request: Request):
+    """Profiling toggle state and stored profiles"""
+    _check_admin(request)
+    return {
+        "profile_next": profiler.profile_next,
+        "interval_ms": profiler.interval_s * 1000,
+        "max_profiles": profiler.max_profiles,
+        "max_age_s": profiler.max_age_s,
+        "profiles": profiler.list_profiles()
+    }
+
+
+@app.put("/api/v2/admin/profiling")
+async def set_profiling(settings: ProfilingSettings, request: Request):
+    """Profile the next N requests (0 disarms)"""
+    _check_admin(request)
+    profiler.profile_next = settings.profile_next
+    return {"profile_next": profiler.profile_next}
+
+
+@app.get("/api/v2/admin/profiles/{profile_id}/{artifact}")
+async def download_profile(profile_id: str, artifact: str, request: Request):
+    """
+    Download a stored profile: artifact "cpu" is folded stacks (flamegraph.pl,
+    speedscope), "memory" the tracemalloc allocation diff.
+    """
+    _check_admin(request)
+    try:
+        path = profiler.artifact_path(profile_id, artifact)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} has no {artifact} artifact")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}_{os.path.basename(path)}")
+
+
+@app.delete("/api/v2/admin/profiles/{profile_id}")
+async def delete_profile(profile_id: str, request: Request):
+    """Delete a stored profile"""
+    _check_admin(request)
+    try:
+        profiler.delete(profile_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return {"message": f"Profile {profile_id} deleted"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus text exposition of pipeline metrics"""
+    try:
+        metrics.DISK_FREE_BYTES.set(shutil.disk_usage(OUTPUT_DIR).free)
+    except OSError:
+        pass
+    used = output_store.used_bytes()
+    metrics.OUTPUT_STORE_BYTES.set(used)
+    metrics.OUTPUT_STORE_HEADROOM_BYTES.set(output_store.high_watermark_bytes - used)
+    metrics.QUEUE_DEPTH.set(render_queue.waiting)
+    metrics.QUEUE_RUNNING.set(render_queue.running)
+
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/v2/session/{session_key}/usage")
+async def get_session_usage(session_key: str):
+    """CPU, peak memory and block I/O of all ffmpeg/ffprobe children run for a session"""
+    if session_key not in camera_uploads:
+        raise HTTPException(status_code=404, detail=f"Session {session_key} not found")
+    return session_usage.get(session_key, ResourceUsage()).to_dict()
+
+
+@app.get("/api/v2/session/{session_key}/sync", response_model=SessionSync)
+async def get_session_sync(session_key: str):
+    """
+    Per-camera sync offsets (waits for the analysis started at upload).
+    Clip segment times are on the reference camera's timeline.
+    """
+    if session_key not in camera_uploads:
+        raise HTTPException(status_code=404, detail=f"Session {session_key} not found")
+
+    try:
+        result = await run_in_threadpool(sync_service.analyze, camera_uploads[session_key])
+    except Exception as e:
+        logger.error(f"Error analyzing sync: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return SessionSync(
+        session_key=session_key,
+        reference_camera=result.reference_camera,
+        cameras=[CameraSync(**camera.to_dict()) for camera in result.cameras.values()]
+    )
+
+
+@app.post("/api/v2/session/{session_key}/switch_plan", response_model=SwitchPlanResponse)
+async def plan_switches(session_key: str, request: SwitchPlanRequest):
+    """
+    Propose which camera to show over an event window, from each camera's motion energy.
+    The returned segments can be sent unchanged to /api/v2/clip/create.
+    """
+    if session_key not in camera_uploads:
+        raise HTTPException(status_code=404, detail=f"Session {session_key} not found")
+
+    try:
+        plan = await render_queue.run(
+            "switch_plan",
+            switch_planner.plan,
+            camera_files=camera_uploads[session_key],
+            start_s=request.start_s,
+            end_s=request.end_s,
+            cameras=request.cameras,
+            interval_s=request.interval_s,
+            min_shot_s=request.min_shot_s,
+            switch_penalty=request.switch_penalty,
+            method=request.method
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error planning switches: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return SwitchPlanResponse(
+        session_key=session_key,
+        start_s=plan.start_s,
+        end_s=plan.end_s,
+        interval_s=plan.interval_s,
+        segments=[ClipSegment(camera_id=camera_id, start_s=start_s, end_s=end_s)
+                  for camera_id, start_s, end_s in plan.segments],
+        energy=plan.energy,
+        processing_time_ms=plan.processing_time_ms
+    )
+
+
+@app.post("/api/v2/session/{session_key}/highlights", response_model=HighlightScanResponse)
+async def scan_highlights(session_key: str, request: HighlightScanRequest):
+    """
+    Rank likely highlight moments in one camera from a single low-resolution pass
+    (motion, scene cuts and loudness against a rolling baseline).
+    Candidate times are on the session timeline, like clip segments.
+    """
+    if session_key not in camera_uploads:
+        raise HTTPException(status_code=404, detail=f"Session {session_key} not found")
+    camera_files = camera_uploads[session_key]
+    if request.camera_id not in camera_files:
+        raise HTTPException(status_code=400, detail=f"Camera {request.camera_id} not found in session")
+
+    try:
+        scan = await render_queue.run(
+            "highlight_scan",
+            highlight_detector.scan,
+            camera_files[request.camera_id],
+            interval_s=request.interval_s,
+            top_k=request.top_k,
+            min_score=request.min_score,
+            max_event_s=request.max_event_s,
+            pre_roll_s=request.pre_roll_s,
+            post_roll_s=request.post_roll_s,
+            use_audio=request.use_audio,
+            job_id=request.job_id
+        )
+        offset = 0.0
+        if AUTO_SYNC:
+            sync = await run_in_threadpool(sync_service.analyze, camera_files)
+            offset = sync.offset(request.camera_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error scanning highlights: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Source time = timeline time + offset
+    candidates = [
+        HighlightCandidate(
+            start_s=round(max(c.start_s - offset, 0.0), 3),
+            end_s=round(c.end_s - offset, 3),
+            peak_s=round(c.peak_s - offset, 3),
+            score=c.score,
+            features=c.features
+        )
+        for c in scan.candidates if c.end_s - offset > 0
+    ]
+    return HighlightScanResponse(
+        session_key=session_key,
+        camera_id=request.camera_id,
+        duration_s=scan.duration_s,
+        processing_time_ms=scan.processing_time_ms,
+        speed=round(scan.speed, 2),
+        has_audio=scan.has_audio,
+        candidates=candidates
+    )
+
+
+@app.post("/api/v2/session/{session_key}/audio_events", response_model=AudioEventsResponse)
+async def detect_audio_events(session_key: str, request: AudioEventsRequest):
+    """
+    Whistles and crowd surges from the cameras' audio tracks, merged on the session timeline.
+    Each camera's audio is streamed once as low-rate PCM; no video is decoded.
+    """
+    if session_key not in camera_uploads:
+        raise HTTPException(status_code=404, detail=f"Session {session_key} not found")
+    camera_files = camera_uploads[session_key]
+    cameras = request.cameras or sorted(camera_files)
+    unknown = [camera_id for camera_id in cameras if camera_id not in camera_files]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Camera {unknown[0]} not found in session")
+
+    start_time = time.time()
+    try:
+        sync = sync_service.cached(camera_files) if AUTO_SYNC else None
+        offsets = sync.offsets() if sync else {}
+        events, scans = await render_queue.run(
+            "audio_events",
+            audio_event_detector.detect_session,
+            {camera_id: camera_files[camera_id] for camera_id in cameras},
+            offsets,
+            kinds=request.kinds,
+            min_confidence=request.min_confidence,
+            job_id=request.job_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error detecting audio events: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return AudioEventsResponse(
+        session_key=session_key,
+        events=[AudioEvent(**event.to_dict()) for event in events],
+        cameras=[
+            CameraAudioScan(camera_id=camera_id, has_audio=scan.has_audio, duration_s=round(scan.duration_s, 2),
+                            speed=round(scan.speed, 1), events=len(scan.events))
+            for camera_id, scan in scans.items()
+        ],
+        processing_time_ms=(time.time() - start_time) * 1000
+    )
+
+
+@app.post("/api/v2/session/{session_key}/layout", response_model=LayoutResponse)
+async def create_layout(session_key: str, request: LayoutRequest):
+    """
+    Render several cameras of a window as one video: 2x2 grid, side-by-side,
+    or picture-in-picture (zoom camera inset over the wide one).
+
+    All cameras are decoded, fitted and stacked in one ffmpeg filter graph,
+    time-aligned by the session's sync offsets; long windows are composed in
+    parallel chunks.
+    """
+    if session_key not in camera_uploads:
+        raise HTTPException(status_code=404, detail=f"Session {session_key} not found")
+
+    spec = LayoutSpec(
+        layout=request.layout,
+        cameras=tuple(request.cameras or ()),
+        pip_scale=request.pip_scale,
+        pip_corner=request.pip_corner
+    )
+    profile = EncodeProfile(**request.format.model_dump()) if request.format else None
+    try:
+        render = await render_queue.run(
+            "layout",
+            layout_renderer.render,
+            camera_uploads[session_key], spec, request.start_s, request.end_s, profile,
+            job_id=request.job_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error rendering layout: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    session_usage.setdefault(session_key, ResourceUsage()).add(render.resource_usage)
+    return LayoutResponse(
+        layout_id=render.layout_id,
+        layout=render.spec.layout,
+        cameras=list(render.spec.camera_ids),
+        start_s=render.start_s,
+        end_s=render.end_s,
+        duration_s=render.duration_s,
+        format=render.profile.to_dict(),
+        sync_offsets=render.offsets,
+        chunks=render.chunks,
+        filesize_bytes=render.filesize_bytes,
+        download_url=f"/api/v2/layout/{render.layout_id}/download",
+        processing_time_ms=render.processing_time_ms
+    )
+
+
+@app.get("/api/v2/layout/{layout_id}/download")
+async def download_layout(layout_id: str):
+    """Download a layout render (re-rendered if it was evicted)"""
+    try:
+        path = await _rendered_path(
+            "layout_download", layout_renderer.cached_path, layout_renderer.ensure_rendered, layout_id
+        )
+        return FileResponse(path, media_type="video/mp4", filename=f"{layout_id}.mp4")
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e).strip("'"))
+    except Exception as e:
+        logger.error(f"Error downloading layout: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/v2/layout/{layout_id}")
+async def delete_layout(layout_id: str):
+    """Delete a layout render"""
+    try:
+        layout_renderer.delete_render(layout_id)
+        return {"message": f"Layout {layout_id} deleted successfully"}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Layout {layout_id} not found")
+
+
+@app.post("/api/v2/bumpers", response_model=BumperResponse)
+async def upload_bumper(name: str = Form(...), video: UploadFile = File(...)):
+    """
+    Add an intro/outro bumper to the library.
+    It is conformed to each clip stream format the first time a reel in that format uses it.
+    """
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4", prefix="bumper_")
+    content = await video.read()
+    temp_file.write(content)
+    temp_file.close()
+    metrics.UPLOAD_BYTES.inc(len(content))
+
+    try:
+        bumper = await run_in_threadpool(bumper_library.add, name, temp_file.name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error adding bumper: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    return BumperResponse(**bumper.to_dict())
+
+
+@app.get("/api/v2/bumpers")
+async def list_bumpers():
+    """List all bumpers"""
+    return {"bumpers": [bumper.to_dict() for bumper in bumper_library.list_bumpers()]}
+
+
+@app.delete("/api/v2/bumpers/{bumper_id}")
+async def delete_bumper(bumper_id: str):
+    """Delete a bumper and its conformed copies (refused while a reel uses it)"""
+    try:
+        reel_service.delete_bumper(bumper_id)
+        return {"message": f"Bumper {bumper_id} deleted successfully"}
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Bumper {bumper_id} not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/api/v2/session/{session_key}/activity", response_model=SessionActivity)
+async def get_session_activity(session_key: str, resolution_s: float = 1.0):
+    """
+    Per-camera activity heatmap on the session timeline, from compressed packet sizes
+    (demux only, no decoding), with frozen and black stretches. Cameras are aligned
+    only if the session's sync offsets have already been analyzed.
+    """
+    if session_key not in camera_uploads:
+        raise HTTPException(status_code=404, detail=f"Session {session_key} not found")
+    if not 0 < resolution_s <= 60:
+        raise HTTPException(status_code=400, detail="resolution_s must be in (0, 60]")
+    camera_files = camera_uploads[session_key]
+
+    start_time = time.time()
+    try:
+        sync = sync_service.cached(camera_files) if AUTO_SYNC else None
+        offsets = sync.offsets() if sync else {}
+        timelines = await run_in_threadpool(packet_activity.session_timelines, camera_files, offsets, resolution_s)
+    except Exception as e:
+        logger.error(f"Error computing activity: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return SessionActivity(
+        session_key=session_key,
+        resolution_s=resolution_s,
+        cameras=[
+            CameraActivity(
+                camera_id=camera_id,
+                duration_s=timeline.duration_s,
+                keyframes=timeline.keyframes,
+                activity=timeline.activity,
+                kbps=timeline.kbps,
+                frozen=[list(run) for run in timeline.frozen],
+                black=[list(run) for run in timeline.black]
+            )
+            for camera_id, timeline in timelines.items()
+        ],
+        processing_time_ms=(time.time() - start_time) * 1000
+    )
+
+
+@app.get("/api/v2/analyzers")
+async def list_analyzers():
+    """Registered analyzers and the decoded stream (video/audio) each consumes"""
+    return {"analyzers": analysis_engine.available()}
+
+
+@app.post("/api/v2/session/{session_key}/analysis", response_model=AnalysisResponse)
+async def analyze_session(session_key: str, request: AnalysisRequest):
+    """
+    Run analyzers over a session's cameras. Each camera is decoded once for all of them;
+    cached results are reused, so repeating a request is cheap.
+    """
+    if session_key not in camera_uploads:
+        raise HTTPException(status_code=404, detail=f"Session {session_key} not found")
+    camera_files = camera_uploads[session_key]
+    cameras = request.cameras or sorted(camera_files)
+    unknown = [camera_id for camera_id in cameras if camera_id not in camera_files]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Camera {unknown[0]} not found in session")
+
+    try:
+        analyses = await render_queue.run(
+            "analysis",
+            analysis_engine.analyze_files,
+            {camera_id: camera_files[camera_id] for camera_id in cameras},
+            request.analyzers,
+            job_id=request.job_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error analyzing session: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return AnalysisResponse(
+        session_key=session_key,
+        cameras=[
+            CameraAnalysis(
+                camera_id=camera_id,
+                analyzers={name: analysis.summary(name) for name in analysis.results},
+                cached=analysis.cached,
+                decoded_s=round(analysis.decoded_s, 2),
+                processing_time_ms=analysis.processing_time_ms
+            )
+            for camera_id, analysis in analyses.items()
+        ]
+    )
+
+
 @app.delete("/api/v2/session/{session_key}")
 async def cleanup_session(session_key: str):
     """Cleanup session and temporary camera files"""
@@ -348,6 +1346,10 @@ async def cleanup_session(session_key: str):
         raise HTTPException(status_code=404, detail=f"Session {session_key} not found")
 
     camera_files = camera_uploads[session_key]
+    sync_service.forget(camera_files)
+    for path in camera_files.values():
+        analysis_engine.forget(path)
+        packet_activity.forget(path)
 
     # Delete temp files
     for camera_id, path in camera_files.items():
@@ -360,6 +1362,7 @@ async def cleanup_session(session_key: str):
 
     # Remove from memory
     del camera_uploads[session_key]
+    session_usage.pop(session_key, None)
 
     return {"message": f"Session {session_key} cleaned up successfully"}
 
@@ -2,7 +2,17 @@
 
 from .session import CameraFiles
 from .clip import Clip, ClipSegment, ClipResponse
-from .reel import Reel, ReelCreate, ReelResponse
+from .reel import Reel, ReelFormat, ReelTransition, ReelCreate, ReelClipsInsert, ReelResponse
+from .sync import CameraSync, SessionSync
+from .switch_plan import SwitchPlanRequest, SwitchPlanResponse
+from .highlights import HighlightScanRequest, HighlightCandidate, HighlightScanResponse
+from .analysis import AnalysisRequest, CameraAnalysis, AnalysisResponse
+from .activity import CameraActivity, SessionActivity
+from .audio_events import AudioEventsRequest, AudioEvent, CameraAudioScan, AudioEventsResponse
+from .export import ExportTarget, AspectExportRequest, ExportOutput, AspectExportStatus
+from .scorecard import ScorecardRequest, ScorecardResponse
+from .layout import LayoutRequest, LayoutResponse
+from .bumper import BumperResponse
 
 __all__ = [
     "CameraFiles",
@@ -10,6 +20,34 @@ __all__ = [
     "ClipSegment",
     "ClipResponse",
     "Reel",
+    "ReelFormat",
+    "ReelTransition",
     "ReelCreate",
+    "ReelClipsInsert",
     "ReelResponse",
+    "CameraSync",
+    "SessionSync",
+    "SwitchPlanRequest",
+    "SwitchPlanResponse",
+    "HighlightScanRequest",
+    "HighlightCandidate",
+    "HighlightScanResponse",
+    "AnalysisRequest",
+    "CameraAnalysis",
+    "AnalysisResponse",
+    "CameraActivity",
+    "SessionActivity",
+    "AudioEventsRequest",
+    "AudioEvent",
+    "CameraAudioScan",
+    "AudioEventsResponse",
+    "ExportTarget",
+    "AspectExportRequest",
+    "ExportOutput",
+    "AspectExportStatus",
+    "ScorecardRequest",
+    "ScorecardResponse",
+    "LayoutRequest",
+    "LayoutResponse",
+    "BumperResponse",
 ]
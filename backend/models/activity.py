@@ -0,0 +1,42 @@
+"""Decode-free activity timeline models"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class CameraActivity(BaseModel):
+    """Activity of one camera on the session timeline"""
+    camera_id: str
+    duration_s: float
+    keyframes: int
+    activity: List[Optional[float]] = Field(
+        ..., description="0-1 per bucket, relative to this camera's busiest moments (null where no footage)")
+    kbps: List[Optional[float]] = Field(..., description="Video bitrate per bucket")
+    frozen: List[List[float]] = Field(default_factory=list, description="[start_s, end_s] of frozen picture")
+    black: List[List[float]] = Field(default_factory=list, description="[start_s, end_s] of black picture")
+
+
+class SessionActivity(BaseModel):
+    """Per-camera activity heatmap from compressed packet sizes (no decoding)"""
+    session_key: str
+    resolution_s: float
+    cameras: List[CameraActivity]
+    processing_time_ms: float
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_key": "sess_1700000000_ab12cd34",
+                "resolution_s": 1.0,
+                "cameras": [{
+                    "camera_id": "C1",
+                    "duration_s": 5400.0,
+                    "keyframes": 2700,
+                    "activity": [0.41, 0.44, 0.87, 0.93, 0.52],
+                    "kbps": [2100.5, 2230.1, 4410.8, 4620.3, 2650.0],
+                    "frozen": [],
+                    "black": [[0.0, 2.1]]
+                }],
+                "processing_time_ms": 620
+            }
+        }
@@ -0,0 +1,52 @@
+"""Shared-decode analysis models"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+
+class AnalysisRequest(BaseModel):
+    """Analyzers to run over a session's cameras"""
+    cameras: Optional[List[str]] = Field(None, description="Cameras to analyze (default: all)")
+    analyzers: Optional[List[str]] = Field(None, description="Analyzer names (default: all registered)")
+    job_id: Optional[str] = Field(None, description="Job ID for following progress via /api/v2/jobs/{job_id}")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "cameras": ["C1", "C2"],
+                "analyzers": ["motion", "black_frozen", "loudness"],
+                "job_id": "job_3f2a9c1b7d4e"
+            }
+        }
+
+
+class CameraAnalysis(BaseModel):
+    """Summarized analyzer results for one camera (times in that camera's file)"""
+    camera_id: str
+    analyzers: Dict[str, Dict[str, Any]]
+    cached: List[str] = Field(default_factory=list, description="Analyzers served from cache")
+    decoded_s: float = Field(0.0, description="Media seconds decoded for this request")
+    processing_time_ms: float
+
+
+class AnalysisResponse(BaseModel):
+    """Analysis of a session's cameras"""
+    session_key: str
+    cameras: List[CameraAnalysis]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_key": "sess_1700000000_ab12cd34",
+                "cameras": [{
+                    "camera_id": "C1",
+                    "analyzers": {
+                        "black_frozen": {"black": [[0.0, 2.1]], "frozen": []},
+                        "loudness": {"has_audio": True, "mean_db": -35.1, "peak_db": -17.8, "peak_s": 1840.3}
+                    },
+                    "cached": ["black_frozen"],
+                    "decoded_s": 5400.0,
+                    "processing_time_ms": 95000
+                }]
+            }
+        }
@@ -0,0 +1,65 @@
+"""Audio event detection models"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class AudioEventsRequest(BaseModel):
+    """Scan a session's camera audio for whistles and crowd surges"""
+    cameras: Optional[List[str]] = Field(None, description="Cameras to scan (default: all)")
+    kinds: Optional[List[str]] = Field(None, description="Event kinds: 'whistle', 'crowd' (default: both)")
+    min_confidence: float = Field(0.3, description="Drop merged events below this confidence", ge=0, le=1)
+    job_id: Optional[str] = Field(None, description="Job ID for following progress via /api/v2/jobs/{job_id}")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "kinds": ["whistle", "crowd"],
+                "min_confidence": 0.5,
+                "job_id": "job_3f2a9c1b7d4e"
+            }
+        }
+
+
+class AudioEvent(BaseModel):
+    """Whistle or crowd surge on the session timeline"""
+    kind: str
+    start_s: float
+    end_s: float
+    peak_s: float
+    confidence: float = Field(..., description="0-1; raised when several cameras hear the event")
+    level_db: float = Field(..., description="Loudness at the peak in dBFS")
+    cameras: List[str]
+
+
+class CameraAudioScan(BaseModel):
+    """Per-camera scan statistics"""
+    camera_id: str
+    has_audio: bool
+    duration_s: float
+    speed: float = Field(..., description="Audio seconds scanned per wall-clock second")
+    events: int
+
+
+class AudioEventsResponse(BaseModel):
+    """Audio events across a session, sorted by time"""
+    session_key: str
+    events: List[AudioEvent]
+    cameras: List[CameraAudioScan]
+    processing_time_ms: float
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_key": "sess_1700000000_ab12cd34",
+                "events": [
+                    {"kind": "whistle", "start_s": 1838.2, "end_s": 1839.0, "peak_s": 1838.5,
+                     "confidence": 0.97, "level_db": -21.4, "cameras": ["C1", "C3"]},
+                    {"kind": "crowd", "start_s": 1840.1, "end_s": 1846.6, "peak_s": 1841.3,
+                     "confidence": 1.0, "level_db": -14.2, "cameras": ["C1", "C2", "C3"]}
+                ],
+                "cameras": [{"camera_id": "C1", "has_audio": True, "duration_s": 5400.0, "speed": 310.5,
+                             "events": 57}],
+                "processing_time_ms": 18000
+            }
+        }
@@ -0,0 +1,22 @@
+"""Bumper (intro/outro) data models"""
+
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class BumperResponse(BaseModel):
+    """A bumper in the library"""
+    bumper_id: str
+    name: str
+    duration_s: float
+    created_at: datetime = Field(default_factory=datetime.now)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "bumper_id": "bumper_1a2b3c4d5e6f",
+                "name": "Club intro 2026",
+                "duration_s": 4.0,
+                "created_at": "2026-03-01T12:00:00"
+            }
+        }
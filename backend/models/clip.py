@@ -1,7 +1,7 @@
 """Clip data models - simplified for frontend-driven flow"""
 
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Dict
 from datetime import datetime
 
 
@@ -10,13 +10,19 @@ class ClipSegment(BaseModel):
     camera_id: str = Field(..., description="Camera identifier: C1, C2, C3, or C4")
     start_s: float = Field(..., description="Start time in seconds", ge=0)
     end_s: float = Field(..., description="End time in seconds", gt=0)
+    speed: float = Field(1.0, description="Playback speed, e.g. 0.5 for a half-speed replay (re-encoded unless 1.0)",
+                         ge=0.1, le=4.0)
+    interpolate: bool = Field(False, description="Slowed segments: synthesize in-between frames (motion "
+                                                 "interpolation, much slower to encode) instead of repeating frames")
 
     class Config:
         json_schema_extra = {
             "example": {
                 "camera_id": "C1",
                 "start_s": 10.5,
-                "end_s": 15.2
+                "end_s": 15.2,
+                "speed": 1.0,
+                "interpolate": False
             }
         }
 
@@ -28,7 +34,11 @@ class Clip(BaseModel):
     output_path: str
     filesize_bytes: int
     duration_s: float
+    camera_files: Dict[str, str] = Field(default_factory=dict, description="Source files, kept for re-rendering")
     created_at: datetime = Field(default_factory=datetime.now)
+    resource_usage: Dict[str, float] = Field(default_factory=dict, description="CPU/memory/IO of its ffmpeg children")
+    sync_offsets: Dict[str, float] = Field(default_factory=dict,
+                                           description="Per-camera sync offsets already applied to the segment times")
 
 
 class ClipResponse(BaseModel):
@@ -0,0 +1,73 @@
+"""Aspect export models"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class ExportTarget(BaseModel):
+    """One output format"""
+    aspect: str = Field(..., description="'1:1', '9:16' or '16:9'")
+    size: int = Field(1080, description="Short edge in pixels", ge=16, le=4320)
+    fit: str = Field("crop", description="'crop' (fill, cut overflow), 'pad' (letterbox) or 'stretch'")
+    crop_aspect: Optional[str] = Field(None, description="Center-crop the source to this W:H first, e.g. '5:4'")
+    focus_x: float = Field(0.5, description="Horizontal crop position (0 = left, 1 = right)", ge=0, le=1)
+
+
+class AspectExportRequest(BaseModel):
+    """Export a clip or reel in several aspect ratios from one decode"""
+    clip_id: Optional[str] = Field(None, description="Clip to export (set this or reel_id)")
+    reel_id: Optional[str] = Field(None, description="Reel to export (set this or clip_id)")
+    targets: List[ExportTarget] = Field(..., description="Output formats, at most one per aspect")
+    job_id: Optional[str] = Field(None, description="Client-chosen ID to follow progress at /api/v2/jobs/{job_id}/events "
+                                                    "(generated when omitted)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "reel_id": "reel_xyz789",
+                "targets": [
+                    {"aspect": "9:16", "size": 1080},
+                    {"aspect": "1:1", "size": 1080, "fit": "stretch", "crop_aspect": "5:4"},
+                    {"aspect": "16:9", "size": 720, "fit": "pad"}
+                ],
+                "job_id": "job_5f2c9a"
+            }
+        }
+
+
+class ExportOutput(BaseModel):
+    """A finished output file"""
+    name: str
+    aspect: str
+    width: int
+    height: int
+    download_url: str
+
+
+class AspectExportStatus(BaseModel):
+    """State of an export job"""
+    export_id: str
+    job_id: Optional[str] = None
+    status: str = Field(..., description="queued, running, done or failed")
+    error: Optional[str] = None
+    source_kind: str
+    source_id: str
+    outputs: List[ExportOutput] = Field(default_factory=list, description="Filled in once the export is done")
+    filesize_bytes: int = 0
+    processing_time_ms: float = 0.0
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "export_id": "export_4b1e0c9d2a7f",
+                "job_id": "job_5f2c9a",
+                "status": "done",
+                "error": None,
+                "source_kind": "reel",
+                "source_id": "reel_xyz789",
+                "outputs": [{"name": "9x16", "aspect": "9:16", "width": 1080, "height": 1920,
+                             "download_url": "/api/v2/export/export_4b1e0c9d2a7f/9x16/download"}],
+                "filesize_bytes": 48234112,
+                "processing_time_ms": 21500
+            }
+        }
@@ -0,0 +1,63 @@
+"""Automatic highlight detection models"""
+
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+
+class HighlightScanRequest(BaseModel):
+    """Scan one camera of a session for likely highlight moments"""
+    camera_id: str = Field("C1", description="Camera to scan (a wide angle usually works best)")
+    interval_s: float = Field(1.0, description="Scoring granularity in seconds", gt=0, le=10)
+    top_k: int = Field(20, description="Maximum number of candidates returned", ge=1, le=200)
+    min_score: float = Field(3.0, description="Combined z-score an interval needs to count as eventful", ge=0)
+    pre_roll_s: float = Field(5.0, description="Seconds kept before the first eventful interval", ge=0)
+    post_roll_s: float = Field(3.0, description="Seconds kept after the last eventful interval", ge=0)
+    max_event_s: float = Field(30.0, description="Longest stretch merged into one candidate", gt=0)
+    use_audio: bool = Field(True, description="Include crowd/whistle loudness when the file has audio")
+    job_id: Optional[str] = Field(None, description="Job ID for following progress via /api/v2/jobs/{job_id}")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "camera_id": "C1",
+                "top_k": 10,
+                "min_score": 3.0,
+                "job_id": "job_3f2a9c1b7d4e"
+            }
+        }
+
+
+class HighlightCandidate(BaseModel):
+    """Candidate event window on the session timeline"""
+    start_s: float
+    end_s: float
+    peak_s: float
+    score: float = Field(..., description="Peak combined z-score")
+    features: Dict[str, float] = Field(default_factory=dict, description="Feature values at the peak interval")
+
+
+class HighlightScanResponse(BaseModel):
+    """Ranked candidates (highest score first), ready to use as clip windows"""
+    session_key: str
+    camera_id: str
+    duration_s: float
+    processing_time_ms: float
+    speed: float = Field(..., description="Media seconds scanned per wall-clock second")
+    has_audio: bool
+    candidates: List[HighlightCandidate]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_key": "sess_1700000000_ab12cd34",
+                "camera_id": "C1",
+                "duration_s": 5400.0,
+                "processing_time_ms": 210000,
+                "speed": 25.7,
+                "has_audio": True,
+                "candidates": [
+                    {"start_s": 1835.0, "end_s": 1851.0, "peak_s": 1840.5, "score": 6.2,
+                     "features": {"motion_mean": 7.9, "motion_peak": 11.4, "cuts": 0, "loudness_db": -18.3}}
+                ]
+            }
+        }
@@ -0,0 +1,68 @@
+"""Multi-angle layout models"""
+
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+from .reel import ReelFormat
+
+
+class LayoutRequest(BaseModel):
+    """Compose several cameras of a session into one video"""
+    layout: str = Field(..., description="'grid' (2x2), 'side_by_side' or 'pip' (zoom camera inset over the wide one)")
+    start_s: float = Field(..., description="Window start on the session timeline", ge=0)
+    end_s: float = Field(..., description="Window end on the session timeline", gt=0)
+    cameras: Optional[List[str]] = Field(None, description="Cameras in tile order (default: C1-C4 for grid, C1+C3 for "
+                                                           "side_by_side, C1 with C2 inset for pip)")
+    pip_scale: float = Field(0.3, description="Inset size relative to the output", ge=0.1, le=0.5)
+    pip_corner: str = Field("bottom_right", description="Inset corner",
+                            pattern="^(top_left|top_right|bottom_left|bottom_right)$")
+    format: Optional[ReelFormat] = Field(None, description="Output format (default: 1280x720 at 30 fps)")
+    job_id: Optional[str] = Field(None, description="Client-chosen ID to follow progress at /api/v2/jobs/{job_id}/events")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "layout": "pip",
+                "start_s": 120.0,
+                "end_s": 135.0,
+                "cameras": ["C3", "C4"],
+                "pip_scale": 0.3,
+                "pip_corner": "top_right",
+                "format": {"width": 1280, "height": 720, "fps": 30}
+            }
+        }
+
+
+class LayoutResponse(BaseModel):
+    """A finished layout render"""
+    layout_id: str
+    layout: str
+    cameras: List[str]
+    start_s: float
+    end_s: float
+    duration_s: float
+    format: Dict[str, Any]
+    sync_offsets: Dict[str, float] = Field(default_factory=dict, description="Per-camera offsets applied (seconds)")
+    chunks: int = Field(..., description="Pieces composed in parallel")
+    filesize_bytes: int
+    download_url: str
+    processing_time_ms: float
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "layout_id": "layout_1f9a3c7b2d4e",
+                "layout": "pip",
+                "cameras": ["C3", "C4"],
+                "start_s": 120.0,
+                "end_s": 135.0,
+                "duration_s": 15.0,
+                "format": {"width": 1280, "height": 720, "fps": 30.0, "crf": 23, "preset": "veryfast",
+                           "pad_color": "black", "codec": "h264", "pix_fmt": "yuv420p", "codec_profile": None},
+                "sync_offsets": {"C3": 0.0, "C4": 0.42},
+                "chunks": 2,
+                "filesize_bytes": 6234112,
+                "download_url": "/api/v2/layout/layout_1f9a3c7b2d4e/download",
+                "processing_time_ms": 4200
+            }
+        }
@@ -0,0 +1,15 @@
+"""Profiling admin data models"""
+
+from pydantic import BaseModel, Field
+
+
+class ProfilingSettings(BaseModel):
+    """Admin toggle for request profiling"""
+    profile_next: int = Field(..., description="Profile this many upcoming requests (0 turns the toggle off)", ge=0)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "profile_next": 5
+            }
+        }
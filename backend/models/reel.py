@@ -1,18 +1,66 @@
 """Reel (highlight compilation) data models"""
 
 from pydantic import BaseModel, Field
-from typing import List
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 
+class ReelFormat(BaseModel):
+    """Letterboxed output format for a re-encoded reel"""
+    width: int = Field(1280, description="Output width", ge=16, le=3840)
+    height: int = Field(720, description="Output height", ge=16, le=2160)
+    fps: float = Field(30.0, description="Output frame rate", gt=0, le=120)
+    crf: int = Field(23, description="x264 quality (lower is better)", ge=0, le=51)
+    preset: str = Field("veryfast", description="x264 preset",
+                        pattern="^(ultrafast|superfast|veryfast|faster|fast|medium|slow|slower|veryslow)$")
+    pad_color: str = Field("black", description="Letterbox bar color", pattern="^[A-Za-z0-9#]+$")
+
+
+class ReelTransition(BaseModel):
+    """Blend between consecutive clips of a reel (only a window around each cut is re-encoded)"""
+    type: str = Field("crossfade", description="crossfade (clips overlap) or dip_to_black (fade out, then in)",
+                      pattern="^(crossfade|dip_to_black)$")
+    duration_s: float = Field(0.5, description="Length of the blend; a crossfade shortens the reel by this much "
+                                               "per cut", ge=0.1, le=2.0)
+
+
 class ReelCreate(BaseModel):
     """Request to create a highlight reel from existing clips"""
     clip_ids: List[str] = Field(..., description="List of clip IDs to include in reel")
+    format: Optional[ReelFormat] = Field(None, description="Output format; clips not in it are re-encoded scaled and "
+                                                          "padded (default: stream-copy, clips in other formats are "
+                                                          "conformed to the most common one)")
+    transition: Optional[ReelTransition] = Field(None, description="Transition at every cut between clips "
+                                                                  "(default: hard cuts)")
+    intro_id: Optional[str] = Field(None, description="Bumper played before the first clip")
+    outro_id: Optional[str] = Field(None, description="Bumper played after the last clip")
+    job_id: Optional[str] = Field(None, description="Client-chosen ID to follow progress at /api/v2/jobs/{job_id}/events")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "clip_ids": ["clip_abc123", "clip_def456", "clip_ghi789"],
+                "format": {"width": 1280, "height": 720, "fps": 30},
+                "transition": {"type": "crossfade", "duration_s": 0.5},
+                "intro_id": "bumper_1a2b3c",
+                "outro_id": None,
+                "job_id": "job_5f2c9a"
+            }
+        }
+
+
+class ReelClipsInsert(BaseModel):
+    """Request to insert clips into an existing reel"""
+    clip_ids: List[str] = Field(..., description="List of clip IDs to insert")
+    index: Optional[int] = Field(None, description="Position to insert at (default: append)", ge=0)
+    job_id: Optional[str] = Field(None, description="Client-chosen ID to follow progress at /api/v2/jobs/{job_id}/events")
 
     class Config:
         json_schema_extra = {
             "example": {
-                "clip_ids": ["clip_abc123", "clip_def456", "clip_ghi789"]
+                "clip_ids": ["clip_jkl012"],
+                "index": None,
+                "job_id": None
             }
         }
 
@@ -25,6 +73,11 @@ class Reel(BaseModel):
     filesize_bytes: int
     duration_s: float
     created_at: datetime = Field(default_factory=datetime.now)
+    resource_usage: Dict[str, float] = Field(default_factory=dict, description="CPU/memory/IO of its ffmpeg children")
+    format: Optional[Dict[str, Any]] = Field(None, description="ReelFormat of a re-encoded reel")
+    transition: Optional[Dict[str, Any]] = Field(None, description="ReelTransition between its clips")
+    intro_id: Optional[str] = Field(None, description="Bumper before the first clip")
+    outro_id: Optional[str] = Field(None, description="Bumper after the last clip")
 
 
 class ReelResponse(BaseModel):
@@ -0,0 +1,64 @@
+"""Scorecard overlay models"""
+
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class ScorecardRequest(BaseModel):
+    """Show a scoreboard bar over part of a clip"""
+    team_a_score: int = Field(..., ge=0, le=999)
+    team_b_score: int = Field(..., ge=0, le=999)
+    event_type: Optional[str] = Field(None, description="'goal_a', 'goal_b', 'switch' or 'highlight', shown under the score")
+    clock: Optional[str] = Field(None, description="Match time shown before the score, e.g. '50:24'",
+                                 pattern=r"^\d{1,3}:\d{2}$")
+    team_a: str = Field("TEAM A", min_length=1, max_length=24)
+    team_b: str = Field("TEAM B", min_length=1, max_length=24)
+    start_s: float = Field(0.0, description="Show from this time, in seconds from the start of the clip", ge=0)
+    end_s: Optional[float] = Field(None, description="Show until this time (default: end of the clip)", gt=0)
+    position: str = Field("top", description="'top' or 'bottom' of the frame", pattern=r"^(top|bottom)$")
+    job_id: Optional[str] = Field(None, description="Client-chosen ID to follow progress at /api/v2/jobs/{job_id}/events")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "team_a_score": 1,
+                "team_b_score": 0,
+                "event_type": "goal_a",
+                "clock": "50:24",
+                "team_a": "LIV",
+                "team_b": "RMA",
+                "start_s": 2.0,
+                "end_s": 8.0,
+                "position": "top"
+            }
+        }
+
+
+class ScorecardResponse(BaseModel):
+    """A clip with the scoreboard burned in"""
+    overlay_id: str
+    clip_id: str
+    start_s: float
+    end_s: float
+    duration_s: float
+    encoded_s: float = Field(..., description="Seconds re-encoded (the window widened to keyframes)")
+    copied_s: float = Field(..., description="Seconds stream-copied unchanged")
+    filesize_bytes: int
+    download_url: str
+    processing_time_ms: float
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "overlay_id": "score_7c1d2e9f0a3b",
+                "clip_id": "clip_abc123",
+                "start_s": 2.0,
+                "end_s": 8.0,
+                "duration_s": 20.0,
+                "encoded_s": 8.0,
+                "copied_s": 12.0,
+                "filesize_bytes": 5123456,
+                "download_url": "/api/v2/scorecard/score_7c1d2e9f0a3b/download",
+                "processing_time_ms": 1850
+            }
+        }
@@ -0,0 +1,58 @@
+"""Camera switch planning models"""
+
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+from .clip import ClipSegment
+
+
+class SwitchPlanRequest(BaseModel):
+    """Event window to propose camera switches for"""
+    start_s: float = Field(..., description="Window start on the session timeline", ge=0)
+    end_s: float = Field(..., description="Window end on the session timeline", gt=0)
+    cameras: Optional[List[str]] = Field(None, description="Cameras to choose from (default: all)")
+    interval_s: float = Field(1.0, description="Decision granularity in seconds", gt=0, le=10)
+    min_shot_s: float = Field(3.0, description="Shortest shot in the plan", ge=0)
+    switch_penalty: float = Field(1.0, description="Cost of a cut relative to typical per-interval motion", ge=0)
+    method: str = Field("motion", description="'motion' (decoded frame differences) or 'packets' "
+                                              "(compressed packet sizes, no decoding)")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "start_s": 120.0,
+                "end_s": 150.0,
+                "cameras": ["C1", "C2", "C3", "C4"],
+                "interval_s": 1.0,
+                "min_shot_s": 3.0
+            }
+        }
+
+
+class SwitchPlanResponse(BaseModel):
+    """Proposed segments, ready to send to /api/v2/clip/create"""
+    session_key: str
+    start_s: float
+    end_s: float
+    interval_s: float
+    segments: List[ClipSegment]
+    energy: Dict[str, List[Optional[float]]] = Field(
+        default_factory=dict,
+        description="Normalized motion energy per camera per interval (null where the camera has no footage)")
+    processing_time_ms: float
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_key": "sess_1700000000_ab12cd34",
+                "start_s": 120.0,
+                "end_s": 130.0,
+                "interval_s": 1.0,
+                "segments": [
+                    {"camera_id": "C2", "start_s": 120.0, "end_s": 126.0},
+                    {"camera_id": "C4", "start_s": 126.0, "end_s": 130.0}
+                ],
+                "energy": {"C2": [1.8, 2.1, 1.9, 2.4, 2.2, 1.7, 0.9, 0.8, 0.9, 1.0]},
+                "processing_time_ms": 850
+            }
+        }
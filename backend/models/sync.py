@@ -0,0 +1,33 @@
+"""Camera sync models"""
+
+from pydantic import BaseModel, Field
+from typing import List
+
+
+class CameraSync(BaseModel):
+    """Sync estimate for one camera"""
+    camera_id: str
+    offset_s: float = Field(..., description="Source file time = timeline time + offset_s")
+    method: str = Field(..., description="reference, audio, video or none (no reliable estimate, offset 0)")
+    confidence: float = Field(..., description="Correlation margin of the chosen offset over competing offsets (0-1)")
+
+
+class SessionSync(BaseModel):
+    """Sync offsets of a session's cameras relative to the reference camera"""
+    session_key: str
+    reference_camera: str
+    cameras: List[CameraSync]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "session_key": "sess_1700000000_ab12cd34",
+                "reference_camera": "C1",
+                "cameras": [
+                    {"camera_id": "C1", "offset_s": 0.0, "method": "reference", "confidence": 1.0},
+                    {"camera_id": "C2", "offset_s": -2.35, "method": "audio", "confidence": 0.71},
+                    {"camera_id": "C3", "offset_s": 4.1, "method": "audio", "confidence": 0.64},
+                    {"camera_id": "C4", "offset_s": 1.2, "method": "video", "confidence": 0.38}
+                ]
+            }
+        }
@@ -0,0 +1,431 @@
+"""
+Analysis engine - decodes each camera file once and fans the decoded
+stream out to every registered analyzer.
+
+ffmpeg writes small gray frames (and, for audio analyzers, mono PCM) to a
+pipe; the engine copies each chunk into a slot of a shared-memory ring
+buffer and tells the worker processes which slot to read. Workers run
+their analyzers on the slot in place and acknowledge it, and a slot is
+reused once every worker has acknowledged it - so memory is bounded by
+the ring, not the file, and analyzers run on separate cores without
+copying frames between processes. Results are cached on disk per file
+identity, decode format and analyzer version; a later request only
+decodes the file if some requested analyzer has no cached result.
+"""
+
+import contextvars
+import importlib
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from services.analyzers import ANALYZERS, AUDIO, VIDEO, Analyzer, StreamFormat, get_analyzer
+from services.ffmpeg_service import FFmpegService
+from services import file_identity
+from services.job_progress import ScanProgress, current_job
+from services import metrics
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+CHUNK_S = 2.0  # Media seconds per ring slot
+RING_SLOTS = 8
+WORKER_POLL_S = 1.0  # How often a blocked producer checks that workers are still alive
+WORKER_RESULT_TIMEOUT_S = 60.0  # Time allowed for workers to finish after the stream ends
+PROGRESS_EVERY_S = 10.0
+
+
+def _mp_context():
+    """
+    Workers fork from a clean server process rather than the threaded app;
+    the engine and analyzer modules (numpy included) are imported there once
+    instead of in every worker. The app's main module is not preloaded, so
+    its setup (services, thread pools, directories) does not run again there.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([__name__, "services.analyzers"])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def _load_analyzer(module: str, qualname: str):
+    target = importlib.import_module(module)
+    for part in qualname.split("."):
+        target = getattr(target, part)
+    return target
+
+
+def _worker_main(shm_name: str, slot_bytes: int, stream_format: StreamFormat, specs: List[Tuple[str, str]],
+                 tasks, acks, results):
+    """
+    Worker process: run analyzers on ring slots announced on `tasks` until None arrives,
+    acknowledging every slot on `acks`, then put ("ok", {name: arrays}) or ("error", text) on `results`.
+    """
+    ring = shared_memory.SharedMemory(name=shm_name)
+    error = None
+    try:
+        analyzers: List[Analyzer] = []
+        try:
+            analyzers = [_load_analyzer(module, qualname)(stream_format) for module, qualname in specs]
+        except Exception:
+            error = traceback.format_exc()
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, first_index, items = task
+            if error is None:
+                try:
+                    chunk = np.ndarray(stream_format.shape(items), dtype=stream_format.dtype,
+                                       buffer=ring.buf, offset=slot * slot_bytes)
+                    for analyzer in analyzers:
+                        analyzer.process(chunk, first_index)
+                    del chunk
+                except Exception:
+                    error = traceback.format_exc()
+            acks.put(slot)  # Acknowledge even after a failure so the producer never stalls
+        if error is None:
+            try:
+                results.put(("ok", {analyzer.name: analyzer.result() for analyzer in analyzers}))
+            except Exception:
+                error = traceback.format_exc()
+        if error is not None:
+            results.put(("error", error))
+    finally:
+        try:
+            ring.close()
+        except BufferError:
+            pass  # An analyzer kept a view into the ring; the process is exiting anyway
+
+
+class _StreamFanout:
+    """Producer side of one decoded stream: a shared-memory ring and the worker processes reading it"""
+
+    def __init__(self, context, stream_format: StreamFormat, groups: List[List[type]], slots: int):
+        self.format = stream_format
+        self.items_per_slot = max(1, int(round(stream_format.rate * CHUNK_S)))
+        self.slot_bytes = self.items_per_slot * stream_format.item_bytes
+        self.ring = shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes)
+        self.free = deque(range(slots))
+        self.refs = [0] * slots
+        self.items = 0
+        self.acks = context.Queue()
+        self.results = context.Queue()
+        self.tasks = [context.Queue() for _ in groups]
+        self.finished = False
+        self.workers = [
+            context.Process(
+                target=_worker_main,
+                args=(self.ring.name, self.slot_bytes, stream_format,
+                      [(cls.__module__, cls.__qualname__) for cls in group], tasks, self.acks, self.results),
+                daemon=True
+            )
+            for group, tasks in zip(groups, self.tasks)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def _check_workers(self):
+        dead = [worker for worker in self.workers if not worker.is_alive()]
+        if dead:
+            raise RuntimeError(f"Analysis worker exited unexpectedly (exit code {dead[0].exitcode})")
+
+    def _wait_for_free_slot(self):
+        while not self.free:
+            try:
+                slot = self.acks.get(timeout=WORKER_POLL_S)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            self.refs[slot] -= 1
+            if self.refs[slot] == 0:
+                self.free.append(slot)
+
+    def on_chunk(self, chunk: bytes) -> bool:
+        """Decoder callback: publish one chunk to every worker"""
+        self._wait_for_free_slot()
+        slot = self.free.popleft()
+        start = slot * self.slot_bytes
+        self.ring.buf[start:start + len(chunk)] = chunk
+        items = len(chunk) // self.format.item_bytes
+        self.refs[slot] = len(self.workers)
+        for tasks in self.tasks:
+            tasks.put((slot, self.items, items))
+        self.items += items
+        return False
+
+    def finish(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """End the stream and collect every analyzer's result"""
+        self._end()
+        merged = {}
+        deadline = time.time() + WORKER_RESULT_TIMEOUT_S
+        for _ in self.workers:
+            while True:
+                try:
+                    status, payload = self.results.get(timeout=WORKER_POLL_S)
+                    break
+                except queue.Empty:
+                    # A worker that already delivered may have exited; only a missing result is an error
+                    if time.time() > deadline:
+                        raise RuntimeError("Analysis workers did not finish in time")
+                    if all(not worker.is_alive() for worker in self.workers) and self.results.empty():
+                        raise RuntimeError("Analysis workers exited without a result")
+            if status != "ok":
+                raise RuntimeError(f"Analyzer failed:\n{payload}")
+            merged.update(payload)
+        return merged
+
+    def _end(self):
+        if not self.finished:
+            self.finished = True
+            for tasks in self.tasks:
+                tasks.put(None)
+
+    def close(self):
+        self._end()
+        for worker in self.workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+                worker.join()
+        for q in [self.acks, self.results] + self.tasks:
+            q.close()
+            q.cancel_join_thread()
+        self.ring.close()
+        self.ring.unlink()
+
+
+@dataclass
+class FileAnalysis:
+    """Analyzer results for one file"""
+    path: str
+    results: Dict[str, Dict[str, np.ndarray]]  # Analyzer name -> arrays
+    formats: Dict[str, StreamFormat]  # Analyzer name -> stream it ran on
+    cached: List[str] = field(default_factory=list)  # Analyzers served from cache
+    decoded_s: float = 0.0  # Media seconds decoded for this request (0 if fully cached)
+    processing_time_ms: float = 0.0
+
+    def summary(self, name: str) -> Dict:
+        return get_analyzer(name).summarize(self.results[name], self.formats[name])
+
+
+class AnalysisEngine:
+    """Single-decode analysis of camera files with pluggable, cached analyzers"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ffmpeg_service: FFmpegService,
+        width: int = 64,
+        height: int = 36,
+        fps: float = 10.0,
+        sample_rate: int = 8000,
+        max_workers: int = 4,
+        ring_slots: int = RING_SLOTS
+    ):
+        """
+        Args:
+            cache_dir: Directory for per-file result caches
+            width, height, fps: Decode format of the shared gray frame stream
+            sample_rate: Decode rate of the shared mono audio stream
+            max_workers: Analyzer worker processes per file
+            ring_slots: Chunks of CHUNK_S seconds buffered between the decoder and the workers
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ffmpeg = ffmpeg_service
+        self.formats = {
+            VIDEO: StreamFormat(VIDEO, float(fps), width, height),
+            AUDIO: StreamFormat(AUDIO, float(sample_rate))
+        }
+        self.max_workers = max(1, max_workers)
+        self.ring_slots = max(2, ring_slots)
+        self._context = _mp_context()
+        self._file_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> Dict[str, str]:
+        """Registered analyzer names and the stream each consumes"""
+        return {name: cls.stream for name, cls in sorted(ANALYZERS.items())}
+
+    # --- cache ---------------------------------------------------------------
+
+    def _cache_path(self, file_key: str, cls: type) -> Path:
+        tag = self.formats[cls.stream].cache_tag()
+        return self.cache_dir / file_key / f"{cls.name}.v{cls.version}.{tag}.npz"
+
+    def _load_cached(self, cache_path: Path) -> Optional[Dict[str, np.ndarray]]:
+        if not cache_path.exists():
+            return None
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                return {key: data[key] for key in data.files}
+        except (OSError, ValueError):
+            logger.warning(f"Discarding unreadable analysis cache {cache_path}")
+            return None
+
+    def _store(self, cache_path: Path, arrays: Dict[str, np.ndarray]):
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp.npz")
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, cache_path)
+
+    # --- analysis ------------------------------------------------------------
+
+    @tracing.traced("analysis.file")
+    def analyze(self, path: str, analyzers: Optional[List[str]] = None) -> FileAnalysis:
+        """
+        Run analyzers over a file, decoding it at most once per stream.
+
+        Args:
+            path: Camera file
+            analyzers: Analyzer names (default: all registered)
+
+        Returns:
+            FileAnalysis with every requested analyzer's arrays
+
+        Raises:
+            ValueError: If an analyzer name is unknown
+            RuntimeError: If the video cannot be decoded or an analyzer fails
+        """
+        start_time = time.time()
+        classes = [get_analyzer(name) for name in dict.fromkeys(analyzers or sorted(ANALYZERS))]
+        file_key = file_identity.file_key(path)
+        with self._lock:
+            file_lock = self._file_locks.setdefault(file_key, threading.Lock())
+
+        # One analysis per file at a time, so concurrent requests share the decode through the cache
+        with file_lock:
+            results, cached, missing = {}, [], []
+            for cls in classes:
+                arrays = self._load_cached(self._cache_path(file_key, cls))
+                metrics.record_cache("analysis", hit=arrays is not None)
+                if arrays is None:
+                    missing.append(cls)
+                else:
+                    results[cls.name] = arrays
+                    cached.append(cls.name)
+
+            decoded_s = 0.0
+            if missing:
+                fresh, decoded_s = self._decode_and_analyze(path, missing)
+                for cls in missing:
+                    self._store(self._cache_path(file_key, cls), fresh[cls.name])
+                results.update(fresh)
+
+        analysis = FileAnalysis(
+            path=path,
+            results=results,
+            formats={cls.name: self.formats[cls.stream] for cls in classes},
+            cached=cached,
+            decoded_s=decoded_s,
+            processing_time_ms=(time.time() - start_time) * 1000
+        )
+        tracing.current_span().set_attributes({"analysis.analyzers": len(classes),
+                                                "analysis.cached": len(cached),
+                                                "analysis.decoded_s": round(decoded_s, 2)})
+        logger.info(f"Analysis of {path}: {', '.join(cls.name for cls in classes)} "
+                    f"({len(cached)} cached, {decoded_s:.0f}s decoded) in {analysis.processing_time_ms:.0f}ms")
+        return analysis
+
+    def analyze_files(self, files: Dict[str, str], analyzers: Optional[List[str]] = None) -> Dict[str, FileAnalysis]:
+        """Analyze several files (e.g. a session's cameras) one after another; keys are kept"""
+        return {key: self.analyze(path, analyzers) for key, path in files.items()}
+
+    def _groups(self, classes: List[type]) -> Dict[str, List[List[type]]]:
+        """Spread analyzers over worker processes, each worker serving one stream"""
+        by_stream: Dict[str, List[type]] = {}
+        for cls in classes:
+            by_stream.setdefault(cls.stream, []).append(cls)
+        groups = {}
+        for stream, members in by_stream.items():
+            share = max(1, round(self.max_workers * len(members) / len(classes)))
+            workers = min(share, len(members))
+            groups[stream] = [members[i::workers] for i in range(workers)]
+        return groups
+
+    def _decode_and_analyze(self, path: str, classes: List[type]) -> Tuple[Dict[str, Dict[str, np.ndarray]], float]:
+        groups = self._groups(classes)
+        fanouts: Dict[str, _StreamFanout] = {}
+        job = current_job()
+        progress = ScanProgress(job, self.ffmpeg.probe_duration(path) if job and VIDEO in groups else None,
+                                PROGRESS_EVERY_S)
+
+        try:
+            for stream, stream_groups in groups.items():
+                fanouts[stream] = _StreamFanout(self._context, self.formats[stream], stream_groups, self.ring_slots)
+
+            def run_video():
+                fanout = fanouts[VIDEO]
+                video_format = self.formats[VIDEO]
+
+                def on_frames(chunk: bytes) -> bool:
+                    fanout.on_chunk(chunk)
+                    progress.update(fanout.items / video_format.rate)
+                    return False
+
+                with tracing.span("analysis.decode", **{"analysis.stream": VIDEO}):
+                    result = self.ffmpeg.decode_gray_frames(
+                        path, on_frames, width=video_format.width, height=video_format.height,
+                        fps=video_format.rate, frames_per_chunk=fanout.items_per_slot)
+                if not result.success:
+                    raise RuntimeError(f"Failed to decode {path}: {result.stderr}")
+
+            def run_audio():
+                fanout = fanouts[AUDIO]
+                with tracing.span("analysis.decode", **{"analysis.stream": AUDIO}):
+                    result = self.ffmpeg.decode_audio(path, fanout.on_chunk, sample_rate=int(fanout.format.rate),
+                                                      chunk_samples=fanout.items_per_slot)
+                if not result.success:
+                    # Like a file without an audio stream: audio analyzers report empty results
+                    reason = (result.stderr.strip().splitlines() or ["unknown error"])[-1]
+                    logger.info(f"No audio for analysis of {path}: {reason}")
+
+            runners = {VIDEO: run_video, AUDIO: run_audio}
+            # Both streams decode concurrently; a copy of this context carries spans and usage to the threads
+            context = contextvars.copy_context()
+            with ThreadPoolExecutor(max_workers=len(fanouts)) as pool:
+                futures = [pool.submit(context.copy().run, runners[stream]) for stream in fanouts]
+                for future in futures:
+                    future.result()
+
+            results = {}
+            for fanout in fanouts.values():
+                results.update(fanout.finish())
+        finally:
+            for fanout in fanouts.values():
+                fanout.close()
+
+        decoded_s = (fanouts[VIDEO].items / self.formats[VIDEO].rate if VIDEO in fanouts
+                     else fanouts[AUDIO].items / self.formats[AUDIO].rate)
+        progress.finish()
+        return results, decoded_s
+
+    def forget(self, path: str):
+        """Drop cached results for a file about to be deleted"""
+        try:
+            file_key = file_identity.file_key(path)
+        except OSError:
+            return
+        with self._lock:
+            self._file_locks.pop(file_key, None)
+        for cache_path in (self.cache_dir / file_key).glob("*.npz"):
+            cache_path.unlink(missing_ok=True)
+        try:
+            (self.cache_dir / file_key).rmdir()
+        except OSError:
+            pass
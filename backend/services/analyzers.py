@@ -0,0 +1,248 @@
+"""
+Analyzer plugins for the shared-decode analysis engine.
+
+An analyzer consumes one decoded stream of a camera file - small gray
+frames or mono PCM - chunk by chunk and reduces it to a few NumPy arrays.
+Instances run inside engine worker processes, so they must be importable
+by module path and keep only compact state between chunks. Register new
+analyzers with @register_analyzer; results are cached per file identity
+and analyzer version, so bump `version` when the output changes.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Type
+
+import numpy as np
+
+from services.motion import MotionEnergy
+
+VIDEO = "video"
+AUDIO = "audio"
+
+
+@dataclass(frozen=True)
+class StreamFormat:
+    """Layout of a decoded stream as analyzers see it"""
+    kind: str  # VIDEO (gray8 frames) or AUDIO (mono s16le samples)
+    rate: float  # Frames or samples per second
+    width: int = 0
+    height: int = 0
+
+    @property
+    def item_bytes(self) -> int:
+        """Bytes per frame or sample"""
+        return self.width * self.height if self.kind == VIDEO else 2
+
+    @property
+    def dtype(self):
+        return np.uint8 if self.kind == VIDEO else np.dtype("<i2")
+
+    def shape(self, items: int) -> Tuple[int, ...]:
+        return (items, self.height, self.width) if self.kind == VIDEO else (items,)
+
+    def cache_tag(self) -> str:
+        if self.kind == VIDEO:
+            return f"{self.width}x{self.height}@{self.rate:g}"
+        return f"{self.rate:g}hz"
+
+
+class Analyzer:
+    """
+    Base class for analysis plugins.
+
+    process() receives (frames, height, width) uint8 or (samples,) int16
+    arrays that live in shared memory and are only valid during the call;
+    copy anything that must be kept.
+    """
+    name: str = ""
+    stream: str = VIDEO
+    version: int = 1
+
+    def __init__(self, stream_format: StreamFormat):
+        self.format = stream_format
+
+    def process(self, chunk: np.ndarray, first_index: int):
+        """Consume frames/samples first_index .. first_index + len(chunk) - 1"""
+        raise NotImplementedError
+
+    def result(self) -> Dict[str, np.ndarray]:
+        """Arrays to cache once the stream has ended"""
+        raise NotImplementedError
+
+    @classmethod
+    def summarize(cls, result: Dict[str, np.ndarray], stream_format: StreamFormat) -> Dict:
+        """JSON-friendly digest of a result for the API"""
+        return {key: int(value.size) for key, value in result.items()}
+
+
+ANALYZERS: Dict[str, Type[Analyzer]] = {}
+
+
+def register_analyzer(cls: Type[Analyzer]) -> Type[Analyzer]:
+    """Class decorator making an analyzer available to the engine by name"""
+    if not cls.name or cls.stream not in (VIDEO, AUDIO):
+        raise ValueError(f"Analyzer {cls.__name__} needs a name and a stream of '{VIDEO}' or '{AUDIO}'")
+    ANALYZERS[cls.name] = cls
+    return cls
+
+
+def get_analyzer(name: str) -> Type[Analyzer]:
+    """
+    Raises:
+        ValueError: If no analyzer is registered under name
+    """
+    if name not in ANALYZERS:
+        raise ValueError(f"Unknown analyzer '{name}' (available: {', '.join(sorted(ANALYZERS))})")
+    return ANALYZERS[name]
+
+
+def _runs(mask: np.ndarray, min_length: int) -> List[Tuple[int, int]]:
+    """[start, end) index ranges where mask is True for at least min_length items"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    return [(int(s), int(e)) for s, e in zip(starts, ends) if e - s >= min_length]
+
+
+@register_analyzer
+class MotionAnalyzer(Analyzer):
+    """Per-frame motion energy (mean absolute change above compression noise)"""
+    name = "motion"
+    NOISE_FLOOR = 3
+
+    def __init__(self, stream_format: StreamFormat):
+        super().__init__(stream_format)
+        self.motion = MotionEnergy(stream_format.width, stream_format.height, noise_floor=self.NOISE_FLOOR)
+
+    def process(self, chunk: np.ndarray, first_index: int):
+        self.motion.add(chunk)
+
+    def result(self) -> Dict[str, np.ndarray]:
+        return {"energy": self.motion.result()}
+
+    @classmethod
+    def summarize(cls, result: Dict[str, np.ndarray], stream_format: StreamFormat) -> Dict:
+        energy = result["energy"]
+        if not len(energy):
+            return {"frames": 0}
+        return {
+            "frames": int(len(energy)) + 1,
+            "mean": round(float(energy.mean()), 3),
+            "p95": round(float(np.percentile(energy, 95)), 3),
+            "peak_s": round((int(np.argmax(energy)) + 1) / stream_format.rate, 2)
+        }
+
+
+@register_analyzer
+class BlackFrozenAnalyzer(Analyzer):
+    """Mean luma and frame-to-frame change per frame, summarized as black and frozen stretches"""
+    name = "black_frozen"
+    BLACK_LUMA = 24.0  # Mean gray level at or below which a frame counts as black
+    FROZEN_CHANGE = 0.5  # Mean absolute change below which a frame repeats the previous one
+    MIN_BLACK_S = 1.0
+    MIN_FROZEN_S = 2.0
+
+    def __init__(self, stream_format: StreamFormat):
+        super().__init__(stream_format)
+        self.previous: Optional[np.ndarray] = None
+        self.luma: List[np.ndarray] = []
+        self.change: List[np.ndarray] = []
+
+    def process(self, chunk: np.ndarray, first_index: int):
+        frames = chunk.astype(np.int16)
+        self.luma.append(frames.mean(axis=(1, 2)).astype(np.float32))
+        if self.previous is not None:
+            frames = np.concatenate([self.previous[None], frames])
+        else:
+            self.change.append(np.zeros(1, dtype=np.float32))  # First frame: no change to measure
+        self.change.append(np.abs(np.diff(frames, axis=0)).mean(axis=(1, 2)).astype(np.float32))
+        self.previous = frames[-1]
+
+    def result(self) -> Dict[str, np.ndarray]:
+        if not self.luma:
+            return {"luma": np.empty(0, dtype=np.float32), "change": np.empty(0, dtype=np.float32)}
+        return {"luma": np.concatenate(self.luma), "change": np.concatenate(self.change)}
+
+    @classmethod
+    def summarize(cls, result: Dict[str, np.ndarray], stream_format: StreamFormat) -> Dict:
+        rate = stream_format.rate
+        black = result["luma"] <= cls.BLACK_LUMA
+        frozen = (result["change"] < cls.FROZEN_CHANGE) & ~black
+        if len(frozen):
+            frozen[0] = False
+        return {
+            "black": [[round(s / rate, 2), round(e / rate, 2)]
+                      for s, e in _runs(black, int(np.ceil(cls.MIN_BLACK_S * rate)))],
+            "frozen": [[round(s / rate, 2), round(e / rate, 2)]
+                       for s, e in _runs(frozen, int(np.ceil(cls.MIN_FROZEN_S * rate)))]
+        }
+
+
+@register_analyzer
+class LoudnessAnalyzer(Analyzer):
+    """Audio level in dBFS per 100ms window"""
+    name = "loudness"
+    stream = AUDIO
+    WINDOW_S = 0.1
+    SILENCE_DB = -90.0
+
+    def __init__(self, stream_format: StreamFormat):
+        super().__init__(stream_format)
+        self.window = max(1, int(round(stream_format.rate * self.WINDOW_S)))
+        self.pending = np.empty(0, dtype=np.float32)
+        self.parts: List[np.ndarray] = []
+
+    def process(self, chunk: np.ndarray, first_index: int):
+        samples = chunk.astype(np.float32) / 32768.0
+        if len(self.pending):
+            samples = np.concatenate([self.pending, samples])
+        usable = len(samples) - len(samples) % self.window
+        if usable:
+            windows = samples[:usable].reshape(-1, self.window)
+            mean_square = np.mean(windows * windows, axis=1)
+            self.parts.append(np.maximum(10 * np.log10(mean_square + 1e-12), self.SILENCE_DB).astype(np.float32))
+        self.pending = samples[usable:]
+
+    def result(self) -> Dict[str, np.ndarray]:
+        return {"db": np.concatenate(self.parts) if self.parts else np.empty(0, dtype=np.float32)}
+
+    @classmethod
+    def summarize(cls, result: Dict[str, np.ndarray], stream_format: StreamFormat) -> Dict:
+        db = result["db"]
+        if not len(db):
+            return {"has_audio": False}
+        return {
+            "has_audio": True,
+            "mean_db": round(float(db.mean()), 2),
+            "peak_db": round(float(db.max()), 2),
+            "peak_s": round(int(np.argmax(db)) * cls.WINDOW_S, 2)
+        }
+
+
+@register_analyzer
+class ThumbnailAnalyzer(Analyzer):
+    """One analysis-resolution frame every EVERY_S seconds, for scrub strips"""
+    name = "thumbnails"
+    EVERY_S = 10.0
+
+    def __init__(self, stream_format: StreamFormat):
+        super().__init__(stream_format)
+        self.step = max(1, int(round(stream_format.rate * self.EVERY_S)))
+        self.indices: List[int] = []
+        self.frames: List[np.ndarray] = []
+
+    def process(self, chunk: np.ndarray, first_index: int):
+        offset = (-first_index) % self.step
+        for i in range(offset, len(chunk), self.step):
+            self.indices.append(first_index + i)
+            self.frames.append(chunk[i].copy())
+
+    def result(self) -> Dict[str, np.ndarray]:
+        shape = (0, self.format.height, self.format.width)
+        return {
+            "times": np.array(self.indices, dtype=np.float64) / self.format.rate,
+            "frames": np.stack(self.frames) if self.frames else np.empty(shape, dtype=np.uint8)
+        }
+
+    @classmethod
+    def summarize(cls, result: Dict[str, np.ndarray], stream_format: StreamFormat) -> Dict:
+        return {"count": int(len(result["times"])), "times": [round(float(t), 2) for t in result["times"]]}
@@ -0,0 +1,320 @@
+"""
+Aspect export service - social/broadcast versions of a clip or reel.
+
+Crop, scale and pad run inside one ffmpeg filter graph; every requested
+format is split off the same decode (FFmpegService.encode_variants), so
+asking for 1:1, 9:16 and 16:9 together costs one decode plus three encodes.
+Exports are submitted, then run later as a render job.
+"""
+
+import os
+import time
+import uuid
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from services.ffmpeg_service import FFmpegService
+from services.clip_service import ClipService
+from services.reel_service import ReelService
+from services.output_store import OutputStore, Rerenderer
+from services.job_progress import current_job
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+ASPECTS = ("1:1", "9:16", "16:9")
+FITS = ("crop", "pad", "stretch")
+SOURCE_KINDS = ("clip", "reel")
+
+
+def _ratio(aspect: str) -> Fraction:
+    """
+    Raises:
+        ValueError: If aspect is not "W:H" with positive integers
+    """
+    width, _, height = aspect.partition(":")
+    try:
+        ratio = Fraction(int(width), int(height))
+    except (ValueError, ZeroDivisionError):
+        raise ValueError(f"Invalid aspect ratio '{aspect}' (expected W:H, e.g. 5:4)")
+    if ratio <= 0:
+        raise ValueError(f"Invalid aspect ratio '{aspect}'")
+    return ratio
+
+
+def _even(value: float) -> int:
+    return max(2, int(round(value / 2)) * 2)
+
+
+@dataclass(frozen=True)
+class AspectTarget:
+    """One output format of an export"""
+    aspect: str  # One of ASPECTS
+    size: int = 1080  # Short edge in pixels
+    fit: str = "crop"  # crop: fill the frame, cut the overflow; pad: letterbox; stretch: distort to fill
+    crop_aspect: Optional[str] = None  # Center-crop the source to this aspect first (e.g. "5:4")
+    focus_x: float = 0.5  # Horizontal crop position, 0 = left edge, 1 = right edge
+
+    @property
+    def name(self) -> str:
+        """URL-safe name of the output, e.g. 9x16"""
+        return self.aspect.replace(":", "x")
+
+    @property
+    def dimensions(self) -> tuple:
+        ratio = _ratio(self.aspect)
+        if ratio >= 1:
+            return _even(self.size * ratio), _even(self.size)
+        return _even(self.size), _even(self.size / ratio)
+
+    def validate(self):
+        """
+        Raises:
+            ValueError: If any field is out of range
+        """
+        if self.aspect not in ASPECTS:
+            raise ValueError(f"Unsupported aspect '{self.aspect}' (expected one of: {', '.join(ASPECTS)})")
+        if self.fit not in FITS:
+            raise ValueError(f"Unknown fit '{self.fit}' (expected one of: {', '.join(FITS)})")
+        if self.crop_aspect is not None:
+            _ratio(self.crop_aspect)
+        if not 16 <= self.size <= 4320:
+            raise ValueError(f"Size {self.size} out of range (16-4320)")
+        if not 0.0 <= self.focus_x <= 1.0:
+            raise ValueError(f"focus_x {self.focus_x} out of range (0-1)")
+
+    def filter_chain(self) -> str:
+        """Filter chain from the decoded source to this output"""
+        width, height = self.dimensions
+        filters = []
+        if self.crop_aspect is not None:
+            filters.append(self._crop(_ratio(self.crop_aspect), 0.5))
+        if self.fit == "crop":
+            filters.append(self._crop(_ratio(self.aspect), self.focus_x))
+            filters.append(f"scale={width}:{height}")
+        elif self.fit == "pad":
+            filters.append(f"scale={width}:{height}:force_original_aspect_ratio=decrease")
+            filters.append(f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2")
+        else:
+            filters.append(f"scale={width}:{height}")
+        filters.append("setsar=1")
+        return ",".join(filters)
+
+    @staticmethod
+    def _crop(ratio: Fraction, focus_x: float) -> str:
+        """Largest even-sized window of the given aspect, centered vertically"""
+        a = f"{ratio.numerator}/{ratio.denominator}"
+        return (f"crop=w='trunc(min(iw,ih*{a})/2)*2':h='trunc(min(ih,iw/({a}))/2)*2'"
+                f":x='(iw-ow)*{focus_x:g}':y='(ih-oh)/2'")
+
+    def to_dict(self) -> Dict:
+        width, height = self.dimensions
+        return {"aspect": self.aspect, "name": self.name, "width": width, "height": height,
+                "fit": self.fit, "crop_aspect": self.crop_aspect, "focus_x": self.focus_x}
+
+
+@dataclass
+class AspectExport:
+    """An export job and its outputs"""
+    export_id: str
+    source_kind: str
+    source_id: str
+    targets: List[AspectTarget]
+    duration_s: float
+    status: str = "queued"  # queued -> running -> done | failed
+    error: Optional[str] = None
+    outputs: Dict[str, str] = field(default_factory=dict)  # target name -> file path
+    filesize_bytes: int = 0
+    processing_time_ms: float = 0.0
+    created_at: datetime = field(default_factory=datetime.now)
+
+
+class AspectExporter:
+    """Crop/scale/pad exports of clips and reels, several formats per decode"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        ffmpeg_service: FFmpegService,
+        clip_service: ClipService,
+        reel_service: ReelService,
+        output_store: Optional[OutputStore] = None,
+        preset: str = "veryfast",
+        crf: int = 23
+    ):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.ffmpeg = ffmpeg_service
+        self.clip_service = clip_service
+        self.reel_service = reel_service
+        self.output_store = output_store
+        self.preset = preset
+        self.crf = crf
+        self.exports: Dict[str, AspectExport] = {}
+        self._outputs = Rerenderer("export", output_store)  # Per-export re-render of evicted files
+        self._lock = threading.Lock()
+
+    def submit(self, source_kind: str, source_id: str, targets: List[AspectTarget]) -> AspectExport:
+        """
+        Register an export; run it with run(export_id).
+
+        Raises:
+            KeyError: If the clip or reel does not exist
+            ValueError: If the source kind or a target is invalid
+        """
+        if source_kind not in SOURCE_KINDS:
+            raise ValueError(f"Unknown source kind '{source_kind}' (expected one of: {', '.join(SOURCE_KINDS)})")
+        if not targets:
+            raise ValueError("No target formats provided")
+        for target in targets:
+            target.validate()
+        names = [target.name for target in targets]
+        if len(set(names)) != len(names):
+            raise ValueError("Each aspect can only be requested once per export")
+
+        record = self._source(source_kind, source_id)
+        export = AspectExport(
+            export_id=f"export_{uuid.uuid4().hex[:12]}",
+            source_kind=source_kind,
+            source_id=source_id,
+            targets=list(targets),
+            duration_s=record.duration_s
+        )
+        with self._lock:
+            self.exports[export.export_id] = export
+        logger.info(f"Queued export {export.export_id} of {source_kind} {source_id}: {', '.join(names)}")
+        return export
+
+    @tracing.traced("export.aspect")
+    def run(self, export_id: str) -> AspectExport:
+        """
+        Render all outputs of an export from one decode of its source.
+
+        Raises:
+            KeyError: If the export does not exist
+            RuntimeError: If FFmpeg operation fails
+        """
+        export = self.get_export(export_id)
+        export.status = "running"
+        tracing.current_span().set_attributes({"export.id": export_id, "export.outputs": len(export.targets)})
+        try:
+            self._render(export)
+        except Exception as e:
+            export.status = "failed"
+            export.error = str(e)
+            logger.error(f"Export {export_id} failed: {e}")
+            raise
+        export.status = "done"
+        return export
+
+    def _render(self, export: AspectExport):
+        start_time = time.time()
+        source_path = self._source_path(export.source_kind, export.source_id)
+        job = current_job()
+        if job:
+            job.add_work(export.duration_s)
+
+        outputs = {target.name: str(self.output_dir / f"{export.export_id}_{target.name}.mp4")
+                   for target in export.targets}
+        result = self.ffmpeg.encode_variants(
+            source_path,
+            [(target.filter_chain(), outputs[target.name]) for target in export.targets],
+            preset=self.preset,
+            crf=self.crf
+        )
+        if not result.success:
+            raise RuntimeError(f"Failed to export {export.source_kind} {export.source_id}: {result.stderr}")
+
+        export.outputs = outputs
+        export.filesize_bytes = result.filesize_bytes
+        export.processing_time_ms = (time.time() - start_time) * 1000
+        if self.output_store:
+            # Register what the source is rendered from: the clip or reel file itself can be evicted
+            sources = self._source_files(export.source_kind, export.source_id)
+            for name, path in outputs.items():
+                self.output_store.register("export", f"{export.export_id}_{name}", path, sources=sources)
+
+        logger.info(f"Export {export.export_id} done: outputs={len(outputs)}, "
+                   f"size={export.filesize_bytes:,} bytes, processing_time={export.processing_time_ms:.0f}ms")
+
+    def _source(self, source_kind: str, source_id: str):
+        if source_kind == "clip":
+            return self.clip_service.get_clip(source_id)
+        return self.reel_service.get_reel(source_id)
+
+    def _source_files(self, source_kind: str, source_id: str) -> List[str]:
+        if source_kind == "clip":
+            return list(self.clip_service.get_clip(source_id).camera_files.values())
+        return self.reel_service.source_files(self.reel_service.get_reel(source_id))
+
+    def _source_path(self, source_kind: str, source_id: str) -> str:
+        if source_kind == "clip":
+            return self.clip_service.ensure_rendered(source_id)
+        return self.reel_service.ensure_rendered(source_id)
+
+    def get_export(self, export_id: str) -> AspectExport:
+        """Retrieve export by ID"""
+        if export_id not in self.exports:
+            raise KeyError(f"Export {export_id} not found")
+        return self.exports[export_id]
+
+    def _finished_output(self, export_id: str, name: str) -> AspectExport:
+        """
+        Raises:
+            KeyError: If the export or output does not exist
+            ValueError: If the export has not finished
+        """
+        export = self.get_export(export_id)
+        if export.status != "done":
+            raise ValueError(f"Export {export_id} is {export.status}")
+        if name not in export.outputs:
+            raise KeyError(f"Export {export_id} has no output {name}")
+        return export
+
+    def cached_path(self, export_id: str, name: str) -> Optional[str]:
+        """
+        Path of one finished output whose files are on disk (None if the export has to be re-rendered first).
+
+        Raises:
+            KeyError: If the export or output does not exist
+            ValueError: If the export has not finished
+        """
+        export = self._finished_output(export_id, name)
+        resident = self._outputs.resident(export_id, list(export.outputs.values()), f"{export_id}_{name}")
+        return export.outputs[name] if resident else None
+
+    def ensure_rendered(self, export_id: str, name: str) -> str:
+        """
+        Path of one finished output, re-rendering the export if its files were evicted.
+
+        Raises:
+            KeyError: If the export or output does not exist
+            ValueError: If the export has not finished
+            RuntimeError: If FFmpeg operation fails
+        """
+        export = self._finished_output(export_id, name)
+
+        def rerender():
+            logger.info(f"Re-rendering evicted export {export_id}")
+            self._render(export)
+
+        self._outputs.ensure(export_id, list(export.outputs.values()), rerender, f"{export_id}_{name}")
+        return export.outputs[name]
+
+    def delete_export(self, export_id: str):
+        """Delete an export and its files"""
+        export = self.get_export(export_id)
+        for name, path in export.outputs.items():
+            if os.path.exists(path):
+                os.unlink(path)
+            if self.output_store:
+                self.output_store.forget("export", f"{export_id}_{name}")
+        with self._lock:
+            del self.exports[export_id]
+        self._outputs.discard(export_id)
+        logger.info(f"Deleted export: {export_id}")
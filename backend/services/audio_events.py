@@ -0,0 +1,364 @@
+"""
+Audio event detection - finds whistles and crowd surges in the camera
+audio tracks, which the rendered clips drop but the recordings still carry.
+
+Each camera's audio is streamed as mono 16 kHz PCM over an ffmpeg pipe and
+cut into short frames. Per chunk, NumPy computes every frame's RMS level
+and (via one batched FFT) the energy in a crowd band and a whistle band:
+a whistle is a narrow, dominant peak in the whistle band, a crowd surge
+is crowd-band loudness well above a rolling baseline of the preceding
+minutes. Memory is one chunk of samples, the baseline and the open event,
+whatever the match length. Per-camera events are then merged on the
+session timeline; cameras agreeing on an event raise its confidence.
+"""
+
+import contextvars
+import heapq
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from services.ffmpeg_service import FFmpegService
+from services.job_progress import ScanProgress, current_job
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+AUDIO_SAMPLE_RATE = 16000  # Nyquist at 8 kHz keeps the 2.5-4.5 kHz whistle band
+FRAME_SAMPLES = 512  # 32ms analysis frames
+CHUNK_FRAMES = 250  # Frames per pipe read (8s of audio)
+SILENCE_DB = -60.0
+
+BANDS_HZ = {"crowd": (300.0, 2000.0), "whistle": (2500.0, 4500.0)}
+WHISTLE_TONALITY = 10.0  # Peak bin power over mean bin power inside the whistle band
+WHISTLE_SHARE = 0.3  # Whistle-band share of the frame's energy
+MIN_WHISTLE_S = 0.15
+
+CROWD_STEP_S = 0.5  # Crowd loudness is judged per step of this length
+CROWD_BASELINE_S = 120.0
+CROWD_MIN_BASELINE_STEPS = 20
+CROWD_Z = 3.0  # Robust z-score of crowd-band loudness that counts as a surge
+MIN_CROWD_S = 1.0
+
+MERGE_GAP_S = 0.5  # Active stretches of one kind closer than this are one event
+CROSS_CAMERA_TOLERANCE_S = 1.0  # Same-kind events of different cameras this close are one event
+MAX_EVENTS_PER_FILE = 500  # Highest-confidence events kept per file
+PROGRESS_EVERY_S = 30.0
+
+KINDS = ("whistle", "crowd")
+
+
+@dataclass
+class AudioEvent:
+    """A whistle or crowd surge; times in the analyzed file (or the session timeline once merged)"""
+    kind: str
+    start_s: float
+    end_s: float
+    peak_s: float
+    confidence: float  # 0-1
+    level_db: float  # Loudness at the peak
+    cameras: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class AudioEventScan:
+    """Result of scanning one file"""
+    path: str
+    duration_s: float
+    processing_time_ms: float
+    has_audio: bool
+    events: List[AudioEvent]
+
+    @property
+    def speed(self) -> float:
+        """Media seconds scanned per wall-clock second"""
+        return self.duration_s / (self.processing_time_ms / 1000) if self.processing_time_ms > 0 else 0.0
+
+
+class _SpectralFrames:
+    """Splits streamed s16le PCM into frames and computes level and band features for each"""
+
+    def __init__(self, sample_rate: int, frame_samples: int):
+        self.frame_samples = frame_samples
+        self.window = np.hanning(frame_samples).astype(np.float32)
+        freqs = np.fft.rfftfreq(frame_samples, 1.0 / sample_rate)
+        self.bands = {name: (freqs >= low) & (freqs < high) for name, (low, high) in BANDS_HZ.items()}
+        self.pending = np.empty(0, dtype=np.float32)
+
+    def add(self, chunk: bytes) -> Optional[Dict[str, np.ndarray]]:
+        """Features of every frame completed by this chunk (None if none)"""
+        samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32) / 32768.0
+        if len(self.pending):
+            samples = np.concatenate([self.pending, samples])
+        usable = len(samples) - len(samples) % self.frame_samples
+        self.pending = samples[usable:]
+        if not usable:
+            return None
+
+        frames = samples[:usable].reshape(-1, self.frame_samples)
+        mean_square = np.mean(frames * frames, axis=1)
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+        total = power.sum(axis=1) + 1e-12
+        crowd = power[:, self.bands["crowd"]].sum(axis=1)
+        whistle_bins = power[:, self.bands["whistle"]]
+        return {
+            "level_db": np.maximum(10 * np.log10(mean_square + 1e-12), SILENCE_DB),
+            # Band level relative to the frame level, so the crowd baseline follows the band, not the mic gain
+            "crowd_db": 10 * np.log10(mean_square * crowd / total + 1e-12),
+            "whistle_share": whistle_bins.sum(axis=1) / total,
+            "whistle_tonality": whistle_bins.max(axis=1) / (whistle_bins.mean(axis=1) + 1e-12)
+        }
+
+
+class _EventRuns:
+    """Turns per-step activity into events: merges close active steps, drops short runs, keeps the best"""
+
+    def __init__(self, kind: str, step_s: float, min_length_s: float, max_events: int):
+        self.kind = kind
+        self.step_s = step_s
+        self.min_length_s = min_length_s
+        self.merge_gap = max(1, int(round(MERGE_GAP_S / step_s)))
+        self.max_events = max_events
+        self._open: Optional[Dict] = None
+        self._heap: List[Tuple[float, int, AudioEvent]] = []
+        self._counter = itertools.count()
+
+    def add(self, first_step: int, active: np.ndarray, confidence: np.ndarray, level_db: np.ndarray):
+        for i in np.flatnonzero(active):
+            step = first_step + int(i)
+            if self._open and step - self._open["last"] > self.merge_gap:
+                self._close()
+            if self._open is None:
+                self._open = {"first": step, "last": step, "peak": step, "confidence": -1.0, "level": 0.0}
+            self._open["last"] = step
+            if confidence[i] > self._open["confidence"]:
+                self._open.update(peak=step, confidence=float(confidence[i]), level=float(level_db[i]))
+
+    def flush_before(self, step: int):
+        """Close the open event if no later step can extend it"""
+        if self._open and step - self._open["last"] > self.merge_gap:
+            self._close()
+
+    def _close(self):
+        run, self._open = self._open, None
+        start_s, end_s = run["first"] * self.step_s, (run["last"] + 1) * self.step_s
+        if end_s - start_s < self.min_length_s:
+            return
+        event = AudioEvent(kind=self.kind, start_s=round(start_s, 3), end_s=round(end_s, 3),
+                           peak_s=round((run["peak"] + 0.5) * self.step_s, 3),
+                           confidence=round(min(max(run["confidence"], 0.0), 1.0), 3),
+                           level_db=round(run["level"], 2))
+        entry = (event.confidence, next(self._counter), event)
+        if len(self._heap) < self.max_events:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heappushpop(self._heap, entry)
+
+    def finish(self) -> List[AudioEvent]:
+        if self._open:
+            self._close()
+        return [event for _, _, event in self._heap]
+
+
+class _CrowdSteps:
+    """Pools frames into CROWD_STEP_S steps and scores each against a rolling median/MAD baseline"""
+
+    def __init__(self, frames_per_step: int, runs: _EventRuns):
+        self.frames_per_step = frames_per_step
+        self.runs = runs
+        self.baseline = deque(maxlen=int(CROWD_BASELINE_S / runs.step_s))
+        self.pending_power = np.empty(0)
+        self.pending_level = np.empty(0)
+        self.step = 0
+
+    def add(self, crowd_db: np.ndarray, level_db: np.ndarray):
+        power = np.concatenate([self.pending_power, 10 ** (crowd_db / 10)])
+        level = np.concatenate([self.pending_level, level_db])
+        usable = len(power) - len(power) % self.frames_per_step
+        self.pending_power, self.pending_level = power[usable:], level[usable:]
+        if not usable:
+            return
+        step_db = 10 * np.log10(power[:usable].reshape(-1, self.frames_per_step).mean(axis=1) + 1e-12)
+        step_level = level[:usable].reshape(-1, self.frames_per_step).max(axis=1)
+
+        z = np.zeros(len(step_db))
+        for i, value in enumerate(step_db):
+            if len(self.baseline) >= CROWD_MIN_BASELINE_STEPS:
+                window = np.fromiter(self.baseline, dtype=np.float64, count=len(self.baseline))
+                median = np.median(window)
+                spread = max(1.4826 * np.median(np.abs(window - median)), 0.5)  # At least 0.5 dB
+                z[i] = (value - median) / spread
+            self.baseline.append(value)
+        active = z >= CROWD_Z
+        # Confidence reaches 1 at twice the surge threshold
+        self.runs.add(self.step, active, np.clip(z / (2 * CROWD_Z), 0.0, 1.0), step_level)
+        self.step += len(step_db)
+        self.runs.flush_before(self.step)
+
+
+class AudioEventDetector:
+    """Whistle and crowd-surge detection from streamed camera audio"""
+
+    def __init__(self, ffmpeg_service: FFmpegService, max_workers: int = 4):
+        """
+        Args:
+            max_workers: Cameras scanned in parallel by detect_session
+        """
+        self.ffmpeg = ffmpeg_service
+        self.max_workers = max_workers
+
+    @tracing.traced("audio_events.scan")
+    def scan(self, path: str, start_s: float = 0.0, duration_s: Optional[float] = None) -> AudioEventScan:
+        """
+        Detect audio events in one file.
+
+        Args:
+            path: Camera file
+            start_s, duration_s: Part of the file to scan (default: all of it)
+
+        Returns:
+            AudioEventScan with events in file time, sorted by start; a file
+            without audio gives has_audio=False and no events
+        """
+        start_time = time.time()
+        frame_s = FRAME_SAMPLES / AUDIO_SAMPLE_RATE
+        spectral = _SpectralFrames(AUDIO_SAMPLE_RATE, FRAME_SAMPLES)
+        whistles = _EventRuns("whistle", frame_s, MIN_WHISTLE_S, MAX_EVENTS_PER_FILE)
+        frames_per_step = max(1, int(round(CROWD_STEP_S / frame_s)))
+        crowd = _CrowdSteps(frames_per_step,
+                            _EventRuns("crowd", frames_per_step * frame_s, MIN_CROWD_S, MAX_EVENTS_PER_FILE))
+        frames_seen = [0]
+
+        job = current_job()
+        progress = ScanProgress(job, duration_s or (self.ffmpeg.probe_duration(path) if job else None),
+                                PROGRESS_EVERY_S)
+
+        def on_samples(chunk: bytes) -> bool:
+            features = spectral.add(chunk)
+            if features is None:
+                return False
+            share, tonality = features["whistle_share"], features["whistle_tonality"]
+            active = (share >= WHISTLE_SHARE) & (tonality >= WHISTLE_TONALITY) & (features["level_db"] > SILENCE_DB)
+            # Confidence grows with band dominance and peak sharpness
+            confidence = share * np.clip(tonality / (2 * WHISTLE_TONALITY), 0.0, 1.0)
+            whistles.add(frames_seen[0], active, confidence, features["level_db"])
+            frames_seen[0] += len(share)
+            whistles.flush_before(frames_seen[0])
+            crowd.add(features["crowd_db"], features["level_db"])
+
+            progress.update(frames_seen[0] * frame_s)
+            return False
+
+        result = self.ffmpeg.decode_audio(path, on_samples, sample_rate=AUDIO_SAMPLE_RATE,
+                                          chunk_samples=FRAME_SAMPLES * CHUNK_FRAMES,
+                                          start_s=start_s, duration_s=duration_s)
+        if not result.success:
+            reason = (result.stderr.strip().splitlines() or ["unknown error"])[-1]
+            logger.info(f"No audio events for {path}: {reason}")
+        progress.finish()
+
+        events = sorted(whistles.finish() + crowd.runs.finish(), key=lambda e: e.start_s)
+        for event in events:
+            event.start_s, event.end_s, event.peak_s = (round(t + start_s, 3)
+                                                        for t in (event.start_s, event.end_s, event.peak_s))
+        scan = AudioEventScan(
+            path=path,
+            duration_s=frames_seen[0] * frame_s,
+            processing_time_ms=(time.time() - start_time) * 1000,
+            has_audio=result.success and frames_seen[0] > 0,
+            events=events
+        )
+        tracing.current_span().set_attributes({"audio_events.duration_s": round(scan.duration_s, 2),
+                                                "audio_events.events": len(events)})
+        logger.info(f"Audio events in {path}: {len(events)} in {scan.duration_s:.0f}s of audio, "
+                    f"{scan.processing_time_ms:.0f}ms ({scan.speed:.0f}x real time)")
+        return scan
+
+    @tracing.traced("audio_events.session")
+    def detect_session(
+        self,
+        camera_files: Dict[str, str],
+        offsets: Optional[Dict[str, float]] = None,
+        kinds: Optional[List[str]] = None,
+        min_confidence: float = 0.0
+    ) -> Tuple[List[AudioEvent], Dict[str, AudioEventScan]]:
+        """
+        Scan every camera in parallel and merge their events on the session timeline.
+
+        Args:
+            camera_files: Mapping of camera IDs to their file paths
+            offsets: Per-camera sync offsets (source time = timeline time + offset)
+            kinds: Event kinds to return (default: all of KINDS)
+            min_confidence: Merged events below this are dropped
+
+        Returns:
+            (merged events sorted by time, per-camera scans in file time)
+
+        Raises:
+            ValueError: If a kind is unknown
+        """
+        kinds = kinds or list(KINDS)
+        unknown = [kind for kind in kinds if kind not in KINDS]
+        if unknown:
+            raise ValueError(f"Unknown event kind '{unknown[0]}' (expected one of: {', '.join(KINDS)})")
+        offsets = offsets or {}
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(camera_files)))) as pool:
+            futures = {camera_id: pool.submit(context.copy().run, self.scan, path)
+                       for camera_id, path in sorted(camera_files.items())}
+            scans = {camera_id: future.result() for camera_id, future in futures.items()}
+
+        per_camera = []
+        for camera_id, scan in scans.items():
+            offset = offsets.get(camera_id, 0.0)
+            for event in scan.events:
+                if event.kind not in kinds or event.end_s - offset <= 0:
+                    continue  # Before the session timeline starts
+                per_camera.append(AudioEvent(
+                    kind=event.kind,
+                    start_s=round(max(event.start_s - offset, 0.0), 3),
+                    end_s=round(event.end_s - offset, 3),
+                    peak_s=round(event.peak_s - offset, 3),
+                    confidence=event.confidence,
+                    level_db=event.level_db,
+                    cameras=[camera_id]
+                ))
+        merged = [event for event in merge_events(per_camera) if event.confidence >= min_confidence]
+        return merged, scans
+
+
+def merge_events(events: List[AudioEvent]) -> List[AudioEvent]:
+    """
+    Merge same-kind events whose peaks are within CROSS_CAMERA_TOLERANCE_S.
+    Agreeing cameras combine as independent evidence: 1 - prod(1 - confidence).
+    """
+    merged: List[AudioEvent] = []
+    open_by_kind: Dict[str, AudioEvent] = {}
+    best_by_kind: Dict[str, float] = {}  # Highest single-camera confidence of the open event
+    for event in sorted(events, key=lambda e: e.peak_s):
+        current = open_by_kind.get(event.kind)
+        if current and event.peak_s - current.peak_s <= CROSS_CAMERA_TOLERANCE_S \
+                and not set(event.cameras) & set(current.cameras):
+            if event.confidence > best_by_kind[event.kind]:
+                best_by_kind[event.kind] = event.confidence
+                current.peak_s = event.peak_s
+            current.start_s = min(current.start_s, event.start_s)
+            current.end_s = max(current.end_s, event.end_s)
+            current.confidence = round(1 - (1 - current.confidence) * (1 - event.confidence), 3)
+            current.level_db = max(current.level_db, event.level_db)
+            current.cameras = sorted(current.cameras + event.cameras)
+            continue
+        current = AudioEvent(**{**event.to_dict(), "cameras": list(event.cameras)})
+        open_by_kind[event.kind] = current
+        best_by_kind[event.kind] = event.confidence
+        merged.append(current)
+    return sorted(merged, key=lambda e: e.start_s)
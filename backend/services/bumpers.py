@@ -0,0 +1,225 @@
+"""
+Bumper library - branded intro/outro videos for reels.
+
+A bumper is uploaded once and conformed once per source stream format
+(codec, codec profile, resolution, frame rate, pixel format): the
+conformed copy is encoded with the same parameters as the videos it will
+sit next to, so attaching it to a reel is a stream-copy concat. Conformed
+copies are cached per format and re-encoded only if evicted.
+"""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from services.ffmpeg_service import FFmpegService, VideoMetadata
+from services.output_store import OutputStore, KeyedLocks
+from services.reel_encoder import EncodeProfile, frame_rate
+from services.job_progress import current_job
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def format_key(metadata: VideoMetadata) -> str:
+    """
+    Stable identifier of a stream format, used to cache conformed bumpers.
+
+    Raises:
+        ValueError: If the stream reports no usable frame rate
+    """
+    fps = frame_rate(metadata)
+    profile = "".join(ch for ch in (metadata.profile or "none").lower() if ch.isalnum())
+    return (f"{metadata.codec_name}_{profile}_{metadata.width}x{metadata.height}_"
+            f"{fps:.6g}fps_{metadata.pix_fmt}")
+
+
+@dataclass
+class Bumper:
+    """An uploaded bumper video"""
+    bumper_id: str
+    name: str
+    source_path: str
+    duration_s: float
+    created_at: datetime = field(default_factory=datetime.now)
+
+    def to_dict(self) -> Dict:
+        return {"bumper_id": self.bumper_id, "name": self.name, "duration_s": self.duration_s,
+                "created_at": self.created_at.isoformat()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Bumper":
+        return cls(bumper_id=data["bumper_id"], name=data["name"], source_path=data["source_path"],
+                   duration_s=data["duration_s"], created_at=datetime.fromisoformat(data["created_at"]))
+
+
+class BumperLibrary:
+    """Bumper videos, conformed and cached per stream format"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        ffmpeg_service: FFmpegService,
+        output_store: Optional[OutputStore] = None,
+        preset: str = "medium",
+        crf: int = 18
+    ):
+        """
+        Args:
+            preset: Encoder preset of conformed copies (encoded once per format, so a slow one is fine)
+            crf: Encoder quality of conformed copies
+        """
+        self.output_dir = Path(output_dir)
+        self.assets_dir = self.output_dir / "assets"
+        self.assets_dir.mkdir(parents=True, exist_ok=True)
+        self.ffmpeg = ffmpeg_service
+        self.output_store = output_store
+        self.preset = preset
+        self.crf = crf
+        self.bumpers: Dict[str, Bumper] = {}
+        self.conformed: Dict[Tuple[str, str], str] = {}  # (bumper_id, format key) -> conformed copy
+        self.metadata_path = self.output_dir / "library.json"
+        self._conform_locks = KeyedLocks()  # Per (bumper, format): other encodes are not held up
+        self._lock = threading.Lock()
+        self.load_metadata()
+
+    def add(self, name: str, video_path: str) -> Bumper:
+        """
+        Add a bumper from a video file (the file is moved into the library).
+
+        Raises:
+            ValueError: If the file is not a readable video
+        """
+        bumper_id = f"bumper_{uuid.uuid4().hex[:12]}"
+        source_path = str(self.assets_dir / f"{bumper_id}{Path(video_path).suffix or '.mp4'}")
+        shutil.move(video_path, source_path)
+        try:
+            metadata = self.ffmpeg.probe_cached(source_path)
+        except Exception as e:
+            os.unlink(source_path)
+            raise ValueError(f"Bumper '{name}' is not a readable video: {e}")
+
+        bumper = Bumper(bumper_id=bumper_id, name=name, source_path=source_path, duration_s=metadata.duration)
+        with self._lock:
+            self.bumpers[bumper_id] = bumper
+            self.save_metadata()
+        logger.info(f"Added bumper {bumper_id} '{name}': {metadata.width}x{metadata.height} "
+                   f"{metadata.codec_name}, {metadata.duration:.2f}s")
+        return bumper
+
+    def get(self, bumper_id: str) -> Bumper:
+        """Retrieve bumper by ID"""
+        if bumper_id not in self.bumpers:
+            raise KeyError(f"Bumper {bumper_id} not found")
+        return self.bumpers[bumper_id]
+
+    def list_bumpers(self) -> List[Bumper]:
+        """List all bumpers"""
+        return list(self.bumpers.values())
+
+    def conform(self, bumper_id: str, metadata: VideoMetadata) -> str:
+        """
+        Path of the bumper encoded in the given stream format (cached per format).
+
+        Args:
+            metadata: Stream the bumper will be joined to; the bumper is scaled and
+                letterboxed to its size and encoded with its codec, profile, frame
+                rate and pixel format
+
+        Raises:
+            KeyError: If the bumper does not exist
+            ValueError: If the format's codec cannot be encoded
+            RuntimeError: If FFmpeg operation fails
+        """
+        bumper = self.get(bumper_id)
+        key = format_key(metadata)
+        with self._conform_locks(f"{bumper_id}_{key}"):
+            path = self.conformed.get((bumper_id, key))
+            hit = path is not None and os.path.exists(path)
+            metrics.record_cache("bumper_conformed", hit=hit)
+            if hit:
+                if self.output_store:
+                    self.output_store.touch("bumper", f"{bumper_id}_{key}")
+                return path
+
+            profile = EncodeProfile.from_metadata(metadata)
+            path = str(self.output_dir / f"{bumper_id}_{key}.mp4")
+            job = current_job()
+            if job:
+                job.add_work(bumper.duration_s)
+            result = self.ffmpeg.encode_video(
+                bumper.source_path, path, profile.video_filter(),
+                preset=self.preset, crf=self.crf, gop_frames=profile.gop_frames,
+                codec=profile.encoder, pix_fmt=profile.pix_fmt, codec_profile=profile.codec_profile
+            )
+            if not result.success:
+                raise RuntimeError(f"Failed to conform bumper {bumper_id} to {key}: {result.stderr}")
+
+            with self._lock:
+                self.conformed[(bumper_id, key)] = path
+                self.save_metadata()
+            if self.output_store:
+                self.output_store.register("bumper", f"{bumper_id}_{key}", path, sources=[bumper.source_path])
+            logger.info(f"Conformed bumper {bumper_id} to {key}")
+            return path
+
+    def delete(self, bumper_id: str):
+        """Delete a bumper, its upload and every conformed copy"""
+        bumper = self.get(bumper_id)
+        with self._lock:
+            for cache_key in [key for key in self.conformed if key[0] == bumper_id]:
+                path = self.conformed.pop(cache_key)
+                if os.path.exists(path):
+                    os.unlink(path)
+                if self.output_store:
+                    self.output_store.forget("bumper", f"{bumper_id}_{cache_key[1]}")
+                self._conform_locks.discard(f"{bumper_id}_{cache_key[1]}")
+            if os.path.exists(bumper.source_path):
+                os.unlink(bumper.source_path)
+            del self.bumpers[bumper_id]
+            self.save_metadata()
+        logger.info(f"Deleted bumper: {bumper_id}")
+
+    def save_metadata(self):
+        """Save the library (bumpers and conformed copies) to library.json; call with _lock held"""
+        data = {
+            "bumpers": {bumper_id: {**bumper.to_dict(), "source_path": bumper.source_path}
+                        for bumper_id, bumper in self.bumpers.items()},
+            "conformed": [{"bumper_id": bumper_id, "format": key, "path": path}
+                          for (bumper_id, key), path in self.conformed.items()]
+        }
+        tmp_path = self.metadata_path.with_suffix(".json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.metadata_path)
+
+    def load_metadata(self):
+        """Load the library saved by an earlier run (bumpers whose upload is gone are skipped)"""
+        if not self.metadata_path.exists():
+            return
+        with open(self.metadata_path, "r") as f:
+            data = json.load(f)
+
+        for bumper_id, bumper_data in data.get("bumpers", {}).items():
+            bumper = Bumper.from_dict(bumper_data)
+            if not os.path.exists(bumper.source_path):
+                logger.warning(f"Bumper {bumper_id} upload is missing: {bumper.source_path}")
+                continue
+            self.bumpers[bumper_id] = bumper
+        for entry in data.get("conformed", []):
+            bumper_id, key, path = entry["bumper_id"], entry["format"], entry["path"]
+            if bumper_id not in self.bumpers:
+                continue
+            self.conformed[(bumper_id, key)] = path
+            if self.output_store and os.path.exists(path):
+                self.output_store.register("bumper", f"{bumper_id}_{key}", path,
+                                           sources=[self.bumpers[bumper_id].source_path])
+
+        logger.info(f"Loaded {len(self.bumpers)} bumpers from {self.metadata_path}")
@@ -6,12 +6,18 @@ import os
 import uuid
 import json
 import time
-from typing import List, Dict
+from typing import List, Dict, Optional
 from pathlib import Path
 import logging
 
-from models.clip import ClipSegment, Clip
-from services.ffmpeg_service import FFmpegService
+from models.clip import ClipSegment
+from services.ffmpeg_service import FFmpegService, FFmpegResult
+from services.reel_encoder import EncodeProfile
+from services.output_store import OutputStore, Rerenderer
+from services.records import ClipRecord, SegmentTable
+from services.sync_service import SyncService
+from services import tracing
+from services.profiling import profiled
 
 logger = logging.getLogger(__name__)
 
@@ -19,26 +25,41 @@ logger = logging.getLogger(__name__)
 class ClipService:
     """Service for creating video clips from camera segments"""
 
-    def __init__(self, output_dir: str, ffmpeg_service: FFmpegService):
+    def __init__(self, output_dir: str, ffmpeg_service: FFmpegService, output_store: Optional[OutputStore] = None,
+                 sync_service: Optional[SyncService] = None, replay_preset: str = "veryfast", replay_crf: int = 20):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.ffmpeg = ffmpeg_service
-        self.clips_db = {}  # Simple in-memory storage: clip_id -> Clip
-
+        self.output_store = output_store
+        self.sync = sync_service  # When set, segment times are on the reference camera's timeline
+        self.replay_preset = replay_preset  # Encoder settings of retimed (speed != 1) segments
+        self.replay_crf = replay_crf
+        self.clips_db: Dict[str, ClipRecord] = {}  # Simple in-memory storage: clip_id -> ClipRecord
+        self._outputs = Rerenderer("clip", output_store)  # Per-clip re-render of evicted files
+
+    @profiled
+    @tracing.traced("clip.create")
     def create_clip(
         self,
         segments: List[ClipSegment],
         camera_files: Dict[str, str]  # {camera_id: file_path}
-    ) -> Clip:
+    ) -> ClipRecord:
         """
         Create a clip from a list of camera segments.
 
+        Segments with a speed other than 1 (slow-motion replays) are the
+        only parts re-encoded; everything else is stream-copied.
+
+        With a sync service, segment times are on the reference camera's
+        timeline and are shifted by each camera's sync offset; the record
+        keeps the shifted (source file) times and the offsets applied.
+
         Args:
-            segments: List of segments (camera_id, start_s, end_s)
+            segments: List of segments (camera_id, start_s, end_s, speed, interpolate)
             camera_files: Mapping of camera IDs to their file paths
 
         Returns:
-            Clip object with metadata
+            ClipRecord with metadata
 
         Raises:
             ValueError: If segments are invalid
@@ -48,63 +69,191 @@ class ClipService:
             raise ValueError("No segments provided")
 
         # Validate all camera IDs exist in camera_files
-        for seg in segments:
-            if seg.camera_id not in camera_files:
-                raise ValueError(f"Camera {seg.camera_id} not found in provided files")
-            if seg.end_s <= seg.start_s:
-                raise ValueError(f"Invalid segment: end_s ({seg.end_s}) must be > start_s ({seg.start_s})")
+        with tracing.span("clip.validate_segments", segments=len(segments)):
+            for seg in segments:
+                if seg.camera_id not in camera_files:
+                    raise ValueError(f"Camera {seg.camera_id} not found in provided files")
+                if seg.end_s <= seg.start_s:
+                    raise ValueError(f"Invalid segment: end_s ({seg.end_s}) must be > start_s ({seg.start_s})")
 
         # Generate clip ID and output path
         clip_id = f"clip_{uuid.uuid4().hex[:12]}"
         output_path = self.output_dir / f"{clip_id}.mp4"
+        tracing.current_span().set_attributes({"clip.id": clip_id, "clip.segments": len(segments)})
 
         logger.info(f"Creating clip {clip_id} with {len(segments)} segments")
 
-        # Convert segments to FFmpeg format
-        ffmpeg_segments = []
-        total_duration = 0.0
-        for seg in segments:
-            camera_path = camera_files[seg.camera_id]
-            ffmpeg_segments.append({
-                "path": camera_path,
-                "start_s": seg.start_s,
-                "end_s": seg.end_s
-            })
-            total_duration += (seg.end_s - seg.start_s)
-            logger.info(f"  Segment: {seg.camera_id} {seg.start_s:.2f}s-{seg.end_s:.2f}s ({seg.end_s-seg.start_s:.2f}s)")
+        offsets: Dict[str, float] = {}
+        if self.sync:
+            sync = self.sync.analyze(camera_files)
+            offsets = {seg.camera_id: sync.offset(seg.camera_id) for seg in segments}
+            segments = self._apply_offsets(segments, offsets, camera_files)
+
+        table = SegmentTable.from_segments(segments)
+        total_duration = table.total_duration()
+        for i, (camera_id, start_s, end_s) in enumerate(table):
+            speed, _ = table.retiming(i)
+            logger.info(f"  Segment: {camera_id} {start_s:.2f}s-{end_s:.2f}s ({end_s-start_s:.2f}s)"
+                        + (f" at {speed:g}x" if speed != 1.0 else ""))
 
         # Build the clip using FFmpeg
         start_time = time.time()
-        result = self.ffmpeg.extract_and_concat(
-            segments=ffmpeg_segments,
-            output_path=str(output_path)
-        )
+        result = self._render(table, camera_files, str(output_path))
 
         if not result.success:
             raise RuntimeError(f"Failed to create clip: {result.stderr}")
 
         processing_time_ms = (time.time() - start_time) * 1000
 
-        # Create clip object
-        clip = Clip(
+        # Create clip record
+        clip = ClipRecord(
             clip_id=clip_id,
-            segments=segments,
+            segments=table,
             output_path=str(output_path),
             filesize_bytes=result.filesize_bytes,
-            duration_s=total_duration
+            duration_s=total_duration,
+            camera_files={camera_id: camera_files[camera_id] for camera_id in table.camera_ids()},
+            resource_usage=result.resource_usage,
+            sync_offsets=offsets
         )
 
         # Store in memory
         self.clips_db[clip_id] = clip
+        if self.output_store:
+            self.output_store.register("clip", clip_id, clip.output_path,
+                                       sources=list(clip.camera_files.values()))
 
         logger.info(f"Clip {clip_id} created successfully: "
                    f"duration={total_duration:.2f}s, "
                    f"size={result.filesize_bytes:,} bytes, "
-                   f"processing_time={processing_time_ms:.0f}ms")
+                   f"processing_time={processing_time_ms:.0f}ms, "
+                   f"cpu={result.resource_usage.cpu_s:.2f}s")
 
         return clip
 
-    def get_clip(self, clip_id: str) -> Clip:
+    def _apply_offsets(self, segments: List[ClipSegment], offsets: Dict[str, float],
+                       camera_files: Dict[str, str]) -> List[ClipSegment]:
+        """
+        Map timeline times to source file times (source = timeline + offset).
+
+        Raises:
+            ValueError: If a segment lies entirely before its camera started or after it stopped recording
+        """
+        shifted = []
+        for seg in segments:
+            offset = offsets.get(seg.camera_id, 0.0)
+            start_s, end_s = seg.start_s + offset, seg.end_s + offset
+            if end_s <= 0:
+                raise ValueError(f"Segment {seg.start_s:.2f}s-{seg.end_s:.2f}s is before camera "
+                                 f"{seg.camera_id} started recording (offset {offset:+.3f}s)")
+            if start_s < 0:
+                logger.warning(f"Segment on {seg.camera_id} starts {-start_s:.2f}s before the camera "
+                               f"started recording; trimming")
+                start_s = 0.0
+            duration = self.ffmpeg.probe_cached(camera_files[seg.camera_id]).duration
+            if duration > 0:  # 0 when the container does not report it
+                if start_s >= duration:
+                    raise ValueError(f"Segment {seg.start_s:.2f}s-{seg.end_s:.2f}s is after camera "
+                                     f"{seg.camera_id} stopped recording (offset {offset:+.3f}s)")
+                if end_s > duration:
+                    logger.warning(f"Segment on {seg.camera_id} ends {end_s - duration:.2f}s after the camera "
+                                   f"stopped recording; trimming")
+                    end_s = duration
+            shifted.append(ClipSegment.model_construct(camera_id=seg.camera_id, start_s=start_s, end_s=end_s,
+                                                       speed=seg.speed, interpolate=seg.interpolate))
+        return shifted
+
+    @tracing.traced("clip.render")
+    def _render(
+        self,
+        segments: SegmentTable,
+        camera_files: Dict[str, str],
+        output_path: str
+    ) -> FFmpegResult:
+        """Render a segment table to output_path"""
+        # Convert segments to FFmpeg format
+        ffmpeg_segments = [
+            {
+                "path": camera_files[camera_id],
+                "start_s": start_s,
+                "end_s": end_s
+            }
+            for camera_id, start_s, end_s in segments
+        ]
+        for index, (speed, interpolate) in (segments.retimed or {}).items():
+            segment = ffmpeg_segments[index]
+            segment["encode"] = self._retime_settings(segment["path"], segment["end_s"] - segment["start_s"],
+                                                      speed, interpolate)
+        return self.ffmpeg.extract_and_concat(
+            segments=ffmpeg_segments,
+            output_path=output_path
+        )
+
+    def _retime_settings(self, path: str, source_s: float, speed: float, interpolate: bool) -> Dict:
+        """
+        encode_video arguments for a retimed segment of path, matching the stream
+        format of the copied segments (codec, codec profile, size, frame rate,
+        pixel format).
+        """
+        profile = EncodeProfile.from_metadata(self.ffmpeg.probe_cached(path))
+        return {
+            "video_filter": profile.retime_filter(speed, interpolate),
+            "duration_s": source_s / speed,
+            "preset": self.replay_preset,
+            "crf": self.replay_crf,
+            "gop_frames": profile.gop_frames,
+            "codec": profile.encoder,
+            "pix_fmt": profile.pix_fmt,
+            "codec_profile": profile.codec_profile
+        }
+
+    def cached_path(self, clip_id: str) -> Optional[str]:
+        """
+        Path of a clip whose file is on disk (None if it has to be re-rendered first).
+
+        Raises:
+            KeyError: If the clip does not exist
+        """
+        clip = self.get_clip(clip_id)
+        return clip.output_path if self._outputs.resident(clip_id, [clip.output_path]) else None
+
+    @profiled
+    def ensure_rendered(self, clip_id: str) -> str:
+        """
+        Get the file path for a clip, re-rendering it from its segment spec
+        if the file was evicted.
+
+        Raises:
+            KeyError: If the clip does not exist
+            FileNotFoundError: If the file is gone and the source files are no longer available
+            RuntimeError: If FFmpeg operation fails
+        """
+        clip = self.get_clip(clip_id)
+        self._outputs.ensure(clip_id, [clip.output_path], lambda: self._rerender(clip))
+        return clip.output_path
+
+    def _rerender(self, clip: ClipRecord):
+        """Re-render an evicted clip from its segment spec"""
+        clip_id = clip.clip_id
+        missing = [path for path in clip.camera_files.values() if not os.path.exists(path)]
+        if not clip.camera_files or missing:
+            raise FileNotFoundError(f"Clip {clip_id} file is gone and its source files are no longer available")
+
+        logger.info(f"Re-rendering evicted clip {clip_id}")
+        start_time = time.time()
+        result = self._render(clip.segments, clip.camera_files, clip.output_path)
+        if not result.success:
+            raise RuntimeError(f"Failed to re-render clip: {result.stderr}")
+
+        clip.filesize_bytes = result.filesize_bytes
+        clip.resource_usage.add(result.resource_usage)
+        if self.output_store:
+            self.output_store.register("clip", clip_id, clip.output_path,
+                                       sources=list(clip.camera_files.values()))
+
+        logger.info(f"Clip {clip_id} re-rendered in {(time.time() - start_time) * 1000:.0f}ms")
+
+    def get_clip(self, clip_id: str) -> ClipRecord:
         """Retrieve clip by ID"""
         if clip_id not in self.clips_db:
             raise KeyError(f"Clip {clip_id} not found")
@@ -126,25 +275,18 @@ class ClipService:
 
         # Remove from memory
         del self.clips_db[clip_id]
+        self._outputs.discard(clip_id)
+        if self.output_store:
+            self.output_store.forget("clip", clip_id)
         logger.info(f"Deleted clip: {clip_id}")
 
-    def list_clips(self) -> List[Clip]:
+    def list_clips(self) -> List[ClipRecord]:
         """List all clips"""
         return list(self.clips_db.values())
 
     def save_metadata(self, metadata_path: str):
         """Save clip metadata to JSON file"""
-        data = {
-            clip_id: {
-                "clip_id": clip.clip_id,
-                "segments": [seg.dict() for seg in clip.segments],
-                "output_path": clip.output_path,
-                "filesize_bytes": clip.filesize_bytes,
-                "duration_s": clip.duration_s,
-                "created_at": clip.created_at.isoformat()
-            }
-            for clip_id, clip in self.clips_db.items()
-        }
+        data = {clip_id: clip.to_dict() for clip_id, clip in self.clips_db.items()}
 
         with open(metadata_path, 'w') as f:
             json.dump(data, f, indent=2)
@@ -161,7 +303,10 @@ class ClipService:
             data = json.load(f)
 
         for clip_id, clip_data in data.items():
-            clip = Clip(**clip_data)
+            clip = ClipRecord.from_dict(clip_data)
             self.clips_db[clip_id] = clip
+            if self.output_store and os.path.exists(clip.output_path):
+                self.output_store.register("clip", clip_id, clip.output_path,
+                                           sources=list(clip.camera_files.values()))
 
         logger.info(f"Loaded metadata for {len(data)} clips from {metadata_path}")
@@ -1,6 +1,7 @@
 """
 FFmpeg service for stream-copy operations.
-Zero re-encoding, maximum performance.
+Zero re-encoding, maximum performance; encode_video is the one exception,
+used only where an output format has to be normalized.
 """
 
 import subprocess
@@ -8,13 +9,24 @@ import json
 import time
 import tempfile
 import os
+import uuid
+import threading
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass
+from typing import Callable, List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
 import logging
 
+from services import metrics
+from services.job_progress import FFmpegProgress, current_job
+from services import tracing
+from services.resource_usage import ResourceUsage, wait_with_rusage
+
 logger = logging.getLogger(__name__)
 
+# Lines of ffmpeg stderr kept for error reporting; the rest is discarded as it streams
+STDERR_TAIL_LINES = 200
+
 
 @dataclass
 class VideoMetadata:
@@ -45,6 +57,7 @@ class FFmpegResult:
     stderr: str
     filesize_bytes: int = 0
     throughput_mbps: float = 0.0
+    resource_usage: ResourceUsage = field(default_factory=ResourceUsage)  # Summed over all children
 
 
 class FFmpegService:
@@ -53,6 +66,143 @@ class FFmpegService:
     def __init__(self, ffmpeg_bin: str = "ffmpeg", ffprobe_bin: str = "ffprobe"):
         self.ffmpeg_bin = ffmpeg_bin
         self.ffprobe_bin = ffprobe_bin
+        self._probe_cache: Dict[Tuple[str, int, int], VideoMetadata] = {}  # (path, size, mtime) -> metadata
+        self._probe_lock = threading.Lock()
+
+    def _run(self, cmd: List[str], operation: str) -> Tuple[subprocess.CompletedProcess, ResourceUsage]:
+        """Run ffprobe, capturing its (small) stdout"""
+        with tracing.span(f"ffprobe.{operation}", **{"process.command": cmd[0]}) as span:
+            stdout_lines: List[str] = []
+            result, usage = self._spawn(cmd, stdout_lines.append, span)
+            result.stdout = "".join(stdout_lines)
+            return result, usage
+
+    def _run_ffmpeg(self, cmd: List[str], operation: str) -> Tuple[subprocess.CompletedProcess, ResourceUsage]:
+        """
+        Run ffmpeg with a machine-readable progress channel on stdout.
+
+        Progress blocks are parsed as they arrive and reported to the current
+        job (if any); stderr is drained on a side thread keeping only the last
+        STDERR_TAIL_LINES lines.
+        """
+        full_cmd = [cmd[0], "-nostats", "-progress", "pipe:1"] + cmd[1:]
+        job = current_job()
+        progress = FFmpegProgress()
+
+        def on_line(line: str):
+            key, _, value = line.strip().partition("=")
+            if progress.update(key, value) and job:
+                job.ffmpeg_progress(progress)
+
+        with tracing.span(f"ffmpeg.{operation}", **{"process.command": cmd[0]}) as span:
+            result, usage = self._spawn(full_cmd, on_line, span)
+            span.set_attributes({
+                "ffmpeg.out_time_s": progress.out_time_s,
+                "ffmpeg.total_size": progress.total_size,
+                "ffmpeg.speed": progress.speed,
+            })
+
+        if job:
+            job.ffmpeg_finished(progress)
+        return subprocess.CompletedProcess(cmd, result.returncode, stdout="", stderr=result.stderr), usage
+
+    def _spawn(self, cmd: List[str], on_stdout_line, span) -> Tuple[subprocess.CompletedProcess, ResourceUsage]:
+        """Start a child, feed stdout lines to on_stdout_line, reap it and measure its resource usage"""
+        stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+
+        metrics.FFMPEG_ACTIVE.inc()
+        try:
+            spawn_start = time.perf_counter()
+            proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                    stderr=subprocess.PIPE, text=True, errors="replace")
+            span.set_attribute("process.pid", proc.pid)
+            span.set_attribute("process.spawn_ms", round((time.perf_counter() - spawn_start) * 1000, 3))
+            drain = threading.Thread(target=stderr_tail.extend, args=(proc.stderr,), daemon=True)
+            drain.start()
+
+            for line in proc.stdout:
+                on_stdout_line(line)
+
+            returncode, usage = wait_with_rusage(proc)
+            drain.join()
+        finally:
+            metrics.FFMPEG_ACTIVE.dec()
+
+        span.set_attribute("process.exit_code", returncode)
+        span.set_attributes(usage.span_attributes())
+        if returncode != 0:
+            span.set_status("ERROR", f"exit code {returncode}")
+        return subprocess.CompletedProcess(cmd, returncode, stdout="", stderr="".join(stderr_tail)), usage
+
+    def _run_raw(self, cmd: List[str], operation: str, chunk_bytes: int,
+                 on_chunk: Callable[[bytes], Optional[bool]]) -> Tuple[subprocess.CompletedProcess, ResourceUsage]:
+        """
+        Run ffmpeg writing raw media (PCM, rawvideo) to stdout and hand it to
+        on_chunk in chunk_bytes pieces (the last one may be shorter), so
+        analyzers never hold more than one chunk. on_chunk returning True
+        stops the decode early; that still counts as success.
+        """
+        full_cmd = [cmd[0], "-nostats"] + cmd[1:]
+        stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        stopped = False
+        bytes_read = 0
+
+        def drain_stderr(stream):
+            stderr_tail.extend(line.decode(errors="replace") for line in stream)
+
+        with tracing.span(f"ffmpeg.{operation}", **{"process.command": cmd[0]}) as span:
+            metrics.FFMPEG_ACTIVE.inc()
+            try:
+                spawn_start = time.perf_counter()
+                proc = subprocess.Popen(full_cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                        stderr=subprocess.PIPE)
+                span.set_attribute("process.pid", proc.pid)
+                span.set_attribute("process.spawn_ms", round((time.perf_counter() - spawn_start) * 1000, 3))
+                drain = threading.Thread(target=drain_stderr, args=(proc.stderr,), daemon=True)
+                drain.start()
+
+                try:
+                    while True:
+                        chunk = proc.stdout.read(chunk_bytes)
+                        if not chunk:
+                            break
+                        bytes_read += len(chunk)
+                        if on_chunk(chunk):
+                            stopped = True
+                            proc.kill()
+                            break
+                except BaseException:
+                    proc.kill()
+                    raise
+                finally:
+                    proc.stdout.close()
+                    returncode, usage = wait_with_rusage(proc)
+                    drain.join()
+            finally:
+                metrics.FFMPEG_ACTIVE.dec()
+
+            if stopped:
+                returncode = 0
+            span.set_attributes({"process.exit_code": returncode, "ffmpeg.bytes_read": bytes_read,
+                                 "ffmpeg.stopped_early": stopped})
+            span.set_attributes(usage.span_attributes())
+            if returncode != 0:
+                span.set_status("ERROR", f"exit code {returncode}")
+        return subprocess.CompletedProcess(cmd, returncode, stdout="", stderr="".join(stderr_tail)), usage
+
+    def _record(self, operation: str, result: FFmpegResult, count_bytes: bool = True) -> FFmpegResult:
+        """Record metrics for a finished operation and pass the result through"""
+        metrics.FFMPEG_OPERATIONS.inc(operation=operation, status="success" if result.success else "failure")
+        metrics.FFMPEG_DURATION.observe(result.duration_ms / 1000, operation=operation)
+        if count_bytes:
+            # Composite operations are already counted through their children
+            metrics.FFMPEG_CPU_SECONDS.inc(result.resource_usage.cpu_user_s, operation=operation, mode="user")
+            metrics.FFMPEG_CPU_SECONDS.inc(result.resource_usage.cpu_system_s, operation=operation, mode="system")
+        if result.success and count_bytes:
+            metrics.FFMPEG_BYTES.inc(result.filesize_bytes, operation=operation)
+            if result.throughput_mbps > 0:
+                metrics.FFMPEG_THROUGHPUT.observe(result.throughput_mbps, operation=operation)
+        return result
 
     def probe_video(self, video_path: str) -> VideoMetadata:
         """
@@ -69,7 +219,11 @@ class FFmpegService:
             video_path
         ]
 
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        start_time = time.time()
+        result, _ = self._run(cmd, "probe")
+        duration_s = time.time() - start_time
+        metrics.FFMPEG_DURATION.observe(duration_s, operation="probe")
+        metrics.FFMPEG_OPERATIONS.inc(operation="probe", status="success" if result.returncode == 0 else "failure")
         if result.returncode != 0:
             raise RuntimeError(f"ffprobe failed: {result.stderr}")
 
@@ -92,6 +246,44 @@ class FFmpegService:
             sample_aspect_ratio=stream.get("sample_aspect_ratio", "1:1")
         )
 
+    def probe_cached(self, video_path: str) -> VideoMetadata:
+        """
+        probe_video, cached per file identity (path, size, mtime) so a file is probed once.
+        """
+        stat = os.stat(video_path)
+        key = (os.path.realpath(video_path), stat.st_size, stat.st_mtime_ns)
+        with self._probe_lock:
+            metadata = self._probe_cache.get(key)
+        metrics.record_cache("probe", hit=metadata is not None)
+        if metadata is None:
+            metadata = self.probe_video(video_path)
+            with self._probe_lock:
+                self._probe_cache[key] = metadata
+        return metadata
+
+    def probe_duration(self, video_path: str) -> Optional[float]:
+        """Media duration for progress reporting (None if it cannot be probed)"""
+        try:
+            return self.probe_cached(video_path).duration or None
+        except (RuntimeError, OSError, ValueError) as e:
+            logger.debug(f"Could not probe {video_path} for progress: {e}")
+            return None
+
+    def has_stream(self, path: str, stream: str = "a:0") -> bool:
+        """
+        Whether a file has the given stream (an ffprobe stream specifier, e.g. a:0 or v:0).
+
+        Raises:
+            RuntimeError: If the file cannot be probed
+        """
+        cmd = [self.ffprobe_bin, "-v", "error", "-select_streams", stream,
+               "-show_entries", "stream=index", "-of", "csv=p=0", path]
+        result, _ = self._run(cmd, "probe")
+        metrics.FFMPEG_OPERATIONS.inc(operation="probe", status="success" if result.returncode == 0 else "failure")
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe failed: {result.stderr}")
+        return bool(result.stdout.strip())
+
     def validate_compatibility(self, video_paths: List[str]) -> Tuple[bool, str]:
         """
         Validate that all videos are compatible for stream-copy concat.
@@ -168,7 +360,7 @@ class FFmpegService:
             ]
 
         start_time = time.time()
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result, usage = self._run_ffmpeg(cmd, "extract")
         duration_ms = (time.time() - start_time) * 1000
 
         success = result.returncode == 0
@@ -184,7 +376,7 @@ class FFmpegService:
                    f"duration={duration_ms:.0f}ms, size={filesize:,} bytes, "
                    f"throughput={throughput:.1f} Mbps")
 
-        return FFmpegResult(
+        return self._record("extract", FFmpegResult(
             success=success,
             output_path=output_path if success else None,
             duration_ms=duration_ms,
@@ -192,8 +384,84 @@ class FFmpegService:
             exit_code=result.returncode,
             stderr=result.stderr,
             filesize_bytes=filesize,
-            throughput_mbps=throughput
-        )
+            throughput_mbps=throughput,
+            resource_usage=usage
+        ))
+
+    def copy_range(
+        self,
+        input_path: str,
+        output_path: str,
+        start_s: float = 0.0,
+        max_frames: Optional[int] = None
+    ) -> FFmpegResult:
+        """
+        Stream-copy a keyframe-aligned part of a video (no audio).
+
+        Unlike extract_segment, the cut is exact: the part starts on the
+        keyframe at start_s, and max_frames counts packets in decoding order,
+        so a part ending just before a (closed-GOP) keyframe stops right there.
+
+        Args:
+            input_path: Source video file
+            output_path: Output file path
+            start_s: A keyframe time, in seconds from the start of the video (as PacketIndex.keyframes_s)
+            max_frames: Packets to copy, including any edit-list preroll (default: to the end)
+
+        Returns:
+            FFmpegResult with operation details
+        """
+        if start_s > 0 and max_frames is not None:
+            # ffmpeg seeks B-frame video a little before -ss and counts the packets it then
+            # drops toward -frames, so cut the start first and count packets from there
+            rest_path = f"{output_path}.rest.mp4"
+            try:
+                result = self.copy_range(input_path, rest_path, start_s=start_s)
+                if not result.success:
+                    return result
+                return self.copy_range(rest_path, output_path, max_frames=max_frames)
+            finally:
+                if os.path.exists(rest_path):
+                    os.unlink(rest_path)
+
+        cmd = [self.ffmpeg_bin]
+        if start_s > 0:
+            # Must hit the keyframe exactly: earlier copies the GOP before it as hidden preroll,
+            # later hides the keyframe itself
+            cmd += ["-ss", f"{start_s:.6f}"]
+        cmd += ["-i", input_path, "-map", "0:v:0", "-c", "copy", "-an"]
+        if max_frames is not None:
+            cmd += ["-frames:v", str(max_frames)]
+        cmd += ["-y", output_path]
+
+        start_time = time.time()
+        result, usage = self._run_ffmpeg(cmd, "extract")
+        duration_ms = (time.time() - start_time) * 1000
+
+        success = result.returncode == 0
+        filesize = 0
+        throughput = 0.0
+
+        if success and os.path.exists(output_path):
+            filesize = os.path.getsize(output_path)
+            if duration_ms > 0:
+                throughput = (filesize * 8 / 1_000_000) / (duration_ms / 1000)  # Mbps
+
+        logger.info(f"Copy range of {os.path.basename(input_path)} from {start_s:.2f}s: "
+                   f"duration={duration_ms:.0f}ms, size={filesize:,} bytes, "
+                   f"throughput={throughput:.1f} Mbps")
+
+        return self._record("extract", FFmpegResult(
+            success=success,
+            output_path=output_path if success else None,
+            duration_ms=duration_ms,
+            command=" ".join(cmd),
+            exit_code=result.returncode,
+            stderr=result.stderr,
+            filesize_bytes=filesize,
+            throughput_mbps=throughput,
+            resource_usage=usage
+        ))
 
     def concat_segments(
         self,
@@ -212,21 +480,21 @@ class FFmpegService:
             FFmpegResult with operation details
         """
         if not segment_paths:
-            return FFmpegResult(
+            return self._record("concat", FFmpegResult(
                 success=False,
                 output_path=None,
                 duration_ms=0,
                 command="",
                 exit_code=-1,
                 stderr="No segments provided"
-            )
+            ))
 
         if len(segment_paths) == 1:
             # Single segment - just copy
             import shutil
             shutil.copy2(segment_paths[0], output_path)
             filesize = os.path.getsize(output_path)
-            return FFmpegResult(
+            return self._record("concat", FFmpegResult(
                 success=True,
                 output_path=output_path,
                 duration_ms=0,
@@ -234,7 +502,7 @@ class FFmpegService:
                 exit_code=0,
                 stderr="",
                 filesize_bytes=filesize
-            )
+            ))
 
         # Create concat file
         concat_file = tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False)
@@ -259,7 +527,7 @@ class FFmpegService:
             ]
 
             start_time = time.time()
-            result = subprocess.run(cmd, capture_output=True, text=True)
+            result, usage = self._run_ffmpeg(cmd, "concat")
             duration_ms = (time.time() - start_time) * 1000
 
             success = result.returncode == 0
@@ -275,7 +543,7 @@ class FFmpegService:
                        f"duration={duration_ms:.0f}ms, size={filesize:,} bytes, "
                        f"throughput={throughput:.1f} Mbps")
 
-            return FFmpegResult(
+            return self._record("concat", FFmpegResult(
                 success=success,
                 output_path=output_path if success else None,
                 duration_ms=duration_ms,
@@ -283,8 +551,9 @@ class FFmpegService:
                 exit_code=result.returncode,
                 stderr=result.stderr,
                 filesize_bytes=filesize,
-                throughput_mbps=throughput
-            )
+                throughput_mbps=throughput,
+                resource_usage=usage
+            ))
         finally:
             # Cleanup concat file
             try:
@@ -292,9 +561,433 @@ class FFmpegService:
             except:
                 pass
 
+    def fragment_video(
+        self,
+        input_path: str,
+        output_path: str,
+        timescale: int = 90000
+    ) -> FFmpegResult:
+        """
+        Remux a video into a fragmented MP4 (one fragment per keyframe) using stream-copy.
+        Fragments from different files can then be laid end to end without a full concat.
+
+        Args:
+            input_path: Source video file
+            output_path: Output file path
+            timescale: Track timescale, fixed so fragments from different clips line up
+
+        Returns:
+            FFmpegResult with operation details
+        """
+        cmd = [
+            self.ffmpeg_bin,
+            "-i", input_path,
+            "-c", "copy",
+            "-an",
+            "-movflags", "+frag_keyframe+empty_moov+default_base_moof",
+            "-video_track_timescale", str(timescale),
+            "-f", "mp4",
+            "-y",
+            output_path
+        ]
+
+        start_time = time.time()
+        result, usage = self._run_ffmpeg(cmd, "fragment")
+        duration_ms = (time.time() - start_time) * 1000
+
+        success = result.returncode == 0
+        filesize = 0
+        throughput = 0.0
+
+        if success and os.path.exists(output_path):
+            filesize = os.path.getsize(output_path)
+            if duration_ms > 0:
+                throughput = (filesize * 8 / 1_000_000) / (duration_ms / 1000)  # Mbps
+
+        logger.info(f"Fragment {os.path.basename(input_path)}: "
+                   f"duration={duration_ms:.0f}ms, size={filesize:,} bytes, "
+                   f"throughput={throughput:.1f} Mbps")
+
+        return self._record("fragment", FFmpegResult(
+            success=success,
+            output_path=output_path if success else None,
+            duration_ms=duration_ms,
+            command=" ".join(cmd),
+            exit_code=result.returncode,
+            stderr=result.stderr,
+            filesize_bytes=filesize,
+            throughput_mbps=throughput,
+            resource_usage=usage
+        ))
+
+    def encode_video(
+        self,
+        input_path: str,
+        output_path: str,
+        video_filter: str,
+        start_s: float = 0.0,
+        duration_s: Optional[float] = None,
+        preset: str = "veryfast",
+        crf: int = 23,
+        gop_frames: Optional[int] = None,
+        threads: int = 0,
+        codec: str = "libx264",
+        pix_fmt: str = "yuv420p",
+        codec_profile: Optional[str] = None
+    ) -> FFmpegResult:
+        """
+        Re-encode the video stream through a filter graph (no audio).
+
+        Args:
+            input_path: Source video file
+            output_path: Output file path
+            video_filter: -vf filter graph applied before encoding
+            start_s: Encode from this time (seeking to a keyframe here decodes nothing extra)
+            duration_s: Encode at most this long (default: to the end)
+            preset: Encoder preset (x264/x265)
+            crf: Encoder constant rate factor
+            gop_frames: Maximum keyframe interval in frames (default: the encoder's)
+            threads: Encoder/decoder threads (0 = ffmpeg picks per core count)
+            codec: ffmpeg encoder name
+            pix_fmt: Output pixel format
+            codec_profile: Encoder profile, e.g. high or main (default: the encoder's choice)
+
+        Returns:
+            FFmpegResult with operation details
+        """
+        cmd = [self.ffmpeg_bin, "-threads", str(threads)]
+        if start_s > 0:
+            cmd += ["-ss", f"{start_s:.6f}"]
+        cmd += ["-i", input_path]
+        if duration_s is not None:
+            cmd += ["-t", f"{duration_s:.6f}"]
+        cmd += [
+            "-map", "0:v:0", "-an",
+            "-vf", video_filter,
+            "-c:v", codec, "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", pix_fmt,
+            "-threads", str(threads),
+        ]
+        if codec_profile:
+            cmd += ["-profile:v", codec_profile]
+        if gop_frames:
+            cmd += ["-g", str(gop_frames)]
+        cmd += ["-movflags", "+faststart", "-y", output_path]
+
+        start_time = time.time()
+        result, usage = self._run_ffmpeg(cmd, "encode")
+        duration_ms = (time.time() - start_time) * 1000
+
+        success = result.returncode == 0
+        filesize = 0
+        throughput = 0.0
+
+        if success and os.path.exists(output_path):
+            filesize = os.path.getsize(output_path)
+            if duration_ms > 0:
+                throughput = (filesize * 8 / 1_000_000) / (duration_ms / 1000)  # Mbps
+
+        logger.info(f"Encode {os.path.basename(input_path)} from {start_s:.2f}s: "
+                   f"duration={duration_ms:.0f}ms, size={filesize:,} bytes, "
+                   f"cpu={usage.cpu_s:.2f}s")
+
+        return self._record("encode", FFmpegResult(
+            success=success,
+            output_path=output_path if success else None,
+            duration_ms=duration_ms,
+            command=" ".join(cmd),
+            exit_code=result.returncode,
+            stderr=result.stderr,
+            filesize_bytes=filesize,
+            throughput_mbps=throughput,
+            resource_usage=usage
+        ))
+
+    def encode_variants(
+        self,
+        input_path: str,
+        outputs: List[Tuple[str, str]],
+        preset: str = "veryfast",
+        crf: int = 23,
+        threads: int = 0
+    ) -> FFmpegResult:
+        """
+        Encode several filtered versions of one input from a single decode.
+
+        The decoded video is split inside one filter graph, so each extra
+        output costs only its own filter chain and encode.
+
+        Args:
+            input_path: Source video file
+            outputs: (filter chain, output path) per version, e.g. ("crop=...,scale=1080:1080", "square.mp4")
+            preset: x264 preset
+            crf: x264 constant rate factor
+            threads: Encoder/decoder threads (0 = ffmpeg picks per core count)
+
+        Returns:
+            FFmpegResult with operation details (filesize_bytes summed over all outputs)
+        """
+        labels = [f"v{i}" for i in range(len(outputs))]
+        graph = f"[0:v]split={len(outputs)}" + "".join(f"[s{i}]" for i in range(len(outputs)))
+        for i, (chain, _) in enumerate(outputs):
+            graph += f";[s{i}]{chain}[{labels[i]}]"
+
+        cmd = [self.ffmpeg_bin, "-threads", str(threads), "-i", input_path, "-filter_complex", graph]
+        for label, (_, output_path) in zip(labels, outputs):
+            cmd += [
+                "-map", f"[{label}]", "-an",
+                "-c:v", "libx264", "-preset", preset, "-crf", str(crf), "-pix_fmt", "yuv420p",
+                "-movflags", "+faststart", "-y", output_path
+            ]
+
+        start_time = time.time()
+        result, usage = self._run_ffmpeg(cmd, "encode_variants")
+        duration_ms = (time.time() - start_time) * 1000
+
+        success = result.returncode == 0
+        filesize = 0
+        throughput = 0.0
+
+        if success:
+            filesize = sum(os.path.getsize(path) for _, path in outputs if os.path.exists(path))
+            if duration_ms > 0:
+                throughput = (filesize * 8 / 1_000_000) / (duration_ms / 1000)  # Mbps
+
+        logger.info(f"Encode {len(outputs)} variants of {os.path.basename(input_path)}: "
+                   f"duration={duration_ms:.0f}ms, size={filesize:,} bytes, "
+                   f"cpu={usage.cpu_s:.2f}s")
+
+        return self._record("encode_variants", FFmpegResult(
+            success=success,
+            output_path=outputs[0][1] if success and outputs else None,
+            duration_ms=duration_ms,
+            command=" ".join(cmd),
+            exit_code=result.returncode,
+            stderr=result.stderr,
+            filesize_bytes=filesize,
+            throughput_mbps=throughput,
+            resource_usage=usage
+        ))
+
+    def render_image(self, source: str, video_filter: str, output_path: str) -> FFmpegResult:
+        """
+        Render one still image (e.g. a PNG overlay asset) from a lavfi source.
+
+        Args:
+            source: lavfi source graph, e.g. "color=c=black@0.8:s=1280x64,format=rgba"
+            video_filter: -vf filter graph drawn onto the source
+            output_path: Output image path
+
+        Returns:
+            FFmpegResult with operation details
+        """
+        cmd = [
+            self.ffmpeg_bin,
+            "-f", "lavfi", "-i", source,
+            "-vf", video_filter,
+            "-frames:v", "1", "-update", "1",
+            "-y", output_path
+        ]
+
+        start_time = time.time()
+        result, usage = self._run_ffmpeg(cmd, "image")
+        duration_ms = (time.time() - start_time) * 1000
+
+        success = result.returncode == 0 and os.path.exists(output_path)
+        filesize = os.path.getsize(output_path) if success else 0
+
+        logger.info(f"Render image {os.path.basename(output_path)}: "
+                   f"duration={duration_ms:.0f}ms, size={filesize:,} bytes")
+
+        return self._record("image", FFmpegResult(
+            success=success,
+            output_path=output_path if success else None,
+            duration_ms=duration_ms,
+            command=" ".join(cmd),
+            exit_code=result.returncode,
+            stderr=result.stderr,
+            filesize_bytes=filesize,
+            resource_usage=usage
+        ))
+
+    def overlay_image(
+        self,
+        input_path: str,
+        image_path: str,
+        output_path: str,
+        x: str = "0",
+        y: str = "0",
+        enable: Optional[Tuple[float, float]] = None,
+        start_s: float = 0.0,
+        duration_s: Optional[float] = None,
+        preset: str = "veryfast",
+        crf: int = 23,
+        gop_frames: Optional[int] = None,
+        threads: int = 0,
+        codec: str = "libx264",
+        pix_fmt: str = "yuv420p",
+        codec_profile: Optional[str] = None
+    ) -> FFmpegResult:
+        """
+        Re-encode the video stream with a still image composited on top (no audio).
+
+        Args:
+            input_path: Source video file
+            image_path: Image to overlay (alpha is respected)
+            output_path: Output file path
+            x: Overlay x position expression (W/w = video/image width)
+            y: Overlay y position expression (H/h = video/image height)
+            enable: (from_s, to_s) to show the image only then, relative to start_s (default: always)
+            start_s: Encode from this time (seeking to a keyframe here decodes nothing extra)
+            duration_s: Encode at most this long (default: to the end)
+            preset: Encoder preset (x264/x265)
+            crf: Encoder constant rate factor
+            gop_frames: Maximum keyframe interval in frames (default: the encoder's)
+            threads: Encoder/decoder threads (0 = ffmpeg picks per core count)
+            codec: ffmpeg encoder name
+            pix_fmt: Output pixel format
+            codec_profile: Encoder profile, e.g. high or main (default: the encoder's choice)
+
+        Returns:
+            FFmpegResult with operation details
+        """
+        overlay = f"overlay=x={x}:y={y}"
+        if enable is not None:
+            overlay += f":enable='between(t,{enable[0]:.6f},{enable[1]:.6f})'"
+
+        cmd = [self.ffmpeg_bin, "-threads", str(threads)]
+        if start_s > 0:
+            cmd += ["-ss", f"{start_s:.6f}"]
+        cmd += ["-i", input_path, "-i", image_path]
+        if duration_s is not None:
+            cmd += ["-t", f"{duration_s:.6f}"]
+        cmd += [
+            "-filter_complex", f"[0:v][1:v]{overlay}[v]",
+            "-map", "[v]", "-an",
+            "-c:v", codec, "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", pix_fmt,
+            "-threads", str(threads),
+        ]
+        if codec_profile:
+            cmd += ["-profile:v", codec_profile]
+        if gop_frames:
+            cmd += ["-g", str(gop_frames)]
+        cmd += ["-movflags", "+faststart", "-y", output_path]
+
+        start_time = time.time()
+        result, usage = self._run_ffmpeg(cmd, "overlay")
+        duration_ms = (time.time() - start_time) * 1000
+
+        success = result.returncode == 0
+        filesize = 0
+        throughput = 0.0
+
+        if success and os.path.exists(output_path):
+            filesize = os.path.getsize(output_path)
+            if duration_ms > 0:
+                throughput = (filesize * 8 / 1_000_000) / (duration_ms / 1000)  # Mbps
+
+        logger.info(f"Overlay {os.path.basename(image_path)} on {os.path.basename(input_path)} from {start_s:.2f}s: "
+                   f"duration={duration_ms:.0f}ms, size={filesize:,} bytes, "
+                   f"cpu={usage.cpu_s:.2f}s")
+
+        return self._record("overlay", FFmpegResult(
+            success=success,
+            output_path=output_path if success else None,
+            duration_ms=duration_ms,
+            command=" ".join(cmd),
+            exit_code=result.returncode,
+            stderr=result.stderr,
+            filesize_bytes=filesize,
+            throughput_mbps=throughput,
+            resource_usage=usage
+        ))
+
+    def compose_video(
+        self,
+        inputs: List[Tuple[str, float]],
+        output_path: str,
+        filter_complex: str,
+        frames: Optional[int] = None,
+        preset: str = "veryfast",
+        crf: int = 23,
+        gop_frames: Optional[int] = None,
+        threads: int = 0,
+        codec: str = "libx264",
+        pix_fmt: str = "yuv420p",
+        codec_profile: Optional[str] = None
+    ) -> FFmpegResult:
+        """
+        Encode one video from several inputs through a filter graph (no audio).
+
+        Args:
+            inputs: (path, start_s) per input, referenced as [0:v], [1:v], ... in the graph
+            output_path: Output file path
+            filter_complex: Filter graph ending in the output label [v]
+            frames: Stop after this many output frames (default: when the graph ends)
+            preset: Encoder preset (x264/x265)
+            crf: Encoder constant rate factor
+            gop_frames: Maximum keyframe interval in frames (default: the encoder's)
+            threads: Encoder/decoder threads (0 = ffmpeg picks per core count)
+            codec: ffmpeg encoder name
+            pix_fmt: Output pixel format
+            codec_profile: Encoder profile, e.g. high or main (default: the encoder's choice)
+
+        Returns:
+            FFmpegResult with operation details
+        """
+        cmd = [self.ffmpeg_bin, "-threads", str(threads)]
+        for path, start_s in inputs:
+            if start_s > 0:
+                cmd += ["-ss", f"{start_s:.6f}"]
+            cmd += ["-i", path]
+        cmd += [
+            "-filter_complex", filter_complex,
+            "-map", "[v]", "-an",
+            "-c:v", codec, "-preset", preset, "-crf", str(crf),
+            "-pix_fmt", pix_fmt,
+            "-threads", str(threads),
+        ]
+        if codec_profile:
+            cmd += ["-profile:v", codec_profile]
+        if frames is not None:
+            cmd += ["-frames:v", str(frames)]
+        if gop_frames:
+            cmd += ["-g", str(gop_frames)]
+        cmd += ["-movflags", "+faststart", "-y", output_path]
+
+        start_time = time.time()
+        result, usage = self._run_ffmpeg(cmd, "compose")
+        duration_ms = (time.time() - start_time) * 1000
+
+        success = result.returncode == 0
+        filesize = 0
+        throughput = 0.0
+
+        if success and os.path.exists(output_path):
+            filesize = os.path.getsize(output_path)
+            if duration_ms > 0:
+                throughput = (filesize * 8 / 1_000_000) / (duration_ms / 1000)  # Mbps
+
+        logger.info(f"Compose {len(inputs)} inputs into {os.path.basename(output_path)}: "
+                   f"duration={duration_ms:.0f}ms, size={filesize:,} bytes, "
+                   f"cpu={usage.cpu_s:.2f}s")
+
+        return self._record("compose", FFmpegResult(
+            success=success,
+            output_path=output_path if success else None,
+            duration_ms=duration_ms,
+            command=" ".join(cmd),
+            exit_code=result.returncode,
+            stderr=result.stderr,
+            filesize_bytes=filesize,
+            throughput_mbps=throughput,
+            resource_usage=usage
+        ))
+
     def extract_and_concat(
         self,
-        segments: List[Dict],  # [{path, start_s, end_s}, ...]
+        segments: List[Dict],  # [{path, start_s, end_s, encode?}, ...]
         output_path: str,
         temp_dir: Optional[str] = None
     ) -> FFmpegResult:
@@ -302,8 +995,14 @@ class FFmpegService:
         Extract multiple segments and concatenate them in one operation.
         This is the core function for building clips.
 
+        Segments are stream-copied, except those carrying an "encode" dict:
+        those are re-encoded on their own with encode_video(**encode), which
+        must produce the same stream format as the copied segments so the
+        concat stays a stream copy.
+
         Args:
-            segments: List of dicts with keys: path, start_s, end_s
+            segments: List of dicts with keys: path, start_s, end_s, and optionally
+                encode (encode_video keyword arguments, e.g. video_filter, duration_s, crf)
             output_path: Final output file path
             temp_dir: Directory for temporary segment files
 
@@ -311,39 +1010,56 @@ class FFmpegService:
             FFmpegResult with operation details
         """
         if not segments:
-            return FFmpegResult(
+            return self._record("extract_and_concat", FFmpegResult(
                 success=False,
                 output_path=None,
                 duration_ms=0,
                 command="",
                 exit_code=-1,
                 stderr="No segments provided"
-            )
+            ), count_bytes=False)
 
         if temp_dir is None:
             temp_dir = tempfile.gettempdir()
 
         temp_segments = []
         total_extract_ms = 0
+        total_usage = ResourceUsage()
+
+        job = current_job()
+        if job:
+            # Each segment is written once by extract, then once more by concat
+            total_s = sum(seg["encode"].get("duration_s", seg["end_s"] - seg["start_s"]) if seg.get("encode")
+                          else seg["end_s"] - seg["start_s"] for seg in segments)
+            job.add_work(total_s * (2 if len(segments) > 1 else 1))
 
         try:
             # Step 1: Extract all segments
             for i, seg in enumerate(segments):
-                temp_seg_path = os.path.join(temp_dir, f"seg_{i:04d}_{int(time.time()*1000)}.mp4")
+                temp_seg_path = os.path.join(temp_dir, f"seg_{i:04d}_{int(time.time()*1000)}_{uuid.uuid4().hex[:8]}.mp4")
 
-                result = self.extract_segment(
-                    input_path=seg["path"],
-                    start_s=seg["start_s"],
-                    end_s=seg["end_s"],
-                    output_path=temp_seg_path,
-                    accurate_seek=False  # Use keyframe seeking for speed
-                )
+                if seg.get("encode"):
+                    result = self.encode_video(
+                        input_path=seg["path"],
+                        output_path=temp_seg_path,
+                        start_s=seg["start_s"],
+                        **{"duration_s": seg["end_s"] - seg["start_s"], **seg["encode"]}
+                    )
+                else:
+                    result = self.extract_segment(
+                        input_path=seg["path"],
+                        start_s=seg["start_s"],
+                        end_s=seg["end_s"],
+                        output_path=temp_seg_path,
+                        accurate_seek=False  # Use keyframe seeking for speed
+                    )
 
                 if not result.success:
                     raise RuntimeError(f"Failed to extract segment {i}: {result.stderr}")
 
                 temp_segments.append(temp_seg_path)
                 total_extract_ms += result.duration_ms
+                total_usage.add(result.resource_usage)
 
             # Step 2: Concatenate all segments
             concat_result = self.concat_segments(temp_segments, output_path)
@@ -352,13 +1068,14 @@ class FFmpegService:
                 raise RuntimeError(f"Failed to concatenate segments: {concat_result.stderr}")
 
             total_duration_ms = total_extract_ms + concat_result.duration_ms
+            total_usage.add(concat_result.resource_usage)
 
             logger.info(f"Extract & concat complete: {len(segments)} segments, "
                        f"extract={total_extract_ms:.0f}ms, "
                        f"concat={concat_result.duration_ms:.0f}ms, "
-                       f"total={total_duration_ms:.0f}ms")
+                       f"total={total_duration_ms:.0f}ms, cpu={total_usage.cpu_s:.2f}s")
 
-            return FFmpegResult(
+            return self._record("extract_and_concat", FFmpegResult(
                 success=True,
                 output_path=output_path,
                 duration_ms=total_duration_ms,
@@ -366,8 +1083,9 @@ class FFmpegService:
                 exit_code=0,
                 stderr="",
                 filesize_bytes=concat_result.filesize_bytes,
-                throughput_mbps=concat_result.throughput_mbps
-            )
+                throughput_mbps=concat_result.throughput_mbps,
+                resource_usage=total_usage
+            ), count_bytes=False)
 
         finally:
             # Cleanup temp segments
@@ -377,3 +1095,137 @@ class FFmpegService:
                         os.unlink(temp_seg)
                 except Exception as e:
                     logger.warning(f"Failed to cleanup temp segment {temp_seg}: {e}")
+
+    def demux_packets(self, input_path: str, on_line: Callable[[str], None], stream: str = "v:0") -> FFmpegResult:
+        """
+        List every packet of one stream without decoding it.
+
+        The stream is copied into ffmpeg's framecrc muxer, which prints a
+        "#tb" time base header and then one line per packet:
+        "index, dts, pts, duration, size, crc[, F=0xFLAGS]" (the F field is
+        omitted for plain keyframes). Only the demuxer runs, so this costs a
+        small fraction of a decode.
+
+        Args:
+            input_path: Source video file
+            on_line: Called with each output line as it arrives
+            stream: Stream specifier to list
+
+        Returns:
+            FFmpegResult with operation details (no output file)
+        """
+        cmd = [self.ffmpeg_bin, "-nostats", "-v", "error", "-i", input_path,
+               "-map", f"0:{stream}", "-c", "copy", "-f", "framecrc", "pipe:1"]
+
+        start_time = time.time()
+        with tracing.span("ffmpeg.demux_packets", **{"process.command": cmd[0]}) as span:
+            result, usage = self._spawn(cmd, on_line, span)
+        duration_ms = (time.time() - start_time) * 1000
+
+        logger.info(f"demux_packets {os.path.basename(input_path)}: "
+                   f"duration={duration_ms:.0f}ms, cpu={usage.cpu_s:.2f}s")
+
+        return self._record("demux_packets", FFmpegResult(
+            success=result.returncode == 0,
+            output_path=None,
+            duration_ms=duration_ms,
+            command=" ".join(cmd),
+            exit_code=result.returncode,
+            stderr=result.stderr,
+            resource_usage=usage
+        ))
+
+    def decode_audio(
+        self,
+        input_path: str,
+        on_samples: Callable[[bytes], Optional[bool]],
+        sample_rate: int = 8000,
+        chunk_samples: int = 8000,
+        start_s: float = 0.0,
+        duration_s: Optional[float] = None
+    ) -> FFmpegResult:
+        """
+        Decode the first audio stream to mono signed 16-bit PCM and stream it to a callback.
+
+        Args:
+            input_path: Source video file
+            on_samples: Called with each chunk of raw s16le samples; return True to stop early
+            sample_rate: Output sample rate (downsampled by ffmpeg)
+            chunk_samples: Samples per callback
+            start_s: Decode from this time
+            duration_s: Decode at most this long (default: to the end)
+
+        Returns:
+            FFmpegResult with operation details (no output file); fails if there is no audio stream
+        """
+        cmd = [self.ffmpeg_bin, "-v", "error"]
+        if start_s > 0:
+            cmd += ["-ss", str(start_s)]
+        cmd += ["-i", input_path]
+        if duration_s is not None:
+            cmd += ["-t", str(duration_s)]
+        cmd += ["-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1"]
+        return self._decode_raw(cmd, "decode_audio", chunk_samples * 2, on_samples)
+
+    def decode_gray_frames(
+        self,
+        input_path: str,
+        on_frames: Callable[[bytes], Optional[bool]],
+        width: int = 64,
+        height: int = 36,
+        fps: float = 10.0,
+        frames_per_chunk: int = 50,
+        start_s: float = 0.0,
+        duration_s: Optional[float] = None
+    ) -> FFmpegResult:
+        """
+        Decode the video as small 8-bit grayscale frames and stream them to a callback.
+
+        Scaling happens inside ffmpeg, so only width*height bytes per frame
+        cross the pipe; frames are resampled to a constant fps.
+
+        Args:
+            input_path: Source video file
+            on_frames: Called with whole frames (frames_per_chunk at a time, fewer at the end);
+                return True to stop early
+            width, height: Output frame size
+            fps: Output frame rate
+            frames_per_chunk: Frames per callback
+            start_s: Decode from this time (fast keyframe seek, then exact)
+            duration_s: Decode at most this long (default: to the end)
+
+        Returns:
+            FFmpegResult with operation details (no output file)
+        """
+        cmd = [self.ffmpeg_bin, "-v", "error"]
+        if start_s > 0:
+            cmd += ["-ss", str(start_s)]
+        cmd += ["-i", input_path]
+        if duration_s is not None:
+            cmd += ["-t", str(duration_s)]
+        cmd += [
+            "-map", "0:v:0", "-an",
+            "-vf", f"fps={fps:g},scale={width}:{height}:flags=area,format=gray",
+            "-f", "rawvideo",
+            "pipe:1"
+        ]
+        return self._decode_raw(cmd, "decode_frames", width * height * frames_per_chunk, on_frames)
+
+    def _decode_raw(self, cmd: List[str], operation: str, chunk_bytes: int,
+                    on_chunk: Callable[[bytes], Optional[bool]]) -> FFmpegResult:
+        start_time = time.time()
+        result, usage = self._run_raw(cmd, operation, chunk_bytes, on_chunk)
+        duration_ms = (time.time() - start_time) * 1000
+
+        logger.info(f"{operation} {os.path.basename(cmd[cmd.index('-i') + 1])}: "
+                   f"duration={duration_ms:.0f}ms, cpu={usage.cpu_s:.2f}s")
+
+        return self._record(operation, FFmpegResult(
+            success=result.returncode == 0,
+            output_path=None,
+            duration_ms=duration_ms,
+            command=" ".join(cmd),
+            exit_code=result.returncode,
+            stderr=result.stderr,
+            resource_usage=usage
+        ))
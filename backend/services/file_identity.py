@@ -0,0 +1,24 @@
+"""
+File identity for on-disk caches - a key that changes whenever the file at a
+path is replaced or rewritten, so results cached under it are never reused
+for different contents.
+"""
+
+import hashlib
+import os
+
+
+def file_key(path: str, *extra) -> str:
+    """
+    Cache key of a file's contents: resolved path, size and mtime, hashed.
+
+    Args:
+        extra: Settings the cached result also depends on (e.g. a format version), appended to the identity
+
+    Raises:
+        OSError: If the file cannot be stat'ed
+    """
+    stat = os.stat(path)
+    identity = "|".join([os.path.realpath(path), str(stat.st_size), str(stat.st_mtime_ns)]
+                        + [str(value) for value in extra])
+    return hashlib.sha1(identity.encode()).hexdigest()[:20]
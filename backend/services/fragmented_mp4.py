@@ -0,0 +1,307 @@
+"""
+Fragmented MP4 helpers for incremental reel assembly.
+
+A fragmented MP4 is an init segment (ftyp + moov) followed by independent
+moof/mdat pairs. Because every moof carries its own base decode time (tfdt)
+and sequence number (mfhd), fragments from several clips can be laid end to
+end by copying bytes and patching those two fields - no remux of the
+existing reel is required.
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+COPY_CHUNK_BYTES = 1024 * 1024
+
+# Bytes between a visual sample entry header and its child boxes (avcC, pasp, btrt, ...)
+VISUAL_SAMPLE_ENTRY_FIELDS = 78
+
+# Per-file statistics that do not affect decoding and are dropped before comparing
+IGNORED_SAMPLE_ENTRY_BOXES = {b"btrt"}
+
+
+@dataclass
+class FragmentInfo:
+    """Layout of a fragmented MP4 file produced for one clip"""
+    path: str
+    init_size: int          # Bytes of ftyp + moov at the start of the file
+    fragments_offset: int   # Byte offset of the first moof
+    fragments_size: int     # Bytes of all moof/mdat pairs
+    num_fragments: int
+    timescale: int
+    first_decode_time: int  # tfdt of the first fragment
+    duration_ticks: int     # Decode duration of all fragments, in timescale units
+    sample_description: bytes  # stsd box without bitrate stats, used to check stream compatibility
+
+
+def _iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int, int]]:
+    """Yield (type, offset, size, header_size) for boxes in data[start:end]"""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack(">I4s", data[offset:offset + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            raise ValueError(f"Corrupt box {box_type!r} at offset {offset}")
+        yield box_type, offset, size, header
+        offset += size
+
+
+def _find_box(data: bytes, path: Tuple[bytes, ...], start: int = 0, end: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+    """Find the first box matching a path like (b"moov", b"trak"), return (offset, size, header)"""
+    for box_type, offset, size, header in _iter_boxes(data, start, end):
+        if box_type != path[0]:
+            continue
+        if len(path) == 1:
+            return offset, size, header
+        return _find_box(data, path[1:], offset + header, offset + size)
+    return None
+
+
+def _read_top_level_boxes(f: BinaryIO) -> Iterator[Tuple[bytes, int, int, int]]:
+    """Walk top-level boxes of a file without reading payloads"""
+    f.seek(0, os.SEEK_END)
+    file_size = f.tell()
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header:
+            raise ValueError(f"Corrupt box {box_type!r} at offset {offset}")
+        yield box_type, offset, size, header
+        offset += size
+
+
+def _parse_moof(moof: bytes, default_duration: int) -> Tuple[int, int, Optional[int], Optional[int]]:
+    """
+    Parse a moof box.
+
+    Returns:
+        (decode_time, duration_ticks, tfdt_field_offset, tfdt_version)
+        Offsets are relative to the start of the moof.
+    """
+    traf = _find_box(moof, (b"moof", b"traf"))
+    if traf is None:
+        raise ValueError("moof without traf")
+    traf_off, traf_size, traf_header = traf
+    traf_start, traf_end = traf_off + traf_header, traf_off + traf_size
+
+    sample_duration = default_duration
+    decode_time = 0
+    tfdt_offset = None
+    tfdt_version = None
+    duration = 0
+
+    for box_type, offset, size, header in _iter_boxes(moof, traf_start, traf_end):
+        body = offset + header
+        if box_type == b"tfhd":
+            flags = struct.unpack(">I", moof[body:body + 4])[0] & 0xFFFFFF
+            pos = body + 8  # version/flags + track_ID
+            if flags & 0x01:
+                pos += 8    # base-data-offset
+            if flags & 0x02:
+                pos += 4    # sample-description-index
+            if flags & 0x08:
+                sample_duration = struct.unpack(">I", moof[pos:pos + 4])[0]
+        elif box_type == b"tfdt":
+            tfdt_version = moof[body]
+            tfdt_offset = body + 4
+            if tfdt_version == 1:
+                decode_time = struct.unpack(">Q", moof[tfdt_offset:tfdt_offset + 8])[0]
+            else:
+                decode_time = struct.unpack(">I", moof[tfdt_offset:tfdt_offset + 4])[0]
+        elif box_type == b"trun":
+            flags = struct.unpack(">I", moof[body:body + 4])[0] & 0xFFFFFF
+            sample_count = struct.unpack(">I", moof[body + 4:body + 8])[0]
+            pos = body + 8
+            if flags & 0x001:
+                pos += 4    # data-offset
+            if flags & 0x004:
+                pos += 4    # first-sample-flags
+            if not flags & 0x100:
+                duration += sample_count * sample_duration
+                continue
+            entry_size = 4 * sum(1 for bit in (0x100, 0x200, 0x400, 0x800) if flags & bit)
+            for i in range(sample_count):
+                entry = pos + i * entry_size
+                duration += struct.unpack(">I", moof[entry:entry + 4])[0]
+
+    return decode_time, duration, tfdt_offset, tfdt_version
+
+
+def _normalized_sample_description(stsd: bytes) -> bytes:
+    """
+    Strip per-file statistics (bitrate box) from an stsd box so that two files
+    with the same codec configuration compare equal.
+    """
+    normalized = bytearray(stsd[:16])  # header + version/flags + entry_count
+    for entry_type, offset, size, header in _iter_boxes(stsd, 16):
+        children_start = offset + header + VISUAL_SAMPLE_ENTRY_FIELDS
+        if children_start > offset + size:
+            normalized += stsd[offset:offset + size]
+            continue
+        normalized += stsd[offset:children_start]
+        for child_type, child_offset, child_size, _ in _iter_boxes(stsd, children_start, offset + size):
+            if child_type not in IGNORED_SAMPLE_ENTRY_BOXES:
+                normalized += stsd[child_offset:child_offset + child_size]
+    return bytes(normalized)
+
+
+def inspect_fragmented(path: str) -> FragmentInfo:
+    """
+    Inspect a fragmented MP4 written by ffmpeg with
+    -movflags frag_keyframe+empty_moov+default_base_moof.
+    """
+    with open(path, "rb") as f:
+        init_size = 0
+        moov = None
+        fragments_offset = None
+        fragments_end = None
+        num_fragments = 0
+        first_decode_time = None
+        last_end_time = 0
+        default_duration = 0
+        timescale = 0
+
+        for box_type, offset, size, header in _read_top_level_boxes(f):
+            if box_type in (b"ftyp", b"moov") and fragments_offset is None:
+                f.seek(offset)
+                box = f.read(size)
+                init_size = offset + size
+                if box_type == b"moov":
+                    moov = box
+                    mdhd = _find_box(moov, (b"moov", b"trak", b"mdia", b"mdhd"))
+                    if mdhd is None:
+                        raise ValueError(f"No mdhd box in {path}")
+                    body = mdhd[0] + mdhd[2]
+                    version = moov[body]
+                    ts_pos = body + (20 if version == 1 else 12)
+                    timescale = struct.unpack(">I", moov[ts_pos:ts_pos + 4])[0]
+                    trex = _find_box(moov, (b"moov", b"mvex", b"trex"))
+                    if trex is not None:
+                        trex_body = trex[0] + trex[2]
+                        default_duration = struct.unpack(">I", moov[trex_body + 12:trex_body + 16])[0]
+            elif box_type == b"moof":
+                if moov is None:
+                    raise ValueError(f"{path} is not a fragmented MP4 (moof before moov)")
+                if fragments_offset is None:
+                    fragments_offset = offset
+                f.seek(offset)
+                decode_time, duration, _, _ = _parse_moof(f.read(size), default_duration)
+                if first_decode_time is None:
+                    first_decode_time = decode_time
+                last_end_time = decode_time + duration
+                num_fragments += 1
+            elif box_type == b"mdat" and fragments_offset is not None:
+                fragments_end = offset + size
+            elif box_type == b"moov" or box_type == b"mdat":
+                raise ValueError(f"{path} is not a fragmented MP4")
+
+        if moov is None or fragments_offset is None or fragments_end is None:
+            raise ValueError(f"{path} is not a fragmented MP4")
+
+    stsd = _find_box(moov, (b"moov", b"trak", b"mdia", b"minf", b"stbl", b"stsd"))
+    sample_description = _normalized_sample_description(moov[stsd[0]:stsd[0] + stsd[1]]) if stsd else b""
+
+    return FragmentInfo(
+        path=path,
+        init_size=init_size,
+        fragments_offset=fragments_offset,
+        fragments_size=fragments_end - fragments_offset,
+        num_fragments=num_fragments,
+        timescale=timescale,
+        first_decode_time=first_decode_time or 0,
+        duration_ticks=last_end_time - (first_decode_time or 0),
+        sample_description=sample_description
+    )
+
+
+def copy_init(info: FragmentInfo, out: BinaryIO) -> int:
+    """Write the init segment (ftyp + moov) of a fragmented file, return bytes written"""
+    with open(info.path, "rb") as f:
+        data = f.read(info.init_size)
+    out.write(data)
+    return len(data)
+
+
+def copy_prefix(path: str, out: BinaryIO, size: int) -> int:
+    """Write the first size bytes of a file (e.g. the kept head of a reel), return bytes written"""
+    written = 0
+    with open(path, "rb") as f:
+        while written < size:
+            chunk = f.read(min(COPY_CHUNK_BYTES, size - written))
+            if not chunk:
+                raise ValueError(f"Unexpected end of file in {path}")
+            out.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def copy_fragments(
+    info: FragmentInfo,
+    out: BinaryIO,
+    base_decode_time: int,
+    first_sequence: int
+) -> int:
+    """
+    Append all moof/mdat pairs of a fragmented file to out, shifting decode
+    times so the first fragment starts at base_decode_time and renumbering
+    fragments from first_sequence.
+
+    Returns:
+        Bytes written
+    """
+    shift = base_decode_time - info.first_decode_time
+    sequence = first_sequence
+    written = 0
+
+    with open(info.path, "rb") as f:
+        end = info.fragments_offset + info.fragments_size
+        for box_type, offset, size, header in _read_top_level_boxes(f):
+            if offset < info.fragments_offset:
+                continue
+            if offset >= end:
+                break
+
+            f.seek(offset)
+            if box_type == b"moof":
+                moof = bytearray(f.read(size))
+                decode_time, _, tfdt_offset, tfdt_version = _parse_moof(bytes(moof), 0)
+                if tfdt_offset is not None:
+                    new_time = decode_time + shift
+                    if tfdt_version == 1:
+                        struct.pack_into(">Q", moof, tfdt_offset, new_time)
+                    elif new_time < 2 ** 32:
+                        struct.pack_into(">I", moof, tfdt_offset, new_time)
+                    else:
+                        raise ValueError("Reel too long for 32-bit tfdt")
+                mfhd = _find_box(bytes(moof), (b"moof", b"mfhd"))
+                if mfhd is not None:
+                    struct.pack_into(">I", moof, mfhd[0] + mfhd[2] + 4, sequence)
+                sequence += 1
+                out.write(moof)
+                written += size
+            else:
+                remaining = size
+                while remaining > 0:
+                    chunk = f.read(min(COPY_CHUNK_BYTES, remaining))
+                    if not chunk:
+                        raise ValueError(f"Unexpected end of file in {info.path}")
+                    out.write(chunk)
+                    remaining -= len(chunk)
+                written += size
+
+    return written
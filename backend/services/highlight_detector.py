@@ -0,0 +1,390 @@
+"""
+Highlight detection - scans a whole camera file in one low-res decode pass
+and ranks candidate event windows.
+
+Frames stream over an ffmpeg rawvideo pipe and are reduced chunk by chunk
+to per-interval features with NumPy: motion energy (mean and peak),
+scene cuts (gray histogram jumps) and, when the file has audio, crowd
+loudness from a parallel PCM stream. Each interval is scored against a
+rolling baseline of the preceding minutes, runs of high-scoring intervals
+become events, and only the best top_k events are kept - so memory does
+not grow with match length.
+"""
+
+import contextvars
+import heapq
+import itertools
+import math
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from services.ffmpeg_service import FFmpegService
+from services.job_progress import ScanProgress, current_job
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+SCAN_FRAME_SIZE = (64, 36)
+SCAN_FPS = 5.0
+AUDIO_SAMPLE_RATE = 8000
+HIST_BINS = 16
+CUT_THRESHOLD = 0.5  # Histogram L1 distance (0-2) between consecutive frames that counts as a cut
+MOTION_NOISE_FLOOR = 3
+BASELINE_WINDOW_S = 120.0  # Intervals are scored against this much preceding footage
+MIN_BASELINE_INTERVALS = 10
+AUDIO_QUEUE_INTERVALS = 60  # How far the audio stream may run ahead of the video stream
+PROGRESS_EVERY_S = 10.0
+
+SILENCE_DB = -60.0  # Quieter intervals count as silence
+
+# Score = sum of weight * feature, features being baseline z-scores (cuts: count, capped at 2)
+FEATURE_WEIGHTS = {"motion_peak": 1.0, "motion_mean": 0.5, "cuts": 1.5, "loudness": 1.0}
+
+
+@dataclass
+class HighlightCandidate:
+    """A candidate event window in the scanned file's time"""
+    start_s: float
+    end_s: float
+    peak_s: float
+    score: float
+    features: Dict[str, float] = field(default_factory=dict)  # Feature values at the peak interval
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class HighlightScan:
+    """Result of scanning one file"""
+    path: str
+    duration_s: float  # Media seconds scanned
+    processing_time_ms: float
+    has_audio: bool
+    candidates: List[HighlightCandidate]
+
+    @property
+    def speed(self) -> float:
+        """Media seconds scanned per wall-clock second"""
+        return self.duration_s / (self.processing_time_ms / 1000) if self.processing_time_ms > 0 else 0.0
+
+
+class _RollingStats:
+    """Robust z-scores against the last `size` values (median and MAD, so silent or frozen stretches don't skew it)"""
+
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+
+    def z(self, value: float) -> Optional[float]:
+        """z-score of value against the window (None while warming up); then value joins the window"""
+        z = None
+        if len(self.values) >= MIN_BASELINE_INTERVALS:
+            window = np.fromiter(self.values, dtype=np.float64, count=len(self.values))
+            median = np.median(window)
+            spread = 1.4826 * np.median(np.abs(window - median))
+            z = (value - median) / max(spread, 1e-3)
+        self.values.append(value)
+        return z
+
+
+class _VideoFeatures:
+    """Reduces streamed gray frames to per-interval motion and cut features"""
+
+    def __init__(self, frames_per_interval: int, on_interval: Callable[[int, float, float, int], None]):
+        width, height = SCAN_FRAME_SIZE
+        self.frame_bytes = width * height
+        self.frames_per_interval = frames_per_interval
+        self.on_interval = on_interval
+        self.frame_index = 0
+        self.previous: Optional[np.ndarray] = None
+        self.previous_hist: Optional[np.ndarray] = None
+        # Accumulators of the open interval
+        self.motion_sum = 0.0
+        self.motion_peak = 0.0
+        self.motion_frames = 0
+        self.cuts = 0
+
+    def add(self, chunk: bytes):
+        frames = np.frombuffer(chunk, dtype=np.uint8)
+        frames = frames[:len(frames) - len(frames) % self.frame_bytes].reshape(-1, self.frame_bytes)
+        if not len(frames):
+            return
+
+        # Histograms of all frames at once: bincount over (frame, bin) pairs
+        bins = (frames >> (8 - int(math.log2(HIST_BINS)))).astype(np.int64)
+        bins += (np.arange(len(frames)) * HIST_BINS)[:, None]
+        hists = np.bincount(bins.ravel(), minlength=len(frames) * HIST_BINS).reshape(-1, HIST_BINS)
+        hists = hists / self.frame_bytes
+
+        pixels = frames.astype(np.int16)
+        if self.previous is not None:
+            pixels = np.concatenate([self.previous[None], pixels])
+            hists = np.concatenate([self.previous_hist[None], hists])
+        motion = np.maximum(np.abs(np.diff(pixels, axis=0)) - MOTION_NOISE_FLOOR, 0).mean(axis=1)
+        cut = np.abs(np.diff(hists, axis=0)).sum(axis=1) > CUT_THRESHOLD
+        if self.previous is None:
+            # The very first frame has nothing to compare with
+            motion = np.concatenate([[0.0], motion])
+            cut = np.concatenate([[False], cut])
+        self.previous = pixels[-1]
+        self.previous_hist = hists[-1]
+
+        for value, is_cut in zip(motion.tolist(), cut.tolist()):
+            interval = self.frame_index // self.frames_per_interval
+            if self.frame_index and self.frame_index % self.frames_per_interval == 0:
+                self._close(interval - 1)
+            self.motion_sum += value
+            self.motion_peak = max(self.motion_peak, value)
+            self.motion_frames += 1
+            self.cuts += int(is_cut)
+            self.frame_index += 1
+
+    def _close(self, interval: int):
+        if self.motion_frames:
+            self.on_interval(interval, self.motion_sum / self.motion_frames, self.motion_peak, self.cuts)
+        self.motion_sum = self.motion_peak = 0.0
+        self.motion_frames = self.cuts = 0
+
+    def finish(self):
+        if self.motion_frames:
+            self._close((self.frame_index - 1) // self.frames_per_interval)
+
+
+class _AudioLoudness:
+    """Per-interval loudness (dBFS) from a PCM stream decoded on its own thread"""
+
+    def __init__(self, ffmpeg: FFmpegService, path: str, interval_s: float):
+        self.ffmpeg = ffmpeg
+        self.path = path
+        self.samples_per_interval = int(AUDIO_SAMPLE_RATE * interval_s)
+        self.queue: "queue.Queue[Optional[Tuple[int, float]]]" = queue.Queue(maxsize=AUDIO_QUEUE_INTERVALS)
+        self.stop = threading.Event()
+        self.available = True
+        self._pending = np.empty(0, dtype=np.float32)
+        self._interval = 0
+        self._done = False
+        self._thread = threading.Thread(target=contextvars.copy_context().run, args=(self._run,),
+                                        name="highlight-audio", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _on_chunk(self, chunk: bytes) -> bool:
+        samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32) / 32768.0
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        usable = len(samples) - len(samples) % self.samples_per_interval
+        if usable:
+            windows = samples[:usable].reshape(-1, self.samples_per_interval)
+            for mean_square in np.mean(windows * windows, axis=1).tolist():
+                if not self._put((self._interval, max(10 * math.log10(mean_square + 1e-10), SILENCE_DB))):
+                    return True
+                self._interval += 1
+        self._pending = samples[usable:]
+        return self.stop.is_set()
+
+    def _run(self):
+        try:
+            result = self.ffmpeg.decode_audio(self.path, self._on_chunk, sample_rate=AUDIO_SAMPLE_RATE,
+                                              chunk_samples=self.samples_per_interval * 5)
+            if not result.success:
+                self.available = False
+                logger.info(f"No audio for highlight scan of {self.path}")
+        except Exception as e:
+            self.available = False
+            logger.warning(f"Audio loudness failed for {self.path}: {e}")
+        finally:
+            self._put(None)
+
+    def loudness(self, interval: int) -> Optional[float]:
+        """Loudness of an interval, waiting for the audio stream to reach it (None if it never does)"""
+        while not self._done:
+            item = self.queue.get()
+            if item is None:
+                self._done = True
+                break
+            if item[0] == interval:
+                return item[1]
+            if item[0] > interval:
+                return None
+        return None
+
+    def close(self):
+        self.stop.set()
+        self._thread.join()
+
+
+class _EventBuilder:
+    """Turns scored intervals into event windows, keeping only the top_k best"""
+
+    def __init__(self, interval_s: float, min_score: float, merge_gap_s: float, max_event_s: float,
+                 pre_roll_s: float, post_roll_s: float, top_k: int):
+        self.interval_s = interval_s
+        self.min_score = min_score
+        self.merge_gap = max(1, int(round(merge_gap_s / interval_s)))
+        self.max_intervals = max(1, int(round(max_event_s / interval_s)))
+        self.pre_roll_s = pre_roll_s
+        self.post_roll_s = post_roll_s
+        self.top_k = top_k
+        self._heap: List[Tuple[float, int, HighlightCandidate]] = []
+        self._counter = itertools.count()
+        self._open: Optional[Dict] = None
+
+    def add(self, interval: int, score: float, features: Dict[str, float]):
+        if self._open and (interval - self._open["last"] > self.merge_gap or
+                           interval - self._open["first"] >= self.max_intervals):
+            self._close()
+        if score < self.min_score:
+            return
+        if self._open is None:
+            self._open = {"first": interval, "last": interval, "peak": interval, "score": score,
+                          "features": features}
+        else:
+            self._open["last"] = interval
+            if score > self._open["score"]:
+                self._open.update(peak=interval, score=score, features=features)
+
+    def _close(self):
+        event, self._open = self._open, None
+        candidate = HighlightCandidate(
+            start_s=round(max(event["first"] * self.interval_s - self.pre_roll_s, 0.0), 3),
+            end_s=round((event["last"] + 1) * self.interval_s + self.post_roll_s, 3),
+            peak_s=round((event["peak"] + 0.5) * self.interval_s, 3),
+            score=round(float(event["score"]), 3),
+            features=event["features"]
+        )
+        entry = (candidate.score, next(self._counter), candidate)
+        if len(self._heap) < self.top_k:
+            heapq.heappush(self._heap, entry)
+        elif entry[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def finish(self, duration_s: float) -> List[HighlightCandidate]:
+        if self._open:
+            self._close()
+        candidates = [entry[2] for entry in sorted(self._heap, reverse=True)]
+        for candidate in candidates:
+            candidate.end_s = round(min(candidate.end_s, duration_s), 3)
+        return candidates
+
+
+class HighlightDetector:
+    """Streaming highlight candidate detection over whole camera files"""
+
+    def __init__(self, ffmpeg_service: FFmpegService):
+        self.ffmpeg = ffmpeg_service
+
+    @tracing.traced("highlights.scan")
+    def scan(
+        self,
+        path: str,
+        interval_s: float = 1.0,
+        top_k: int = 20,
+        min_score: float = 3.0,
+        merge_gap_s: Optional[float] = None,
+        max_event_s: float = 30.0,
+        pre_roll_s: float = 5.0,
+        post_roll_s: float = 3.0,
+        use_audio: bool = True
+    ) -> HighlightScan:
+        """
+        Scan a file and return its best candidate event windows.
+
+        Args:
+            path: Camera file
+            interval_s: Scoring granularity
+            top_k: Candidates kept (best scores first)
+            min_score: Intervals scoring below this are not part of an event
+            merge_gap_s: High-scoring intervals closer than this form one event
+                (default: pre_roll_s + post_roll_s, so event windows rarely overlap)
+            max_event_s: Longest run of intervals merged into one event
+            pre_roll_s, post_roll_s: Context added before the first and after the last high interval
+            use_audio: Include crowd loudness (ignored when the file has no audio)
+
+        Returns:
+            HighlightScan with candidates sorted by score
+
+        Raises:
+            ValueError: If a parameter is out of range
+            RuntimeError: If decoding fails
+        """
+        if interval_s <= 0 or top_k < 1:
+            raise ValueError("interval_s must be positive and top_k at least 1")
+        start_time = time.time()
+        frames_per_interval = max(1, int(round(SCAN_FPS * interval_s)))
+        interval_s = frames_per_interval / SCAN_FPS
+
+        if merge_gap_s is None:
+            merge_gap_s = pre_roll_s + post_roll_s
+        baseline = int(BASELINE_WINDOW_S / interval_s)
+        stats = {name: _RollingStats(baseline) for name in ("motion_peak", "motion_mean", "loudness")}
+        events = _EventBuilder(interval_s, min_score, merge_gap_s, max_event_s, pre_roll_s, post_roll_s, top_k)
+        audio = _AudioLoudness(self.ffmpeg, path, interval_s) if use_audio else None
+
+        job = current_job()
+        progress = ScanProgress(job, self.ffmpeg.probe_duration(path) if job else None, PROGRESS_EVERY_S)
+
+        def on_interval(interval: int, motion_mean: float, motion_peak: float, cuts: int):
+            loudness = audio.loudness(interval) if audio else None
+            features = {"motion_mean": round(motion_mean, 3), "motion_peak": round(motion_peak, 3), "cuts": cuts}
+            score = FEATURE_WEIGHTS["cuts"] * min(cuts, 2)
+            for name, value in (("motion_peak", motion_peak), ("motion_mean", motion_mean),
+                                ("loudness", loudness)):
+                if value is None:
+                    continue
+                z = stats[name].z(value)
+                if z is not None:
+                    score += FEATURE_WEIGHTS[name] * max(z, 0.0)
+            if loudness is not None:
+                features["loudness_db"] = round(loudness, 2)
+            events.add(interval, score, features)
+
+            progress.update((interval + 1) * interval_s)
+
+        video = _VideoFeatures(frames_per_interval, on_interval)
+        if audio:
+            audio.start()
+        try:
+            width, height = SCAN_FRAME_SIZE
+            result = self.ffmpeg.decode_gray_frames(path, video.add, width=width, height=height, fps=SCAN_FPS,
+                                                    frames_per_chunk=int(SCAN_FPS * 10))
+            if not result.success:
+                raise RuntimeError(f"Failed to decode {path}: {result.stderr}")
+            video.finish()
+        finally:
+            if audio:
+                audio.close()
+
+        duration_s = video.frame_index / SCAN_FPS
+        progress.finish()
+
+        scan = HighlightScan(
+            path=path,
+            duration_s=duration_s,
+            processing_time_ms=(time.time() - start_time) * 1000,
+            has_audio=bool(audio and audio.available),
+            candidates=events.finish(duration_s)
+        )
+        tracing.current_span().set_attributes({"highlights.duration_s": duration_s,
+                                                "highlights.candidates": len(scan.candidates),
+                                                "highlights.speed": round(scan.speed, 2)})
+        logger.info(f"Highlight scan of {path}: {duration_s:.0f}s in {scan.processing_time_ms:.0f}ms "
+                    f"({scan.speed:.1f}x real time), {len(scan.candidates)} candidates, "
+                    f"audio={'yes' if scan.has_audio else 'no'}")
+        return scan
@@ -0,0 +1,253 @@
+"""
+Job progress tracking - per-job render progress fed by ffmpeg's -progress
+channel and published to Server-Sent Events subscribers.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("done", "failed")
+
+_current_job: contextvars.ContextVar[Optional["JobProgress"]] = contextvars.ContextVar("current_job", default=None)
+
+
+def current_job() -> Optional["JobProgress"]:
+    """Progress handle of the job running in this thread, if any"""
+    return _current_job.get()
+
+
+@dataclass
+class FFmpegProgress:
+    """One block of key=value lines from ffmpeg -progress"""
+    frame: int = 0
+    out_time_s: float = 0.0
+    total_size: int = 0
+    speed: Optional[float] = None
+    finished: bool = False
+
+    def update(self, key: str, value: str) -> bool:
+        """
+        Apply one progress line.
+
+        Returns:
+            True when the line closes a block (progress=continue|end)
+        """
+        try:
+            if key == "frame":
+                self.frame = int(value)
+            elif key == "out_time_us":
+                self.out_time_s = max(int(value), 0) / 1_000_000
+            elif key == "total_size":
+                self.total_size = int(value)
+            elif key == "speed":
+                self.speed = float(value.rstrip("x")) if value.rstrip("x") not in ("", "N/A") else None
+            elif key == "progress":
+                self.finished = value == "end"
+                return True
+        except ValueError:
+            pass  # N/A before the first packet is written
+        return False
+
+
+@dataclass
+class JobProgress:
+    """Progress of one render job, in seconds of media processed"""
+    job_id: str
+    kind: str
+    status: str = "pending"  # pending -> queued -> running -> done | failed
+    total_s: float = 0.0  # Media seconds of ffmpeg work expected so far
+    done_s: float = 0.0  # Media seconds of finished ffmpeg steps
+    step_s: float = 0.0  # Media seconds of the running ffmpeg step
+    speed: Optional[float] = None
+    bytes_written: int = 0
+    percent: float = 0.0
+    error: Optional[str] = None
+    updated_at: float = field(default_factory=time.time)
+    _tracker: Optional["ProgressTracker"] = field(default=None, repr=False)
+
+    def add_work(self, seconds: float):
+        """Declare media seconds of ffmpeg work this job is about to do"""
+        self.total_s += max(seconds, 0.0)
+        self._publish()
+
+    def ffmpeg_progress(self, progress: FFmpegProgress):
+        """Update from a running ffmpeg step"""
+        self.step_s = progress.out_time_s
+        self.speed = progress.speed
+        self._publish()
+
+    def ffmpeg_finished(self, progress: FFmpegProgress):
+        """Fold a finished ffmpeg step into the job totals"""
+        self.done_s += progress.out_time_s
+        self.bytes_written += progress.total_size
+        self.step_s = 0.0
+        self._publish()
+
+    def _publish(self):
+        if self.status not in FINISHED_STATUSES and self.total_s > 0:
+            # Never go backwards when more work is discovered mid-job; 100 only on completion
+            self.percent = max(self.percent, min((self.done_s + self.step_s) / self.total_s * 100, 99.0))
+        self.updated_at = time.time()
+        if self._tracker:
+            self._tracker.publish(self)
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "percent": round(self.percent, 1),
+            "out_time_s": round(self.done_s + self.step_s, 3),
+            "total_s": round(self.total_s, 3),
+            "speed": self.speed,
+            "bytes": self.bytes_written,
+            "error": self.error,
+            "updated_at": self.updated_at,
+        }
+
+
+class ScanProgress:
+    """
+    Job progress of work without an ffmpeg -progress channel (a decode the
+    service consumes itself, a byte copy): media seconds processed, published
+    at most every every_s of media. Does nothing without a job or a known total.
+    """
+
+    def __init__(self, job: Optional[JobProgress], total_s: Optional[float], every_s: float):
+        self.job = job if total_s else None
+        self.total_s = total_s
+        self.every_s = every_s
+        self.progress = FFmpegProgress()
+        self.started = time.time()
+        if self.job:
+            self.job.add_work(total_s)
+
+    def update(self, scanned_s: float):
+        if self.job and scanned_s - self.progress.out_time_s >= self.every_s:
+            self.progress.out_time_s = min(scanned_s, self.total_s)
+            self.progress.speed = round(scanned_s / max(time.time() - self.started, 1e-6), 2)
+            self.job.ffmpeg_progress(self.progress)
+
+    def finish(self):
+        if self.job:
+            self.progress.out_time_s = self.total_s
+            self.job.ffmpeg_finished(self.progress)
+
+
+class ProgressTracker:
+    """Registry of job progress with async subscribers"""
+
+    def __init__(self, retention_s: float = 300.0):
+        """
+        Args:
+            retention_s: How long finished (or never started) jobs stay queryable
+        """
+        self.retention_s = retention_s
+        self.jobs: Dict[str, JobProgress] = {}
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, job_id: str, kind: str) -> JobProgress:
+        with self._lock:
+            self._prune()
+            job = self.jobs.get(job_id)
+            if job is None:
+                job = JobProgress(job_id=job_id, kind=kind, _tracker=self)
+                self.jobs[job_id] = job
+            elif job.kind == "unknown":
+                job.kind = kind
+            return job
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_s
+        stale = [job_id for job_id, job in self.jobs.items()
+                 if job.status in FINISHED_STATUSES + ("pending",) and job.updated_at < cutoff
+                 and not self._subscribers.get(job_id)]
+        for job_id in stale:
+            del self.jobs[job_id]
+
+    def get(self, job_id: str) -> JobProgress:
+        """
+        Raises:
+            KeyError: If the job is unknown
+        """
+        with self._lock:
+            return self.jobs[job_id]
+
+    def queued(self, job_id: str, kind: str):
+        """Mark a job as waiting for a render slot"""
+        job = self._get_or_create(job_id, kind)
+        job.status = "queued"
+        job._publish()
+
+    @contextmanager
+    def running(self, job_id: str, kind: str):
+        """Run the body as the job, binding it as current_job() for ffmpeg progress"""
+        job = self._get_or_create(job_id, kind)
+        job.status = "running"
+        job._publish()
+        token = _current_job.set(job)
+        try:
+            yield job
+        except BaseException as e:
+            job.status = "failed"
+            job.error = str(e)
+            job._publish()
+            raise
+        else:
+            job.status = "done"
+            job.percent = 100.0
+            job._publish()
+        finally:
+            _current_job.reset(token)
+
+    def publish(self, job: JobProgress):
+        """Push a snapshot to subscribers (safe to call from worker threads)"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(job.job_id, ()))
+        snapshot = job.to_dict()
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+            except RuntimeError:
+                pass  # Subscriber's loop already closed
+
+    async def subscribe(self, job_id: str, heartbeat_s: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """
+        Yield progress snapshots for a job until it finishes.
+        Subscribing before the job is submitted is allowed. Yields None
+        when nothing changed for heartbeat_s.
+        """
+        job = self._get_or_create(job_id, "unknown")
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, []).append((loop, queue))
+        try:
+            snapshot = job.to_dict()
+            yield snapshot
+            while snapshot["status"] not in FINISHED_STATUSES:
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=heartbeat_s)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                # Coalesce bursts so slow clients only see the latest state
+                while not queue.empty():
+                    snapshot = queue.get_nowait()
+                yield snapshot
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(job_id, [])
+                if (loop, queue) in subscribers:
+                    subscribers.remove((loop, queue))
+                if not subscribers:
+                    self._subscribers.pop(job_id, None)
@@ -0,0 +1,333 @@
+"""
+Multi-angle layout renders - 2x2 mosaic, side-by-side and picture-in-picture.
+
+Every camera of a layout is an input of one ffmpeg filter_complex: each is
+seeked to the same moment on the session timeline (shifted by its sync
+offset), fitted into its tile and placed on one canvas, so one invocation
+decodes all angles and encodes the composite. Long windows are cut into
+chunks of whole output frames that are composed in parallel, each chunk
+from its own seek, and joined with a stream-copy concat.
+"""
+
+import os
+import time
+import uuid
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from services.ffmpeg_service import FFmpegService, FFmpegResult
+from services.reel_encoder import ChunkedEncoder, EncodeProfile
+from services.sync_service import SyncService
+from services.output_store import OutputStore, Rerenderer
+from services.job_progress import current_job
+from services.resource_usage import ResourceUsage
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+# Layout -> default cameras, in tile order
+LAYOUTS = {
+    "grid": ("C1", "C2", "C3", "C4"),  # 2x2: left wide, left zoom / right wide, right zoom
+    "side_by_side": ("C1", "C3"),  # Left and right halves of the pitch
+    "pip": ("C1", "C2"),  # Wide camera, zoom camera inset
+}
+PIP_CORNERS = ("top_left", "top_right", "bottom_left", "bottom_right")
+PIP_BORDER = 2  # Pixels of white frame around the inset
+PIP_MARGIN_RATIO = 0.03  # Inset distance from the frame edge (inside its border), relative to the output height
+
+
+def _even(value: float) -> int:
+    return max(2, int(value) // 2 * 2)
+
+
+@dataclass(frozen=True)
+class LayoutSpec:
+    """Which cameras go where"""
+    layout: str  # One of LAYOUTS
+    cameras: Tuple[str, ...] = ()  # Tile order (default: LAYOUTS[layout]); for pip: (main, inset)
+    pip_scale: float = 0.3  # Inset size relative to the output
+    pip_corner: str = "bottom_right"
+
+    @property
+    def camera_ids(self) -> Tuple[str, ...]:
+        return self.cameras or LAYOUTS.get(self.layout, ())
+
+    def validate(self, camera_files: Dict[str, str]):
+        """
+        Raises:
+            ValueError: If the layout, a camera or a pip option is invalid
+        """
+        if self.layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout '{self.layout}' (expected one of: {', '.join(LAYOUTS)})")
+        expected = len(LAYOUTS[self.layout])
+        if len(self.camera_ids) != expected:
+            raise ValueError(f"Layout '{self.layout}' takes {expected} cameras, got {len(self.camera_ids)}")
+        for camera_id in self.camera_ids:
+            if camera_id not in camera_files:
+                raise ValueError(f"Camera {camera_id} not found in session")
+        if not 0.1 <= self.pip_scale <= 0.5:
+            raise ValueError(f"pip_scale {self.pip_scale} out of range (0.1-0.5)")
+        if self.pip_corner not in PIP_CORNERS:
+            raise ValueError(f"Unknown pip corner '{self.pip_corner}' (expected one of: {', '.join(PIP_CORNERS)})")
+
+    def tiles(self, width: int, height: int) -> List[Tuple[int, int, int, int]]:
+        """(x, y, width, height) of each input's tile in a width x height output"""
+        if self.layout == "grid":
+            tile_w, tile_h = _even(width / 2), _even(height / 2)
+            return [(0, 0, tile_w, tile_h), (tile_w, 0, tile_w, tile_h),
+                    (0, tile_h, tile_w, tile_h), (tile_w, tile_h, tile_w, tile_h)]
+        if self.layout == "side_by_side":
+            tile_w = _even(width / 2)
+            return [(0, 0, tile_w, height), (tile_w, 0, tile_w, height)]
+        inset_w, inset_h = _even(width * self.pip_scale), _even(height * self.pip_scale)
+        margin = _even(height * PIP_MARGIN_RATIO) + PIP_BORDER
+        x = margin if self.pip_corner.endswith("left") else width - inset_w - margin
+        y = margin if self.pip_corner.startswith("top") else height - inset_h - margin
+        return [(0, 0, width, height), (x, y, inset_w, inset_h)]
+
+    def filter_complex(self, profile: EncodeProfile, leads: List[float]) -> str:
+        """
+        Filter graph from the inputs [0:v].. to [v].
+
+        Tiles are overlaid on a blank canvas at the output frame rate, so a
+        camera that starts late or ends early leaves its tile blank instead of
+        stalling or ending the graph.
+
+        Args:
+            profile: Output size, frame rate and pad color
+            leads: Seconds each input starts after the window does (camera starts later)
+        """
+        fps = Fraction(profile.fps).limit_denominator(1001)
+        chains = [f"color=c={profile.pad_color}:s={profile.width}x{profile.height}:r={fps}[c0]"]
+        tiles = self.tiles(profile.width, profile.height)
+        for i, ((x, y, width, height), lead_s) in enumerate(zip(tiles, leads)):
+            chain = (f"[{i}:v]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                     f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color={profile.pad_color},setsar=1,fps={fps}")
+            if lead_s > 0:
+                chain += f",setpts=PTS+{lead_s:.6f}/TB"
+            if self.layout == "pip" and i == 1:
+                chain += f",pad=iw+{2 * PIP_BORDER}:ih+{2 * PIP_BORDER}:{PIP_BORDER}:{PIP_BORDER}:color=white"
+                x, y = x - PIP_BORDER, y - PIP_BORDER
+            chains.append(f"{chain}[t{i}]")
+            out = "v" if i == len(tiles) - 1 else f"c{i + 1}"
+            chains.append(f"[c{i}][t{i}]overlay=x={x}:y={y}:eof_action=pass[{out}]")
+        return ";".join(chains)
+
+    def to_dict(self) -> Dict:
+        return {"layout": self.layout, "cameras": list(self.camera_ids),
+                "pip_scale": self.pip_scale, "pip_corner": self.pip_corner}
+
+
+@dataclass
+class LayoutRender:
+    """A composed multi-angle video of one timeline window"""
+    layout_id: str
+    spec: LayoutSpec
+    camera_files: Dict[str, str]
+    start_s: float
+    end_s: float
+    profile: EncodeProfile
+    offsets: Dict[str, float]  # Sync offsets applied (source time = timeline time + offset)
+    output_path: str
+    chunks: int = 0
+    filesize_bytes: int = 0
+    processing_time_ms: float = 0.0
+    resource_usage: ResourceUsage = field(default_factory=ResourceUsage)
+    created_at: datetime = field(default_factory=datetime.now)
+
+    @property
+    def duration_s(self) -> float:
+        return self.end_s - self.start_s
+
+
+class LayoutRenderer:
+    """Single-pass, chunk-parallel multi-camera layouts"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        ffmpeg_service: FFmpegService,
+        encoder: ChunkedEncoder,
+        sync_service: Optional[SyncService] = None,
+        output_store: Optional[OutputStore] = None
+    ):
+        """
+        Args:
+            encoder: Worker pool and chunk length for parallel composes
+            sync_service: When set, windows are on the reference camera's timeline (as in create_clip)
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.ffmpeg = ffmpeg_service
+        self.encoder = encoder
+        self.sync = sync_service
+        self.output_store = output_store
+        self.renders: Dict[str, LayoutRender] = {}
+        self._outputs = Rerenderer("layout", output_store)  # Per-render re-render of evicted files
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        camera_files: Dict[str, str],
+        spec: LayoutSpec,
+        start_s: float,
+        end_s: float,
+        profile: Optional[EncodeProfile] = None
+    ) -> LayoutRender:
+        """
+        Compose the layout's cameras over start_s-end_s of the session timeline.
+
+        Args:
+            camera_files: Session mapping of camera IDs to file paths
+            spec: Layout and cameras
+            start_s: Window start on the session timeline
+            end_s: Window end on the session timeline
+            profile: Output size, frame rate and encoder settings (default: 1280x720 at 30 fps)
+
+        Returns:
+            LayoutRender with the output path
+
+        Raises:
+            ValueError: If the layout, cameras, window or profile is invalid
+            RuntimeError: If FFmpeg operation fails
+        """
+        spec.validate(camera_files)
+        if start_s < 0 or end_s <= start_s:
+            raise ValueError(f"Invalid window: end_s ({end_s}) must be > start_s ({start_s}) >= 0")
+        profile = profile or EncodeProfile()
+        profile.encoder  # Fails early (ValueError) for a codec that cannot be encoded
+
+        offsets = {}
+        if self.sync:
+            sync = self.sync.analyze(camera_files)
+            offsets = {camera_id: sync.offset(camera_id) for camera_id in spec.camera_ids}
+
+        layout_id = f"layout_{uuid.uuid4().hex[:12]}"
+        render = LayoutRender(
+            layout_id=layout_id,
+            spec=spec,
+            camera_files={camera_id: camera_files[camera_id] for camera_id in spec.camera_ids},
+            start_s=start_s,
+            end_s=end_s,
+            profile=profile,
+            offsets=offsets,
+            output_path=str(self.output_dir / f"{layout_id}.mp4")
+        )
+        self._render(render)
+        with self._lock:
+            self.renders[layout_id] = render
+        return render
+
+    @tracing.traced("layout.render")
+    def _render(self, render: LayoutRender):
+        start_time = time.time()
+        profile = render.profile
+        total_frames = max(1, int(round(render.duration_s * profile.fps)))
+        chunk_frames = max(1, int(round(self.encoder.chunk_s * profile.fps)))
+        spans = [(first, min(chunk_frames, total_frames - first)) for first in range(0, total_frames, chunk_frames)]
+        if len(spans) > 1 and spans[-1][1] < chunk_frames / 2:
+            # Fold a short tail into the chunk before it
+            first, frames = spans.pop()
+            spans[-1] = (spans[-1][0], spans[-1][1] + frames)
+        paths = [render.output_path] if len(spans) == 1 else \
+            [f"{render.output_path}.chunk{i:03d}.mp4" for i in range(len(spans))]
+
+        tracing.current_span().set_attributes({"layout.id": render.layout_id, "layout.layout": render.spec.layout,
+                                               "layout.chunks": len(spans)})
+        job = current_job()
+        if job:
+            job.add_work(render.duration_s * (2 if len(spans) > 1 else 1))
+
+        def compose(chunk: Tuple[Tuple[int, int], str], threads: int) -> FFmpegResult:
+            (first, frames), path = chunk
+            inputs, leads = [], []
+            for camera_id in render.spec.camera_ids:
+                source_s = render.start_s + first / profile.fps + render.offsets.get(camera_id, 0.0)
+                inputs.append((render.camera_files[camera_id], max(0.0, source_s)))
+                leads.append(max(0.0, -source_s))
+            return self.ffmpeg.compose_video(
+                inputs, path, render.spec.filter_complex(profile, leads), frames=frames,
+                preset=profile.preset, crf=profile.crf, gop_frames=profile.gop_frames, threads=threads,
+                codec=profile.encoder, pix_fmt=profile.pix_fmt, codec_profile=profile.codec_profile
+            )
+
+        usage = ResourceUsage()
+        try:
+            results = self.encoder.run_chunks(list(zip(spans, paths)), compose)
+            for (first, _), result in zip(spans, results):
+                usage.add(result.resource_usage)
+                if not result.success:
+                    raise RuntimeError(f"Failed to compose {render.spec.layout} layout at "
+                                       f"{render.start_s + first / profile.fps:.2f}s: {result.stderr}")
+            if len(paths) > 1:
+                result = self.ffmpeg.concat_segments(paths, render.output_path)
+                usage.add(result.resource_usage)
+                if not result.success:
+                    raise RuntimeError(f"Failed to join chunks of {render.layout_id}: {result.stderr}")
+        finally:
+            for path in paths:
+                if path != render.output_path and os.path.exists(path):
+                    os.unlink(path)
+
+        render.chunks = len(spans)
+        render.filesize_bytes = os.path.getsize(render.output_path)
+        render.processing_time_ms = (time.time() - start_time) * 1000
+        render.resource_usage = usage
+        if self.output_store:
+            self.output_store.register("layout", render.layout_id, render.output_path,
+                                       sources=list(render.camera_files.values()))
+
+        logger.info(f"Layout {render.layout_id} ({render.spec.layout}, {', '.join(render.spec.camera_ids)}): "
+                   f"{render.start_s:.2f}s-{render.end_s:.2f}s, chunks={len(spans)}, "
+                   f"size={render.filesize_bytes:,} bytes, processing_time={render.processing_time_ms:.0f}ms, "
+                   f"cpu={usage.cpu_s:.2f}s")
+
+    def get_render(self, layout_id: str) -> LayoutRender:
+        """Retrieve render by ID"""
+        if layout_id not in self.renders:
+            raise KeyError(f"Layout {layout_id} not found")
+        return self.renders[layout_id]
+
+    def cached_path(self, layout_id: str) -> Optional[str]:
+        """
+        Path of a render whose file is on disk (None if it has to be re-rendered first).
+
+        Raises:
+            KeyError: If the render does not exist
+        """
+        render = self.get_render(layout_id)
+        return render.output_path if self._outputs.resident(layout_id, [render.output_path]) else None
+
+    def ensure_rendered(self, layout_id: str) -> str:
+        """
+        Path of a render, re-rendering it if its file was evicted.
+
+        Raises:
+            KeyError: If the render does not exist
+            RuntimeError: If FFmpeg operation fails
+        """
+        render = self.get_render(layout_id)
+
+        def rerender():
+            logger.info(f"Re-rendering evicted layout {layout_id}")
+            self._render(render)
+
+        self._outputs.ensure(layout_id, [render.output_path], rerender)
+        return render.output_path
+
+    def delete_render(self, layout_id: str):
+        """Delete a render and its file"""
+        render = self.get_render(layout_id)
+        if os.path.exists(render.output_path):
+            os.unlink(render.output_path)
+        if self.output_store:
+            self.output_store.forget("layout", layout_id)
+        with self._lock:
+            del self.renders[layout_id]
+        self._outputs.discard(layout_id)
+        logger.info(f"Deleted layout: {layout_id}")
@@ -0,0 +1,246 @@
+"""
+Minimal Prometheus-style metrics for the rendering pipeline.
+Renders the text exposition format (version 0.0.4) without extra dependencies.
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Seconds - ffmpeg stream-copy operations range from ~10ms to minutes for long reels
+DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+THROUGHPUT_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)  # Mbps
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DURATION_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+# Default registry and pipeline metrics
+REGISTRY = MetricsRegistry()
+
+FFMPEG_DURATION = REGISTRY.histogram(
+    "highlight_ffmpeg_operation_duration_seconds",
+    "Wall time of ffmpeg/ffprobe operations", ["operation"])
+FFMPEG_OPERATIONS = REGISTRY.counter(
+    "highlight_ffmpeg_operations_total",
+    "ffmpeg/ffprobe operations by outcome", ["operation", "status"])
+FFMPEG_BYTES = REGISTRY.counter(
+    "highlight_ffmpeg_output_bytes_total",
+    "Bytes written by ffmpeg operations", ["operation"])
+FFMPEG_THROUGHPUT = REGISTRY.histogram(
+    "highlight_ffmpeg_throughput_mbps",
+    "Output throughput of ffmpeg operations in megabits per second", ["operation"],
+    buckets=THROUGHPUT_BUCKETS)
+FFMPEG_CPU_SECONDS = REGISTRY.counter(
+    "highlight_ffmpeg_cpu_seconds_total",
+    "CPU time of ffmpeg children by operation and mode (user/system)", ["operation", "mode"])
+FFMPEG_ACTIVE = REGISTRY.gauge(
+    "highlight_ffmpeg_active_processes",
+    "ffmpeg/ffprobe child processes currently running")
+
+UPLOAD_DURATION = REGISTRY.histogram(
+    "highlight_upload_duration_seconds",
+    "Wall time to receive and validate a 4-camera upload")
+UPLOAD_BYTES = REGISTRY.counter(
+    "highlight_upload_bytes_total",
+    "Bytes received in camera uploads")
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "highlight_render_queue_depth",
+    "Render jobs waiting for a free slot")
+QUEUE_RUNNING = REGISTRY.gauge(
+    "highlight_render_jobs_running",
+    "Render jobs currently running")
+QUEUE_WAIT = REGISTRY.histogram(
+    "highlight_render_queue_wait_seconds",
+    "Time render jobs spend waiting for a slot", ["job"])
+JOB_DURATION = REGISTRY.histogram(
+    "highlight_render_job_duration_seconds",
+    "Run time of render jobs once started", ["job"])
+
+SYNC_ESTIMATES = REGISTRY.counter(
+    "highlight_sync_estimates_total",
+    "Camera sync offset estimates by method (audio, video, none)", ["method"])
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "highlight_cache_requests_total",
+    "Cache lookups by cache and result (hit/miss)", ["cache", "result"])
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    "highlight_cache_hit_ratio",
+    "Cache hit ratio since start", ["cache"])
+
+DISK_FREE_BYTES = REGISTRY.gauge(
+    "highlight_output_disk_free_bytes",
+    "Free bytes on the output volume")
+OUTPUT_STORE_BYTES = REGISTRY.gauge(
+    "highlight_output_store_used_bytes",
+    "Bytes of resident rendered outputs")
+OUTPUT_STORE_HEADROOM_BYTES = REGISTRY.gauge(
+    "highlight_output_store_headroom_bytes",
+    "Bytes left before the output store high watermark")
+
+
+def record_cache(cache: str, hit: bool):
+    """Count a cache lookup and update its hit ratio"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+    hits = CACHE_REQUESTS.get(cache=cache, result="hit")
+    misses = CACHE_REQUESTS.get(cache=cache, result="miss")
+    CACHE_HIT_RATIO.set(hits / (hits + misses), cache=cache)
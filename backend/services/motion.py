@@ -0,0 +1,42 @@
+"""
+Motion energy of streamed low-res grayscale frames (ffmpeg rawvideo pipe),
+computed chunk by chunk with NumPy so memory stays at one chunk of frames.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+
+class MotionEnergy:
+    """Per-frame motion energy: mean absolute difference to the previous frame above a noise floor"""
+
+    def __init__(self, width: int, height: int, noise_floor: int = 0):
+        """
+        Args:
+            width, height: Frame size of the raw gray8 stream
+            noise_floor: Per-pixel differences up to this are treated as compression noise
+        """
+        self.frame_bytes = width * height
+        self.shape = (height, width)
+        self.noise_floor = noise_floor
+        self.previous: Optional[np.ndarray] = None
+        self.parts: List[np.ndarray] = []
+
+    def add(self, chunk: bytes):
+        """Consume a chunk of whole frames (callback for FFmpegService.decode_gray_frames)"""
+        frames = np.frombuffer(chunk, dtype=np.uint8)
+        frames = frames[:len(frames) - len(frames) % self.frame_bytes].reshape(-1, *self.shape).astype(np.int16)
+        if self.previous is not None:
+            frames = np.concatenate([self.previous[None], frames])
+        if len(frames) > 1:
+            diff = np.abs(np.diff(frames, axis=0))
+            if self.noise_floor:
+                diff = np.maximum(diff - self.noise_floor, 0)
+            self.parts.append(diff.mean(axis=(1, 2)).astype(np.float32))
+        if len(frames):
+            self.previous = frames[-1]
+
+    def result(self) -> np.ndarray:
+        """Energy of every frame after the first"""
+        return np.concatenate(self.parts) if self.parts else np.empty(0, dtype=np.float32)
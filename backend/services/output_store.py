@@ -0,0 +1,281 @@
+"""
+Output store - tracks rendered clip/reel files and evicts them under disk pressure.
+Evicted outputs keep their metadata and are re-rendered on next access.
+"""
+
+import os
+import time
+import shutil
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, List, Optional, Set
+import logging
+
+from services import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredOutput:
+    """A rendered output file tracked by the store"""
+    kind: str  # clip, reel, fragment
+    output_id: str
+    path: str
+    size_bytes: int
+    last_access: float
+    pinned: bool = False
+    evicted: bool = False
+    sources: List[str] = field(default_factory=list)  # Files needed to re-render
+
+    def can_rerender(self) -> bool:
+        return all(os.path.exists(path) for path in self.sources)
+
+
+class OutputStore:
+    """LRU store for rendered outputs with pinning and watermark-based eviction"""
+
+    def __init__(
+        self,
+        root_dir: str,
+        high_watermark_bytes: int,
+        low_watermark_bytes: Optional[int] = None,
+        min_free_bytes: int = 0
+    ):
+        """
+        Args:
+            root_dir: Directory holding the outputs (used for free-space checks)
+            high_watermark_bytes: Start evicting when tracked outputs exceed this size
+            low_watermark_bytes: Evict down to this size (default: 80% of high watermark)
+            min_free_bytes: Also evict while free disk space is below this
+        """
+        self.root_dir = root_dir
+        self.high_watermark_bytes = high_watermark_bytes
+        self.low_watermark_bytes = (low_watermark_bytes if low_watermark_bytes is not None
+                                    else int(high_watermark_bytes * 0.8))
+        self.min_free_bytes = min_free_bytes
+        self.entries: Dict[str, StoredOutput] = {}  # "kind:id" -> StoredOutput
+        self._held: Dict[str, int] = {}  # "kind:id" -> number of holders (never evicted)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(kind: str, output_id: str) -> str:
+        return f"{kind}:{output_id}"
+
+    def register(self, kind: str, output_id: str, path: str, sources: Optional[List[str]] = None):
+        """
+        Track a newly rendered (or re-rendered) output and enforce the watermark.
+
+        Args:
+            sources: Files the output is rendered from; it is only evicted while they exist
+        """
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        key = self._key(kind, output_id)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = StoredOutput(kind=kind, output_id=output_id, path=path,
+                                     size_bytes=size, last_access=time.time(),
+                                     sources=list(sources or []))
+                self.entries[key] = entry
+            else:
+                if sources is not None:
+                    entry.sources = list(sources)
+                entry.path = path
+                entry.size_bytes = size
+                entry.last_access = time.time()
+                entry.evicted = False
+        self.enforce(protect=key)
+
+    def touch(self, kind: str, output_id: str):
+        """Record an access (download) of an output"""
+        with self._lock:
+            entry = self.entries.get(self._key(kind, output_id))
+            if entry is not None:
+                entry.last_access = time.time()
+
+    def forget(self, kind: str, output_id: str):
+        """Stop tracking an output (after it was deleted)"""
+        with self._lock:
+            self.entries.pop(self._key(kind, output_id), None)
+
+    def set_pinned(self, kind: str, output_id: str, pinned: bool):
+        """Pin or unpin an output. Pinned outputs are never evicted."""
+        with self._lock:
+            entry = self.entries.get(self._key(kind, output_id))
+            if entry is None:
+                raise KeyError(f"{kind} {output_id} not tracked")
+            entry.pinned = pinned
+
+    @contextmanager
+    def hold(self, kind: str, output_id: str):
+        """Keep an output from being evicted while it is being read or rewritten"""
+        key = self._key(kind, output_id)
+        with self._lock:
+            self._held[key] = self._held.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._held[key] -= 1
+                if not self._held[key]:
+                    del self._held[key]
+
+    def is_evicted(self, kind: str, output_id: str) -> bool:
+        """Whether an output was evicted and needs re-rendering"""
+        with self._lock:
+            entry = self.entries.get(self._key(kind, output_id))
+            return entry is not None and entry.evicted
+
+    def used_bytes(self) -> int:
+        """Total size of resident (non-evicted) outputs"""
+        with self._lock:
+            return sum(e.size_bytes for e in self.entries.values() if not e.evicted)
+
+    def _free_bytes(self) -> int:
+        try:
+            return shutil.disk_usage(self.root_dir).free
+        except OSError:
+            return self.min_free_bytes
+
+    def enforce(self, protect: Optional[str] = None) -> List[StoredOutput]:
+        """
+        Evict least-recently-used unpinned outputs while over the high watermark
+        (or below min free space), down to the low watermark.
+
+        Args:
+            protect: Key of an entry that must not be evicted (e.g. the one just rendered)
+
+        Returns:
+            List of evicted entries
+        """
+        evicted = []
+        with self._lock:
+            used = sum(e.size_bytes for e in self.entries.values() if not e.evicted)
+            free = self._free_bytes()
+            if used <= self.high_watermark_bytes and free >= self.min_free_bytes:
+                return evicted
+
+            candidates = sorted(
+                (e for key, e in self.entries.items()
+                 if not e.evicted and not e.pinned and key != protect
+                 and key not in self._held and e.can_rerender()),
+                key=lambda e: e.last_access
+            )
+
+            for entry in candidates:
+                if used <= self.low_watermark_bytes and free >= self.min_free_bytes:
+                    break
+                try:
+                    if os.path.exists(entry.path):
+                        os.unlink(entry.path)
+                except OSError as e:
+                    logger.warning(f"Failed to evict {entry.path}: {e}")
+                    continue
+                entry.evicted = True
+                used -= entry.size_bytes
+                free += entry.size_bytes
+                evicted.append(entry)
+
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} outputs "
+                       f"({sum(e.size_bytes for e in evicted):,} bytes), "
+                       f"resident={used:,} bytes")
+        elif used > self.high_watermark_bytes:
+            logger.warning(f"Output store over watermark ({used:,} bytes) but nothing evictable")
+
+        return evicted
+
+    def stats(self) -> Dict:
+        """Summary of tracked outputs"""
+        with self._lock:
+            entries = list(self.entries.values())
+        resident = [e for e in entries if not e.evicted]
+        return {
+            "tracked": len(entries),
+            "resident": len(resident),
+            "evicted": len(entries) - len(resident),
+            "pinned": sum(1 for e in entries if e.pinned),
+            "used_bytes": sum(e.size_bytes for e in resident),
+            "high_watermark_bytes": self.high_watermark_bytes,
+            "low_watermark_bytes": self.low_watermark_bytes,
+            "free_bytes": self._free_bytes(),
+            "outputs": [asdict(e) for e in sorted(entries, key=lambda e: e.last_access, reverse=True)]
+        }
+
+
+class KeyedLocks:
+    """One lock per key (created on first use), so work on one output does not hold up the others"""
+
+    def __init__(self):
+        self._locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, key: str) -> threading.RLock:
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.RLock()
+            return lock
+
+    def discard(self, key: str):
+        """Drop the lock of a deleted output"""
+        with self._lock:
+            self._locks.pop(key, None)
+
+
+class Rerenderer:
+    """
+    Re-render on access for evicted outputs of one kind.
+
+    Outputs whose files are on disk are served without locking; a missing
+    one is re-rendered under its own lock, so concurrent requests for it
+    render it once and requests for other outputs are not held up.
+    """
+
+    def __init__(self, kind: str, output_store: Optional[OutputStore] = None):
+        self.kind = kind
+        self.output_store = output_store
+        self.locks = KeyedLocks()
+        self._rendering: Set[str] = set()  # Output IDs being re-rendered (their files may be partial)
+        self._lock = threading.Lock()
+
+    def resident(self, output_id: str, paths: List[str], touch_id: Optional[str] = None) -> bool:
+        """
+        Whether all files of an output are on disk and complete; a hit counts as an access.
+
+        Args:
+            touch_id: Output store ID to record the access under (default: output_id)
+        """
+        # Existence first: a re-render that started after this check has not created its files yet
+        if not all(os.path.exists(path) for path in paths):
+            return False
+        with self._lock:
+            if output_id in self._rendering:
+                return False
+        metrics.record_cache(f"{self.kind}_output", hit=True)
+        if self.output_store:
+            self.output_store.touch(self.kind, touch_id or output_id)
+        return True
+
+    def ensure(self, output_id: str, paths: List[str], rerender: Callable[[], None],
+               touch_id: Optional[str] = None):
+        """Run rerender() if any of the output's files is missing (once, however many callers wait)"""
+        if self.resident(output_id, paths, touch_id):
+            return
+        with self.locks(output_id):
+            if self.resident(output_id, paths, touch_id):
+                return
+            metrics.record_cache(f"{self.kind}_output", hit=False)
+            with self._lock:
+                self._rendering.add(output_id)
+            try:
+                rerender()
+            finally:
+                with self._lock:
+                    self._rendering.discard(output_id)
+
+    def discard(self, output_id: str):
+        """Forget a deleted output"""
+        self.locks.discard(output_id)
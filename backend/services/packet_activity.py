@@ -0,0 +1,290 @@
+"""
+Packet activity - a decode-free activity timeline per camera.
+
+Encoders spend bits on change: inter-coded (non-key) packets grow with
+motion and shrink to a few bytes when nothing moves, and the keyframe of
+a black picture is tiny. The packet list comes from a demux-only pass
+(FFmpegService.demux_packets), so a full match is indexed for a small
+fraction of a decode's CPU; NumPy bins it into per-bucket activity and
+flags frozen and black stretches.
+"""
+
+import contextvars
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from services.ffmpeg_service import FFmpegService
+from services import file_identity
+from services import metrics
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+NOPTS = -(2 ** 63)  # AV_NOPTS_VALUE as printed by framecrc
+FROZEN_RATIO = 0.05  # Inter packets below this fraction of the file's median inter packet carry no change
+BLACK_KEY_RATIO = 0.1  # Keyframes below this fraction of the median keyframe are (near) black pictures
+STILL_WINDOW_S = 0.5  # Inter packet sizes are averaged over this long before the still test
+MIN_FROZEN_S = 2.0
+MIN_BLACK_S = 1.0
+ACTIVITY_PERCENTILE = 98  # Activity 1.0 = this percentile of a file's bucket values
+MAX_CACHED_FILES = 32
+
+
+@dataclass
+class PacketIndex:
+    """Packets of one video stream, in presentation order"""
+    pts_s: np.ndarray  # float64
+    size: np.ndarray  # int64 bytes
+    keyframe: np.ndarray  # bool
+    frame_s: float  # Typical packet duration
+
+    @property
+    def start_s(self) -> float:
+        """Presentation start; packets before 0 are edit-list preroll that is decoded but never shown"""
+        return max(float(self.pts_s[0]), 0.0) if len(self.pts_s) else 0.0
+
+    @property
+    def duration_s(self) -> float:
+        return max(0.0, float(self.pts_s[-1] - self.start_s + self.frame_s)) if len(self.pts_s) else 0.0
+
+    def keyframes_s(self) -> List[float]:
+        """Shown keyframes, in seconds from the presentation start (what -ss seeks against)"""
+        keyframe_pts = self.pts_s[self.keyframe]
+        return (keyframe_pts[keyframe_pts >= self.start_s] - self.start_s).tolist()
+
+
+class FramecrcParser:
+    """Builds a PacketIndex from FFmpegService.demux_packets output, line by line"""
+
+    def __init__(self):
+        self.time_base: Optional[float] = None
+        self.pts = array("q")
+        self.durations = array("q")
+        self.sizes = array("q")
+        self.keyframes = array("b")
+
+    def add(self, line: str):
+        if line.startswith("#"):
+            if line.startswith("#tb 0:"):
+                num, _, den = line.split(":", 1)[1].strip().partition("/")
+                self.time_base = int(num) / int(den)
+            return
+        fields = line.split(",")
+        if len(fields) < 6:
+            return
+        self.pts.append(int(fields[2]))
+        self.durations.append(int(fields[3]))
+        self.sizes.append(int(fields[4]))
+        # Plain keyframes print no flags field
+        self.keyframes.append(len(fields) < 7 or int(fields[6].strip()[2:], 16) & 1)
+
+    def result(self) -> PacketIndex:
+        """
+        Raises:
+            ValueError: If the output had no time base or no packets
+        """
+        if self.time_base is None or not self.pts:
+            raise ValueError("No video packets found")
+        pts = np.frombuffer(self.pts, dtype=np.int64)
+        valid = pts != NOPTS
+        order = np.argsort(pts[valid], kind="stable")
+        durations = np.frombuffer(self.durations, dtype=np.int64)[valid]
+        return PacketIndex(
+            pts_s=pts[valid][order] * self.time_base,
+            size=np.frombuffer(self.sizes, dtype=np.int64)[valid][order],
+            keyframe=np.frombuffer(self.keyframes, dtype=np.int8)[valid][order].astype(bool),
+            frame_s=float(np.median(durations)) * self.time_base if len(durations) else 0.0
+        )
+
+
+@dataclass
+class ActivityTimeline:
+    """Per-bucket activity of one camera on the session timeline"""
+    resolution_s: float
+    duration_s: float  # Timeline seconds covered (from 0)
+    activity: List[Optional[float]]  # 0-1 relative to the file's own busy moments; None where no footage
+    kbps: List[Optional[float]]  # Video bitrate per bucket
+    keyframes: int
+    frozen: List[Tuple[float, float]] = field(default_factory=list)
+    black: List[Tuple[float, float]] = field(default_factory=list)
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """[start, end) index ranges where mask is True"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+def _to_timeline(runs: List[Tuple[float, float]], offset_s: float) -> List[Tuple[float, float]]:
+    return [(round(max(start_s - offset_s, 0.0), 3), round(end_s - offset_s, 3))
+            for start_s, end_s in runs if end_s - offset_s > 0]
+
+
+def still_stretches(index: PacketIndex) -> Tuple[List[Tuple[float, float]], List[Tuple[float, float]]]:
+    """
+    Frozen and black stretches (source times) from runs of near-empty inter packets.
+
+    Inter packet sizes are averaged over STILL_WINDOW_S first, since encoders
+    keep spending a little on reference frames of a static picture. A run is
+    black when a keyframe inside it, or the keyframe it follows, is itself
+    tiny; otherwise the picture is frozen.
+    """
+    inter = ~index.keyframe
+    if not inter.any() or not index.keyframe.any():
+        return [], []
+    inter_positions = np.flatnonzero(inter)
+    inter_sizes = index.size[inter_positions].astype(np.float64)
+    window = max(1, int(round(STILL_WINDOW_S / index.frame_s))) if index.frame_s > 0 else 1
+    smoothed = np.convolve(inter_sizes, np.ones(window) / window, mode="same")
+    still = np.zeros(len(index.size), dtype=bool)
+    still[inter_positions] = smoothed < FROZEN_RATIO * np.median(inter_sizes)
+    small_key = index.keyframe & (index.size < BLACK_KEY_RATIO * np.median(index.size[index.keyframe]))
+    quiet = still | small_key
+
+    frozen, black = [], []
+    # Keyframes neither start nor break a run of still inter packets
+    for first, last in _runs(quiet | index.keyframe):
+        inside = np.flatnonzero(quiet[first:last])
+        if not len(inside) or not still[first:last].any():
+            continue
+        first, last = first + inside[0], first + inside[-1] + 1
+        start_s, end_s = float(index.pts_s[first]), float(index.pts_s[last - 1] + index.frame_s)
+        preceding = np.flatnonzero(index.keyframe[:first])
+        keys = list(np.flatnonzero(index.keyframe[first:last]) + first) + list(preceding[-1:])
+        is_black = any(small_key[k] for k in keys)
+        if end_s - start_s >= (MIN_BLACK_S if is_black else MIN_FROZEN_S):
+            (black if is_black else frozen).append((round(start_s, 3), round(end_s, 3)))
+    return frozen, black
+
+
+class PacketActivity:
+    """Demux-only activity timelines, cached in memory per file identity"""
+
+    def __init__(self, ffmpeg_service: FFmpegService, max_workers: int = 4):
+        """
+        Args:
+            max_workers: Files demuxed in parallel for a session
+        """
+        self.ffmpeg = ffmpeg_service
+        self.max_workers = max_workers
+        self._indexes: "OrderedDict[str, PacketIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def index(self, path: str) -> PacketIndex:
+        """
+        Packet index of a file's first video stream (cached).
+
+        Raises:
+            RuntimeError: If the file cannot be demuxed
+        """
+        file_key = file_identity.file_key(path)
+        with self._lock:
+            index = self._indexes.get(file_key)
+            if index is not None:
+                self._indexes.move_to_end(file_key)
+        metrics.record_cache("packet_index", hit=index is not None)
+        if index is not None:
+            return index
+
+        parser = FramecrcParser()
+        result = self.ffmpeg.demux_packets(path, parser.add)
+        if not result.success:
+            raise RuntimeError(f"Failed to demux {path}: {result.stderr}")
+        try:
+            index = parser.result()
+        except ValueError as e:
+            raise RuntimeError(f"Failed to index {path}: {e}")
+
+        with self._lock:
+            self._indexes[file_key] = index
+            while len(self._indexes) > MAX_CACHED_FILES:
+                self._indexes.popitem(last=False)
+        return index
+
+    def timeline(self, path: str, resolution_s: float = 1.0, offset_s: float = 0.0) -> ActivityTimeline:
+        """
+        Activity per resolution_s bucket on the session timeline (source time = timeline time + offset_s).
+
+        Raises:
+            ValueError: If resolution_s is not positive
+            RuntimeError: If the file cannot be demuxed
+        """
+        if resolution_s <= 0:
+            raise ValueError("resolution_s must be positive")
+        index = self.index(path)
+        timeline_s = index.pts_s - offset_s
+        on_timeline = timeline_s >= 0
+        n_buckets = int(np.ceil((timeline_s[-1] + index.frame_s) / resolution_s)) if on_timeline.any() else 0
+        buckets = np.floor(timeline_s[on_timeline] / resolution_s).astype(np.int64)
+        sizes = index.size[on_timeline]
+        inter = ~index.keyframe[on_timeline]
+
+        packets = np.bincount(buckets, minlength=n_buckets)
+        total_bytes = np.bincount(buckets, weights=sizes, minlength=n_buckets)
+        inter_bytes = np.bincount(buckets[inter], weights=sizes[inter], minlength=n_buckets)
+        inter_count = np.bincount(buckets[inter], minlength=n_buckets)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_inter = np.where(inter_count > 0, inter_bytes / inter_count, np.nan)
+        scale = np.nanpercentile(mean_inter, ACTIVITY_PERCENTILE) if np.isfinite(mean_inter).any() else 0.0
+        activity = np.clip(mean_inter / scale, 0.0, 1.0) if scale > 0 else np.zeros(n_buckets)
+        kbps = total_bytes * 8 / 1000 / resolution_s
+
+        frozen, black = still_stretches(index)
+        return ActivityTimeline(
+            resolution_s=resolution_s,
+            duration_s=round(n_buckets * resolution_s, 3),
+            activity=[None if packets[i] == 0 or np.isnan(a) else round(float(a), 3)
+                      for i, a in enumerate(activity)],
+            kbps=[None if packets[i] == 0 else round(float(k), 1) for i, k in enumerate(kbps)],
+            keyframes=int(index.keyframe[on_timeline].sum()),
+            frozen=_to_timeline(frozen, offset_s),
+            black=_to_timeline(black, offset_s)
+        )
+
+    @tracing.traced("activity.session")
+    def session_timelines(self, camera_files: Dict[str, str], offsets: Optional[Dict[str, float]] = None,
+                          resolution_s: float = 1.0) -> Dict[str, ActivityTimeline]:
+        """Timelines of every camera, demuxed in parallel"""
+        start_time = time.time()
+        offsets = offsets or {}
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(camera_files)))) as pool:
+            futures = {camera_id: pool.submit(context.copy().run, self.timeline, path, resolution_s,
+                                              offsets.get(camera_id, 0.0))
+                       for camera_id, path in sorted(camera_files.items())}
+            timelines = {camera_id: future.result() for camera_id, future in futures.items()}
+        logger.info(f"Packet activity for {len(timelines)} cameras in {(time.time() - start_time) * 1000:.0f}ms")
+        return timelines
+
+    def interval_activity(self, path: str, start_s: float, end_s: float, interval_s: float,
+                          offset_s: float = 0.0) -> np.ndarray:
+        """
+        Mean inter packet size per interval of a timeline window (NaN where the camera has no footage).
+        A decode-free stand-in for motion energy.
+        """
+        index = self.index(path)
+        n_intervals = int(np.ceil((end_s - start_s) / interval_s - 1e-9))
+        inter = ~index.keyframe
+        bins = np.floor((index.pts_s[inter] - offset_s - start_s) / interval_s).astype(np.int64)
+        inside = (bins >= 0) & (bins < n_intervals)
+        sums = np.bincount(bins[inside], weights=index.size[inter][inside], minlength=n_intervals)
+        counts = np.bincount(bins[inside], minlength=n_intervals)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def forget(self, path: str):
+        """Drop the cached index of a file about to be deleted"""
+        try:
+            file_key = file_identity.file_key(path)
+        except OSError:
+            return
+        with self._lock:
+            self._indexes.pop(file_key, None)
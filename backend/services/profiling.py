@@ -0,0 +1,264 @@
+"""
+Opt-in per-request profiling - a sampling CPU profiler (folded stacks, ready
+for flamegraph.pl / speedscope) plus a tracemalloc allocation diff, stored
+with count and age limits.
+
+A profile is bound to the request through a context variable; service
+entry points decorated with @profiled add their worker thread to it, so
+samples cover ClipService/ReelService work rather than the event loop.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS = {"cpu": "cpu.folded", "memory": "memory.txt"}
+TRACEMALLOC_FRAMES = 25
+MEMORY_TOP_LINES = 50
+
+_active_profile: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar("active_profile",
+                                                                                             default=None)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+    """CPU samples and allocation snapshots of one request"""
+
+    def __init__(self, method: str, path: str):
+        self.profile_id = f"prof_{uuid.uuid4().hex[:12]}"
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now()
+        self.start_time = time.perf_counter()
+        self.duration_ms = 0.0
+        self.status_code: Optional[int] = None
+        self.thread_ids: Set[int] = set()  # Threads being sampled right now
+        self.threads_seen = 0
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._end_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def add_sample(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def folded(self) -> str:
+        """Collapsed stacks, one "frame;frame;frame count" line each"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def memory_report(self) -> str:
+        if self._start_snapshot is None or self._end_snapshot is None:
+            return "tracemalloc snapshot unavailable\n"
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+                   tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+        start = self._start_snapshot.filter_traces(filters)
+        end = self._end_snapshot.filter_traces(filters)
+        diffs = end.compare_to(start, "lineno")
+        growth = sum(d.size_diff for d in diffs)
+        lines = [f"Allocation growth during {self.method} {self.path}: {growth / 1024:.1f} KiB "
+                 f"(net of frees, traced since request start)", ""]
+        for diff in diffs[:MEMORY_TOP_LINES]:
+            lines.append(str(diff))
+        return "\n".join(lines) + "\n"
+
+    def metadata(self, interval_s: float) -> Dict:
+        return {
+            "profile_id": self.profile_id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": self.samples,
+            "interval_ms": interval_s * 1000,
+            "threads": self.threads_seen,
+        }
+
+
+class Profiler:
+    """Runs a sampler thread while any profile is active and persists finished profiles"""
+
+    def __init__(self, root_dir: str, interval_s: float = 0.005, max_profiles: int = 50,
+                 max_age_s: float = 7 * 24 * 3600):
+        """
+        Args:
+            root_dir: Directory holding one sub-directory per stored profile
+            interval_s: CPU sampling interval
+            max_profiles: Oldest profiles are deleted beyond this count
+            max_age_s: Profiles older than this are deleted
+        """
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.interval_s = interval_s
+        self.max_profiles = max_profiles
+        self.max_age_s = max_age_s
+        self.profile_next = 0  # Admin toggle: profile this many upcoming requests
+        self._active: List[RequestProfile] = []
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._tracemalloc_users = 0
+        self._started_tracemalloc = False
+
+    # --- lifecycle -------------------------------------------------------------
+
+    def should_profile(self, requested: bool) -> bool:
+        """Whether to profile a request (explicit opt-in, or consume one admin-toggled slot)"""
+        if requested:
+            return True
+        with self._lock:
+            if self.profile_next > 0:
+                self.profile_next -= 1
+                return True
+        return False
+
+    def start(self, method: str, path: str) -> RequestProfile:
+        profile = RequestProfile(method, path)
+        with self._lock:
+            if self._tracemalloc_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+                self._started_tracemalloc = True
+            self._tracemalloc_users += 1
+            self._active.append(profile)
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+                self._sampler.start()
+        profile._start_snapshot = tracemalloc.take_snapshot()
+        return profile
+
+    def finish(self, profile: RequestProfile, status_code: Optional[int] = None) -> Dict:
+        """Stop a profile, write it to disk and apply retention"""
+        profile.duration_ms = (time.perf_counter() - profile.start_time) * 1000
+        profile.status_code = status_code
+        profile._end_snapshot = tracemalloc.take_snapshot()
+        with self._lock:
+            self._active.remove(profile)
+            self._tracemalloc_users -= 1
+            if self._tracemalloc_users == 0 and self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+        meta = self._save(profile)
+        self.prune()
+        logger.info(f"Profile {profile.profile_id} stored: {profile.method} {profile.path}, "
+                    f"{profile.samples} samples, {profile.duration_ms:.0f}ms")
+        return meta
+
+    def _sample_loop(self):
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._sampler = None
+                    return
+                active = list(self._active)
+            frames = sys._current_frames()
+            for profile in active:
+                for thread_id in list(profile.thread_ids):
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        profile.add_sample(frame)
+            del frames
+            time.sleep(self.interval_s)
+
+    # --- storage ---------------------------------------------------------------
+
+    def _save(self, profile: RequestProfile) -> Dict:
+        profile_dir = self.root_dir / profile.profile_id
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        (profile_dir / ARTIFACTS["cpu"]).write_text(profile.folded())
+        (profile_dir / ARTIFACTS["memory"]).write_text(profile.memory_report())
+        meta = profile.metadata(self.interval_s)
+        with open(profile_dir / "profile.json", "w") as f:
+            json.dump(meta, f, indent=2)
+        return meta
+
+    def list_profiles(self) -> List[Dict]:
+        """Stored profile metadata, newest first"""
+        profiles = []
+        for meta_path in self.root_dir.glob("*/profile.json"):
+            try:
+                with open(meta_path) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda p: p["started_at"], reverse=True)
+
+    def artifact_path(self, profile_id: str, artifact: str) -> str:
+        """
+        Raises:
+            KeyError: If the profile or artifact does not exist
+        """
+        if artifact not in ARTIFACTS or os.sep in profile_id or profile_id.startswith("."):
+            raise KeyError(artifact)
+        path = self.root_dir / profile_id / ARTIFACTS[artifact]
+        if not path.exists():
+            raise KeyError(profile_id)
+        return str(path)
+
+    def delete(self, profile_id: str):
+        """
+        Raises:
+            KeyError: If the profile does not exist
+        """
+        profile_dir = self.root_dir / profile_id
+        if os.sep in profile_id or not (profile_dir / "profile.json").exists():
+            raise KeyError(profile_id)
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+    def prune(self):
+        """Delete profiles beyond max_profiles or older than max_age_s"""
+        cutoff = datetime.now().timestamp() - self.max_age_s
+        for i, meta in enumerate(self.list_profiles()):
+            if i >= self.max_profiles or datetime.fromisoformat(meta["started_at"]).timestamp() < cutoff:
+                shutil.rmtree(self.root_dir / meta["profile_id"], ignore_errors=True)
+
+
+def activate(profile: Optional[RequestProfile]) -> contextvars.Token:
+    """Bind a profile to the current request context"""
+    return _active_profile.set(profile)
+
+
+def deactivate(token: contextvars.Token):
+    _active_profile.reset(token)
+
+
+def profiled(fn):
+    """Sample the calling thread while fn runs, if the current request is being profiled"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profile = _active_profile.get()
+        if profile is None:
+            return fn(*args, **kwargs)
+        thread_id = threading.get_ident()
+        added = thread_id not in profile.thread_ids
+        if added:
+            profile.thread_ids.add(thread_id)
+            profile.threads_seen += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            if added:
+                profile.thread_ids.discard(thread_id)
+    return wrapper
@@ -0,0 +1,277 @@
+"""
+Compact internal records for clip/reel storage.
+
+Services keep tens of thousands of clips in memory, so they store these
+__slots__ records instead of pydantic models. Segments are packed into a
+SegmentTable (camera indices in bytes, times in a double array). Pydantic
+models are only built at the API boundary via to_model().
+"""
+
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models.clip import Clip, ClipSegment
+from models.reel import Reel
+from services.resource_usage import ResourceUsage
+from services.reel_encoder import EncodeProfile
+from services.transitions import Transition
+
+# Camera IDs are interned to a small index so a segment costs 1 byte + 2 doubles
+_camera_ids: List[str] = []
+_camera_index: Dict[str, int] = {}
+
+# Camera file mappings are shared by every clip of a session
+_camera_files_cache: Dict[Tuple[Tuple[str, str], ...], Dict[str, str]] = {}
+
+
+def _camera_to_index(camera_id: str) -> int:
+    index = _camera_index.get(camera_id)
+    if index is None:
+        if len(_camera_ids) >= 256:
+            raise ValueError("Too many distinct camera IDs")
+        index = len(_camera_ids)
+        _camera_ids.append(camera_id)
+        _camera_index[camera_id] = index
+    return index
+
+
+def intern_camera_files(camera_files: Dict[str, str]) -> Dict[str, str]:
+    """Return a shared dict for identical camera file mappings (treat as read-only)"""
+    key = tuple(sorted(camera_files.items()))
+    shared = _camera_files_cache.get(key)
+    if shared is None:
+        shared = dict(key)
+        _camera_files_cache[key] = shared
+    return shared
+
+
+class SegmentTable:
+    """Packed list of (camera_id, start_s, end_s) segments"""
+    __slots__ = ("cameras", "times", "retimed")
+
+    def __init__(self, cameras: bytes, times: array, retimed: Optional[Dict[int, Tuple[float, bool]]] = None):
+        self.cameras = cameras  # One camera index per segment
+        self.times = times      # Interleaved start_s, end_s
+        self.retimed = retimed  # Segment index -> (speed, interpolate), only for speed != 1; None if there are none
+
+    @classmethod
+    def from_segments(cls, segments: Iterable) -> "SegmentTable":
+        """Build from ClipSegment models or any objects with camera_id/start_s/end_s (and optionally speed)"""
+        cameras = bytearray()
+        times = array("d")
+        retimed = {}
+        for i, seg in enumerate(segments):
+            cameras.append(_camera_to_index(seg.camera_id))
+            times.append(seg.start_s)
+            times.append(seg.end_s)
+            speed = getattr(seg, "speed", 1.0)
+            if speed != 1.0:
+                retimed[i] = (float(speed), bool(getattr(seg, "interpolate", False)))
+        return cls(bytes(cameras), times, retimed or None)
+
+    @classmethod
+    def from_dicts(cls, segments: Iterable[Dict]) -> "SegmentTable":
+        """Build from plain dicts (metadata files)"""
+        cameras = bytearray()
+        times = array("d")
+        retimed = {}
+        for i, seg in enumerate(segments):
+            cameras.append(_camera_to_index(seg["camera_id"]))
+            times.append(float(seg["start_s"]))
+            times.append(float(seg["end_s"]))
+            speed = float(seg.get("speed", 1.0))
+            if speed != 1.0:
+                retimed[i] = (speed, bool(seg.get("interpolate", False)))
+        return cls(bytes(cameras), times, retimed or None)
+
+    def __len__(self) -> int:
+        return len(self.cameras)
+
+    def __iter__(self) -> Iterator[Tuple[str, float, float]]:
+        times = self.times
+        return zip([_camera_ids[camera] for camera in self.cameras], times[0::2], times[1::2])
+
+    def camera_ids(self) -> List[str]:
+        return [_camera_ids[camera] for camera in self.cameras]
+
+    def retiming(self, index: int) -> Tuple[float, bool]:
+        """(speed, interpolate) of one segment"""
+        if self.retimed is None:
+            return 1.0, False
+        return self.retimed.get(index, (1.0, False))
+
+    def total_duration(self) -> float:
+        """Playing time of the clip (retimed segments last (end_s - start_s) / speed)"""
+        times = self.times
+        total = sum(times[1::2]) - sum(times[0::2])
+        for index, (speed, _) in (self.retimed or {}).items():
+            source_s = times[2 * index + 1] - times[2 * index]
+            total += source_s / speed - source_s
+        return total
+
+    def to_dicts(self) -> List[Dict]:
+        dicts = [
+            {"camera_id": camera_id, "start_s": start_s, "end_s": end_s}
+            for camera_id, start_s, end_s in self
+        ]
+        for index, (speed, interpolate) in (self.retimed or {}).items():
+            dicts[index].update(speed=speed, interpolate=interpolate)
+        return dicts
+
+    def to_models(self) -> List[ClipSegment]:
+        return [
+            ClipSegment.model_construct(camera_id=camera_id, start_s=start_s, end_s=end_s,
+                                        speed=self.retiming(i)[0], interpolate=self.retiming(i)[1])
+            for i, (camera_id, start_s, end_s) in enumerate(self)
+        ]
+
+
+class ClipRecord:
+    """Internal clip record"""
+    __slots__ = ("clip_id", "segments", "output_path", "filesize_bytes",
+                 "duration_s", "camera_files", "created_at", "resource_usage", "sync_offsets")
+
+    def __init__(
+        self,
+        clip_id: str,
+        segments: SegmentTable,
+        output_path: str,
+        filesize_bytes: int,
+        duration_s: float,
+        camera_files: Dict[str, str],
+        created_at: Optional[datetime] = None,
+        resource_usage: Optional[ResourceUsage] = None,
+        sync_offsets: Optional[Dict[str, float]] = None
+    ):
+        self.clip_id = clip_id
+        self.segments = segments
+        self.output_path = output_path
+        self.filesize_bytes = filesize_bytes
+        self.duration_s = duration_s
+        self.camera_files = intern_camera_files(camera_files)
+        self.created_at = created_at or datetime.now()
+        self.resource_usage = resource_usage or ResourceUsage()  # ffmpeg children of all renders
+        self.sync_offsets = sync_offsets or {}  # Already applied to segments
+
+    def to_model(self) -> Clip:
+        """Build the pydantic model (API boundary only)"""
+        return Clip.model_construct(
+            clip_id=self.clip_id,
+            segments=self.segments.to_models(),
+            output_path=self.output_path,
+            filesize_bytes=self.filesize_bytes,
+            duration_s=self.duration_s,
+            camera_files=dict(self.camera_files),
+            created_at=self.created_at,
+            resource_usage=self.resource_usage.to_dict(),
+            sync_offsets=dict(self.sync_offsets)
+        )
+
+    def to_dict(self) -> Dict:
+        """JSON-ready dict, same shape as the metadata file"""
+        return {
+            "clip_id": self.clip_id,
+            "segments": self.segments.to_dicts(),
+            "output_path": self.output_path,
+            "filesize_bytes": self.filesize_bytes,
+            "duration_s": self.duration_s,
+            "camera_files": self.camera_files,
+            "created_at": self.created_at.isoformat(),
+            "resource_usage": self.resource_usage.to_dict(),
+            "sync_offsets": self.sync_offsets
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ClipRecord":
+        return cls(
+            clip_id=data["clip_id"],
+            segments=SegmentTable.from_dicts(data["segments"]),
+            output_path=data["output_path"],
+            filesize_bytes=int(data["filesize_bytes"]),
+            duration_s=float(data["duration_s"]),
+            camera_files=data.get("camera_files", {}),
+            created_at=datetime.fromisoformat(data["created_at"]) if "created_at" in data else None,
+            resource_usage=ResourceUsage.from_dict(data.get("resource_usage")),
+            sync_offsets=data.get("sync_offsets")
+        )
+
+
+class ReelRecord:
+    """Internal reel record"""
+    __slots__ = ("reel_id", "clip_ids", "output_path", "filesize_bytes", "duration_s", "created_at",
+                 "resource_usage", "profile", "transition", "intro_id", "outro_id")
+
+    def __init__(
+        self,
+        reel_id: str,
+        clip_ids: Iterable[str],
+        output_path: str,
+        filesize_bytes: int,
+        duration_s: float,
+        created_at: Optional[datetime] = None,
+        resource_usage: Optional[ResourceUsage] = None,
+        profile: Optional[EncodeProfile] = None,
+        transition: Optional[Transition] = None,
+        intro_id: Optional[str] = None,
+        outro_id: Optional[str] = None
+    ):
+        self.reel_id = reel_id
+        self.clip_ids = tuple(clip_ids)
+        self.output_path = output_path
+        self.filesize_bytes = filesize_bytes
+        self.duration_s = duration_s
+        self.created_at = created_at or datetime.now()
+        self.resource_usage = resource_usage or ResourceUsage()  # ffmpeg children of all builds and edits
+        self.profile = profile  # Output format clips not in it are re-encoded to; None = all stream-copied
+        self.transition = transition  # Blend between consecutive clips; None = hard cuts
+        self.intro_id = intro_id  # Bumpers played before/after the clips
+        self.outro_id = outro_id
+
+    def to_model(self) -> Reel:
+        """Build the pydantic model (API boundary only)"""
+        return Reel.model_construct(
+            reel_id=self.reel_id,
+            clip_ids=list(self.clip_ids),
+            output_path=self.output_path,
+            filesize_bytes=self.filesize_bytes,
+            duration_s=self.duration_s,
+            created_at=self.created_at,
+            resource_usage=self.resource_usage.to_dict(),
+            format=self.profile.to_dict() if self.profile else None,
+            transition=self.transition.to_dict() if self.transition else None,
+            intro_id=self.intro_id,
+            outro_id=self.outro_id
+        )
+
+    def to_dict(self) -> Dict:
+        """JSON-ready dict, same shape as the metadata file"""
+        return {
+            "reel_id": self.reel_id,
+            "clip_ids": list(self.clip_ids),
+            "output_path": self.output_path,
+            "filesize_bytes": self.filesize_bytes,
+            "duration_s": self.duration_s,
+            "created_at": self.created_at.isoformat(),
+            "resource_usage": self.resource_usage.to_dict(),
+            "profile": self.profile.to_dict() if self.profile else None,
+            "transition": self.transition.to_dict() if self.transition else None,
+            "intro_id": self.intro_id,
+            "outro_id": self.outro_id
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ReelRecord":
+        return cls(
+            reel_id=data["reel_id"],
+            clip_ids=data["clip_ids"],
+            output_path=data["output_path"],
+            filesize_bytes=int(data["filesize_bytes"]),
+            duration_s=float(data["duration_s"]),
+            created_at=datetime.fromisoformat(data["created_at"]) if "created_at" in data else None,
+            resource_usage=ResourceUsage.from_dict(data.get("resource_usage")),
+            profile=EncodeProfile.from_dict(data.get("profile")),
+            transition=Transition.from_dict(data.get("transition")),
+            intro_id=data.get("intro_id"),
+            outro_id=data.get("outro_id")
+        )
@@ -0,0 +1,321 @@
+"""
+Chunked re-encoder - normalizes videos to one letterboxed output format.
+
+Scaling and padding happen in an ffmpeg filter graph, so no frame passes
+through Python. Inputs are split at their own keyframes into chunks of
+about chunk_s seconds: each chunk seeks straight to a keyframe (no frames
+decoded and thrown away), encodes independently on its own core, and the
+chunks are joined with a stream-copy concat. Every chunk is encoded with
+identical settings, so the joined file plays as one stream.
+"""
+
+import contextvars
+import os
+import time
+from fractions import Fraction
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+import logging
+
+from services.ffmpeg_service import FFmpegService, FFmpegResult, VideoMetadata
+from services.packet_activity import PacketActivity
+from services.job_progress import current_job
+from services.resource_usage import ResourceUsage
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_S = 10.0
+KEYFRAME_INTERVAL_S = 2.0  # Output GOP, keeps later stream-copy cuts and fragments fine-grained
+
+# Codec (as probed) -> ffmpeg encoder used to produce it
+ENCODERS = {"h264": "libx264", "hevc": "libx265"}
+
+# Probed profile names that the encoder spells differently
+_ENCODER_PROFILES = {"constrained baseline": "baseline", "high 10": "high10", "high 4:2:2": "high422",
+                     "high 4:4:4 predictive": "high444", "main 10": "main10", "main still picture": "mainstillpicture"}
+
+T = TypeVar("T")
+
+
+def frame_rate(metadata: VideoMetadata) -> float:
+    """
+    Frames per second of a probed stream: r_frame_rate, or avg_frame_rate when
+    that is unset ("0/0" in some containers and variable-frame-rate files).
+
+    Raises:
+        ValueError: If the stream reports neither rate
+    """
+    for rate in (metadata.r_frame_rate, metadata.avg_frame_rate):
+        try:
+            fps = Fraction(rate)
+        except (ValueError, ZeroDivisionError):
+            continue
+        if fps > 0:
+            return float(fps)
+    raise ValueError(f"Video has no usable frame rate (r_frame_rate={metadata.r_frame_rate!r}, "
+                     f"avg_frame_rate={metadata.avg_frame_rate!r})")
+
+
+def encoder_profile(metadata: VideoMetadata) -> Optional[str]:
+    """The encoder's -profile:v name for a probed profile (None if there is none)"""
+    if not metadata.profile:
+        return None
+    name = metadata.profile.lower()
+    return _ENCODER_PROFILES.get(name, name.replace(" ", ""))
+
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    """Output format of a normalized video"""
+    width: int = 1280
+    height: int = 720
+    fps: float = 30.0
+    crf: int = 23
+    preset: str = "veryfast"
+    pad_color: str = "black"
+    codec: str = "h264"
+    pix_fmt: str = "yuv420p"
+    codec_profile: Optional[str] = None  # Encoder -profile:v name, e.g. high (None = the encoder's choice)
+
+    @classmethod
+    def from_metadata(cls, metadata: VideoMetadata) -> "EncodeProfile":
+        """
+        The stream format of an existing video (encoder settings left at defaults).
+
+        Raises:
+            ValueError: If the stream reports no usable frame rate
+        """
+        return cls(width=metadata.width, height=metadata.height, fps=frame_rate(metadata),
+                   codec=metadata.codec_name, pix_fmt=metadata.pix_fmt, codec_profile=encoder_profile(metadata))
+
+    @property
+    def key(self) -> str:
+        """Stable identifier, used to cache encodes per format"""
+        return (f"{self.width}x{self.height}_{self.fps:.6g}fps_{self.codec}_{self.codec_profile or 'auto'}_"
+                f"{self.pix_fmt}_crf{self.crf}_{self.preset}_{self.pad_color}")
+
+    @property
+    def stream_key(self) -> Tuple:
+        """
+        What decides whether two videos can be joined by stream-copy (an
+        unpinned codec_profile never matches a pinned one)
+        """
+        return (self.width, self.height, round(self.fps, 3), self.codec, self.codec_profile, self.pix_fmt)
+
+    @property
+    def encoder(self) -> str:
+        """
+        Raises:
+            ValueError: If there is no encoder for the codec
+        """
+        if self.codec not in ENCODERS:
+            raise ValueError(f"Cannot encode to codec '{self.codec}' (supported: {', '.join(ENCODERS)})")
+        return ENCODERS[self.codec]
+
+    @property
+    def gop_frames(self) -> int:
+        return max(1, int(round(self.fps * KEYFRAME_INTERVAL_S)))
+
+    def video_filter(self) -> str:
+        """Fit inside width x height keeping the aspect ratio, pad the rest, constant frame rate"""
+        return (f"scale={self.width}:{self.height}:force_original_aspect_ratio=decrease,"
+                f"pad={self.width}:{self.height}:(ow-iw)/2:(oh-ih)/2:color={self.pad_color},"
+                f"setsar=1,fps={Fraction(self.fps).limit_denominator(1001)}")
+
+    def retime_filter(self, speed: float, interpolate: bool = False) -> str:
+        """
+        Play at speed (0.5 = half speed) at the profile's constant frame rate.
+
+        Slowed video repeats source frames to fill the rate, or with interpolate
+        synthesizes motion-compensated in-between frames instead.
+        """
+        fps = Fraction(self.fps).limit_denominator(1001)
+        retime = f"setpts=(PTS-STARTPTS)/{speed:g}"
+        if interpolate and speed < 1:
+            return f"{retime},minterpolate=fps={fps}:mi_mode=mci"
+        return f"{retime},fps={fps}"
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional["EncodeProfile"]:
+        return cls(**data) if data else None
+
+
+@dataclass
+class EncodeChunk:
+    """One independently encoded piece of an output"""
+    output_index: int
+    input_path: str
+    start_s: float
+    duration_s: Optional[float]  # None = to the end of the input
+    path: str
+
+
+class ChunkedEncoder:
+    """Keyframe-aligned, chunk-parallel re-encoding"""
+
+    def __init__(
+        self,
+        ffmpeg_service: FFmpegService,
+        packet_activity: PacketActivity,
+        max_workers: Optional[int] = None,
+        chunk_s: float = DEFAULT_CHUNK_S
+    ):
+        """
+        Args:
+            packet_activity: Source of keyframe positions (demux only)
+            max_workers: Chunks encoded at once (default: one per core)
+            chunk_s: Target chunk length; chunks end on the first input keyframe past it
+        """
+        self.ffmpeg = ffmpeg_service
+        self.packet_activity = packet_activity
+        cores = os.cpu_count() or 1
+        self.max_workers = max_workers or cores
+        self.threads_per_chunk = max(1, cores // self.max_workers)
+        self.chunk_s = chunk_s
+
+    def plan(self, input_path: str, chunk_s: Optional[float] = None) -> Tuple[List[Tuple[float, Optional[float]]], float]:
+        """
+        Split an input at keyframes into (start_s, duration_s) chunks.
+
+        The last chunk runs to the end of the input; a tail shorter than half
+        a chunk is folded into the chunk before it.
+
+        Returns:
+            (chunks, input duration in seconds)
+
+        Raises:
+            RuntimeError: If the input cannot be demuxed
+        """
+        chunk_s = chunk_s or self.chunk_s
+        index = self.packet_activity.index(input_path)
+        duration_s = index.duration_s
+
+        starts = [0.0]
+        for keyframe_s in index.keyframes_s():
+            if keyframe_s - starts[-1] >= chunk_s and duration_s - keyframe_s >= chunk_s / 2:
+                starts.append(keyframe_s)
+
+        chunks = [(start_s, end_s - start_s) for start_s, end_s in zip(starts, starts[1:])]
+        chunks.append((starts[-1], None))
+        return chunks, duration_s
+
+    @tracing.traced("encoder.encode_files")
+    def encode_files(self, jobs: List[Tuple[str, str]], profile: EncodeProfile, parallel: bool = True) -> FFmpegResult:
+        """
+        Re-encode each (input_path, output_path) pair to the profile.
+
+        With parallel, all chunks of all inputs share one pool of workers, so
+        a single long input uses every core as well as many short ones. Without
+        it, each input is encoded whole by one ffmpeg process, one after another.
+
+        Returns:
+            FFmpegResult summed over every encode and concat (each is also recorded on its own)
+
+        Raises:
+            ValueError: If the profile's codec cannot be encoded
+            RuntimeError: If an input cannot be demuxed or an encode fails
+        """
+        start_time = time.time()
+        chunks: List[EncodeChunk] = []
+        total_s = 0.0
+        for output_index, (input_path, output_path) in enumerate(jobs):
+            if parallel:
+                spans, duration_s = self.plan(input_path)
+            else:
+                spans, duration_s = [(0.0, None)], self.packet_activity.index(input_path).duration_s
+            total_s += duration_s
+            for i, (chunk_start_s, chunk_duration_s) in enumerate(spans):
+                path = output_path if len(spans) == 1 else f"{output_path}.chunk{i:03d}.mp4"
+                chunks.append(EncodeChunk(output_index, input_path, chunk_start_s, chunk_duration_s, path))
+
+        concat_outputs = {chunk.output_index for chunk in chunks if chunk.path != jobs[chunk.output_index][1]}
+        job = current_job()
+        if job:
+            job.add_work(total_s + sum(self.packet_activity.index(jobs[i][0]).duration_s for i in concat_outputs))
+        tracing.current_span().set_attributes({"encoder.outputs": len(jobs), "encoder.chunks": len(chunks),
+                                               "encoder.parallel": parallel})
+
+        total_usage = ResourceUsage()
+        total_bytes = 0
+        try:
+            results = self._encode_chunks(chunks, profile, parallel)
+            for chunk, result in zip(chunks, results):
+                total_usage.add(result.resource_usage)
+                if not result.success:
+                    raise RuntimeError(f"Failed to encode {os.path.basename(chunk.input_path)} "
+                                       f"from {chunk.start_s:.2f}s: {result.stderr}")
+
+            for output_index, (_, output_path) in enumerate(jobs):
+                if output_index in concat_outputs:
+                    parts = [chunk.path for chunk in chunks if chunk.output_index == output_index]
+                    result = self.ffmpeg.concat_segments(parts, output_path)
+                    total_usage.add(result.resource_usage)
+                    if not result.success:
+                        raise RuntimeError(f"Failed to join chunks of {output_path}: {result.stderr}")
+                total_bytes += os.path.getsize(output_path)
+        finally:
+            for chunk in chunks:
+                if chunk.path != jobs[chunk.output_index][1] and os.path.exists(chunk.path):
+                    os.unlink(chunk.path)
+
+        duration_ms = (time.time() - start_time) * 1000
+        logger.info(f"Encoded {len(jobs)} files to {profile.key}: chunks={len(chunks)}, "
+                   f"media={total_s:.1f}s, duration={duration_ms:.0f}ms, "
+                   f"speed={total_s / max(duration_ms / 1000, 1e-6):.1f}x, cpu={total_usage.cpu_s:.2f}s")
+
+        return FFmpegResult(
+            success=True,
+            output_path=jobs[-1][1] if jobs else None,
+            duration_ms=duration_ms,
+            command=f"encode({len(chunks)} chunks, parallel={parallel}) + concat",
+            exit_code=0,
+            stderr="",
+            filesize_bytes=total_bytes,
+            resource_usage=total_usage
+        )
+
+    def _encode_chunks(self, chunks: List[EncodeChunk], profile: EncodeProfile, parallel: bool) -> List[FFmpegResult]:
+        codec = profile.encoder
+
+        def encode(chunk: EncodeChunk, threads: int) -> FFmpegResult:
+            return self.ffmpeg.encode_video(
+                chunk.input_path, chunk.path, profile.video_filter(),
+                start_s=chunk.start_s, duration_s=chunk.duration_s,
+                preset=profile.preset, crf=profile.crf, gop_frames=profile.gop_frames, threads=threads,
+                codec=codec, pix_fmt=profile.pix_fmt, codec_profile=profile.codec_profile
+            )
+
+        return self.run_chunks(chunks, encode, parallel)
+
+    def run_chunks(self, chunks: List[T], encode: Callable[[T, int], FFmpegResult],
+                   parallel: bool = True) -> List[FFmpegResult]:
+        """
+        Run encode(chunk, threads) for each chunk, in order (serial) or across the
+        worker pool; stops at the first failure.
+
+        Returns:
+            Results in chunk order, up to and including the first failure
+        """
+        if not parallel or len(chunks) == 1 or self.max_workers == 1:
+            results = []
+            for chunk in chunks:
+                results.append(encode(chunk, 0 if not parallel else self.threads_per_chunk))
+                if not results[-1].success:
+                    break
+            return results
+
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+            futures = [pool.submit(context.copy().run, encode, chunk, self.threads_per_chunk) for chunk in chunks]
+            results = []
+            for future in futures:
+                results.append(future.result())
+                if not results[-1].success:
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    break
+            return results
@@ -6,36 +6,134 @@ import os
 import uuid
 import json
 import time
-from typing import List
+import functools
+from contextlib import ExitStack
+from typing import List, Dict, Optional, BinaryIO, Tuple
 from pathlib import Path
+from dataclasses import dataclass, field
 import logging
 
-from models.reel import Reel
 from services.ffmpeg_service import FFmpegService
 from services.clip_service import ClipService
+from services.output_store import OutputStore, KeyedLocks, Rerenderer
+from services.records import ReelRecord
+from services import metrics
+from services.job_progress import ScanProgress, current_job
+from services import tracing
+from services.profiling import profiled
+from services.resource_usage import collect_usage
+from services.fragmented_mp4 import FragmentInfo, inspect_fragmented, copy_init, copy_prefix, copy_fragments
+from services.packet_activity import PacketActivity
+from services.reel_encoder import ChunkedEncoder, EncodeProfile
+from services.transitions import Transition, TransitionJoiner
+from services.bumpers import BumperLibrary
 
 logger = logging.getLogger(__name__)
 
 
+def _per_reel(method):
+    """Serialize changes to one reel (renders run on worker threads); other reels are not held up"""
+    @functools.wraps(method)
+    def wrapper(self, reel_id, *args, **kwargs):
+        with self._outputs.locks(reel_id):
+            return method(self, reel_id, *args, **kwargs)
+    return wrapper
+
+
+@dataclass
+class ReelPart:
+    """One clip's fragments inside a reel file"""
+    clip_id: str
+    byte_offset: int
+    byte_size: int
+    tick_offset: int
+    ticks: int
+    first_sequence: int
+    num_fragments: int
+
+
+@dataclass
+class ReelLayout:
+    """Byte/time layout of a fragmented reel file, used for incremental edits"""
+    init_size: int
+    timescale: int
+    sample_description: bytes
+    parts: List[ReelPart] = field(default_factory=list)
+
+    @property
+    def end_offset(self) -> int:
+        if not self.parts:
+            return self.init_size
+        last = self.parts[-1]
+        return last.byte_offset + last.byte_size
+
+    @property
+    def end_ticks(self) -> int:
+        if not self.parts:
+            return 0
+        last = self.parts[-1]
+        return last.tick_offset + last.ticks
+
+    @property
+    def next_sequence(self) -> int:
+        if not self.parts:
+            return 1
+        last = self.parts[-1]
+        return last.first_sequence + last.num_fragments
+
+
 class ReelService:
     """Service for creating highlight reels from clips"""
 
-    def __init__(self, output_dir: str, ffmpeg_service: FFmpegService, clip_service: ClipService):
+    def __init__(
+        self,
+        output_dir: str,
+        ffmpeg_service: FFmpegService,
+        clip_service: ClipService,
+        output_store: Optional[OutputStore] = None,
+        encoder: Optional[ChunkedEncoder] = None,
+        bumpers: Optional[BumperLibrary] = None
+    ):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.ffmpeg = ffmpeg_service
         self.clip_service = clip_service
-        self.reels_db = {}  # Simple in-memory storage: reel_id -> Reel
-
-    def create_reel(self, clip_ids: List[str]) -> Reel:
+        self.output_store = output_store
+        self.reels_db: Dict[str, ReelRecord] = {}  # Simple in-memory storage: reel_id -> ReelRecord
+        self.layouts: Dict[str, ReelLayout] = {}  # reel_id -> fragment layout of the reel file
+        self.fragments_dir = self.output_dir / "fragments"
+        self.fragments_dir.mkdir(parents=True, exist_ok=True)
+        self.fragment_cache: Dict[str, FragmentInfo] = {}  # clip_id -> fragmented copy of the clip
+        self.encoder = encoder or ChunkedEncoder(ffmpeg_service, PacketActivity(ffmpeg_service))
+        self.normalized_dir = self.output_dir / "normalized"
+        self.normalized_dir.mkdir(parents=True, exist_ok=True)
+        self.normalized_cache: Dict[Tuple[str, str], str] = {}  # (clip_id, profile key) -> re-encoded clip
+        self.clip_formats: Dict[str, EncodeProfile] = {}  # clip_id -> stream format of the clip file
+        self.transitions = TransitionJoiner(ffmpeg_service, self.encoder)
+        self.bumpers = bumpers  # Intro/outro videos, conformed per stream format
+        self._outputs = Rerenderer("reel", output_store)  # Per-reel locks and re-render of evicted files
+        self._clip_locks = KeyedLocks()  # Per-clip guard of the fragment and re-encode caches
+
+    @profiled
+    @tracing.traced("reel.create")
+    def create_reel(self, clip_ids: List[str], profile: Optional[EncodeProfile] = None,
+                    transition: Optional[Transition] = None, intro_id: Optional[str] = None,
+                    outro_id: Optional[str] = None) -> ReelRecord:
         """
         Create a highlight reel from a list of clips.
 
         Args:
             clip_ids: List of clip IDs to include in the reel
+            profile: Output format; clips not already in it are re-encoded letterboxed
+                (default: stream-copy, or the most common format when clips differ)
+            transition: Blend at every cut; only a window around each cut is
+                re-encoded (default: hard cuts)
+            intro_id: Bumper played before the first clip (conformed to the reel's
+                stream format once, then stream-copied)
+            outro_id: Bumper played after the last clip
 
         Returns:
-            Reel object with metadata
+            ReelRecord with metadata
 
         Raises:
             ValueError: If clip_ids are invalid
@@ -43,14 +141,15 @@ class ReelService:
         """
         if not clip_ids:
             raise ValueError("No clips provided")
+        if transition is not None:
+            transition.validate()
+        self._check_bumpers(intro_id, outro_id)
 
         # Validate all clips exist
-        clip_paths = []
         total_duration = 0.0
         for clip_id in clip_ids:
             try:
                 clip = self.clip_service.get_clip(clip_id)
-                clip_paths.append(clip.output_path)
                 total_duration += clip.duration_s
                 logger.info(f"  Including clip {clip_id}: {clip.duration_s:.2f}s")
             except KeyError:
@@ -59,43 +158,522 @@ class ReelService:
         # Generate reel ID and output path
         reel_id = f"reel_{uuid.uuid4().hex[:12]}"
         output_path = self.output_dir / f"{reel_id}.mp4"
+        tracing.current_span().set_attributes({"reel.id": reel_id, "reel.clips": len(clip_ids)})
 
         logger.info(f"Creating reel {reel_id} from {len(clip_ids)} clips, "
                    f"total duration={total_duration:.2f}s")
 
-        # Concatenate clips using FFmpeg
+        # Lay clip fragments end to end (stream-copy, fragments are cached per clip),
+        # or join clips with re-encoded copies of those not in the reel's format
         start_time = time.time()
-        result = self.ffmpeg.concat_segments(
-            segment_paths=clip_paths,
-            output_path=str(output_path)
-        )
-
-        if not result.success:
-            raise RuntimeError(f"Failed to create reel: {result.stderr}")
-
+        with collect_usage() as usage:
+            if profile is None:
+                profile = self._conform_target(clip_ids)
+            layout = self._write_reel_file(str(output_path), clip_ids, profile, transition, intro_id, outro_id)
         processing_time_ms = (time.time() - start_time) * 1000
+        total_duration += self._added_duration(len(clip_ids), transition, intro_id, outro_id)
 
-        # Create reel object
-        reel = Reel(
+        # Create reel record
+        reel = ReelRecord(
             reel_id=reel_id,
             clip_ids=clip_ids,
             output_path=str(output_path),
-            filesize_bytes=result.filesize_bytes,
-            duration_s=total_duration
+            filesize_bytes=os.path.getsize(output_path),
+            duration_s=total_duration,
+            resource_usage=usage,
+            profile=profile,
+            transition=transition,
+            intro_id=intro_id,
+            outro_id=outro_id
         )
 
         # Store in memory
         self.reels_db[reel_id] = reel
+        if layout is not None:
+            self.layouts[reel_id] = layout
+        self._register_output(reel)
 
         logger.info(f"Reel {reel_id} created successfully: "
                    f"clips={len(clip_ids)}, "
                    f"duration={total_duration:.2f}s, "
-                   f"size={result.filesize_bytes:,} bytes, "
+                   f"size={reel.filesize_bytes:,} bytes, "
+                   f"processing_time={processing_time_ms:.0f}ms, "
+                   f"cpu={usage.cpu_s:.2f}s")
+
+        return reel
+
+    @profiled
+    @tracing.traced("reel.insert_clips")
+    @_per_reel
+    def insert_clips(self, reel_id: str, clip_ids: List[str], index: Optional[int] = None) -> ReelRecord:
+        """
+        Insert clips into an existing reel (append when index is None).
+
+        Only the inserted clips and the clips after the insertion point are
+        rewritten; the unchanged prefix of the reel file is kept as-is, so an
+        append costs about as much as the new clip.
+
+        Raises:
+            KeyError: If the reel does not exist
+            ValueError: If clip_ids or index are invalid
+            RuntimeError: If FFmpeg operation fails
+        """
+        reel = self.get_reel(reel_id)
+        if not clip_ids:
+            raise ValueError("No clips provided")
+        for clip_id in clip_ids:
+            try:
+                self.clip_service.get_clip(clip_id)
+            except KeyError:
+                raise ValueError(f"Clip {clip_id} not found")
+
+        if index is None:
+            index = len(reel.clip_ids)
+        if index < 0 or index > len(reel.clip_ids):
+            raise ValueError(f"Index {index} out of range for reel with {len(reel.clip_ids)} clips")
+
+        new_clip_ids = list(reel.clip_ids[:index]) + list(clip_ids) + list(reel.clip_ids[index:])
+        logger.info(f"Inserting {len(clip_ids)} clips into reel {reel_id} at index {index}")
+        return self._splice(reel, index, new_clip_ids)
+
+    @profiled
+    @tracing.traced("reel.remove_clip")
+    @_per_reel
+    def remove_clip(self, reel_id: str, index: int) -> ReelRecord:
+        """
+        Remove the clip at the given position from a reel.
+        Only the clips after the removed one are rewritten.
+
+        Raises:
+            KeyError: If the reel does not exist
+            ValueError: If index is invalid or the reel would become empty
+        """
+        reel = self.get_reel(reel_id)
+        if index < 0 or index >= len(reel.clip_ids):
+            raise ValueError(f"Index {index} out of range for reel with {len(reel.clip_ids)} clips")
+        if len(reel.clip_ids) == 1:
+            raise ValueError("Cannot remove the only clip in a reel, delete the reel instead")
+
+        new_clip_ids = list(reel.clip_ids[:index]) + list(reel.clip_ids[index + 1:])
+        logger.info(f"Removing clip {reel.clip_ids[index]} at index {index} from reel {reel_id}")
+        return self._splice(reel, index, new_clip_ids)
+
+    def discard_fragment(self, clip_id: str):
+        """Drop the cached fragmented and re-encoded copies of a clip (e.g. after the clip is deleted)"""
+        with self._clip_locks(clip_id):
+            info = self.fragment_cache.pop(clip_id, None)
+            if info is not None and os.path.exists(info.path):
+                os.unlink(info.path)
+            if self.output_store:
+                self.output_store.forget("fragment", clip_id)
+            self.clip_formats.pop(clip_id, None)
+            for cache_key in [key for key in self.normalized_cache if key[0] == clip_id]:
+                path = self.normalized_cache.pop(cache_key)
+                if os.path.exists(path):
+                    os.unlink(path)
+                if self.output_store:
+                    self.output_store.forget("normalized", f"{clip_id}_{cache_key[1]}")
+        self._clip_locks.discard(clip_id)
+
+    def cached_path(self, reel_id: str) -> Optional[str]:
+        """
+        Path of a reel whose file is on disk (None if it has to be rebuilt first).
+
+        Raises:
+            KeyError: If the reel does not exist
+        """
+        reel = self.get_reel(reel_id)
+        return reel.output_path if self._outputs.resident(reel_id, [reel.output_path]) else None
+
+    @profiled
+    def ensure_rendered(self, reel_id: str) -> str:
+        """
+        Get the file path for a reel, rebuilding it from its clips if the
+        file was evicted.
+
+        Raises:
+            KeyError: If the reel does not exist
+            FileNotFoundError: If a clip can no longer be re-rendered
+            RuntimeError: If FFmpeg operation fails
+        """
+        reel = self.get_reel(reel_id)
+        self._outputs.ensure(reel_id, [reel.output_path], lambda: self._rerender(reel))
+        return reel.output_path
+
+    def _rerender(self, reel: ReelRecord):
+        """Rebuild an evicted reel from its clips"""
+        logger.info(f"Re-rendering evicted reel {reel.reel_id}")
+        start_time = time.time()
+        with collect_usage() as usage:
+            layout = self._write_reel_file(reel.output_path, reel.clip_ids, reel.profile, reel.transition,
+                                           reel.intro_id, reel.outro_id)
+        if layout is not None:
+            self.layouts[reel.reel_id] = layout
+        reel.resource_usage.add(usage)
+        reel.filesize_bytes = os.path.getsize(reel.output_path)
+        self._register_output(reel)
+
+        logger.info(f"Reel {reel.reel_id} re-rendered in {(time.time() - start_time) * 1000:.0f}ms")
+
+    def source_files(self, reel: ReelRecord) -> List[str]:
+        """Files a reel is rebuilt from: its clips' camera files and its bumpers' uploads"""
+        sources = set()
+        for clip_id in reel.clip_ids:
+            sources.update(self.clip_service.get_clip(clip_id).camera_files.values())
+        for bumper_id in (reel.intro_id, reel.outro_id):
+            if bumper_id:
+                bumper = self.bumpers.bumpers.get(bumper_id) if self.bumpers else None
+                # A bumper that is gone cannot be re-joined: its missing source keeps the reel from eviction
+                sources.add(bumper.source_path if bumper else os.path.join(self.output_dir, f"{bumper_id}.missing"))
+        return sorted(sources)
+
+    def _register_output(self, reel: ReelRecord):
+        """Track the reel file in the output store"""
+        if self.output_store:
+            self.output_store.register("reel", reel.reel_id, reel.output_path, sources=self.source_files(reel))
+
+    def _splice(self, reel: ReelRecord, index: int, new_clip_ids: List[str]) -> ReelRecord:
+        """Rewrite the reel from the part at index, keeping the bytes before it"""
+        with collect_usage() as usage:
+            if self.output_store:
+                with self.output_store.hold("reel", reel.reel_id):
+                    reel = self._splice_file(reel, index, new_clip_ids)
+            else:
+                reel = self._splice_file(reel, index, new_clip_ids)
+        reel.resource_usage.add(usage)
+        return reel
+
+    def _splice_file(self, reel: ReelRecord, index: int, new_clip_ids: List[str]) -> ReelRecord:
+        """
+        Write the changed reel next to the old file and move it over the old
+        one once complete: a download running meanwhile keeps reading the old
+        file, and a failure leaves the reel as it was.
+        """
+        start_time = time.time()
+        layout = self.layouts.get(reel.reel_id)
+        profile = reel.profile
+        if profile is None:
+            # A stream-copied reel keeps the format of its first clip once other formats join it
+            profile = self._conform_target(new_clip_ids, keep=reel.clip_ids[0])
+        if profile is None and layout is not None and os.path.exists(reel.output_path):
+            try:
+                # Fragment and check the tail before touching the file
+                for clip_id in new_clip_ids[index:]:
+                    self._check_compatible(layout, clip_id)
+            except ValueError as e:
+                logger.info(f"{e}, rebuilding reel {reel.reel_id} with concat")
+                layout = None
+
+        tmp_path = f"{reel.output_path}.tmp.mp4"
+        try:
+            if (profile is not None or reel.transition is not None or reel.intro_id or reel.outro_id
+                    or layout is None or not os.path.exists(reel.output_path)):
+                # Reel was loaded from metadata, built elsewhere, mixes formats or has transitions or
+                # bumpers - rebuild (cached clips, re-encodes and bumpers are re-joined, only new clips
+                # and transitions are encoded)
+                layout = self._write_reel_file(tmp_path, new_clip_ids, profile, reel.transition,
+                                               reel.intro_id, reel.outro_id)
+                rewritten = len(new_clip_ids)
+            else:
+                layout = ReelLayout(init_size=layout.init_size, timescale=layout.timescale,
+                                    sample_description=layout.sample_description, parts=layout.parts[:index])
+                with open(tmp_path, "wb") as f:
+                    copy_prefix(reel.output_path, f, layout.end_offset)
+                    kept_s = sum(self.clip_service.get_clip(cid).duration_s for cid in new_clip_ids[:index])
+                    self._append_parts(layout, f, new_clip_ids[index:], kept_s)
+                rewritten = len(new_clip_ids) - index
+            os.replace(tmp_path, reel.output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+        processing_time_ms = (time.time() - start_time) * 1000
+
+        reel.clip_ids = tuple(new_clip_ids)
+        reel.profile = profile
+        reel.filesize_bytes = os.path.getsize(reel.output_path)
+        reel.duration_s = sum(self.clip_service.get_clip(cid).duration_s for cid in new_clip_ids)
+        reel.duration_s += self._added_duration(len(new_clip_ids), reel.transition, reel.intro_id, reel.outro_id)
+        if layout is not None:
+            self.layouts[reel.reel_id] = layout
+        else:
+            self.layouts.pop(reel.reel_id, None)
+        self._register_output(reel)
+
+        logger.info(f"Reel {reel.reel_id} updated: clips={len(new_clip_ids)}, "
+                   f"rewritten={rewritten}, size={reel.filesize_bytes:,} bytes, "
                    f"processing_time={processing_time_ms:.0f}ms")
 
         return reel
 
-    def get_reel(self, reel_id: str) -> Reel:
+    def _get_fragment(self, clip_id: str) -> FragmentInfo:
+        """Get (or create) the fragmented copy of a clip"""
+        with self._clip_locks(clip_id):
+            info = self.fragment_cache.get(clip_id)
+            if info is not None and os.path.exists(info.path):
+                metrics.record_cache("reel_fragment", hit=True)
+                if self.output_store:
+                    self.output_store.touch("fragment", clip_id)
+                return info
+
+            metrics.record_cache("reel_fragment", hit=False)
+            job = current_job()
+            if job:
+                job.add_work(self.clip_service.get_clip(clip_id).duration_s)
+            clip_path = self.clip_service.ensure_rendered(clip_id)
+            fragment_path = str(self.fragments_dir / f"{clip_id}.mp4")
+            result = self.ffmpeg.fragment_video(clip_path, fragment_path)
+            if not result.success:
+                raise RuntimeError(f"Failed to fragment clip {clip_id}: {result.stderr}")
+
+            info = inspect_fragmented(fragment_path)
+            self.fragment_cache[clip_id] = info
+            if self.output_store:
+                clip = self.clip_service.get_clip(clip_id)
+                self.output_store.register("fragment", clip_id, fragment_path,
+                                           sources=list(clip.camera_files.values()))
+            return info
+
+    def _clip_format(self, clip_id: str) -> EncodeProfile:
+        """Stream format of a clip (probed once from the clip's own file, which outlives its session)"""
+        fmt = self.clip_formats.get(clip_id)
+        if fmt is None:
+            clip_path = self.clip_service.ensure_rendered(clip_id)
+            fmt = EncodeProfile.from_metadata(self.ffmpeg.probe_cached(clip_path))
+            self.clip_formats[clip_id] = fmt
+        return fmt
+
+    def _conform_target(self, clip_ids: List[str], keep: Optional[str] = None) -> Optional[EncodeProfile]:
+        """
+        Format to conform a reel to when its clips do not share one.
+
+        Each clip's format is probed once and cached, so only the first reel
+        using a clip pays for the probe.
+
+        Args:
+            keep: Clip whose format wins (an existing reel's); default: the
+                format covering most of the reel's duration, so the least is re-encoded
+
+        Returns:
+            None when every clip has the same format (plain stream-copy)
+        """
+        clips = [self.clip_service.get_clip(clip_id) for clip_id in clip_ids]
+        if keep is not None:
+            clips.append(self.clip_service.get_clip(keep))
+
+        durations: Dict[Tuple, float] = {}
+        formats: Dict[Tuple, EncodeProfile] = {}
+        for clip in clips:
+            fmt = self._clip_format(clip.clip_id)
+            durations[fmt.stream_key] = durations.get(fmt.stream_key, 0.0) + clip.duration_s
+            formats.setdefault(fmt.stream_key, fmt)
+        if len(formats) == 1:
+            return None
+
+        target = self._clip_format(keep) if keep is not None else formats[max(durations, key=durations.get)]
+        logger.info(f"Clips span {len(formats)} stream formats, conforming to "
+                   f"{target.width}x{target.height} {target.codec} {target.fps:.6g}fps")
+        return target
+
+    def _conformed_paths(self, clip_ids: List[str], profile: EncodeProfile) -> List[str]:
+        """
+        Files to join for a reel in the given format: clips already in it are
+        used as-is (stream-copy), the others are re-encoded once, all missing
+        ones in one parallel batch, and cached per format.
+        """
+        with ExitStack() as stack:
+            # Clips in sorted order, so reels sharing clips cannot deadlock
+            for clip_id in sorted(set(clip_ids)):
+                stack.enter_context(self._clip_locks(clip_id))
+
+            jobs = []
+            missing = []
+            for clip_id in dict.fromkeys(clip_ids):
+                if self._clip_format(clip_id).stream_key == profile.stream_key:
+                    continue
+                path = self.normalized_cache.get((clip_id, profile.key))
+                cached = path is not None and os.path.exists(path)
+                metrics.record_cache("reel_normalized", hit=cached)
+                if cached:
+                    if self.output_store:
+                        self.output_store.touch("normalized", f"{clip_id}_{profile.key}")
+                    continue
+                path = str(self.normalized_dir / f"{clip_id}_{profile.key}.mp4")
+                jobs.append((self.clip_service.ensure_rendered(clip_id), path))
+                missing.append(clip_id)
+
+            if jobs:
+                self.encoder.encode_files(jobs, profile)
+                for clip_id, (_, path) in zip(missing, jobs):
+                    self.normalized_cache[(clip_id, profile.key)] = path
+                    if self.output_store:
+                        clip = self.clip_service.get_clip(clip_id)
+                        self.output_store.register("normalized", f"{clip_id}_{profile.key}", path,
+                                                   sources=list(clip.camera_files.values()))
+
+        return [self.clip_service.ensure_rendered(clip_id)
+                if self._clip_format(clip_id).stream_key == profile.stream_key
+                else self.normalized_cache[(clip_id, profile.key)]
+                for clip_id in clip_ids]
+
+    @tracing.traced("reel.write_file")
+    def _write_reel_file(self, output_path: str, clip_ids: List[str], profile: Optional[EncodeProfile] = None,
+                         transition: Optional[Transition] = None, intro_id: Optional[str] = None,
+                         outro_id: Optional[str] = None) -> Optional[ReelLayout]:
+        """
+        Write a complete reel file. Reels whose clips share one stream are
+        fragmented and their layout is returned; reels with a profile, or
+        whose clips' encoder parameters differ, are a concat-demuxer join
+        (which carries each file's parameter sets in-band) with no layout.
+        Reels with transitions or bumpers are joined by the TransitionJoiner,
+        with no layout; bumpers are conformed to the format of the clips' files.
+        """
+        if (transition is not None and len(clip_ids) > 1) or intro_id or outro_id:
+            paths = (self._conformed_paths(clip_ids, profile) if profile is not None
+                     else [self.clip_service.ensure_rendered(clip_id) for clip_id in clip_ids])
+            metadata = self.ffmpeg.probe_cached(paths[0])
+            intro = self.bumpers.conform(intro_id, metadata) if intro_id else None
+            outro = self.bumpers.conform(outro_id, metadata) if outro_id else None
+            self.transitions.join(paths, output_path, transition, intro=intro, outro=outro)
+            return None
+
+        if profile is not None:
+            self._join(output_path, clip_ids, self._conformed_paths(clip_ids, profile))
+            return None
+
+        first = self._get_fragment(clip_ids[0])
+        layout = ReelLayout(
+            init_size=first.init_size,
+            timescale=first.timescale,
+            sample_description=first.sample_description
+        )
+        try:
+            for clip_id in clip_ids:
+                self._check_compatible(layout, clip_id)
+        except ValueError as e:
+            logger.info(f"{e}, joining with concat")
+            self._join(output_path, clip_ids, [self.clip_service.ensure_rendered(cid) for cid in clip_ids])
+            return None
+
+        with open(output_path, "wb") as f:
+            copy_init(self._get_fragment(clip_ids[0]), f)
+            self._append_parts(layout, f, clip_ids)
+
+        return layout
+
+    def _check_bumpers(self, intro_id: Optional[str], outro_id: Optional[str]):
+        """
+        Raises:
+            ValueError: If a bumper is requested but does not exist
+        """
+        for bumper_id in (intro_id, outro_id):
+            if not bumper_id:
+                continue
+            if self.bumpers is None:
+                raise ValueError("No bumper library configured")
+            try:
+                self.bumpers.get(bumper_id)
+            except KeyError:
+                raise ValueError(f"Bumper {bumper_id} not found")
+
+    def delete_bumper(self, bumper_id: str):
+        """
+        Delete a bumper from the library, unless a reel still uses it.
+
+        Raises:
+            KeyError: If the bumper does not exist
+            ValueError: If a reel uses it as intro or outro
+        """
+        users = [reel.reel_id for reel in list(self.reels_db.values()) if bumper_id in (reel.intro_id, reel.outro_id)]
+        if users:
+            raise ValueError(f"Bumper {bumper_id} is used by {len(users)} reel(s): {', '.join(sorted(users))}")
+        if self.bumpers is None:
+            raise KeyError(f"Bumper {bumper_id} not found")
+        self.bumpers.delete(bumper_id)
+
+    def delete_clip(self, clip_id: str):
+        """
+        Delete a clip and its fragmented and re-encoded copies, unless a reel still uses it.
+
+        Raises:
+            KeyError: If the clip does not exist
+            ValueError: If a reel includes it
+        """
+        users = [reel.reel_id for reel in list(self.reels_db.values()) if clip_id in reel.clip_ids]
+        if users:
+            raise ValueError(f"Clip {clip_id} is used by {len(users)} reel(s): {', '.join(sorted(users))}")
+        self.clip_service.delete_clip(clip_id)
+        self.discard_fragment(clip_id)
+
+    def _added_duration(self, num_clips: int, transition: Optional[Transition], intro_id: Optional[str],
+                        outro_id: Optional[str]) -> float:
+        """Seconds transitions and bumpers add to the clips' total (crossfades overlap, so subtract)"""
+        added = -transition.overlap_s * (num_clips - 1) if transition is not None else 0.0
+        for bumper_id in (intro_id, outro_id):
+            if bumper_id and self.bumpers is not None and bumper_id in self.bumpers.bumpers:
+                added += self.bumpers.get(bumper_id).duration_s
+        return added
+
+    def _join(self, output_path: str, clip_ids: List[str], paths: List[str]):
+        """Stream-copy concat of the files making up a reel"""
+        total_s = sum(self.clip_service.get_clip(clip_id).duration_s for clip_id in clip_ids)
+        job = current_job()
+        if len(paths) > 1:
+            if job:
+                job.add_work(total_s)
+            result = self.ffmpeg.concat_segments(paths, output_path)
+        else:
+            # A single file is copied without ffmpeg, so report the copy here
+            progress = ScanProgress(job, total_s, every_s=0.0)
+            result = self.ffmpeg.concat_segments(paths, output_path)
+            progress.finish()
+        if not result.success:
+            raise RuntimeError(f"Failed to join reel clips: {result.stderr}")
+
+    def _check_compatible(self, layout: ReelLayout, clip_id: str) -> FragmentInfo:
+        """Ensure a clip can be stream-copied into the reel"""
+        info = self._get_fragment(clip_id)
+        if info.timescale != layout.timescale or info.sample_description != layout.sample_description:
+            raise ValueError(f"Clip {clip_id} stream parameters do not match the reel, "
+                             f"cannot stream-copy")
+        return info
+
+    def _append_parts(self, layout: ReelLayout, f: BinaryIO, clip_ids: List[str], kept_s: float = 0.0):
+        """
+        Append clips' fragments, reporting the copy as job progress (cached
+        fragments cost no ffmpeg work, so this is all a fully cached reel does).
+
+        Args:
+            kept_s: Seconds of reel already copied into f (a splice's kept prefix), reported as done
+        """
+        durations = [self.clip_service.get_clip(clip_id).duration_s for clip_id in clip_ids]
+        progress = ScanProgress(current_job(), kept_s + sum(durations), every_s=0.0)
+        copied_s = kept_s
+        progress.update(copied_s)
+        for clip_id, duration_s in zip(clip_ids, durations):
+            self._append_part(layout, f, clip_id)
+            copied_s += duration_s
+            progress.update(copied_s)
+        progress.finish()
+
+    def _append_part(self, layout: ReelLayout, f: BinaryIO, clip_id: str):
+        """Append one clip's fragments at the current end of the reel file"""
+        info = self._check_compatible(layout, clip_id)
+
+        part = ReelPart(
+            clip_id=clip_id,
+            byte_offset=layout.end_offset,
+            byte_size=0,
+            tick_offset=layout.end_ticks,
+            ticks=info.duration_ticks,
+            first_sequence=layout.next_sequence,
+            num_fragments=info.num_fragments
+        )
+        f.seek(part.byte_offset)
+        part.byte_size = copy_fragments(info, f, part.tick_offset, part.first_sequence)
+        layout.parts.append(part)
+
+    def get_reel(self, reel_id: str) -> ReelRecord:
         """Retrieve reel by ID"""
         if reel_id not in self.reels_db:
             raise KeyError(f"Reel {reel_id} not found")
@@ -106,6 +684,7 @@ class ReelService:
         reel = self.get_reel(reel_id)
         return reel.output_path
 
+    @_per_reel
     def delete_reel(self, reel_id: str):
         """Delete a reel and its file"""
         reel = self.get_reel(reel_id)
@@ -117,25 +696,19 @@ class ReelService:
 
         # Remove from memory
         del self.reels_db[reel_id]
+        self.layouts.pop(reel_id, None)
+        self._outputs.discard(reel_id)
+        if self.output_store:
+            self.output_store.forget("reel", reel_id)
         logger.info(f"Deleted reel: {reel_id}")
 
-    def list_reels(self) -> List[Reel]:
+    def list_reels(self) -> List[ReelRecord]:
         """List all reels"""
         return list(self.reels_db.values())
 
     def save_metadata(self, metadata_path: str):
         """Save reel metadata to JSON file"""
-        data = {
-            reel_id: {
-                "reel_id": reel.reel_id,
-                "clip_ids": reel.clip_ids,
-                "output_path": reel.output_path,
-                "filesize_bytes": reel.filesize_bytes,
-                "duration_s": reel.duration_s,
-                "created_at": reel.created_at.isoformat()
-            }
-            for reel_id, reel in self.reels_db.items()
-        }
+        data = {reel_id: reel.to_dict() for reel_id, reel in self.reels_db.items()}
 
         with open(metadata_path, 'w') as f:
             json.dump(data, f, indent=2)
@@ -143,7 +716,7 @@ class ReelService:
         logger.info(f"Saved metadata for {len(data)} reels to {metadata_path}")
 
     def load_metadata(self, metadata_path: str):
-        """Load reel metadata from JSON file"""
+        """Load reel metadata from JSON file (after the clips' metadata, so reels register their sources)"""
         if not os.path.exists(metadata_path):
             logger.warning(f"Metadata file not found: {metadata_path}")
             return
@@ -152,7 +725,14 @@ class ReelService:
             data = json.load(f)
 
         for reel_id, reel_data in data.items():
-            reel = Reel(**reel_data)
+            reel = ReelRecord.from_dict(reel_data)
             self.reels_db[reel_id] = reel
+            if self.output_store and os.path.exists(reel.output_path):
+                try:
+                    sources = self.source_files(reel)
+                except KeyError:
+                    # Clips not loaded: the reel cannot be rebuilt, so its missing source keeps it from eviction
+                    sources = [os.path.join(self.output_dir, f"{reel_id}.missing")]
+                self.output_store.register("reel", reel_id, reel.output_path, sources=sources)
 
         logger.info(f"Loaded metadata for {len(data)} reels from {metadata_path}")
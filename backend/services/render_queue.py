@@ -0,0 +1,77 @@
+"""
+Render queue - runs blocking clip/reel renders off the event loop with a
+bounded number of concurrent jobs.
+"""
+
+import asyncio
+import contextvars
+import time
+from typing import Callable, Optional, TypeVar
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+from services import metrics
+from services.job_progress import ProgressTracker
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class RenderQueue:
+    """Bounded concurrency for render jobs, with queue depth and wait time metrics"""
+
+    def __init__(self, max_concurrent: int, progress: Optional[ProgressTracker] = None):
+        self.max_concurrent = max_concurrent
+        self.progress = progress
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+        self.running = 0
+
+    async def run(self, job: str, fn: Callable[..., T], *args, job_id: Optional[str] = None, **kwargs) -> T:
+        """
+        Wait for a free slot, then run fn(*args, **kwargs) in a worker thread.
+
+        Args:
+            job: Job type label for metrics (e.g. "clip", "reel")
+            job_id: Client-chosen ID to publish progress under (optional)
+        """
+        track = job_id is not None and self.progress is not None
+        if track:
+            self.progress.queued(job_id, job)
+
+        enqueued = time.time()
+        self.waiting += 1
+        metrics.QUEUE_DEPTH.set(self.waiting)
+        try:
+            with tracing.span("render_queue.wait", job=job, **{"queue.depth": self.waiting}):
+                await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+            metrics.QUEUE_DEPTH.set(self.waiting)
+
+        wait_s = time.time() - enqueued
+        metrics.QUEUE_WAIT.observe(wait_s, job=job)
+        if wait_s > 1.0:
+            logger.info(f"Render job {job} waited {wait_s * 1000:.0f}ms for a slot")
+
+        self.running += 1
+        metrics.QUEUE_RUNNING.set(self.running)
+        started = time.time()
+        try:
+            # Carry the caller's context (current span) over to the worker thread
+            context = contextvars.copy_context()
+            if track:
+                return await run_in_threadpool(context.run, self._run_tracked, job_id, job, fn, *args, **kwargs)
+            return await run_in_threadpool(context.run, fn, *args, **kwargs)
+        finally:
+            metrics.JOB_DURATION.observe(time.time() - started, job=job)
+            self.running -= 1
+            metrics.QUEUE_RUNNING.set(self.running)
+            self._slots.release()
+
+    def _run_tracked(self, job_id: str, job: str, fn: Callable[..., T], *args, **kwargs) -> T:
+        with self.progress.running(job_id, job):
+            return fn(*args, **kwargs)
@@ -0,0 +1,136 @@
+"""
+Resource accounting for ffmpeg/ffprobe children - CPU, peak memory and
+block I/O from wait4(), aggregated per operation, clip, reel and session.
+"""
+
+import contextvars
+import os
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+_collectors: contextvars.ContextVar[Tuple["ResourceUsage", ...]] = contextvars.ContextVar("usage_collectors",
+                                                                                          default=())
+
+
+class ResourceUsage:
+    """
+    Resource usage of one or more child processes.
+    CPU and block counts add up; max_rss_kb is the peak of any single child.
+    """
+    __slots__ = ("processes", "cpu_user_s", "cpu_system_s", "max_rss_kb", "read_blocks", "write_blocks")
+
+    def __init__(self, processes: int = 0, cpu_user_s: float = 0.0, cpu_system_s: float = 0.0,
+                 max_rss_kb: int = 0, read_blocks: int = 0, write_blocks: int = 0):
+        self.processes = processes
+        self.cpu_user_s = cpu_user_s
+        self.cpu_system_s = cpu_system_s
+        self.max_rss_kb = max_rss_kb
+        self.read_blocks = read_blocks
+        self.write_blocks = write_blocks
+
+    @property
+    def cpu_s(self) -> float:
+        return self.cpu_user_s + self.cpu_system_s
+
+    def add(self, other: "ResourceUsage") -> "ResourceUsage":
+        """Accumulate other into this usage in place"""
+        self.processes += other.processes
+        self.cpu_user_s += other.cpu_user_s
+        self.cpu_system_s += other.cpu_system_s
+        self.max_rss_kb = max(self.max_rss_kb, other.max_rss_kb)
+        self.read_blocks += other.read_blocks
+        self.write_blocks += other.write_blocks
+        return self
+
+    def to_dict(self) -> Dict:
+        return {
+            "processes": self.processes,
+            "cpu_user_s": round(self.cpu_user_s, 6),
+            "cpu_system_s": round(self.cpu_system_s, 6),
+            "max_rss_kb": self.max_rss_kb,
+            "read_blocks": self.read_blocks,
+            "write_blocks": self.write_blocks,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "ResourceUsage":
+        data = data or {}
+        return cls(
+            processes=int(data.get("processes", 0)),
+            cpu_user_s=float(data.get("cpu_user_s", 0.0)),
+            cpu_system_s=float(data.get("cpu_system_s", 0.0)),
+            max_rss_kb=int(data.get("max_rss_kb", 0)),
+            read_blocks=int(data.get("read_blocks", 0)),
+            write_blocks=int(data.get("write_blocks", 0))
+        )
+
+    def span_attributes(self) -> Dict:
+        return {
+            "process.cpu.user_s": round(self.cpu_user_s, 6),
+            "process.cpu.system_s": round(self.cpu_system_s, 6),
+            "process.max_rss_kb": self.max_rss_kb,
+            "process.io.read_blocks": self.read_blocks,
+            "process.io.write_blocks": self.write_blocks,
+        }
+
+    def __repr__(self) -> str:
+        return (f"ResourceUsage(processes={self.processes}, cpu={self.cpu_s:.3f}s, "
+                f"max_rss={self.max_rss_kb}KB, blocks={self.read_blocks}/{self.write_blocks})")
+
+
+def wait_with_rusage(proc: subprocess.Popen) -> Tuple[int, ResourceUsage]:
+    """
+    Reap a child and return (exit code, its resource usage).
+    Needs os.wait4 (POSIX); elsewhere the usage only counts the process.
+    """
+    if hasattr(os, "wait4"):
+        try:
+            _, status, ru = os.wait4(proc.pid, 0)
+        except ChildProcessError:
+            pass  # Already reaped by someone else
+        else:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            usage = ResourceUsage(
+                processes=1,
+                cpu_user_s=ru.ru_utime,
+                cpu_system_s=ru.ru_stime,
+                max_rss_kb=ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss,
+                read_blocks=ru.ru_inblock,
+                write_blocks=ru.ru_oublock
+            )
+            report(usage)
+            return proc.returncode, usage
+
+    usage = ResourceUsage(processes=1)
+    report(usage)
+    return proc.wait(), usage
+
+
+@contextmanager
+def collect_usage() -> Iterator[ResourceUsage]:
+    """
+    Accumulate the usage of every child reaped in this context (this thread,
+    or worker threads started with a copy of it) into the yielded total.
+    Collectors nest, so a reel total includes the clip re-renders it triggers.
+    """
+    usage = ResourceUsage()
+    token = _collectors.set(_collectors.get() + (usage,))
+    try:
+        yield usage
+    finally:
+        _collectors.reset(token)
+
+
+_report_lock = threading.Lock()
+
+
+def report(usage: ResourceUsage):
+    """Add a child's usage to every active collector"""
+    collectors = _collectors.get()
+    if collectors:
+        with _report_lock:
+            for total in collectors:
+                total.add(usage)
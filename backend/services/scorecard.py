@@ -0,0 +1,404 @@
+"""
+Scorecard overlay service - score bar burned into a window of a clip.
+
+Each distinct scoreboard state is drawn once into a PNG asset (libass
+text over a translucent bar, rendered by ffmpeg) and reused for every clip
+that shows it. The asset is composited with ffmpeg's overlay filter, and
+only the keyframe-aligned stretch of the clip around the visible window is
+re-encoded; before and after it the clip is stream-copied and the three
+parts are joined with a stream-copy concat.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+import threading
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from services.ffmpeg_service import FFmpegService
+from services.clip_service import ClipService
+from services.packet_activity import PacketActivity
+from services.reel_encoder import EncodeProfile
+from services.output_store import OutputStore, Rerenderer
+from services.job_progress import current_job
+from services import metrics
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+EVENT_TYPES = ("goal_a", "goal_b", "switch", "highlight")
+POSITIONS = ("top", "bottom")
+BAR_HEIGHT_RATIO = 80 / 1080  # Bar height relative to the video height
+BAR_COLOR = "black@0.8"
+SCORE_FONT_RATIO = 0.4  # Font sizes relative to the bar height
+EVENT_FONT_RATIO = 0.25
+
+ASS_TEMPLATE = """[Script Info]
+ScriptType: v4.00+
+PlayResX: {width}
+PlayResY: {height}
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, \
+Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, \
+MarginV, Encoding
+Style: Score,{font},{score_size},&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,1,0,0,0,100,100,0,0,1,2,0,{score_align},\
+0,0,{margin},1
+Style: Event,{font},{event_size},&H0000FFFF,&H0000FFFF,&H00000000,&H00000000,1,0,0,0,100,100,0,0,1,1,0,2,0,0,{margin},1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+
+def _ass_text(text: str) -> str:
+    """Plain text for an ASS dialogue line (no override blocks or escapes)"""
+    return " ".join(text.replace("{", "(").replace("}", ")").replace("\\", "/").split())
+
+
+def _filter_path(path: str) -> str:
+    """Quote a file path for use as a filter option value"""
+    return "'" + path.replace("\\", "/").replace("'", "'\\''").replace(":", "\\:") + "'"
+
+
+@dataclass(frozen=True)
+class ScorecardState:
+    """What the scoreboard shows; one PNG asset is rendered per state and size"""
+    team_a_score: int
+    team_b_score: int
+    event_type: Optional[str] = None  # One of EVENT_TYPES, shown below the score
+    clock: Optional[str] = None  # Match time, e.g. "50:24"
+    team_a: str = "TEAM A"
+    team_b: str = "TEAM B"
+
+    def validate(self):
+        """
+        Raises:
+            ValueError: If any field is out of range
+        """
+        if self.event_type is not None and self.event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown event type '{self.event_type}' (expected one of: {', '.join(EVENT_TYPES)})")
+        if min(self.team_a_score, self.team_b_score) < 0:
+            raise ValueError("Scores cannot be negative")
+        if not _ass_text(self.team_a) or not _ass_text(self.team_b):
+            raise ValueError("Team names cannot be empty")
+
+    @property
+    def key(self) -> str:
+        """Stable identifier of the state, used to cache its asset"""
+        encoded = json.dumps(asdict(self), sort_keys=True).encode("utf-8")
+        return hashlib.sha1(encoded).hexdigest()[:16]
+
+    @property
+    def score_text(self) -> str:
+        score = f"{_ass_text(self.team_a)} {self.team_a_score} - {self.team_b_score} {_ass_text(self.team_b)}"
+        return f"{_ass_text(self.clock)} | {score}" if self.clock else score
+
+    @property
+    def event_text(self) -> Optional[str]:
+        return self.event_type.replace("_", " ").upper() if self.event_type else None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class ScorecardRender:
+    """A clip with the scoreboard shown over part of it"""
+    overlay_id: str
+    clip_id: str
+    state: ScorecardState
+    start_s: float
+    end_s: float
+    position: str
+    output_path: str
+    duration_s: float = 0.0
+    encoded_s: float = 0.0  # Re-encoded around the window
+    copied_s: float = 0.0  # Stream-copied before and after it
+    filesize_bytes: int = 0
+    processing_time_ms: float = 0.0
+    created_at: datetime = field(default_factory=datetime.now)
+
+
+class ScorecardService:
+    """Cached scoreboard assets, composited over keyframe-aligned windows of clips"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        ffmpeg_service: FFmpegService,
+        clip_service: ClipService,
+        packet_activity: PacketActivity,
+        output_store: Optional[OutputStore] = None,
+        font: str = "DejaVu Sans",
+        preset: str = "veryfast",
+        crf: int = 20
+    ):
+        """
+        Args:
+            output_dir: Rendered clips go here, assets under assets/
+            packet_activity: Source of keyframe positions (demux only)
+            font: Font family for the scoreboard text (resolved by fontconfig)
+            preset: x264 preset for the re-encoded window
+            crf: x264 CRF for the re-encoded window (kept low so it matches the copied parts)
+        """
+        self.output_dir = Path(output_dir)
+        self.asset_dir = self.output_dir / "assets"
+        self.asset_dir.mkdir(parents=True, exist_ok=True)
+        self.ffmpeg = ffmpeg_service
+        self.clip_service = clip_service
+        self.packet_activity = packet_activity
+        self.output_store = output_store
+        self.font = font
+        self.preset = preset
+        self.crf = crf
+        self.renders: Dict[str, ScorecardRender] = {}
+        self.render_cache: Dict[Tuple, str] = {}  # (clip_id, state key, window, position) -> overlay_id
+        self._outputs = Rerenderer("scorecard", output_store)  # Per-render re-render of evicted files
+        self._asset_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+    def asset(self, state: ScorecardState, width: int, height: int) -> str:
+        """
+        PNG of the scoreboard bar for a video of this size, rendered on first use.
+
+        Raises:
+            RuntimeError: If FFmpeg operation fails
+        """
+        bar_height = max(16, int(round(height * BAR_HEIGHT_RATIO / 2)) * 2)
+        path = self.asset_dir / f"{state.key}_{width}x{bar_height}.png"
+        with self._asset_lock:
+            hit = path.exists()
+            metrics.record_cache("scorecard_asset", hit=hit)
+            if hit:
+                return str(path)
+
+            event_text = state.event_text
+            margin = max(1, bar_height // 16)
+            script = ASS_TEMPLATE.format(
+                width=width, height=bar_height, font=self.font, margin=margin,
+                score_size=max(8, int(bar_height * SCORE_FONT_RATIO)),
+                event_size=max(6, int(bar_height * EVENT_FONT_RATIO)),
+                score_align=8 if event_text else 5
+            )
+            script += f"Dialogue: 0,0:00:00.00,0:00:01.00,Score,,0,0,0,,{state.score_text}\n"
+            if event_text:
+                script += f"Dialogue: 0,0:00:00.00,0:00:01.00,Event,,0,0,0,,{event_text}\n"
+
+            script_path = path.with_suffix(".ass")
+            script_path.write_text(script, encoding="utf-8")
+            try:
+                result = self.ffmpeg.render_image(
+                    f"color=c={BAR_COLOR}:s={width}x{bar_height},format=rgba",
+                    f"ass={_filter_path(str(script_path))}:alpha=1",
+                    str(path)
+                )
+            finally:
+                script_path.unlink(missing_ok=True)
+            if not result.success:
+                raise RuntimeError(f"Failed to render scorecard asset: {result.stderr}")
+
+        logger.info(f"Rendered scorecard asset {path.name}: {state.score_text}")
+        return str(path)
+
+    def create(
+        self,
+        clip_id: str,
+        state: ScorecardState,
+        start_s: float = 0.0,
+        end_s: Optional[float] = None,
+        position: str = "top"
+    ) -> ScorecardRender:
+        """
+        Show the scoreboard over start_s-end_s of a clip (default: all of it).
+
+        The same clip, state, window and position returns the existing render.
+
+        Args:
+            clip_id: Clip to overlay
+            state: Scores, event and clock to show
+            start_s: Window start, in seconds from the start of the clip
+            end_s: Window end (default: end of the clip)
+            position: "top" or "bottom" of the frame
+
+        Returns:
+            ScorecardRender with the output path
+
+        Raises:
+            KeyError: If the clip does not exist
+            ValueError: If the state, window or position is invalid
+            RuntimeError: If FFmpeg operation fails
+        """
+        state.validate()
+        if position not in POSITIONS:
+            raise ValueError(f"Unknown position '{position}' (expected one of: {', '.join(POSITIONS)})")
+        clip = self.clip_service.get_clip(clip_id)
+        end_s = clip.duration_s if end_s is None else min(end_s, clip.duration_s)
+        if start_s < 0 or start_s >= end_s:
+            raise ValueError(f"Invalid window {start_s:.2f}s-{end_s:.2f}s for a {clip.duration_s:.2f}s clip")
+
+        cache_key = (clip_id, state.key, round(start_s, 3), round(end_s, 3), position)
+        with self._lock:
+            overlay_id = self.render_cache.get(cache_key)
+        metrics.record_cache("scorecard", hit=overlay_id is not None)
+        if overlay_id is not None:
+            return self.renders[overlay_id]
+
+        overlay_id = f"score_{uuid.uuid4().hex[:12]}"
+        render = ScorecardRender(
+            overlay_id=overlay_id,
+            clip_id=clip_id,
+            state=state,
+            start_s=start_s,
+            end_s=end_s,
+            position=position,
+            output_path=str(self.output_dir / f"{overlay_id}.mp4")
+        )
+        self._render(render)
+        with self._lock:
+            self.renders[overlay_id] = render
+            self.render_cache[cache_key] = overlay_id
+        return render
+
+    @tracing.traced("scorecard.render")
+    def _render(self, render: ScorecardRender):
+        start_time = time.time()
+        source_path = self.clip_service.ensure_rendered(render.clip_id)
+        metadata = self.ffmpeg.probe_cached(source_path)
+        profile = EncodeProfile.from_metadata(metadata)
+        asset_path = self.asset(render.state, metadata.width, metadata.height)
+
+        window_start_s, window_end_s, duration_s, head_frames = self._window(source_path, render.start_s, render.end_s)
+        head = window_start_s > 0
+        tail = window_end_s is not None
+        encoded_s = (window_end_s if tail else duration_s) - window_start_s
+        tracing.current_span().set_attributes({"scorecard.encoded_s": encoded_s, "scorecard.duration_s": duration_s})
+        job = current_job()
+        if job:
+            job.add_work(duration_s * 2 if head or tail else duration_s)
+
+        base = str(self.output_dir / render.overlay_id)
+        parts: List[str] = []
+        try:
+            if head:
+                parts.append(f"{base}.head.mp4")
+                self._check(self.ffmpeg.copy_range(source_path, parts[-1], max_frames=head_frames),
+                            render, "copy the start of")
+
+            parts.append(f"{base}.window.mp4" if head or tail else render.output_path)
+            self._check(self.ffmpeg.overlay_image(
+                source_path, asset_path, parts[-1],
+                x="(W-w)/2", y="0" if render.position == "top" else "H-h",
+                enable=(render.start_s - window_start_s, render.end_s - window_start_s),
+                start_s=window_start_s, duration_s=encoded_s if tail else None,
+                preset=self.preset, crf=self.crf, gop_frames=profile.gop_frames,
+                codec=profile.encoder, pix_fmt=profile.pix_fmt, codec_profile=profile.codec_profile
+            ), render, "overlay")
+
+            if tail:
+                parts.append(f"{base}.tail.mp4")
+                self._check(self.ffmpeg.copy_range(source_path, parts[-1], start_s=window_end_s),
+                            render, "copy the end of")
+
+            if len(parts) > 1:
+                self._check(self.ffmpeg.concat_segments(parts, render.output_path), render, "join")
+        finally:
+            for part in parts:
+                if part != render.output_path and os.path.exists(part):
+                    os.unlink(part)
+
+        render.duration_s = duration_s
+        render.encoded_s = encoded_s
+        render.copied_s = max(0.0, duration_s - encoded_s)
+        render.filesize_bytes = os.path.getsize(render.output_path)
+        render.processing_time_ms = (time.time() - start_time) * 1000
+        if self.output_store:
+            # The clip file itself can be evicted; register the camera files it is rendered from
+            clip = self.clip_service.get_clip(render.clip_id)
+            self.output_store.register("scorecard", render.overlay_id, render.output_path,
+                                       sources=list(clip.camera_files.values()))
+
+        logger.info(f"Scorecard {render.overlay_id} on clip {render.clip_id}: "
+                   f"encoded={encoded_s:.2f}s of {duration_s:.2f}s, size={render.filesize_bytes:,} bytes, "
+                   f"processing_time={render.processing_time_ms:.0f}ms")
+
+    def _window(self, path: str, start_s: float, end_s: float) -> Tuple[float, Optional[float], float, int]:
+        """
+        Widen start_s-end_s to the surrounding keyframes of a file.
+
+        Returns:
+            (keyframe at or before start_s, keyframe at or after end_s or None for the end
+            of the file, file duration, packets before the first keyframe), times in seconds
+            from the start of the file
+        """
+        index = self.packet_activity.index(path)
+        keyframes = index.keyframes_s()
+        epsilon = index.frame_s / 2
+
+        window_start_s = max([k for k in keyframes if k <= start_s + epsilon], default=0.0)
+        later = [k for k in keyframes if k >= end_s - epsilon and k < index.duration_s - epsilon]
+        window_end_s = min(later) if later else None
+        head_frames = int((index.pts_s < index.start_s + window_start_s - epsilon).sum())
+        return window_start_s, window_end_s, index.duration_s, head_frames
+
+    @staticmethod
+    def _check(result, render: ScorecardRender, action: str):
+        if not result.success:
+            raise RuntimeError(f"Failed to {action} clip {render.clip_id}: {result.stderr}")
+
+    def get_render(self, overlay_id: str) -> ScorecardRender:
+        """Retrieve render by ID"""
+        if overlay_id not in self.renders:
+            raise KeyError(f"Scorecard {overlay_id} not found")
+        return self.renders[overlay_id]
+
+    def cached_path(self, overlay_id: str) -> Optional[str]:
+        """
+        Path of a render whose file is on disk (None if it has to be re-rendered first).
+
+        Raises:
+            KeyError: If the render does not exist
+        """
+        render = self.get_render(overlay_id)
+        return render.output_path if self._outputs.resident(overlay_id, [render.output_path]) else None
+
+    def ensure_rendered(self, overlay_id: str) -> str:
+        """
+        Path of a render, re-rendering it if its file was evicted.
+
+        Raises:
+            KeyError: If the render (or its clip) does not exist
+            RuntimeError: If FFmpeg operation fails
+        """
+        render = self.get_render(overlay_id)
+
+        def rerender():
+            logger.info(f"Re-rendering evicted scorecard {overlay_id}")
+            self._render(render)
+
+        self._outputs.ensure(overlay_id, [render.output_path], rerender)
+        return render.output_path
+
+    def delete_render(self, overlay_id: str):
+        """Delete a render and its file"""
+        render = self.get_render(overlay_id)
+        if os.path.exists(render.output_path):
+            os.unlink(render.output_path)
+        if self.output_store:
+            self.output_store.forget("scorecard", overlay_id)
+        with self._lock:
+            del self.renders[overlay_id]
+            self.render_cache = {key: value for key, value in self.render_cache.items() if value != overlay_id}
+        self._outputs.discard(overlay_id)
+        logger.info(f"Deleted scorecard: {overlay_id}")
+
+    def discard_clip(self, clip_id: str):
+        """Delete every render of a clip (when the clip itself is deleted)"""
+        for overlay_id in [r.overlay_id for r in list(self.renders.values()) if r.clip_id == clip_id]:
+            self.delete_render(overlay_id)
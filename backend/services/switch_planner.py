@@ -0,0 +1,235 @@
+"""
+Camera switch planner - proposes which camera to show for each part of an
+event window, from the motion energy of every camera.
+
+Each camera is decoded as small grayscale frames over an ffmpeg rawvideo
+pipe (or, with method="packets", only demuxed and scored by compressed
+packet size); energy is averaged per interval, normalized per camera (a
+zoomed camera moves more pixels for the same action) and a Viterbi pass
+with a switch penalty picks the camera path. Shots shorter than a minimum
+length are merged into a neighbour. The result is a segment list that
+ClipService.create_clip renders directly.
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from services.ffmpeg_service import FFmpegService
+from services.motion import MotionEnergy
+from services.packet_activity import PacketActivity
+from services.sync_service import SyncService
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+PLAN_FRAME_SIZE = (96, 54)
+PLAN_FPS = 10.0
+NOISE_FLOOR = 3  # Gray levels of frame-to-frame change ignored as compression noise
+METHODS = ("motion", "packets")
+
+
+@dataclass
+class SwitchPlan:
+    """Proposed camera path over [start_s, end_s] on the session timeline"""
+    start_s: float
+    end_s: float
+    interval_s: float
+    segments: List[Tuple[str, float, float]]  # (camera_id, start_s, end_s)
+    energy: Dict[str, List[Optional[float]]] = field(default_factory=dict)  # Normalized, per interval
+    processing_time_ms: float = 0.0
+
+
+def best_path(energy: np.ndarray, switch_penalty: float) -> np.ndarray:
+    """
+    Camera index per interval maximizing total energy minus switch_penalty per switch.
+
+    Args:
+        energy: (intervals, cameras) scores; -inf where a camera cannot be used
+    """
+    intervals, cameras = energy.shape
+    score = energy[0].copy()
+    back = np.zeros((intervals, cameras), dtype=np.int64)
+    for t in range(1, intervals):
+        leader = int(np.argmax(score))
+        switch_score = score[leader] - switch_penalty
+        stay = score >= switch_score
+        back[t] = np.where(stay, np.arange(cameras), leader)
+        score = np.where(stay, score, switch_score) + energy[t]
+
+    path = np.empty(intervals, dtype=np.int64)
+    path[-1] = int(np.argmax(score))
+    for t in range(intervals - 1, 0, -1):
+        path[t - 1] = back[t, path[t]]
+    return path
+
+
+def merge_short_shots(path: np.ndarray, energy: np.ndarray, min_intervals: int) -> np.ndarray:
+    """Give shots shorter than min_intervals to whichever neighbouring camera scores better over them"""
+    path = path.copy()
+    while True:
+        starts = np.flatnonzero(np.diff(path, prepend=-1))
+        if len(starts) < 2:
+            return path
+        ends = np.append(starts[1:], len(path))
+        lengths = ends - starts
+        shortest = int(np.argmin(lengths))
+        if lengths[shortest] >= min_intervals:
+            return path
+        start, end = starts[shortest], ends[shortest]
+        neighbours = []
+        if shortest > 0:
+            neighbours.append(path[start - 1])
+        if shortest < len(starts) - 1:
+            neighbours.append(path[end])
+        path[start:end] = max(neighbours, key=lambda camera: energy[start:end, camera].sum())
+
+
+class SwitchPlanner:
+    """Motion-energy based camera switch proposals"""
+
+    def __init__(self, ffmpeg_service: FFmpegService, sync_service: Optional[SyncService] = None,
+                 packet_activity: Optional[PacketActivity] = None, max_workers: int = 4):
+        """
+        Args:
+            sync_service: When set, windows are on the reference camera's timeline (as in create_clip)
+            packet_activity: Packet index source for method="packets" (a private one by default)
+            max_workers: Cameras decoded in parallel
+        """
+        self.ffmpeg = ffmpeg_service
+        self.sync = sync_service
+        self.packets = packet_activity or PacketActivity(ffmpeg_service)
+        self.max_workers = max_workers
+
+    @tracing.traced("switch_plan.create")
+    def plan(
+        self,
+        camera_files: Dict[str, str],
+        start_s: float,
+        end_s: float,
+        cameras: Optional[List[str]] = None,
+        interval_s: float = 1.0,
+        min_shot_s: float = 3.0,
+        switch_penalty: float = 1.0,
+        method: str = "motion"
+    ) -> SwitchPlan:
+        """
+        Propose a camera per part of the window.
+
+        Args:
+            camera_files: Mapping of camera IDs to their file paths
+            start_s, end_s: Event window on the session timeline
+            cameras: Cameras to choose from (default: all)
+            interval_s: Decision granularity
+            min_shot_s: Shortest shot the plan may contain
+            switch_penalty: Cost of a cut, in units of a camera's typical per-interval motion
+            method: "motion" (decoded frame differences) or "packets" (compressed packet sizes,
+                no decoding; coarser but far cheaper)
+
+        Returns:
+            SwitchPlan whose segments can be passed to create_clip
+
+        Raises:
+            ValueError: If the window or camera list is invalid
+            RuntimeError: If decoding fails
+        """
+        start_time = time.time()
+        cameras = sorted(cameras or camera_files)
+        unknown = [camera_id for camera_id in cameras if camera_id not in camera_files]
+        if unknown:
+            raise ValueError(f"Camera {unknown[0]} not found in session")
+        if end_s <= start_s:
+            raise ValueError(f"Invalid window: end_s ({end_s}) must be > start_s ({start_s})")
+        if interval_s <= 0:
+            raise ValueError("interval_s must be positive")
+        if method not in METHODS:
+            raise ValueError(f"Unknown method '{method}' (expected one of: {', '.join(METHODS)})")
+
+        offsets = self.sync.analyze(camera_files).offsets() if self.sync else {}
+        n_intervals = int(np.ceil((end_s - start_s) / interval_s - 1e-9))
+
+        # Decoders run with a copy of this context so their spans and usage land on the request
+        context = contextvars.copy_context()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(cameras))) as pool:
+            energy_fn = self._interval_energy if method == "motion" else self.packets.interval_activity
+            futures = [pool.submit(context.copy().run, energy_fn, camera_files[camera_id], start_s,
+                                   end_s, interval_s, offsets.get(camera_id, 0.0))
+                       for camera_id in cameras]
+            per_camera = [future.result() for future in futures]
+        energy = np.stack(per_camera, axis=1)  # (intervals, cameras), NaN where not recording
+
+        normalized = self._normalize(energy)
+        usable = np.where(np.isnan(normalized), -np.inf, normalized)
+        if not np.isfinite(usable).any(axis=1).all():
+            raise ValueError("No camera has footage for part of the window")
+
+        path = best_path(usable, switch_penalty)
+        path = merge_short_shots(path, usable, max(1, int(round(min_shot_s / interval_s))))
+
+        segments = []
+        starts = np.flatnonzero(np.diff(path, prepend=-1))
+        ends = np.append(starts[1:], n_intervals)
+        for first, last in zip(starts, ends):
+            segments.append((cameras[path[first]], round(float(start_s + first * interval_s), 3),
+                             round(float(min(start_s + last * interval_s, end_s)), 3)))
+
+        plan = SwitchPlan(
+            start_s=start_s,
+            end_s=end_s,
+            interval_s=interval_s,
+            segments=segments,
+            energy={camera_id: [None if np.isnan(v) else round(float(v), 3) for v in normalized[:, i]]
+                    for i, camera_id in enumerate(cameras)},
+            processing_time_ms=(time.time() - start_time) * 1000
+        )
+        tracing.current_span().set_attributes({"switch_plan.method": method,
+                                                "switch_plan.intervals": n_intervals,
+                                                "switch_plan.segments": len(segments)})
+        logger.info(f"Switch plan {start_s:.1f}s-{end_s:.1f}s: " +
+                    ", ".join(f"{c} {s:.1f}-{e:.1f}" for c, s, e in segments) +
+                    f" ({plan.processing_time_ms:.0f}ms)")
+        return plan
+
+    def _interval_energy(self, path: str, start_s: float, end_s: float, interval_s: float,
+                         offset_s: float) -> np.ndarray:
+        """Mean motion energy per interval of the window (NaN where the camera has no footage)"""
+        n_intervals = int(np.ceil((end_s - start_s) / interval_s - 1e-9))
+        source_start = max(start_s + offset_s, 0.0)
+        source_end = end_s + offset_s
+        if source_end <= source_start:
+            return np.full(n_intervals, np.nan)
+
+        width, height = PLAN_FRAME_SIZE
+        motion = MotionEnergy(width, height, noise_floor=NOISE_FLOOR)
+        result = self.ffmpeg.decode_gray_frames(path, motion.add, width=width, height=height, fps=PLAN_FPS,
+                                                start_s=source_start, duration_s=source_end - source_start)
+        if not result.success:
+            raise RuntimeError(f"Failed to decode {path}: {result.stderr}")
+
+        frame_energy = motion.result()
+        # Energy i measures the change into frame i + 1; place it at that frame's timeline time
+        timeline = source_start - offset_s + (np.arange(len(frame_energy)) + 1) / PLAN_FPS
+        bins = np.floor((timeline - start_s) / interval_s).astype(np.int64)
+        inside = (bins >= 0) & (bins < n_intervals)
+        sums = np.bincount(bins[inside], weights=frame_energy[inside], minlength=n_intervals)
+        counts = np.bincount(bins[inside], minlength=n_intervals)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    @staticmethod
+    def _normalize(energy: np.ndarray) -> np.ndarray:
+        """Scale each camera by its median interval energy so framing doesn't decide the winner"""
+        normalized = energy.copy()
+        for i in range(energy.shape[1]):
+            column = energy[:, i]
+            valid = column[~np.isnan(column)]
+            scale = np.median(valid) if len(valid) else 0.0
+            if scale <= 0:
+                scale = valid.mean() if len(valid) and valid.mean() > 0 else 1.0
+            normalized[:, i] = column / scale
+        return normalized
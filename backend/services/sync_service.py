@@ -0,0 +1,367 @@
+"""
+Multi-camera sync - estimates per-camera time offsets so a time on the
+shared (reference camera) timeline maps to the same moment in every file.
+
+Offsets come from FFT cross-correlation of downsampled audio envelopes,
+since every camera hears the same whistles and crowd. When a camera has
+no usable audio, frame-difference activity is correlated instead.
+Per-file signals are cached on disk keyed by file identity, so repeated
+analysis of the same files only redoes the (cheap) correlation.
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from services.ffmpeg_service import FFmpegService
+from services import file_identity
+from services.motion import MotionEnergy
+from services import metrics
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_CAMERA = "C1"
+
+AUDIO_SAMPLE_RATE = 8000
+ENVELOPE_RATE_HZ = 100  # One RMS value per 10ms of audio
+ACTIVITY_RATE_HZ = 10.0  # Frame-difference samples per second
+ACTIVITY_SIZE = (64, 36)
+DETREND_WINDOW_S = 5.0
+
+# Bump when signal extraction changes so stale cache files are ignored
+SIGNALS_VERSION = 1
+
+
+@dataclass
+class CameraOffset:
+    """Sync estimate for one camera: source time = timeline time + offset_s"""
+    camera_id: str
+    offset_s: float
+    method: str  # reference, audio, video or none (no reliable estimate, offset 0)
+    confidence: float  # Correlation margin of the chosen lag over competing lags, 0-1
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class SyncResult:
+    """Offsets of all cameras of a session relative to the reference camera"""
+    reference_camera: str
+    cameras: Dict[str, CameraOffset]
+
+    def offset(self, camera_id: str) -> float:
+        camera = self.cameras.get(camera_id)
+        return camera.offset_s if camera else 0.0
+
+    def offsets(self) -> Dict[str, float]:
+        return {camera_id: camera.offset_s for camera_id, camera in self.cameras.items()}
+
+    def to_dict(self) -> Dict:
+        return {
+            "reference_camera": self.reference_camera,
+            "cameras": [camera.to_dict() for camera in self.cameras.values()],
+        }
+
+
+def _standardize(signal: np.ndarray) -> np.ndarray:
+    signal = signal.astype(np.float64) - signal.mean()
+    std = signal.std()
+    return signal / std if std > 0 else signal
+
+
+def cross_correlate(reference: np.ndarray, other: np.ndarray, rate_hz: float, max_lag_s: float,
+                    min_overlap: float = 0.5) -> Tuple[float, float]:
+    """
+    Find the lag of `other` against `reference` by FFT cross-correlation.
+
+    Args:
+        reference, other: Signals sampled at rate_hz
+        max_lag_s: Only lags within +/- this are considered
+        min_overlap: Lags where the signals overlap less than this fraction of the shorter one are ignored
+
+    Returns:
+        (lag_s, confidence): the moment at reference time t appears in `other` at
+        t + lag_s; confidence is how far the overlap-normalized correlation at that
+        lag stands above any lag more than a second away (0-1)
+    """
+    if len(reference) < 2 or len(other) < 2:
+        return 0.0, 0.0
+    ref = _standardize(reference)
+    oth = _standardize(other)
+
+    # corr[k] = sum_n ref[n] * oth[n + k]; negative lags wrap to the end
+    n_fft = 1 << (len(ref) + len(oth) - 1).bit_length()
+    corr = np.fft.irfft(np.conj(np.fft.rfft(ref, n_fft)) * np.fft.rfft(oth, n_fft), n_fft)
+
+    max_lag = int(max_lag_s * rate_hz)
+    lags = np.arange(-min(max_lag, len(ref) - 1), min(max_lag, len(oth) - 1) + 1)
+    overlap = np.minimum(len(ref), len(oth) - lags) - np.maximum(0, -lags)
+    valid = overlap >= min_overlap * min(len(ref), len(oth))
+    if not valid.any():
+        return 0.0, 0.0
+    normalized = np.where(valid, corr[lags % n_fft] / np.maximum(overlap, 1), -np.inf)
+
+    best = int(np.argmax(normalized))
+    # Periodic content (repeated chants, a looping scoreboard) gives several near-equal peaks;
+    # confidence is the margin over the best lag more than a second away
+    rivals = normalized[np.abs(lags - lags[best]) > rate_hz]
+    rival = float(rivals.max()) if len(rivals) and np.isfinite(rivals.max()) else 0.0
+    confidence = float(np.clip(normalized[best] - max(rival, 0.0), 0.0, 1.0))
+
+    lag = float(lags[best])
+    if 0 < best < len(lags) - 1 and np.isfinite(normalized[best - 1]) and np.isfinite(normalized[best + 1]):
+        # Parabolic interpolation between neighbouring lags for sub-sample precision
+        y0, y1, y2 = normalized[best - 1], normalized[best], normalized[best + 1]
+        denominator = y0 - 2 * y1 + y2
+        if denominator != 0:
+            lag += 0.5 * (y0 - y2) / denominator
+    return float(lag) / rate_hz, confidence
+
+
+def detrend(signal: np.ndarray, window: int) -> np.ndarray:
+    """
+    Subtract a centered moving average, so slow level changes (crowd build-up,
+    auto gain, light drifting) don't dominate the correlation over short events.
+    """
+    signal = signal.astype(np.float64)
+    cumulative = np.concatenate([[0.0], np.cumsum(signal)])
+    index = np.arange(len(signal))
+    lo = np.maximum(index - window // 2, 0)
+    hi = np.minimum(index + window // 2 + 1, len(signal))
+    return signal - (cumulative[hi] - cumulative[lo]) / (hi - lo)
+
+
+class _EnvelopeBuilder:
+    """RMS envelope of a streamed s16le PCM signal"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.pending = np.empty(0, dtype=np.float32)
+        self.parts: List[np.ndarray] = []
+
+    def add(self, chunk: bytes):
+        samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32) / 32768.0
+        if len(self.pending):
+            samples = np.concatenate([self.pending, samples])
+        usable = len(samples) - len(samples) % self.window
+        if usable:
+            windows = samples[:usable].reshape(-1, self.window)
+            self.parts.append(np.sqrt(np.mean(windows * windows, axis=1)))
+        self.pending = samples[usable:]
+
+    def result(self) -> np.ndarray:
+        return np.concatenate(self.parts) if self.parts else np.empty(0, dtype=np.float32)
+
+
+class SyncService:
+    """Estimates and caches camera sync offsets"""
+
+    def __init__(
+        self,
+        cache_dir: str,
+        ffmpeg_service: FFmpegService,
+        analysis_window_s: float = 900.0,
+        max_offset_s: float = 15.0,
+        min_confidence: float = 0.2,
+        max_workers: int = 4
+    ):
+        """
+        Args:
+            cache_dir: Directory for per-file signal caches
+            analysis_window_s: Only the first this-many seconds of each file are analyzed
+            max_offset_s: Largest start-time difference between cameras that is searched for
+            min_confidence: Audio estimates below this fall back to video; video estimates below it
+                give offset 0
+            max_workers: Files decoded in parallel
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ffmpeg = ffmpeg_service
+        self.analysis_window_s = analysis_window_s
+        self.max_offset_s = max_offset_s
+        self.min_confidence = min_confidence
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sync")
+        self._signals: Dict[Tuple[str, str], Future] = {}  # (file key, kind) -> Future[np.ndarray]
+        self._results: Dict[Tuple, SyncResult] = {}  # Camera file keys -> result
+        self._lock = threading.Lock()
+
+    # --- per-file signals ----------------------------------------------------
+
+    def _file_key(self, path: str) -> str:
+        """Identity of a file's contents and the signal settings as far as the cache is concerned"""
+        return file_identity.file_key(path, SIGNALS_VERSION, f"{self.analysis_window_s:g}")
+
+    def _cache_path(self, file_key: str, kind: str) -> Path:
+        return self.cache_dir / f"{file_key}.{kind}.npy"
+
+    def _signal(self, path: str, kind: str) -> Future:
+        """Future of a file's audio envelope or video activity (empty array if it has none)"""
+        key = (self._file_key(path), kind)
+        with self._lock:
+            future = self._signals.get(key)
+            submitted = future is None
+            if submitted:
+                future = self._pool.submit(self._load_signal, path, key[0], kind)
+                self._signals[key] = future
+        if submitted:
+            # Outside the lock: the callback runs right here if the decode has already finished
+            future.add_done_callback(lambda done: self._drop_failed(key, done))
+        return future
+
+    def _drop_failed(self, key: Tuple[str, str], future: Future):
+        """Forget a failed decode so the next request retries it instead of re-raising its error"""
+        if future.exception() is not None:
+            with self._lock:
+                if self._signals.get(key) is future:
+                    del self._signals[key]
+
+    def _load_signal(self, path: str, file_key: str, kind: str) -> np.ndarray:
+        """
+        Decode (or load the cached) signal; a file without the stream gives an
+        empty signal, which is cached like any other.
+
+        Raises:
+            RuntimeError: If the stream exists but cannot be decoded, or the file cannot be probed
+        """
+        cache_path = self._cache_path(file_key, kind)
+        if cache_path.exists():
+            try:
+                signal = np.load(cache_path)
+                metrics.record_cache("sync_signal", hit=True)
+                return signal
+            except (OSError, ValueError):
+                logger.warning(f"Discarding unreadable sync cache {cache_path}")
+        metrics.record_cache("sync_signal", hit=False)
+
+        with tracing.span(f"sync.{kind}_signal", **{"sync.file": os.path.basename(path)}):
+            if kind == "audio":
+                builder = _EnvelopeBuilder(AUDIO_SAMPLE_RATE // ENVELOPE_RATE_HZ)
+                result = self.ffmpeg.decode_audio(path, builder.add, sample_rate=AUDIO_SAMPLE_RATE,
+                                                  chunk_samples=AUDIO_SAMPLE_RATE,
+                                                  duration_s=self.analysis_window_s)
+            else:
+                width, height = ACTIVITY_SIZE
+                builder = MotionEnergy(width, height)
+                result = self.ffmpeg.decode_gray_frames(path, builder.add, width=width, height=height,
+                                                        fps=ACTIVITY_RATE_HZ, duration_s=self.analysis_window_s)
+        if result.success:
+            signal = builder.result()
+        else:
+            reason = (result.stderr.strip().splitlines() or ["unknown error"])[-1]
+            if self.ffmpeg.has_stream(path, "a:0" if kind == "audio" else "v:0"):
+                # Not cached: the caller drops the failed decode and the next request retries it
+                raise RuntimeError(f"Failed to decode {kind} of {path}: {reason}")
+            logger.info(f"No {kind} signal for {path}: {reason}")
+            signal = np.empty(0, dtype=np.float32)
+
+        tmp_path = cache_path.with_suffix(".tmp.npy")
+        np.save(tmp_path, signal)
+        os.replace(tmp_path, cache_path)
+        return signal
+
+    # --- offsets -------------------------------------------------------------
+
+    def _result_key(self, camera_files: Dict[str, str]) -> Tuple:
+        return tuple(sorted((camera_id, self._file_key(path)) for camera_id, path in camera_files.items()))
+
+    def schedule(self, camera_files: Dict[str, str]):
+        """Start decoding audio envelopes in the background (call at ingest)"""
+        for path in camera_files.values():
+            self._signal(path, "audio")
+
+    def cached(self, camera_files: Dict[str, str]) -> Optional[SyncResult]:
+        """Offsets already analyzed for these files (None if not yet; never starts an analysis)"""
+        key = self._result_key(camera_files)
+        with self._lock:
+            return self._results.get(key)
+
+    def analyze(self, camera_files: Dict[str, str]) -> SyncResult:
+        """
+        Offsets of every camera relative to the reference camera (C1 if present).
+        Waits for any signal decode still running; results are cached.
+        """
+        key = self._result_key(camera_files)
+        with self._lock:
+            cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
+        reference = REFERENCE_CAMERA if REFERENCE_CAMERA in camera_files else sorted(camera_files)[0]
+        with tracing.span("sync.analyze", **{"sync.cameras": len(camera_files)}):
+            self.schedule(camera_files)
+            cameras = {reference: CameraOffset(reference, 0.0, "reference", 1.0)}
+            failed = False
+            for camera_id in sorted(camera_files):
+                if camera_id == reference:
+                    continue
+                try:
+                    cameras[camera_id] = self._estimate(camera_id, camera_files[reference], camera_files[camera_id])
+                except Exception as e:
+                    # The failed decode is not cached, so the next analysis retries it
+                    logger.warning(f"Sync signal for camera {camera_id} failed ({e}); assuming offset 0")
+                    metrics.SYNC_ESTIMATES.inc(method="none")
+                    cameras[camera_id] = CameraOffset(camera_id, 0.0, "none", 0.0)
+                    failed = True
+
+        result = SyncResult(reference_camera=reference, cameras=cameras)
+        if not failed:
+            with self._lock:
+                self._results[key] = result
+        logger.info("Camera sync: " + ", ".join(
+            f"{c.camera_id} {c.offset_s:+.3f}s ({c.method}, {c.confidence:.2f})" for c in cameras.values()))
+        return result
+
+    def _estimate(self, camera_id: str, reference_path: str, path: str) -> CameraOffset:
+        ref_audio = self._signal(reference_path, "audio").result()
+        audio = self._signal(path, "audio").result()
+        best = CameraOffset(camera_id, 0.0, "none", 0.0)
+        if len(ref_audio) and len(audio):
+            window = int(DETREND_WINDOW_S * ENVELOPE_RATE_HZ)
+            lag_s, confidence = cross_correlate(detrend(ref_audio, window), detrend(audio, window),
+                                                ENVELOPE_RATE_HZ, self.max_offset_s)
+            if confidence >= self.min_confidence:
+                metrics.SYNC_ESTIMATES.inc(method="audio")
+                return CameraOffset(camera_id, round(lag_s, 3), "audio", round(confidence, 3))
+            best.confidence = round(confidence, 3)
+
+        ref_activity = self._signal(reference_path, "video").result()
+        activity = self._signal(path, "video").result()
+        if len(ref_activity) and len(activity):
+            window = int(DETREND_WINDOW_S * ACTIVITY_RATE_HZ)
+            lag_s, confidence = cross_correlate(detrend(ref_activity, window), detrend(activity, window),
+                                                ACTIVITY_RATE_HZ, self.max_offset_s)
+            if confidence >= self.min_confidence:
+                metrics.SYNC_ESTIMATES.inc(method="video")
+                return CameraOffset(camera_id, round(lag_s, 3), "video", round(confidence, 3))
+
+        logger.warning(f"No reliable sync estimate for camera {camera_id}; assuming offset 0")
+        metrics.SYNC_ESTIMATES.inc(method="none")
+        return best
+
+    def forget(self, camera_files: Dict[str, str]):
+        """Drop cached signals and results for files about to be deleted"""
+        keys = set()
+        for path in camera_files.values():
+            try:
+                keys.add(self._file_key(path))
+            except OSError:
+                continue
+        with self._lock:
+            for signal_key in [k for k in self._signals if k[0] in keys]:
+                del self._signals[signal_key]
+            for result_key in [k for k in self._results if any(file_key in keys for _, file_key in k)]:
+                del self._results[result_key]
+        for file_key in keys:
+            for kind in ("audio", "video"):
+                try:
+                    self._cache_path(file_key, kind).unlink()
+                except FileNotFoundError:
+                    pass
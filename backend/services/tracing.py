@@ -0,0 +1,235 @@
+"""
+Lightweight request tracing - OpenTelemetry-shaped spans exported as JSON
+lines to the console or a file, without the OpenTelemetry SDK.
+
+Spans nest through a context variable, so a span opened in an endpoint is
+the parent of spans opened by services on the render worker thread. Each
+exported line matches the JSON written by OpenTelemetry's
+ConsoleSpanExporter, and incoming W3C `traceparent` headers are honoured.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, Optional, TextIO, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _format_ns(ns: int) -> str:
+    return datetime.fromtimestamp(ns / 1e9, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class Span:
+    """A timed operation with attributes, parented to the span that was current when it started"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns",
+                 "attributes", "status", "status_message")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = "UNSET"
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def set_status(self, code: str, description: str = ""):
+        """code is "OK" or "ERROR" (spans end as OK unless set otherwise)"""
+        self.status = code
+        self.status_message = description
+
+    def record_exception(self, exc: BaseException):
+        self.set_status("ERROR", f"{type(exc).__name__}: {exc}")
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def to_dict(self, resource: Dict[str, Any]) -> Dict:
+        status = {"status_code": self.status}
+        if self.status_message:
+            status["description"] = self.status_message
+        return {
+            "name": self.name,
+            "context": {
+                "trace_id": f"0x{self.trace_id}",
+                "span_id": f"0x{self.span_id}",
+                "trace_state": "[]",
+            },
+            "kind": "SpanKind.INTERNAL",
+            "parent_id": f"0x{self.parent_id}" if self.parent_id else None,
+            "start_time": _format_ns(self.start_ns),
+            "end_time": _format_ns(self.end_ns or self.start_ns),
+            "status": status,
+            "attributes": self.attributes,
+            "events": [],
+            "links": [],
+            "resource": {"attributes": resource, "schema_url": ""},
+        }
+
+
+class _NoopSpan:
+    """Stand-in when tracing is disabled, so call sites need no checks"""
+
+    __slots__ = ()
+    duration_ms = 0.0
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def set_status(self, code: str, description: str = ""):
+        pass
+
+    def record_exception(self, exc: BaseException):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Writes finished spans as one JSON document per line"""
+
+    def __init__(self, stream: TextIO, close_stream: bool = False):
+        self.stream = stream
+        self._close_stream = close_stream
+        self._lock = threading.Lock()
+
+    def export(self, span_dict: Dict):
+        line = json.dumps(span_dict, default=str)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def shutdown(self):
+        if self._close_stream:
+            self.stream.close()
+
+
+def console_exporter() -> SpanExporter:
+    return SpanExporter(sys.stdout)
+
+
+def file_exporter(path: str) -> SpanExporter:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return SpanExporter(open(path, "a", buffering=1), close_stream=True)
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporter"""
+
+    def __init__(self, service_name: str = "highlight-backend", exporter: Optional[SpanExporter] = None):
+        self.resource = {"service.name": service_name}
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, remote_parent: Optional[Tuple[str, str]] = None, **attributes) -> Iterator[Span]:
+        """
+        Open a child of the current span (or a new trace).
+
+        Args:
+            name: Span name, e.g. "clip.create" or "ffmpeg.extract"
+            remote_parent: (trace_id, span_id) from an incoming traceparent header
+            **attributes: Initial span attributes
+        """
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        if remote_parent is not None:
+            trace_id, parent_id = remote_parent
+        elif parent is not None:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        else:
+            trace_id, parent_id = os.urandom(16).hex(), None
+
+        span = Span(name, trace_id, parent_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            if span.status == "UNSET":
+                span.status = "OK"
+            try:
+                self.exporter.export(span.to_dict(self.resource))
+            except Exception as e:
+                logger.warning(f"Failed to export span {name}: {e}")
+
+
+# Process-wide tracer, disabled until configure() is called with an exporter
+TRACER = Tracer()
+
+
+def configure(exporter: Optional[SpanExporter], service_name: str = "highlight-backend"):
+    """Install the exporter used by span()/traced() (None disables tracing)"""
+    if TRACER.exporter is not None:
+        TRACER.exporter.shutdown()
+    TRACER.exporter = exporter
+    TRACER.resource = {"service.name": service_name}
+
+
+def span(name: str, **attributes):
+    """Open a span on the process-wide tracer"""
+    return TRACER.span(name, **attributes)
+
+
+def current_span():
+    """The innermost open span, or a no-op span"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def traced(name: str):
+    """Decorator wrapping each call of a function in a span"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str]]:
+    """(trace_id, parent span_id) from a W3C traceparent header"""
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2)
@@ -0,0 +1,95 @@
+"""
+Traffic capture - records API request timing and payload shapes (segments,
+clip_ids, produced IDs) as JSON lines, without any media, so real operator
+sessions can be replayed against synthetic sources (benchmarks/replay.py).
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_VERSION = 1
+
+# (method, route template) -> event kind; other routes are not captured
+ROUTE_KINDS = {
+    ("POST", "/api/v2/upload_cameras"): "upload",
+    ("POST", "/api/v2/clip/create"): "create_clip",
+    ("GET", "/api/v2/clip/{clip_id}/download"): "download_clip",
+    ("DELETE", "/api/v2/clip/{clip_id}"): "delete_clip",
+    ("POST", "/api/v2/reel/create"): "create_reel",
+    ("POST", "/api/v2/reel/{reel_id}/clips"): "insert_reel_clips",
+    ("DELETE", "/api/v2/reel/{reel_id}/clips/{index}"): "remove_reel_clip",
+    ("GET", "/api/v2/reel/{reel_id}/download"): "download_reel",
+    ("DELETE", "/api/v2/reel/{reel_id}"): "delete_reel",
+    ("DELETE", "/api/v2/session/{session_key}"): "delete_session",
+}
+
+_shape: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("traffic_shape", default=None)
+
+
+def bind() -> contextvars.Token:
+    """Start collecting payload shape for the current request"""
+    return _shape.set({})
+
+
+def unbind(token: contextvars.Token) -> Dict:
+    shape = _shape.get() or {}
+    _shape.reset(token)
+    return shape
+
+
+def annotate(**fields):
+    """Attach payload shape fields to the request being captured (no-op when capture is off)"""
+    shape = _shape.get()
+    if shape is not None:
+        shape.update(fields)
+
+
+class TrafficRecorder:
+    """Appends one JSON line per captured request"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.start_time = time.time()
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1)
+        self._write({
+            "type": "capture",
+            "version": CAPTURE_VERSION,
+            "started_at": datetime.now().isoformat(),
+        })
+        logger.info(f"Capturing API traffic to {path}")
+
+    def _write(self, event: Dict):
+        line = json.dumps(event, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def record(self, method: str, route: str, path_params: Dict, status_code: int,
+               started: float, latency_ms: float, shape: Dict):
+        """Record a finished request if its route is one of ROUTE_KINDS"""
+        kind = ROUTE_KINDS.get((method, route))
+        if kind is None:
+            return
+        event = {
+            "type": "request",
+            "t": round(started - self.start_time, 4),
+            "kind": kind,
+            "status": status_code,
+            "latency_ms": round(latency_ms, 3),
+        }
+        event.update(path_params)
+        event.update(shape)
+        self._write(event)
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,299 @@
+"""
+Reel transitions - crossfades and dips to black between clips.
+
+Only a window around each boundary is re-encoded: it runs from the last
+keyframe before the outgoing clip's transition frames to the first keyframe
+after the incoming clip's, so the rest of both clips is stream-copied
+untouched. The windows are encoded in the clips' own stream format (in
+parallel, one ffmpeg filter graph each) and everything is joined with a
+stream-copy concat. A clip too short to keep a copied middle is folded
+whole into the window, which then spans the transitions on both its sides.
+
+The same joiner handles hard cuts (no transition) where stream copy alone
+cannot: a video whose first GOP is edit-list preroll only plays correctly
+as the first file of a concat, so after a bumper or another video its
+frames up to the first shown keyframe are re-encoded instead.
+"""
+
+import os
+import time
+from dataclasses import dataclass, asdict
+from fractions import Fraction
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+
+from services.ffmpeg_service import FFmpegService, FFmpegResult
+from services.packet_activity import PacketIndex
+from services.reel_encoder import ChunkedEncoder, EncodeProfile
+from services.job_progress import current_job
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+TRANSITION_TYPES = ("crossfade", "dip_to_black")
+
+
+@dataclass(frozen=True)
+class Transition:
+    """How consecutive clips of a reel blend into each other"""
+    type: str = "crossfade"  # One of TRANSITION_TYPES
+    duration_s: float = 0.5  # crossfade: overlap of the two clips; dip_to_black: fade out + fade in
+
+    def validate(self):
+        """
+        Raises:
+            ValueError: If the type or duration is invalid
+        """
+        if self.type not in TRANSITION_TYPES:
+            raise ValueError(f"Unknown transition '{self.type}' (expected one of: {', '.join(TRANSITION_TYPES)})")
+        if not 0.1 <= self.duration_s <= 2.0:
+            raise ValueError(f"Transition duration {self.duration_s}s out of range (0.1-2.0)")
+
+    @property
+    def overlap_s(self) -> float:
+        """How much shorter the reel gets per transition"""
+        return self.duration_s if self.type == "crossfade" else 0.0
+
+    def frames(self, fps: float) -> Tuple[int, int]:
+        """
+        Returns:
+            (frames of the outgoing clip taking part, frames of the incoming clip taking part)
+        """
+        if self.type == "crossfade":
+            frames = max(1, int(round(self.duration_s * fps)))
+            return frames, frames
+        half = max(1, int(round(self.duration_s * fps / 2)))
+        return half, half
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional["Transition"]:
+        return cls(**data) if data else None
+
+
+@dataclass
+class WindowPiece:
+    """Frames of one clip inside a re-encoded window"""
+    path: str
+    start_s: float  # A keyframe (or 0), so the encode seeks without decoding extra frames
+    frames: int
+
+
+@dataclass
+class CopyPart:
+    """Stream-copied middle of one clip"""
+    path: str
+    start_s: float  # A keyframe (or 0)
+    frames: Optional[int]  # Packets to copy, including any edit-list preroll (None = to the end)
+    duration_s: float
+
+
+@dataclass
+class TransitionJoin:
+    """Outcome of joining a reel with transitions"""
+    duration_s: float
+    encoded_s: float
+    copied_s: float
+    windows: int
+
+
+class TransitionJoiner:
+    """Joins same-format videos with transitions, re-encoding only around the boundaries"""
+
+    def __init__(self, ffmpeg_service: FFmpegService, encoder: ChunkedEncoder, preset: str = "veryfast",
+                 crf: int = 20):
+        """
+        Args:
+            encoder: Worker pool the windows are encoded on (its packet_activity finds keyframes)
+        """
+        self.ffmpeg = ffmpeg_service
+        self.encoder = encoder
+        self.packet_activity = encoder.packet_activity
+        self.preset = preset
+        self.crf = crf
+
+    @tracing.traced("reel.transitions")
+    def join(self, paths: List[str], output_path: str, transition: Optional[Transition],
+             intro: Optional[str] = None, outro: Optional[str] = None) -> TransitionJoin:
+        """
+        Join videos with a transition at every boundary.
+
+        Args:
+            paths: Videos in reel order, all in one stream format
+            output_path: Output file path
+            transition: Transition used between each pair (None = hard cuts)
+            intro: Video stream-copied before the first one, as-is (e.g. a conformed bumper)
+            outro: Video stream-copied after the last one, as-is
+
+        Raises:
+            ValueError: If a video is too short for its transitions
+            RuntimeError: If a video cannot be demuxed or an FFmpeg operation fails
+        """
+        start_time = time.time()
+        profile = EncodeProfile.from_metadata(self.ffmpeg.probe_cached(paths[0]))
+        out_frames, in_frames = transition.frames(profile.fps) if transition else (0, 0)
+        items = self._plan(paths, out_frames, in_frames, after_intro=intro is not None)
+
+        windows = [item for item in items if isinstance(item, list)]
+        frame_s = 1.0 / profile.fps
+        overlap = out_frames if transition and transition.type == "crossfade" else 0
+        encoded_s = sum(sum(piece.frames for piece in window) - overlap * (len(window) - 1)
+                        for window in windows) * frame_s
+        copied_s = sum(item.duration_s for item in items if isinstance(item, CopyPart))
+        tracing.current_span().set_attributes({"transitions.windows": len(windows),
+                                               "transitions.encoded_s": encoded_s,
+                                               "transitions.copied_s": copied_s})
+        job = current_job()
+        if job:
+            # Windows are encoded, middles copied, then everything is written once more by concat
+            job.add_work((encoded_s + copied_s) * 2)
+
+        base = f"{output_path}.part"
+        parts = [f"{base}{i:03d}.mp4" for i in range(len(items))]
+        try:
+            jobs = [(window, parts[i]) for i, window in enumerate(items) if isinstance(window, list)]
+
+            def encode(window_job: Tuple[List[WindowPiece], str], threads: int) -> FFmpegResult:
+                window, path = window_job
+                return self.ffmpeg.compose_video(
+                    [(piece.path, piece.start_s) for piece in window], path,
+                    self.filter_complex(window, transition, profile, out_frames, in_frames),
+                    frames=sum(piece.frames for piece in window) - overlap * (len(window) - 1),
+                    preset=self.preset, crf=self.crf, gop_frames=profile.gop_frames, threads=threads,
+                    codec=profile.encoder, pix_fmt=profile.pix_fmt, codec_profile=profile.codec_profile
+                )
+
+            for (window, _), result in zip(jobs, self.encoder.run_chunks(jobs, encode)):
+                if not result.success:
+                    raise RuntimeError(f"Failed to encode transition into "
+                                       f"{os.path.basename(window[-1].path)}: {result.stderr}")
+
+            for item, path in zip(items, parts):
+                if isinstance(item, CopyPart):
+                    result = self.ffmpeg.copy_range(item.path, path, start_s=item.start_s, max_frames=item.frames)
+                    if not result.success:
+                        raise RuntimeError(f"Failed to copy {os.path.basename(item.path)}: {result.stderr}")
+
+            head = [intro] if intro else []
+            tail = [outro] if outro else []
+            result = self.ffmpeg.concat_segments(head + parts + tail, output_path)
+            if not result.success:
+                raise RuntimeError(f"Failed to join reel parts: {result.stderr}")
+        finally:
+            for part in parts:
+                if os.path.exists(part):
+                    os.unlink(part)
+
+        joined = TransitionJoin(duration_s=encoded_s + copied_s, encoded_s=encoded_s, copied_s=copied_s,
+                                windows=len(windows))
+        logger.info(f"Joined {len(paths)} videos with {transition.type if transition else 'no'} transitions: "
+                   f"encoded={encoded_s:.2f}s in {len(windows)} windows, copied={copied_s:.2f}s, "
+                   f"duration={(time.time() - start_time) * 1000:.0f}ms")
+        return joined
+
+    def _plan(self, paths: List[str], out_frames: int, in_frames: int, after_intro: bool = False) -> List:
+        """
+        Split the videos into copied middles (CopyPart) and re-encoded windows
+        (lists of WindowPiece, one per video taking part), in output order.
+
+        Args:
+            after_intro: The first video is not the first file of the concat either
+
+        Raises:
+            ValueError: If a video has fewer frames than its transitions need
+        """
+        items: List = []
+        window: List[WindowPiece] = []
+        last = len(paths) - 1
+        for i, path in enumerate(paths):
+            index = self.packet_activity.index(path)
+            need_in = in_frames if i > 0 else 0
+            need_out = out_frames if i < last else 0
+            if not need_in and (i > 0 or after_intro) and self._preroll(index):
+                # Hidden preroll can't be copied mid-concat: re-encode up to the first shown keyframe
+                need_in = 1
+            shown_s = self._shown_s(index)
+            if len(shown_s) < need_in + need_out:
+                raise ValueError(f"{os.path.basename(path)} is too short for its transitions "
+                                 f"({len(shown_s)} frames, needs {need_in + need_out})")
+
+            epsilon = index.frame_s / 2
+            keyframes = index.keyframes_s()
+            copy_start_s = (min([k for k in keyframes if k >= shown_s[need_in] - epsilon], default=None)
+                            if need_in else 0.0)
+            copy_end_s = (max([k for k in keyframes if k <= shown_s[-need_out] + epsilon], default=0.0)
+                          if need_out else None)
+            if copy_start_s is None or (copy_end_s is not None and copy_end_s <= copy_start_s + epsilon):
+                # No keyframe between the transitions: the whole video is re-encoded
+                window.append(WindowPiece(path, 0.0, len(shown_s)))
+                continue
+
+            head_frames = int(np.searchsorted(shown_s, copy_start_s - epsilon))
+            if head_frames:
+                window.append(WindowPiece(path, 0.0, head_frames))
+            if window:
+                items.append(window)
+                window = []
+
+            if copy_end_s is None:
+                frames, end_s = None, index.duration_s
+            else:
+                end_frames = int(np.searchsorted(shown_s, copy_end_s - epsilon))
+                # Packets in decoding order up to the keyframe (closed GOPs), plus any preroll at the start
+                frames = end_frames - head_frames + (0 if copy_start_s > 0 else self._preroll(index))
+                end_s = copy_end_s
+                window.append(WindowPiece(path, copy_end_s, len(shown_s) - end_frames))
+            items.append(CopyPart(path, copy_start_s, frames, end_s - copy_start_s))
+        if window:
+            items.append(window)
+        return items
+
+    @staticmethod
+    def _shown_s(index: PacketIndex) -> np.ndarray:
+        """Presentation times of the frames an edit list leaves visible, from the start of the video"""
+        epsilon = index.frame_s / 2
+        pts_s = np.sort(index.pts_s)
+        return pts_s[pts_s >= index.start_s - epsilon] - index.start_s
+
+    @staticmethod
+    def _preroll(index: PacketIndex) -> int:
+        """Packets an edit list hides before the first shown frame"""
+        return int((index.pts_s < index.start_s - index.frame_s / 2).sum())
+
+    @staticmethod
+    def filter_complex(window: List[WindowPiece], transition: Optional[Transition], profile: EncodeProfile,
+                       out_frames: int, in_frames: int) -> str:
+        """
+        Graph blending the pieces of a window into [v]: each input is cut to its
+        frames, then crossfaded into the next (xfade), or faded out and in
+        around a black frame (fade) and concatenated, or just concatenated
+        (hard cuts).
+        """
+        frame_s = 1.0 / profile.fps
+        fps = Fraction(profile.fps).limit_denominator(1001)
+        chains = []
+        for j, piece in enumerate(window):
+            chain = f"[{j}:v]trim=end_frame={piece.frames},setpts=PTS-STARTPTS,settb=AVTB,fps={fps}"
+            if transition and transition.type == "dip_to_black":
+                if j > 0:
+                    chain += f",fade=t=in:nb_frames={in_frames}"
+                if j < len(window) - 1:
+                    chain += f",fade=t=out:start_frame={piece.frames - out_frames}:nb_frames={out_frames}"
+            chains.append(f"{chain}[p{j}]")
+
+        if not transition or transition.type == "dip_to_black" or len(window) == 1:
+            inputs = "".join(f"[p{j}]" for j in range(len(window)))
+            chains.append(f"{inputs}concat=n={len(window)}:v=1:a=0[v]")
+            return ";".join(chains)
+
+        label, frames = "p0", window[0].frames
+        for j in range(1, len(window)):
+            output = "v" if j == len(window) - 1 else f"x{j}"
+            chains.append(f"[{label}][p{j}]xfade=transition=fade:duration={out_frames * frame_s:.6f}"
+                          f":offset={(frames - out_frames) * frame_s:.6f}[{output}]")
+            label, frames = output, frames + window[j].frames - out_frames
+        return ";".join(chains)
@@ -0,0 +1,101 @@
+import io
+import struct
+
+import pytest
+
+from services.fragmented_mp4 import _iter_boxes, _parse_moof, copy_fragments, copy_prefix, inspect_fragmented
+
+TIMESCALE = 12800
+SAMPLE_DURATION = 512
+
+
+def box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def full_box(box_type: bytes, version: int, flags: int, payload: bytes) -> bytes:
+    return box(box_type, struct.pack(">I", (version << 24) | flags) + payload)
+
+
+def init_segment() -> bytes:
+    mdhd = full_box(b"mdhd", 0, 0, struct.pack(">IIIIHH", 0, 0, TIMESCALE, 0, 0, 0))
+    trex = full_box(b"trex", 0, 0, struct.pack(">IIIII", 1, 1, SAMPLE_DURATION, 0, 0))
+    moov = box(b"moov", box(b"trak", box(b"mdia", mdhd)) + box(b"mvex", trex))
+    return box(b"ftyp", b"isom\x00\x00\x02\x00") + moov
+
+
+def fragment(sequence: int, decode_time: int, samples: int, tfdt_version: int = 1) -> bytes:
+    mfhd = full_box(b"mfhd", 0, 0, struct.pack(">I", sequence))
+    tfhd = full_box(b"tfhd", 0, 0x020000, struct.pack(">I", 1))
+    tfdt = full_box(b"tfdt", tfdt_version, 0,
+                    struct.pack(">Q" if tfdt_version == 1 else ">I", decode_time))
+    trun = full_box(b"trun", 0, 0x001, struct.pack(">Ii", samples, 0))
+    moof = box(b"moof", mfhd + box(b"traf", tfhd + tfdt + trun))
+    return moof + box(b"mdat", bytes([sequence]) * 100)
+
+
+def moofs(data: bytes):
+    """(sequence, decode time) of each moof"""
+    result = []
+    for box_type, offset, size, _ in _iter_boxes(data):
+        if box_type == b"moof":
+            moof = data[offset:offset + size]
+            decode_time, _, _, _ = _parse_moof(moof, SAMPLE_DURATION)
+            mfhd = moof.index(b"mfhd")
+            result.append((struct.unpack(">I", moof[mfhd + 8:mfhd + 12])[0], decode_time))
+    return result
+
+
+@pytest.fixture
+def fragmented(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(init_segment() + fragment(1, 1000, 3) + fragment(2, 1000 + 3 * SAMPLE_DURATION, 3))
+    return str(path)
+
+
+def test_inspect_fragmented(fragmented):
+    info = inspect_fragmented(fragmented)
+    assert info.init_size == len(init_segment())
+    assert info.fragments_offset == info.init_size
+    assert info.num_fragments == 2
+    assert info.timescale == TIMESCALE
+    assert info.first_decode_time == 1000
+    assert info.duration_ticks == 6 * SAMPLE_DURATION
+
+
+def test_inspect_rejects_plain_mp4(tmp_path):
+    path = tmp_path / "plain.mp4"
+    path.write_bytes(box(b"ftyp", b"isom") + box(b"mdat", b"\x00" * 10) + box(b"moov", b""))
+    with pytest.raises(ValueError):
+        inspect_fragmented(str(path))
+
+
+def test_copy_fragments_patches_decode_times_and_sequence(fragmented):
+    info = inspect_fragmented(fragmented)
+    out = io.BytesIO()
+    written = copy_fragments(info, out, base_decode_time=50000, first_sequence=7)
+
+    data = out.getvalue()
+    assert written == len(data) == info.fragments_size
+    assert moofs(data) == [(7, 50000), (8, 50000 + 3 * SAMPLE_DURATION)]
+    with open(fragmented, "rb") as f:
+        original = f.read()
+    # mdat payloads are copied untouched
+    assert data.count(bytes([1]) * 100) == 1 and data.count(bytes([2]) * 100) == 1
+    assert len(data) == len(original) - info.init_size
+
+
+def test_copy_fragments_rejects_32_bit_tfdt_overflow(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(init_segment() + fragment(1, 0, 3, tfdt_version=0))
+    with pytest.raises(ValueError):
+        copy_fragments(inspect_fragmented(str(path)), io.BytesIO(), base_decode_time=2 ** 32, first_sequence=1)
+
+
+def test_copy_prefix(fragmented):
+    out = io.BytesIO()
+    assert copy_prefix(fragmented, out, 20) == 20
+    with open(fragmented, "rb") as f:
+        assert out.getvalue() == f.read(20)
+    with pytest.raises(ValueError):
+        copy_prefix(fragmented, io.BytesIO(), 10 ** 6)
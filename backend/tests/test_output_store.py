@@ -0,0 +1,75 @@
+import os
+
+from services.output_store import OutputStore, Rerenderer
+
+
+def write(path, size=100):
+    with open(path, "wb") as f:
+        f.write(b"\x00" * size)
+    return str(path)
+
+
+def make_store(tmp_path, high=250, low=200):
+    source = write(tmp_path / "camera.mp4", 1)
+    store = OutputStore(str(tmp_path), high_watermark_bytes=high, low_watermark_bytes=low)
+    return store, source
+
+
+def test_evicts_least_recently_used_down_to_low_watermark(tmp_path):
+    store, source = make_store(tmp_path)
+    a, b = write(tmp_path / "a.mp4"), write(tmp_path / "b.mp4")
+    store.register("clip", "a", a, sources=[source])
+    store.register("clip", "b", b, sources=[source])
+    store.entries["clip:a"].last_access = 2.0
+    store.entries["clip:b"].last_access = 1.0
+
+    store.register("clip", "c", write(tmp_path / "c.mp4"), sources=[source])
+
+    assert store.is_evicted("clip", "b") and not os.path.exists(b)
+    assert not store.is_evicted("clip", "a") and os.path.exists(a)
+    assert not store.is_evicted("clip", "c")
+    assert store.used_bytes() == 200
+
+
+def test_pinned_held_and_unrebuildable_outputs_are_kept(tmp_path):
+    store, source = make_store(tmp_path, high=150, low=0)
+    store.register("clip", "pinned", write(tmp_path / "pinned.mp4"), sources=[source])
+    store.set_pinned("clip", "pinned", True)
+    store.register("clip", "orphan", write(tmp_path / "orphan.mp4"), sources=[str(tmp_path / "gone.mp4")])
+    store.register("clip", "held", write(tmp_path / "held.mp4"), sources=[source])
+
+    with store.hold("clip", "held"):
+        assert store.enforce() == []
+    evicted = store.enforce()
+
+    assert [entry.output_id for entry in evicted] == ["held"]
+    assert not store.is_evicted("clip", "pinned")
+    assert not store.is_evicted("clip", "orphan")
+
+
+def test_register_after_rerender_makes_output_resident_again(tmp_path):
+    store, source = make_store(tmp_path, high=50, low=0)
+    a = write(tmp_path / "a.mp4")
+    store.register("clip", "a", a, sources=[source])
+    store.enforce()
+    assert store.is_evicted("clip", "a")
+
+    store.register("clip", "a", write(tmp_path / "a.mp4"))
+    assert not store.is_evicted("clip", "a")
+    assert store.entries["clip:a"].sources == [source]
+
+
+def test_rerenderer_rerenders_only_missing_outputs(tmp_path):
+    outputs = Rerenderer("clip")
+    path = str(tmp_path / "a.mp4")
+    calls = []
+
+    def rerender():
+        calls.append(1)
+        write(path)
+
+    assert not outputs.resident("a", [path])
+    outputs.ensure("a", [path], rerender)
+    outputs.ensure("a", [path], rerender)
+    assert len(calls) == 1
+    assert outputs.resident("a", [path])
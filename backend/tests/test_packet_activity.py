@@ -0,0 +1,44 @@
+import pytest
+
+from services.packet_activity import NOPTS, FramecrcParser
+
+
+def parse(lines):
+    parser = FramecrcParser()
+    for line in lines:
+        parser.add(line)
+    return parser.result()
+
+
+def test_framecrc_parser_orders_packets_by_presentation():
+    index = parse([
+        "#software: Lavf60.3.100",
+        "#tb 0: 1/12800",
+        "#media_type 0: video",
+        "0,       -512,          0,      512,    40000, 0x11111111",
+        "0,          0,       1536,      512,     3000, 0x22222222, F=0x0",
+        "0,        512,        512,      512,     1000, 0x33333333, F=0x0",
+        "0,       1024,       1024,      512,     1100, 0x44444444, F=0x0",
+        f"0,       1536,    {NOPTS},      512,      900, 0x55555555, F=0x0",
+        "0,       2048,       2048,      512,    39000, 0x66666666, F=0x1",
+    ])
+
+    assert index.pts_s.tolist() == pytest.approx([0.0, 0.04, 0.08, 0.12, 0.16])
+    assert index.size.tolist() == [40000, 1000, 1100, 3000, 39000]
+    assert index.keyframe.tolist() == [True, False, False, False, True]
+    assert index.frame_s == pytest.approx(0.04)
+    assert index.keyframes_s() == pytest.approx([0.0, 0.16])
+    assert index.duration_s == pytest.approx(0.2)
+
+
+def test_framecrc_parser_skips_short_lines():
+    index = parse(["#tb 0: 1/25", "0, 0, 0, 1, 500, 0x1", "garbage", "0, 1, 1"])
+    assert len(index.pts_s) == 1
+    assert index.frame_s == pytest.approx(0.04)
+
+
+def test_framecrc_parser_without_packets():
+    with pytest.raises(ValueError):
+        parse(["#tb 0: 1/12800"])
+    with pytest.raises(ValueError):
+        parse(["0, 0, 0, 512, 1000, 0x1"])
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.records import ClipRecord, ReelRecord, SegmentTable
+from services.transitions import Transition
+
+
+def segment(camera_id, start_s, end_s, **retiming):
+    return SimpleNamespace(camera_id=camera_id, start_s=start_s, end_s=end_s, **retiming)
+
+
+def test_segment_table_round_trip():
+    table = SegmentTable.from_segments([
+        segment("C1", 0.0, 4.0),
+        segment("C2", 10.0, 12.0, speed=0.5, interpolate=True),
+        segment("C1", 4.0, 5.5),
+    ])
+
+    assert list(table) == [("C1", 0.0, 4.0), ("C2", 10.0, 12.0), ("C1", 4.0, 5.5)]
+    assert table.camera_ids() == ["C1", "C2", "C1"]
+    assert table.retiming(1) == (0.5, True)
+    assert table.retiming(0) == (1.0, False)
+    assert table.total_duration() == pytest.approx(4.0 + 4.0 + 1.5)
+
+    restored = SegmentTable.from_dicts(table.to_dicts())
+    assert list(restored) == list(table)
+    assert restored.retimed == table.retimed
+
+
+def test_segment_table_without_retiming_stores_none():
+    table = SegmentTable.from_dicts([{"camera_id": "C3", "start_s": 1, "end_s": 2}])
+    assert table.retimed is None
+    assert table.to_dicts() == [{"camera_id": "C3", "start_s": 1.0, "end_s": 2.0}]
+
+
+def test_clip_record_round_trip():
+    clip = ClipRecord(
+        clip_id="clip_1",
+        segments=SegmentTable.from_segments([segment("C1", 1.0, 3.0)]),
+        output_path="/tmp/clip_1.mp4",
+        filesize_bytes=1234,
+        duration_s=2.0,
+        camera_files={"C1": "/tmp/c1.mp4"},
+        sync_offsets={"C1": 0.25}
+    )
+    restored = ClipRecord.from_dict(clip.to_dict())
+
+    assert restored.to_dict() == clip.to_dict()
+    # Identical camera file mappings are shared between records
+    assert restored.camera_files is clip.camera_files
+
+
+def test_reel_record_round_trip():
+    reel = ReelRecord(
+        reel_id="reel_1",
+        clip_ids=["clip_1", "clip_2"],
+        output_path="/tmp/reel_1.mp4",
+        filesize_bytes=99,
+        duration_s=7.5,
+        transition=Transition("dip_to_black", 1.0),
+        intro_id="bumper_1"
+    )
+    restored = ReelRecord.from_dict(reel.to_dict())
+
+    assert restored.to_dict() == reel.to_dict()
+    assert restored.clip_ids == ("clip_1", "clip_2")
+    assert restored.transition == Transition("dip_to_black", 1.0)
+    assert restored.outro_id is None
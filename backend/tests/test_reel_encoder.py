@@ -0,0 +1,35 @@
+import pytest
+
+from services.ffmpeg_service import VideoMetadata
+from services.reel_encoder import EncodeProfile
+
+
+def metadata(r_frame_rate="30000/1001", avg_frame_rate="30000/1001", profile="High"):
+    return VideoMetadata(codec_name="h264", profile=profile, level=40, width=1920, height=1080,
+                         pix_fmt="yuv420p", r_frame_rate=r_frame_rate, avg_frame_rate=avg_frame_rate,
+                         duration=10.0, nb_frames=300, time_base="1/30000", color_range="tv",
+                         sample_aspect_ratio="1:1")
+
+
+def test_from_metadata():
+    profile = EncodeProfile.from_metadata(metadata())
+    assert (profile.width, profile.height, profile.codec, profile.pix_fmt) == (1920, 1080, "h264", "yuv420p")
+    assert profile.fps == pytest.approx(29.97, abs=1e-3)
+    assert profile.codec_profile == "high"
+
+
+def test_stream_key_includes_codec_profile():
+    high = EncodeProfile.from_metadata(metadata(profile="High"))
+    main = EncodeProfile.from_metadata(metadata(profile="Main"))
+    assert high.stream_key != main.stream_key
+    assert high.key != main.key
+    assert EncodeProfile.from_metadata(metadata(profile="Constrained Baseline")).codec_profile == "baseline"
+
+
+def test_from_metadata_falls_back_to_average_frame_rate():
+    assert EncodeProfile.from_metadata(metadata(r_frame_rate="0/0", avg_frame_rate="25/1")).fps == 25.0
+
+
+def test_from_metadata_without_frame_rate():
+    with pytest.raises(ValueError):
+        EncodeProfile.from_metadata(metadata(r_frame_rate="0/0", avg_frame_rate="0/0"))
@@ -0,0 +1,39 @@
+import pytest
+
+from services.records import ReelRecord
+from services.ffmpeg_service import FFmpegService
+from services.reel_service import ReelService
+
+
+class ClipStore:
+    """Stands in for ClipService: only tracks which clips exist"""
+
+    def __init__(self, clip_ids):
+        self.clip_ids = set(clip_ids)
+
+    def delete_clip(self, clip_id):
+        if clip_id not in self.clip_ids:
+            raise KeyError(clip_id)
+        self.clip_ids.remove(clip_id)
+
+
+@pytest.fixture
+def reels(tmp_path):
+    service = ReelService(str(tmp_path), FFmpegService(), ClipStore(["clip_1", "clip_2"]))
+    service.reels_db["reel_1"] = ReelRecord(reel_id="reel_1", clip_ids=["clip_1"],
+                                            output_path=str(tmp_path / "reel_1.mp4"),
+                                            filesize_bytes=0, duration_s=5.0)
+    return service
+
+
+def test_delete_clip_used_by_a_reel_is_refused(reels):
+    with pytest.raises(ValueError, match="reel_1"):
+        reels.delete_clip("clip_1")
+    assert "clip_1" in reels.clip_service.clip_ids
+
+
+def test_delete_unused_clip(reels):
+    reels.delete_clip("clip_2")
+    assert reels.clip_service.clip_ids == {"clip_1"}
+    with pytest.raises(KeyError):
+        reels.delete_clip("clip_2")
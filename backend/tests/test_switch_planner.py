@@ -0,0 +1,37 @@
+import numpy as np
+
+from services.switch_planner import best_path, merge_short_shots
+
+
+def test_best_path_follows_the_busier_camera():
+    energy = np.array([[1.0, 0.0]] * 5 + [[0.0, 1.0]] * 5)
+    assert best_path(energy, switch_penalty=0.5).tolist() == [0] * 5 + [1] * 5
+
+
+def test_best_path_switch_penalty_suppresses_brief_switches():
+    energy = np.array([[1.0, 0.0]] * 4 + [[0.0, 1.0]] + [[1.0, 0.0]] * 4)
+    assert best_path(energy, switch_penalty=0.0).tolist() == [0] * 4 + [1] + [0] * 4
+    assert best_path(energy, switch_penalty=1.0).tolist() == [0] * 9
+
+
+def test_best_path_avoids_unusable_cameras():
+    energy = np.array([[-np.inf, 0.1], [-np.inf, 0.1], [1.0, 0.0]])
+    path = best_path(energy, switch_penalty=0.5)
+    assert path[:2].tolist() == [1, 1]
+
+
+def test_merge_short_shots_gives_short_shot_to_better_neighbour():
+    path = np.array([0, 0, 0, 2, 1, 1, 1])
+    energy = np.zeros((7, 3))
+    energy[3, 1] = 1.0
+    assert merge_short_shots(path, energy, min_intervals=2).tolist() == [0, 0, 0, 1, 1, 1, 1]
+
+
+def test_merge_short_shots_keeps_long_shots():
+    path = np.array([0, 0, 1, 1, 2, 2])
+    assert merge_short_shots(path, np.zeros((6, 3)), min_intervals=2).tolist() == path.tolist()
+
+
+def test_merge_short_shots_single_shot():
+    path = np.array([1])
+    assert merge_short_shots(path, np.zeros((1, 2)), min_intervals=3).tolist() == [1]
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from services.ffmpeg_service import FFmpegResult
+from services.sync_service import SyncService, cross_correlate, detrend
+
+RATE_HZ = 100
+
+
+def test_cross_correlate_finds_lag():
+    rng = np.random.default_rng(1)
+    reference = rng.standard_normal(3000)
+    # The other camera started 0.25s earlier: everything appears 25 samples later in its file
+    other = np.concatenate([rng.standard_normal(25), reference[:-25]])
+
+    lag_s, confidence = cross_correlate(reference, other, RATE_HZ, max_lag_s=5.0)
+
+    assert lag_s == pytest.approx(0.25, abs=0.01)
+    assert confidence > 0.5
+
+
+def test_cross_correlate_negative_lag():
+    rng = np.random.default_rng(2)
+    reference = rng.standard_normal(3000)
+    other = reference[40:]
+
+    lag_s, _ = cross_correlate(reference, other, RATE_HZ, max_lag_s=5.0)
+
+    assert lag_s == pytest.approx(-0.4, abs=0.01)
+
+
+def test_cross_correlate_ignores_lags_beyond_max():
+    rng = np.random.default_rng(3)
+    reference = rng.standard_normal(2000)
+    other = np.concatenate([rng.standard_normal(300), reference[:-300]])
+
+    lag_s, confidence = cross_correlate(reference, other, RATE_HZ, max_lag_s=1.0)
+
+    assert abs(lag_s) <= 1.0
+    assert confidence < 0.5
+
+
+def test_cross_correlate_without_signal():
+    assert cross_correlate(np.empty(0), np.ones(10), RATE_HZ, 5.0) == (0.0, 0.0)
+
+
+def test_detrend_removes_slow_level_changes():
+    ramp = np.linspace(0.0, 100.0, 1000)
+    assert np.abs(detrend(ramp, 51)[50:-50]).max() < 1e-6
+
+
+class FailingDecoder:
+    """Stands in for FFmpegService: every audio decode fails"""
+
+    def __init__(self, has_audio: bool):
+        self.has_audio = has_audio
+        self.decodes = 0
+
+    def decode_audio(self, path, on_samples, **kwargs):
+        self.decodes += 1
+        return FFmpegResult(success=False, output_path=None, duration_ms=0.0, command="ffmpeg",
+                            exit_code=1, stderr="decode error")
+
+    def has_stream(self, path, stream="a:0"):
+        return self.has_audio
+
+
+def test_failed_decode_is_retried(tmp_path):
+    video = tmp_path / "cam.mp4"
+    video.write_bytes(b"video")
+    ffmpeg = FailingDecoder(has_audio=True)
+    sync = SyncService(str(tmp_path / "cache"), ffmpeg, max_workers=1)
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            sync._signal(str(video), "audio").result()
+        # The failed future is dropped by a callback on the (single) worker; wait for it
+        sync._pool.submit(lambda: None).result()
+
+    assert ffmpeg.decodes == 2
+    assert not list((tmp_path / "cache").iterdir())
+
+
+def test_missing_stream_is_cached_as_empty(tmp_path):
+    video = tmp_path / "cam.mp4"
+    video.write_bytes(b"video")
+    ffmpeg = FailingDecoder(has_audio=False)
+    sync = SyncService(str(tmp_path / "cache"), ffmpeg, max_workers=1)
+
+    assert len(sync._signal(str(video), "audio").result()) == 0
+    sync._signals.clear()
+    assert len(sync._signal(str(video), "audio").result()) == 0
+
+    assert ffmpeg.decodes == 1
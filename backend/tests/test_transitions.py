@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from services.packet_activity import PacketIndex
+from services.transitions import CopyPart, TransitionJoiner, WindowPiece
+
+FPS = 25
+GOP = 25
+
+
+def packet_index(frames: int, gop: int = GOP) -> PacketIndex:
+    return PacketIndex(
+        pts_s=np.arange(frames) / FPS,
+        size=np.full(frames, 1000, dtype=np.int64),
+        keyframe=np.arange(frames) % gop == 0,
+        frame_s=1 / FPS
+    )
+
+
+def joiner(indexes):
+    """A joiner whose packet indexes come from memory instead of demuxing the files"""
+    packet_activity = SimpleNamespace(index=indexes.__getitem__)
+    return TransitionJoiner(ffmpeg_service=None, encoder=SimpleNamespace(packet_activity=packet_activity))
+
+
+def test_plan_copies_between_keyframes_and_reencodes_the_boundary():
+    plan = joiner({"a": packet_index(100), "b": packet_index(100)})._plan(["a", "b"], 12, 12)
+
+    assert plan[0] == CopyPart("a", 0.0, 75, 3.0)
+    assert plan[1] == [WindowPiece("a", 3.0, 25), WindowPiece("b", 0.0, 25)]
+    assert plan[2].path == "b" and plan[2].start_s == 1.0 and plan[2].frames is None
+    assert plan[2].duration_s == pytest.approx(3.0)
+    assert len(plan) == 3
+
+
+def test_plan_folds_a_clip_without_a_middle_keyframe_into_the_window():
+    indexes = {"a": packet_index(100), "b": packet_index(30, gop=100), "c": packet_index(100)}
+    plan = joiner(indexes)._plan(["a", "b", "c"], 12, 12)
+
+    assert plan[1] == [WindowPiece("a", 3.0, 25), WindowPiece("b", 0.0, 30), WindowPiece("c", 0.0, 25)]
+    assert [type(item) for item in plan] == [CopyPart, list, CopyPart]
+
+
+def test_plan_hard_cuts_copy_everything():
+    plan = joiner({"a": packet_index(50), "b": packet_index(50)})._plan(["a", "b"], 0, 0)
+
+    assert [(part.path, part.start_s, part.frames) for part in plan] == [("a", 0.0, None), ("b", 0.0, None)]
+
+
+def test_plan_rejects_clip_shorter_than_its_transitions():
+    with pytest.raises(ValueError):
+        joiner({"a": packet_index(100), "b": packet_index(5)})._plan(["a", "b"], 12, 12)
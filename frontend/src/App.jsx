@@ -2,7 +2,7 @@ import { useState, useRef, useEffect } from 'react';
 import VideoPreview from './components/VideoPreview';
 import ClipControls from './components/ClipControls';
 import ClipsList from './components/ClipsList';
-import { uploadCameras, createClip as createBackendClip, createReel, getReelDownloadUrl } from './services/api';
+import { uploadCameras, createClip as createBackendClip, createReel, getReelDownloadUrl, newJobId, watchJobProgress } from './services/api';
 
 export default function App() {
   // Video refs
@@ -56,6 +56,7 @@ export default function App() {
   const [sessionKey, setSessionKey] = useState(null);
   const [isUploading, setIsUploading] = useState(false);
   const [isExporting, setIsExporting] = useState(false);
+  const [exportProgress, setExportProgress] = useState(null);
 
   // Cleanup blob URLs on unmount to prevent memory leaks
   useEffect(() => {
@@ -291,9 +292,12 @@ export default function App() {
     }
 
     setIsExporting(true);
+    setExportProgress(null);
+    const jobId = newJobId();
+    const stopWatching = watchJobProgress(jobId, (progress) => setExportProgress(progress.percent));
     try {
       console.log('Creating highlight reel from', backendClipIds.length, 'clips...');
-      const reel = await createReel(backendClipIds);
+      const reel = await createReel(backendClipIds, jobId);
 
       console.log('✅ Highlight reel created:', reel);
       console.log(`   Duration: ${reel.duration_s}s`);
@@ -312,7 +316,9 @@ export default function App() {
       console.error('❌ Failed to export highlight reel:', error);
       alert(`Failed to export highlight reel: ${error.message}`);
     } finally {
+      stopWatching();
       setIsExporting(false);
+      setExportProgress(null);
     }
   };
 
@@ -430,6 +436,7 @@ export default function App() {
             onExport={handleExport}
             onPreviewClip={handlePreviewClip}
             isExporting={isExporting}
+            exportProgress={exportProgress}
           />
         </div>
       </main>
@@ -29,7 +29,7 @@ const PlayIcon = () => (
   </svg>
 );
 
-export default function ClipsList({ clips, onDeleteClip, onMoveClip, onExport, onPreviewClip, isExporting }) {
+export default function ClipsList({ clips, onDeleteClip, onMoveClip, onExport, onPreviewClip, isExporting, exportProgress }) {
   const formatTime = (seconds) => {
     if (!seconds || isNaN(seconds)) return '00:00';
     const mins = Math.floor(seconds / 60);
@@ -79,7 +79,9 @@ export default function ClipsList({ clips, onDeleteClip, onMoveClip, onExport, o
             disabled={isExporting}
           >
             <ExportIcon />
-            {isExporting ? 'Exporting...' : 'Export Highlight Video'}
+            {isExporting
+              ? (exportProgress != null ? `Exporting... ${Math.round(exportProgress)}%` : 'Exporting...')
+              : 'Export Highlight Video'}
           </button>
         )}
       </div>
@@ -43,10 +43,12 @@ export async function uploadCameras(videoFiles) {
 /**
  * Create a clip on the backend
  * @param {string} sessionKey - Session key from uploadCameras
- * @param {Object} clip - Frontend clip object with {source, start, end}
+ * @param {Object} clip - Frontend clip object with {source, start, end}, optionally {speed, interpolate}
+ *   for a slow-motion replay (e.g. speed 0.5; only this segment is re-encoded)
+ * @param {string} [jobId] - Optional job ID to follow progress with watchJobProgress
  * @returns {Promise<{clip_id: string, duration_s: number, filesize_bytes: number, download_url: string}>}
  */
-export async function createClip(sessionKey, clip) {
+export async function createClip(sessionKey, clip, jobId) {
   const formData = new FormData();
   formData.append('session_key', sessionKey);
 
@@ -54,10 +56,15 @@ export async function createClip(sessionKey, clip) {
   const segments = [{
     camera_id: sourceToCamera[clip.source],
     start_s: clip.start,
-    end_s: clip.end
+    end_s: clip.end,
+    speed: clip.speed || 1,
+    interpolate: Boolean(clip.interpolate)
   }];
 
   formData.append('segments', JSON.stringify(segments));
+  if (jobId) {
+    formData.append('job_id', jobId);
+  }
 
   const response = await fetch(`${API_BASE_URL}/api/v2/clip/create`, {
     method: 'POST',
@@ -72,18 +79,162 @@ export async function createClip(sessionKey, clip) {
   return await response.json();
 }
 
+/**
+ * Get a per-camera activity heatmap for the timeline (from packet sizes, no decoding)
+ * @param {string} sessionKey - Session key from uploadCameras
+ * @param {number} [resolution] - Seconds per bucket (default 1)
+ * @returns {Promise<{cameras: Array<{camera_id: string, activity: Array<number|null>, frozen: Array, black: Array}>}>}
+ */
+export async function getActivity(sessionKey, resolution = 1) {
+  const response = await fetch(`${API_BASE_URL}/api/v2/session/${sessionKey}/activity?resolution_s=${resolution}`);
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to load activity');
+  }
+
+  return await response.json();
+}
+
+/**
+ * Ask the backend which camera to show over an event window (by motion energy)
+ * @param {string} sessionKey - Session key from uploadCameras
+ * @param {number} start - Window start in seconds
+ * @param {number} end - Window end in seconds
+ * @param {Object} [options] - Optional {cameras, interval_s, min_shot_s, switch_penalty, method}
+ * @returns {Promise<{segments: Array<{camera_id: string, start_s: number, end_s: number}>, energy: Object}>}
+ */
+export async function planSwitches(sessionKey, start, end, options = {}) {
+  const response = await fetch(`${API_BASE_URL}/api/v2/session/${sessionKey}/switch_plan`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify({ start_s: start, end_s: end, ...options })
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to plan camera switches');
+  }
+
+  return await response.json();
+}
+
+/**
+ * Scan one camera for likely highlight moments (motion bursts, cuts, crowd noise)
+ * @param {string} sessionKey - Session key from uploadCameras
+ * @param {Object} [options] - Optional {camera_id, top_k, min_score, pre_roll_s, post_roll_s, use_audio, job_id}
+ * @returns {Promise<{candidates: Array<{start_s: number, end_s: number, peak_s: number, score: number}>, speed: number}>}
+ */
+export async function scanHighlights(sessionKey, options = {}) {
+  const response = await fetch(`${API_BASE_URL}/api/v2/session/${sessionKey}/highlights`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify(options)
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to scan for highlights');
+  }
+
+  return await response.json();
+}
+
+/**
+ * Burn a scoreboard bar into a clip (only the part around the window is re-encoded)
+ * @param {string} clipId - Clip ID from createClip
+ * @param {Object} scorecard - {team_a_score, team_b_score} plus optional {event_type, clock, team_a, team_b, start_s, end_s, position, job_id}
+ * @returns {Promise<{overlay_id: string, encoded_s: number, copied_s: number, download_url: string}>}
+ */
+export async function addScorecard(clipId, scorecard) {
+  const response = await fetch(`${API_BASE_URL}/api/v2/clip/${clipId}/scorecard`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify(scorecard)
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to add scorecard');
+  }
+
+  return await response.json();
+}
+
+/**
+ * Find referee whistles and crowd surges in the cameras' audio, on the session timeline
+ * @param {string} sessionKey - Session key from uploadCameras
+ * @param {Object} [options] - Optional {cameras, kinds, min_confidence, job_id}
+ * @returns {Promise<{events: Array<{kind: string, start_s: number, end_s: number, peak_s: number, confidence: number, cameras: string[]}>}>}
+ */
+export async function detectAudioEvents(sessionKey, options = {}) {
+  const response = await fetch(`${API_BASE_URL}/api/v2/session/${sessionKey}/audio_events`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify(options)
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to detect audio events');
+  }
+
+  return await response.json();
+}
+
+/**
+ * Render several cameras of a window as one video (2x2 grid, side-by-side, or zoom picture-in-picture)
+ * @param {string} sessionKey - Session key from uploadCameras
+ * @param {string} layout - 'grid', 'side_by_side' or 'pip'
+ * @param {number} start - Window start in seconds
+ * @param {number} end - Window end in seconds
+ * @param {Object} [options] - Optional {cameras, pip_scale, pip_corner, format, job_id}
+ * @returns {Promise<{layout_id: string, duration_s: number, chunks: number, download_url: string}>}
+ */
+export async function renderLayout(sessionKey, layout, start, end, options = {}) {
+  const response = await fetch(`${API_BASE_URL}/api/v2/session/${sessionKey}/layout`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify({ layout, start_s: start, end_s: end, ...options })
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to render layout');
+  }
+
+  return await response.json();
+}
+
 /**
  * Create a highlight reel from clips
  * @param {string[]} clipIds - Array of backend clip IDs
+ * @param {string} [jobId] - Optional job ID to follow progress with watchJobProgress
+ * @param {Object} [format] - Optional {width, height, fps, crf, preset, pad_color}; clips in another format are
+ *   re-encoded letterboxed (default: stream-copy, clips from differing sessions are conformed to the most common format)
+ * @param {Object} [transition] - Optional {type: 'crossfade'|'dip_to_black', duration_s} at every cut; only a short
+ *   window around each cut is re-encoded (default: hard cuts)
+ * @param {Object} [bumpers] - Optional {intro_id, outro_id} from uploadBumper, stream-copied before/after the clips
  * @returns {Promise<{reel_id: string, duration_s: number, filesize_bytes: number, num_clips: number, download_url: string}>}
  */
-export async function createReel(clipIds) {
+export async function createReel(clipIds, jobId, format, transition, bumpers = {}) {
   const response = await fetch(`${API_BASE_URL}/api/v2/reel/create`, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json'
     },
-    body: JSON.stringify({ clip_ids: clipIds })
+    body: JSON.stringify({ clip_ids: clipIds, job_id: jobId || null, format: format || null,
+                           transition: transition || null, ...bumpers })
   });
 
   if (!response.ok) {
@@ -94,6 +245,99 @@ export async function createReel(clipIds) {
   return await response.json();
 }
 
+/**
+ * Add an intro/outro bumper to the library (conformed to each reel format on first use)
+ * @param {string} name - Display name
+ * @param {File} video - Bumper video file
+ * @returns {Promise<{bumper_id: string, name: string, duration_s: number}>}
+ */
+export async function uploadBumper(name, video) {
+  const formData = new FormData();
+  formData.append('name', name);
+  formData.append('video', video);
+
+  const response = await fetch(`${API_BASE_URL}/api/v2/bumpers`, {
+    method: 'POST',
+    body: formData
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to upload bumper');
+  }
+
+  return await response.json();
+}
+
+/**
+ * Start exporting a clip or reel as 1:1 / 9:16 / 16:9 versions (runs in the background)
+ * @param {Object} source - {clip_id} or {reel_id}
+ * @param {Array<{aspect: string, size?: number, fit?: string, crop_aspect?: string, focus_x?: number}>} targets
+ * @param {string} [jobId] - Optional job ID to follow progress with watchJobProgress
+ * @returns {Promise<{export_id: string, job_id: string, status: string}>}
+ */
+export async function exportAspect(source, targets, jobId) {
+  const response = await fetch(`${API_BASE_URL}/api/v2/export/aspect`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json'
+    },
+    body: JSON.stringify({ ...source, targets, job_id: jobId || null })
+  });
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to start export');
+  }
+
+  return await response.json();
+}
+
+/**
+ * Get the status of an aspect export; outputs carry download URLs once it is done
+ * @param {string} exportId - Export ID from exportAspect
+ * @returns {Promise<{status: string, error: string|null, outputs: Array<{name: string, aspect: string, width: number, height: number, download_url: string}>}>}
+ */
+export async function getExport(exportId) {
+  const response = await fetch(`${API_BASE_URL}/api/v2/export/${exportId}`);
+
+  if (!response.ok) {
+    const error = await response.json();
+    throw new Error(error.detail || 'Failed to load export');
+  }
+
+  return await response.json();
+}
+
+/**
+ * Generate a job ID for createClip/createReel progress tracking
+ * @returns {string}
+ */
+export function newJobId() {
+  return `job_${crypto.randomUUID().replace(/-/g, '').slice(0, 12)}`;
+}
+
+/**
+ * Follow render progress of a job over Server-Sent Events.
+ * Call before createClip/createReel with the same jobId to catch every update.
+ * @param {string} jobId - Job ID passed to createClip/createReel
+ * @param {Function} onProgress - Called with {status, percent, out_time_s, total_s, speed, bytes, error}
+ * @returns {Function} - Call to stop listening
+ */
+export function watchJobProgress(jobId, onProgress) {
+  const source = new EventSource(`${API_BASE_URL}/api/v2/jobs/${jobId}/events`);
+
+  source.addEventListener('progress', (event) => {
+    const progress = JSON.parse(event.data);
+    onProgress(progress);
+    if (progress.status === 'done' || progress.status === 'failed') {
+      source.close();
+    }
+  });
+
+  return () => source.close();
+}
+
 /**
  * Get download URL for a reel
  * @param {string} reelId - Reel ID from createReel